@@ -9,15 +9,16 @@ use std::{
 };
 
 use bioscript_formats::{
-    GenotypeLoadOptions, GenotypeSourceFormat, GenotypeStore, InferredSex, InspectOptions,
-    PrepareRequest, SexDetectionConfidence, SexInference, inspect_file, prepare_indexes,
-    shell_flags, convert_23andme_grch37_to_grch38,
+    AlignmentSexMethod, FileInspection, GenotypeLoadOptions, GenotypeSourceFormat, GenotypeStore,
+    InferredSex, InspectOptions, PrepareRequest, SexDetectionConfidence, SexInference, inspect_file,
+    prepare_indexes, shell_flags, convert_23andme_grch37_to_grch38,
 };
-use bioscript_runtime::{BioscriptRuntime, RuntimeConfig, StageTiming};
+use bioscript_runtime::{BioscriptRuntime, RuntimeConfig, StageTiming, write_timing_report};
 use bioscript_schema::{
-    AssayManifest, PanelInterpretation, PanelManifest, VariantManifest, load_assay_manifest,
-    load_panel_manifest, load_variant_manifest, validate_assays_path, validate_panels_path,
-    validate_variants_path,
+    AssayManifest, PanelInterpretation, PanelManifest, ValidateOptions, VariantManifest,
+    load_assay_manifest, load_panel_manifest, load_variant_manifest,
+    validate_assays_path_with_options, validate_panels_path_with_options,
+    validate_variants_path_with_options,
 };
 use monty::ResourceLimits;
 
@@ -57,7 +58,7 @@ fn run_cli() -> Result<(), String> {
     Ok(())
 }
 
-const USAGE: &str = "usage: bioscript <script.py|manifest.yaml|package.yaml|package.zip|https://.../package.yaml|https://.../package.zip> [--root <dir>] [--input-file <path>] [--output-file <path>] [--observations-file <path>] [--asset id=path] [--participant-id <id>] [--trace-report <path>] [--timing-report <path>] [--filter key=value] [--input-format auto|text|zip|vcf|bcf|cram] [--input-index <path>] [--reference-file <path>] [--reference-index <path>] [--auto-index] [--cache-dir <path>] [--max-duration-ms N] [--max-memory-bytes N] [--max-allocations N] [--max-recursion-depth N]\n       bioscript report <manifest.yaml|package.yaml|package.zip|https://.../package.yaml|https://.../package.zip> --input-file <path> [--input-file <path>...] --output-dir <dir> [--html] [--open] [--root <dir>] [--input-format auto|text|zip|vcf|bcf|cram] [--input-index <path>] [--reference-file <path>] [--reference-index <path>] [--allow-md5-mismatch] [--detect-sex] [--sample-sex male|female|unknown] [--analysis-max-duration-ms N]\n       bioscript review <manifest.yaml|package.yaml|package.zip> --cases <cases.yaml> --output-dir <dir> [--html] [--root <dir>] [--filter key=value]\n       bioscript import-package <package.yaml|package.zip|https://.../package.yaml|https://.../package.zip> [--root <dir>] [--output-dir <dir>]\n       bioscript validate-variants <path> [--report <file>]\n       bioscript validate-panels <path> [--report <file>]\n       bioscript validate-assays <path> [--report <file>]\n       bioscript prepare [--root <dir>] [--input-file <path>] [--reference-file <path>] [--input-format auto|text|zip|vcf|bcf|cram] [--cache-dir <path>]\n       bioscript inspect <path> [--input-index <path>] [--reference-file <path>] [--reference-index <path>] [--detect-sex]\n       bioscript liftover-23andme <input.txt> <output.txt> [--unmapped <unmapped.tsv>]";
+const USAGE: &str = "usage: bioscript <script.py|manifest.yaml|package.yaml|package.zip|https://.../package.yaml|https://.../package.zip> [--root <dir>] [--input-file <path>] [--output-file <path>] [--observations-file <path>] [--asset id=path] [--participant-id <id>] [--trace-report <path>] [--timing-report <path>] [--filter key=value] [--input-format auto|text|zip|vcf|bcf|cram] [--input-index <path>] [--reference-file <path>] [--reference-index <path>] [--auto-index] [--cache-dir <path>] [--max-duration-ms N] [--max-memory-bytes N] [--max-allocations N] [--max-recursion-depth N]\n       bioscript report <manifest.yaml|package.yaml|package.zip|https://.../package.yaml|https://.../package.zip> --input-file <path> [--input-file <path>...] --output-dir <dir> [--html] [--open] [--cohort] [--root <dir>] [--input-format auto|text|zip|vcf|bcf|cram] [--input-index <path>] [--reference-file <path>] [--reference-index <path>] [--allow-md5-mismatch] [--detect-sex] [--sex-method auto|index|decode] [--sample-sex male|female|unknown] [--analysis-max-duration-ms N]\n       bioscript review <manifest.yaml|package.yaml|package.zip> --cases <cases.yaml> --output-dir <dir> [--html] [--root <dir>] [--filter key=value]\n       bioscript import-package <package.yaml|package.zip|https://.../package.yaml|https://.../package.zip> [--root <dir>] [--output-dir <dir>]\n       bioscript validate-variants <path> [--report <file>] [--cache-dir <dir>] [--threads N]\n       bioscript validate-panels <path> [--report <file>] [--cache-dir <dir>] [--threads N]\n       bioscript validate-assays <path> [--report <file>] [--cache-dir <dir>] [--threads N]\n       bioscript prepare [--root <dir>] [--input-file <path>] [--reference-file <path>] [--input-format auto|text|zip|vcf|bcf|cram] [--cache-dir <path>]\n       bioscript inspect <path> [<path>...] [--manifest <file>] [--jsonl] [--threads N] [--input-index <path>] [--reference-file <path>] [--reference-index <path>] [--detect-sex] [--sex-method auto|index|decode]\n       bioscript liftover-23andme <input.txt> <output.txt> [--unmapped <unmapped.tsv>]\n       bioscript liftover-23andme --output-dir <dir> <input.txt> [<input.txt>...]";
 
 struct CliOptions {
     script_path: Option<PathBuf>,
@@ -342,11 +343,11 @@ fn prepare_cli_indexes(
             eprintln!("bioscript: auto-indexed reference -> {}", ref_idx.display());
             options.loader.reference_index = Some(ref_idx);
         }
-        cli_timings.push(StageTiming {
-            stage: "auto_index".to_owned(),
-            duration_ms: auto_index_started.elapsed().as_millis(),
-            detail: "prepare_indexes".to_owned(),
-        });
+        cli_timings.push(StageTiming::new(
+            "auto_index",
+            auto_index_started.elapsed(),
+            "prepare_indexes",
+        ));
     }
     Ok(cli_timings)
 }
@@ -367,13 +368,13 @@ fn run_cli_manifest(
         filters: &options.filters,
     };
     run_manifest(runtime_root, script_path, &manifest_options)?;
-    cli_timings.push(StageTiming {
-        stage: "manifest_run".to_owned(),
-        duration_ms: manifest_started.elapsed().as_millis(),
-        detail: script_path.display().to_string(),
-    });
+    cli_timings.push(StageTiming::new(
+        "manifest_run",
+        manifest_started.elapsed(),
+        script_path.display().to_string(),
+    ));
     if let Some(timing_path) = &options.timing_report {
-        write_timing_report(timing_path, cli_timings)?;
+        write_timing_report(timing_path, cli_timings).map_err(|err| err.to_string())?;
     }
     Ok(())
 }
@@ -422,7 +423,7 @@ fn run_cli_script(
     if let Some(timing_path) = options.timing_report {
         let mut all_timings = cli_timings;
         all_timings.extend(runtime.timing_snapshot());
-        write_timing_report(&timing_path, &all_timings)?;
+        write_timing_report(&timing_path, &all_timings).map_err(|err| err.to_string())?;
     }
     Ok(())
 }
@@ -441,29 +442,6 @@ fn monty_string_dict(values: &BTreeMap<String, String>) -> monty::MontyObject {
     )
 }
 
-fn write_timing_report(path: &PathBuf, timings: &[StageTiming]) -> Result<(), String> {
-    if let Some(parent) = path.parent() {
-        fs::create_dir_all(parent).map_err(|err| {
-            format!(
-                "failed to create timing report dir {}: {err}",
-                parent.display()
-            )
-        })?;
-    }
-    let mut output = String::from("stage\tduration_ms\tdetail\n");
-    for timing in timings {
-        let _ = writeln!(
-            output,
-            "{}\t{}\t{}",
-            timing.stage,
-            timing.duration_ms,
-            timing.detail.replace('\t', " ")
-        );
-    }
-    fs::write(path, output)
-        .map_err(|err| format!("failed to write timing report {}: {err}", path.display()))
-}
-
 #[cfg(test)]
 mod cli_bootstrap_tests {
     use super::*;
@@ -580,33 +558,6 @@ mod cli_bootstrap_tests {
         .contains("invalid --max-duration-ms"));
     }
 
-    #[test]
-    fn write_timing_report_creates_parent_and_sanitizes_tabs() {
-        let dir = temp_dir("timing");
-        let path = dir.join("nested/timing.tsv");
-        write_timing_report(
-            &path,
-            &[
-                StageTiming {
-                    stage: "stage1".to_owned(),
-                    duration_ms: 12,
-                    detail: "a\tb".to_owned(),
-                },
-                StageTiming {
-                    stage: "stage2".to_owned(),
-                    duration_ms: 0,
-                    detail: "ok".to_owned(),
-                },
-            ],
-        )
-        .unwrap();
-        let text = fs::read_to_string(&path).unwrap();
-        assert!(text.starts_with("stage\tduration_ms\tdetail\n"));
-        assert!(text.contains("stage1\t12\ta b"));
-
-        fs::remove_dir_all(dir).unwrap();
-    }
-
     #[test]
     fn prepare_cli_indexes_noops_when_auto_index_is_disabled() {
         let mut options = default_cli_options();
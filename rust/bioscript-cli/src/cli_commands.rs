@@ -66,8 +66,24 @@ fn run_prepare(args: Vec<String>) -> Result<(), String> {
     Ok(())
 }
 
+fn parse_sex_method(value: &str) -> Result<AlignmentSexMethod, String> {
+    match value {
+        "auto" => Ok(AlignmentSexMethod::Auto),
+        "index" => Ok(AlignmentSexMethod::Index),
+        "decode" => Ok(AlignmentSexMethod::Decode),
+        other => Err(format!(
+            "invalid --sex-method value: {other} (expected auto, index or decode)"
+        )),
+    }
+}
+
+const INSPECT_USAGE: &str = "usage: bioscript inspect <path> [<path>...] [--manifest <file>] [--jsonl] [--threads N] [--input-index <path>] [--reference-file <path>] [--reference-index <path>] [--detect-sex] [--sex-method auto|index|decode]";
+
 fn run_inspect(args: Vec<String>) -> Result<(), String> {
-    let mut path: Option<PathBuf> = None;
+    let mut paths: Vec<PathBuf> = Vec::new();
+    let mut manifest: Option<PathBuf> = None;
+    let mut threads: Option<usize> = None;
+    let mut jsonl = false;
     let mut options = InspectOptions::default();
 
     let mut iter = args.into_iter();
@@ -88,34 +104,56 @@ fn run_inspect(args: Vec<String>) -> Result<(), String> {
                     iter.next().ok_or("--reference-index requires a path")?,
                 ));
             }
+            "--manifest" => {
+                manifest = Some(PathBuf::from(
+                    iter.next().ok_or("--manifest requires a path")?,
+                ));
+            }
+            "--threads" => {
+                threads = Some(parse_threads_arg(iter.next())?);
+            }
+            "--jsonl" => {
+                jsonl = true;
+            }
             "--detect-sex" => {
                 options.detect_sex = true;
             }
-            other if path.is_none() => {
-                path = Some(PathBuf::from(other));
+            "--sex-method" => {
+                options.alignment_sex_method =
+                    parse_sex_method(&iter.next().ok_or("--sex-method requires a value")?)?;
             }
-            other => {
+            other if other.starts_with("--") => {
                 return Err(format!("unexpected argument: {other}"));
             }
+            other => {
+                paths.push(PathBuf::from(other));
+            }
         }
     }
 
-    let Some(path) = path else {
-        return Err(
-            "usage: bioscript inspect <path> [--input-index <path>] [--reference-file <path>] [--reference-index <path>] [--detect-sex]"
-                .to_owned(),
-        );
-    };
+    if paths.is_empty() && manifest.is_none() {
+        return Err(INSPECT_USAGE.to_owned());
+    }
+    let single_file = manifest.is_none() && paths.len() == 1 && !paths[0].is_dir();
+    if single_file && !jsonl {
+        let inspection = inspect_file(&paths[0], &options).map_err(|err| err.to_string())?;
+        println!("{}", inspection.render_text());
+        return Ok(());
+    }
+    if !single_file && options.input_index.is_some() {
+        return Err("--input-index applies to a single input file".to_owned());
+    }
 
-    let inspection = inspect_file(&path, &options).map_err(|err| err.to_string())?;
-    println!("{}", inspection.render_text());
-    Ok(())
+    let targets = collect_inspect_targets(&paths, manifest.as_deref())?;
+    write_inspections_jsonl(&targets, &options, threads, &mut std::io::stdout().lock())
 }
 
+const LIFTOVER_USAGE: &str = "usage: bioscript liftover-23andme <input.txt> <output.txt> [--unmapped <unmapped.tsv>]\n       bioscript liftover-23andme --output-dir <dir> <input.txt> [<input.txt>...]";
+
 fn run_liftover_23andme(args: Vec<String>) -> Result<(), String> {
-    let mut input: Option<PathBuf> = None;
-    let mut output: Option<PathBuf> = None;
+    let mut paths: Vec<PathBuf> = Vec::new();
     let mut unmapped: Option<PathBuf> = None;
+    let mut output_dir: Option<PathBuf> = None;
 
     let mut iter = args.into_iter();
     while let Some(arg) = iter.next() {
@@ -125,132 +163,92 @@ fn run_liftover_23andme(args: Vec<String>) -> Result<(), String> {
                     iter.next().ok_or("--unmapped requires a path")?,
                 ));
             }
-            other if input.is_none() => input = Some(PathBuf::from(other)),
-            other if output.is_none() => output = Some(PathBuf::from(other)),
-            other => return Err(format!("unexpected argument: {other}")),
+            "--output-dir" => {
+                output_dir = Some(PathBuf::from(
+                    iter.next().ok_or("--output-dir requires a path")?,
+                ));
+            }
+            other if other.starts_with("--") => return Err(LIFTOVER_USAGE.to_owned()),
+            other => paths.push(PathBuf::from(other)),
         }
     }
 
-    let Some(input) = input else {
-        return Err(
-            "usage: bioscript liftover-23andme <input.txt> <output.txt> [--unmapped <unmapped.tsv>]"
-                .to_owned(),
-        );
-    };
-    let Some(output) = output else {
-        return Err(
-            "usage: bioscript liftover-23andme <input.txt> <output.txt> [--unmapped <unmapped.tsv>]"
-                .to_owned(),
-        );
-    };
-    let unmapped = unmapped.unwrap_or_else(|| output.with_extension("unmapped.tsv"));
-
-    let stats = convert_23andme_grch37_to_grch38(&input, &output, &unmapped)
-        .map_err(|err| err.to_string())?;
-    println!("total_markers={}", stats.total_markers);
-    println!("mapped={}", stats.mapped);
-    println!("unmapped={}", stats.unmapped);
-    println!(
-        "reverse_strand_genotypes={}",
-        stats.reverse_strand_genotypes
-    );
-    println!("output={}", output.display());
-    println!("unmapped_report={}", unmapped.display());
-    Ok(())
-}
-
-fn run_validate_variants(args: Vec<String>) -> Result<(), String> {
-    let mut path: Option<PathBuf> = None;
-    let mut report_path: Option<PathBuf> = None;
-
-    let mut iter = args.into_iter();
-    while let Some(arg) = iter.next() {
-        if arg == "--report" {
-            let Some(value) = iter.next() else {
-                return Err("--report requires a path".to_owned());
-            };
-            report_path = Some(PathBuf::from(value));
-        } else if path.is_none() {
-            path = Some(PathBuf::from(arg));
-        } else {
-            return Err(format!("unexpected argument: {arg}"));
+    let jobs = if let Some(output_dir) = output_dir {
+        if paths.is_empty() {
+            return Err(LIFTOVER_USAGE.to_owned());
         }
-    }
-
-    let Some(path) = path else {
-        return Err("usage: bioscript validate-variants <path> [--report <file>]".to_owned());
-    };
-
-    let report = validate_variants_path(&path)?;
-    let text = report.render_text();
-    print!("{text}");
-
-    if let Some(report_path) = report_path {
-        if let Some(parent) = report_path.parent() {
-            std::fs::create_dir_all(parent).map_err(|err| {
-                format!("failed to create report dir {}: {err}", parent.display())
-            })?;
+        if unmapped.is_some() {
+            return Err("--unmapped cannot be combined with --output-dir".to_owned());
         }
-        std::fs::write(&report_path, text)
-            .map_err(|err| format!("failed to write {}: {err}", report_path.display()))?;
-    }
-
-    if report.has_errors() {
-        return Err(format!(
-            "validation found {} errors and {} warnings",
-            report.total_errors(),
-            report.total_warnings()
-        ));
-    }
-
-    Ok(())
-}
-
-fn run_validate_panels(args: Vec<String>) -> Result<(), String> {
-    let mut path: Option<PathBuf> = None;
-    let mut report_path: Option<PathBuf> = None;
-
-    let mut iter = args.into_iter();
-    while let Some(arg) = iter.next() {
-        if arg == "--report" {
-            let Some(value) = iter.next() else {
-                return Err("--report requires a path".to_owned());
-            };
-            report_path = Some(PathBuf::from(value));
-        } else if path.is_none() {
-            path = Some(PathBuf::from(arg));
-        } else {
-            return Err(format!("unexpected argument: {arg}"));
+        let mut jobs = Vec::with_capacity(paths.len());
+        let mut stems: BTreeMap<String, PathBuf> = BTreeMap::new();
+        for input in paths {
+            let stem = input.file_stem().map_or_else(
+                || "genotypes".to_owned(),
+                |stem| stem.to_string_lossy().into_owned(),
+            );
+            if let Some(previous) = stems.insert(stem.clone(), input.clone()) {
+                return Err(format!(
+                    "{} and {} would both write {stem}.grch38.txt in {}; \
+                     lift them in separate --output-dir runs",
+                    previous.display(),
+                    input.display(),
+                    output_dir.display()
+                ));
+            }
+            let output = output_dir.join(format!("{stem}.grch38.txt"));
+            let unmapped = output.with_extension("unmapped.tsv");
+            jobs.push((input, output, unmapped));
         }
-    }
-
-    let Some(path) = path else {
-        return Err("usage: bioscript validate-panels <path> [--report <file>]".to_owned());
+        fs::create_dir_all(&output_dir).map_err(|err| {
+            format!(
+                "failed to create output dir {}: {err}",
+                output_dir.display()
+            )
+        })?;
+        jobs
+    } else {
+        if let Some(extra) = paths.get(2) {
+            return Err(format!("unexpected argument: {}", extra.display()));
+        }
+        let [input, output] =
+            <[PathBuf; 2]>::try_from(paths).map_err(|_| LIFTOVER_USAGE.to_owned())?;
+        let unmapped = unmapped.unwrap_or_else(|| output.with_extension("unmapped.tsv"));
+        vec![(input, output, unmapped)]
     };
 
-    let report = validate_panels_path(&path)?;
-    let text = report.render_text();
-    print!("{text}");
-
-    if let Some(report_path) = report_path {
-        if let Some(parent) = report_path.parent() {
-            std::fs::create_dir_all(parent).map_err(|err| {
-                format!("failed to create report dir {}: {err}", parent.display())
-            })?;
+    for (index, (input, output, unmapped)) in jobs.iter().enumerate() {
+        let stats = convert_23andme_grch37_to_grch38(input, output, unmapped)
+            .map_err(|err| format!("{}: {err}", input.display()))?;
+        if index > 0 {
+            println!();
         }
-        std::fs::write(&report_path, text)
-            .map_err(|err| format!("failed to write {}: {err}", report_path.display()))?;
+        if jobs.len() > 1 {
+            println!("input={}", input.display());
+        }
+        println!("total_markers={}", stats.total_markers);
+        println!("mapped={}", stats.mapped);
+        println!("unmapped={}", stats.unmapped);
+        println!(
+            "reverse_strand_genotypes={}",
+            stats.reverse_strand_genotypes
+        );
+        println!("output={}", output.display());
+        println!("unmapped_report={}", unmapped.display());
     }
+    Ok(())
+}
 
-    if report.has_errors() {
-        return Err(format!(
-            "validation found {} errors and {} warnings",
-            report.total_errors(),
-            report.total_warnings()
-        ));
-    }
+fn run_validate_variants(args: Vec<String>) -> Result<(), String> {
+    run_validation_command(
+        args,
+        "validate-variants",
+        validate_variants_path_with_options,
+    )
+}
 
-    Ok(())
+fn run_validate_panels(args: Vec<String>) -> Result<(), String> {
+    run_validation_command(args, "validate-panels", validate_panels_path_with_options)
 }
 
 fn is_yaml_manifest(path: &Path) -> bool {
@@ -260,8 +258,26 @@ fn is_yaml_manifest(path: &Path) -> bool {
 }
 
 fn run_validate_assays(args: Vec<String>) -> Result<(), String> {
+    run_validation_command(args, "validate-assays", validate_assays_path_with_options)
+}
+
+/// Value of a `--threads N` flag.
+fn parse_threads_arg(value: Option<String>) -> Result<usize, String> {
+    let value = value.ok_or("--threads requires an integer")?;
+    value
+        .parse::<usize>()
+        .map_err(|err| format!("invalid --threads value {value}: {err}"))
+}
+
+/// Shared `<path> [--report <file>] [--cache-dir <dir>] [--threads N]` front
+/// end of the `validate-*` commands.
+fn run_validation_command<F>(args: Vec<String>, command: &str, validate: F) -> Result<(), String>
+where
+    F: FnOnce(&Path, &ValidateOptions) -> Result<bioscript_schema::ValidationReport, String>,
+{
     let mut path: Option<PathBuf> = None;
     let mut report_path: Option<PathBuf> = None;
+    let mut options = ValidateOptions::default();
 
     let mut iter = args.into_iter();
     while let Some(arg) = iter.next() {
@@ -270,6 +286,13 @@ fn run_validate_assays(args: Vec<String>) -> Result<(), String> {
                 return Err("--report requires a path".to_owned());
             };
             report_path = Some(PathBuf::from(value));
+        } else if arg == "--cache-dir" {
+            let Some(value) = iter.next() else {
+                return Err("--cache-dir requires a directory".to_owned());
+            };
+            options.cache_dir = Some(PathBuf::from(value));
+        } else if arg == "--threads" {
+            options.threads = Some(parse_threads_arg(iter.next())?);
         } else if path.is_none() {
             path = Some(PathBuf::from(arg));
         } else {
@@ -278,10 +301,12 @@ fn run_validate_assays(args: Vec<String>) -> Result<(), String> {
     }
 
     let Some(path) = path else {
-        return Err("usage: bioscript validate-assays <path> [--report <file>]".to_owned());
+        return Err(format!(
+            "usage: bioscript {command} <path> [--report <file>] [--cache-dir <dir>] [--threads N]"
+        ));
     };
 
-    let report = validate_assays_path(&path)?;
+    let report = validate(&path, &options)?;
     let text = report.render_text();
     print!("{text}");
 
@@ -362,12 +387,30 @@ alleles:
             .contains("unexpected argument"));
 
         assert!(run_inspect(Vec::new()).unwrap_err().contains("usage"));
-        assert!(run_inspect(vec!["a.txt".to_owned(), "b.txt".to_owned()])
+        assert!(run_inspect(vec!["a.txt".to_owned(), "--bogus".to_owned()])
             .unwrap_err()
-            .contains("unexpected argument"));
+            .contains("unexpected argument: --bogus"));
+        assert!(run_inspect(vec![
+            "a.txt".to_owned(),
+            "b.txt".to_owned(),
+            "--input-index".to_owned(),
+            "a.txt.idx".to_owned(),
+        ])
+        .unwrap_err()
+        .contains("single input file"));
+        assert!(run_inspect(vec!["a.txt".to_owned(), "--threads".to_owned(), "x".to_owned()])
+            .unwrap_err()
+            .contains("invalid --threads value x"));
         assert!(run_inspect(vec!["sample.cram".to_owned(), "--input-index".to_owned()])
             .unwrap_err()
             .contains("--input-index requires"));
+        assert!(run_inspect(vec![
+            "sample.cram".to_owned(),
+            "--sex-method".to_owned(),
+            "guess".to_owned(),
+        ])
+        .unwrap_err()
+        .contains("invalid --sex-method"));
 
         assert!(run_liftover_23andme(Vec::new())
             .unwrap_err()
@@ -382,6 +425,25 @@ alleles:
         ])
         .unwrap_err()
         .contains("--unmapped requires"));
+        assert!(run_liftover_23andme(vec![
+            "a.txt".to_owned(),
+            "b.txt".to_owned(),
+            "c.txt".to_owned(),
+        ])
+        .unwrap_err()
+        .contains("unexpected argument: c.txt"));
+        assert!(run_liftover_23andme(vec!["--output-dir".to_owned(), "out".to_owned()])
+            .unwrap_err()
+            .contains("usage"));
+        assert!(run_liftover_23andme(vec![
+            "--output-dir".to_owned(),
+            "out".to_owned(),
+            "--unmapped".to_owned(),
+            "unmapped.tsv".to_owned(),
+            "a.txt".to_owned(),
+        ])
+        .unwrap_err()
+        .contains("cannot be combined"));
     }
 
     #[test]
@@ -412,6 +474,26 @@ alleles:
         let err = run_validate_variants(vec![invalid.display().to_string()]).unwrap_err();
         assert!(err.contains("validation found"));
 
+        let cache_dir = dir.join("cache");
+        for _ in 0..2 {
+            run_validate_variants(vec![
+                valid.display().to_string(),
+                "--cache-dir".to_owned(),
+                cache_dir.display().to_string(),
+                "--threads".to_owned(),
+                "2".to_owned(),
+            ])
+            .unwrap();
+        }
+        assert!(cache_dir.join("bioscript-validation-cache.txt").exists());
+        let err = run_validate_variants(vec![
+            valid.display().to_string(),
+            "--threads".to_owned(),
+            "many".to_owned(),
+        ])
+        .unwrap_err();
+        assert!(err.contains("invalid --threads value"));
+
         assert!(run_validate_variants(Vec::new()).unwrap_err().contains("usage"));
         assert!(run_validate_variants(vec![valid.display().to_string(), "--report".to_owned()])
             .unwrap_err()
@@ -452,6 +534,42 @@ rs1800437\t19\t46181392\tCG\n",
         assert!(lifted.contains("rs1800437\t19\t45678134\tCG"));
         assert!(fs::read_to_string(&unmapped).unwrap().contains("reason"));
 
+        let second = dir.join("second.txt");
+        fs::write(&second, "rs1800437\t19\t46181392\tCG\nrsBad\t19\tx\tAA\n").unwrap();
+        let out_dir = dir.join("lifted");
+        run_liftover_23andme(vec![
+            "--output-dir".to_owned(),
+            out_dir.display().to_string(),
+            input.display().to_string(),
+            second.display().to_string(),
+        ])
+        .unwrap();
+        assert_eq!(
+            fs::read_to_string(out_dir.join("genome.grch38.txt")).unwrap(),
+            lifted
+        );
+        assert!(fs::read_to_string(out_dir.join("second.grch38.txt"))
+            .unwrap()
+            .contains("rs1800437\t19\t45678134\tCG"));
+        assert!(fs::read_to_string(out_dir.join("second.grch38.unmapped.tsv"))
+            .unwrap()
+            .contains("rsBad\t19\tx\tAA\tnon_integer_position"));
+
+        // Inputs sharing a file stem would overwrite each other's outputs.
+        let nested = dir.join("nested");
+        fs::create_dir_all(&nested).unwrap();
+        fs::copy(&second, nested.join("genome.txt")).unwrap();
+        let clash_dir = dir.join("clash");
+        let err = run_liftover_23andme(vec![
+            "--output-dir".to_owned(),
+            clash_dir.display().to_string(),
+            input.display().to_string(),
+            nested.join("genome.txt").display().to_string(),
+        ])
+        .unwrap_err();
+        assert!(err.contains("would both write genome.grch38.txt"));
+        assert!(!clash_dir.exists());
+
         fs::remove_dir_all(dir).unwrap();
     }
 
@@ -0,0 +1,230 @@
+/// Sidecar indexes sit next to the files they index; a directory walk does
+/// not inspect them as inputs of their own.
+const INSPECT_SIDECAR_EXTENSIONS: &[&str] = &["bai", "crai", "csi", "tbi", "fai", "gzi"];
+
+/// Expand `inputs` and the paths listed in `manifest` into the files to
+/// inspect. Directories are walked recursively in sorted order, skipping
+/// hidden entries and sidecar indexes. Manifest lines are paths relative to
+/// the manifest; blank lines and `#` comments are ignored.
+fn collect_inspect_targets(
+    inputs: &[PathBuf],
+    manifest: Option<&Path>,
+) -> Result<Vec<PathBuf>, String> {
+    let mut inputs = inputs.to_vec();
+    if let Some(manifest) = manifest {
+        let text = fs::read_to_string(manifest)
+            .map_err(|err| format!("failed to read manifest {}: {err}", manifest.display()))?;
+        let base = manifest.parent().unwrap_or_else(|| Path::new(""));
+        inputs.extend(
+            text.lines()
+                .map(str::trim)
+                .filter(|line| !line.is_empty() && !line.starts_with('#'))
+                .map(|line| base.join(line)),
+        );
+    }
+
+    let mut targets = Vec::new();
+    for input in inputs {
+        if input.is_dir() {
+            collect_inspect_dir(&input, &mut targets)?;
+        } else {
+            targets.push(input);
+        }
+    }
+    Ok(targets)
+}
+
+fn collect_inspect_dir(dir: &Path, targets: &mut Vec<PathBuf>) -> Result<(), String> {
+    let mut entries = fs::read_dir(dir)
+        .and_then(|entries| {
+            entries
+                .map(|entry| entry.map(|entry| entry.path()))
+                .collect::<Result<Vec<_>, _>>()
+        })
+        .map_err(|err| format!("failed to read directory {}: {err}", dir.display()))?;
+    entries.sort();
+    for path in entries {
+        let hidden = path
+            .file_name()
+            .and_then(|name| name.to_str())
+            .is_some_and(|name| name.starts_with('.'));
+        if hidden {
+            continue;
+        }
+        if path.is_dir() {
+            collect_inspect_dir(&path, targets)?;
+            continue;
+        }
+        let sidecar = path
+            .extension()
+            .and_then(|ext| ext.to_str())
+            .is_some_and(|ext| {
+                INSPECT_SIDECAR_EXTENSIONS
+                    .iter()
+                    .any(|sidecar| ext.eq_ignore_ascii_case(sidecar))
+            });
+        if !sidecar {
+            targets.push(path);
+        }
+    }
+    Ok(())
+}
+
+/// Inspect `targets` on `threads` workers (default: available cores) and
+/// write one JSON record per file to `out`.
+///
+/// Files are handed out from a shared cursor, so a slow CRAM does not hold
+/// up a batch of text files. Records are written in `targets` order as soon
+/// as every earlier record is done, so output streams and is identical to a
+/// sequential run except for `duration_ms`. A file that fails to inspect
+/// gets a `status: "error"` record rather than aborting the run.
+fn write_inspections_jsonl(
+    targets: &[PathBuf],
+    options: &InspectOptions,
+    threads: Option<usize>,
+    out: &mut dyn std::io::Write,
+) -> Result<(), String> {
+    let workers = threads
+        .filter(|value| *value > 0)
+        .unwrap_or_else(|| std::thread::available_parallelism().map_or(1, usize::from))
+        .min(targets.len())
+        .max(1);
+    let next = std::sync::atomic::AtomicUsize::new(0);
+    let (sender, receiver) = std::sync::mpsc::channel();
+
+    std::thread::scope(|scope| {
+        for _ in 0..workers {
+            let sender = sender.clone();
+            let next = &next;
+            scope.spawn(move || {
+                loop {
+                    let index = next.fetch_add(1, std::sync::atomic::Ordering::Relaxed);
+                    let Some(path) = targets.get(index) else {
+                        break;
+                    };
+                    let record = inspection_record(path, inspect_file(path, options));
+                    // The writer hung up after an output error; stop early.
+                    if sender.send((index, record)).is_err() {
+                        break;
+                    }
+                }
+            });
+        }
+        drop(sender);
+
+        let mut pending = BTreeMap::new();
+        let mut next_to_write = 0;
+        for (index, record) in receiver {
+            pending.insert(index, record);
+            while let Some(record) = pending.remove(&next_to_write) {
+                writeln!(out, "{record}")
+                    .map_err(|err| format!("failed to write inspection record: {err}"))?;
+                next_to_write += 1;
+            }
+        }
+        out.flush()
+            .map_err(|err| format!("failed to write inspection record: {err}"))
+    })
+}
+
+/// One JSONL record: `status` plus the `render_text` fields on success, or
+/// `path`, `status` and `error` on failure.
+fn inspection_record(
+    path: &Path,
+    result: Result<FileInspection, bioscript_core::RuntimeError>,
+) -> serde_json::Value {
+    match result {
+        Ok(inspection) => {
+            let mut record = serde_json::Map::new();
+            for (key, value) in inspection.render_fields() {
+                record.insert(key.to_owned(), serde_json::Value::String(value));
+            }
+            record.insert("status".to_owned(), "ok".into());
+            serde_json::Value::Object(record)
+        }
+        Err(err) => serde_json::json!({
+            "path": path.display().to_string(),
+            "status": "error",
+            "error": err.to_string(),
+        }),
+    }
+}
+
+#[cfg(test)]
+mod inspect_bulk_tests {
+    use super::*;
+
+    #[test]
+    fn inspect_targets_expand_directories_and_manifests_in_order() {
+        let dir =
+            std::env::temp_dir().join(format!("bioscript-inspect-bulk-{}", std::process::id()));
+        let nested = dir.join("nested");
+        fs::create_dir_all(&nested).unwrap();
+        fs::write(dir.join("b.txt"), "rs1\t1\t10\tAG\n").unwrap();
+        fs::write(dir.join("a.cram"), "cram").unwrap();
+        fs::write(dir.join("a.cram.crai"), "crai").unwrap();
+        fs::write(dir.join(".hidden.txt"), "").unwrap();
+        fs::write(nested.join("c.vcf"), "##fileformat=VCFv4.3\n").unwrap();
+        let manifest = dir.join("inputs.txt");
+        fs::write(&manifest, "# uploads\n\nnested/c.vcf\nmissing.txt\n").unwrap();
+
+        let targets = collect_inspect_targets(&[nested.clone()], Some(&manifest)).unwrap();
+        assert_eq!(
+            targets,
+            vec![
+                nested.join("c.vcf"),
+                dir.join("nested/c.vcf"),
+                dir.join("missing.txt")
+            ]
+        );
+
+        let targets = collect_inspect_targets(&[dir.clone()], None).unwrap();
+        assert_eq!(
+            targets,
+            vec![
+                dir.join("a.cram"),
+                dir.join("b.txt"),
+                dir.join("inputs.txt"),
+                nested.join("c.vcf"),
+            ]
+        );
+
+        fs::remove_dir_all(dir).unwrap();
+    }
+
+    #[test]
+    fn inspections_stream_as_ordered_jsonl_with_error_records() {
+        let dir =
+            std::env::temp_dir().join(format!("bioscript-inspect-jsonl-{}", std::process::id()));
+        fs::create_dir_all(&dir).unwrap();
+        let text = dir.join("sample.txt");
+        fs::write(
+            &text,
+            "rsid\tchromosome\tposition\tgenotype\nrs1\t1\t10\tAG\n",
+        )
+        .unwrap();
+        let targets = vec![dir.join("missing.txt"), text.clone(), text];
+
+        let mut out = Vec::new();
+        write_inspections_jsonl(&targets, &InspectOptions::default(), Some(3), &mut out).unwrap();
+        let records = String::from_utf8(out)
+            .unwrap()
+            .lines()
+            .map(|line| serde_json::from_str::<serde_json::Value>(line).unwrap())
+            .collect::<Vec<_>>();
+        assert_eq!(records.len(), 3);
+        assert_eq!(records[0]["status"], "error");
+        assert!(
+            records[0]["error"]
+                .as_str()
+                .unwrap()
+                .contains("missing.txt")
+        );
+        for record in &records[1..] {
+            assert_eq!(record["status"], "ok");
+            assert_eq!(record["kind"], "genotype_text");
+        }
+
+        fs::remove_dir_all(dir).unwrap();
+    }
+}
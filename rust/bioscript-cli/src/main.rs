@@ -3,6 +3,7 @@
 // creating arbitrary numbered chunks.
 include!("cli_bootstrap.rs");
 include!("cli_commands.rs");
+include!("inspect_bulk.rs");
 include!("report_options.rs");
 include!("package.rs");
 include!("report_review.rs");
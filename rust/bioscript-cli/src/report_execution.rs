@@ -23,7 +23,7 @@ impl bioscript_reporting::ReportAnalysisRunner for CliReportAnalysisRunner<'_> {
         task: &bioscript_reporting::AnalysisManifestTask,
         observation_rows: &[BTreeMap<String, String>],
         _variant_observations: &[bioscript_core::VariantObservation],
-        _observations: &[serde_json::Value],
+        _observations: &[bioscript_reporting::AppObservation],
     ) -> Result<Vec<serde_json::Value>, String> {
         let options = ReportAnalysisOptions {
             runtime_root: self.runtime_root,
@@ -13,12 +13,14 @@ struct AppReportOptions {
     root: PathBuf,
     html: bool,
     open_report: bool,
+    cohort: bool,
     observations_format: AppOutputFormat,
     reports_format: AppOutputFormat,
     loader: GenotypeLoadOptions,
     filters: Vec<String>,
     analysis_max_duration_ms: u64,
     detect_sex: bool,
+    sex_method: AlignmentSexMethod,
     sample_sex: Option<InferredSex>,
 }
 
@@ -30,12 +32,14 @@ struct AppReportCliState {
     root: Option<PathBuf>,
     html: bool,
     open_report: bool,
+    cohort: bool,
     observations_format: AppOutputFormat,
     reports_format: AppOutputFormat,
     loader: GenotypeLoadOptions,
     filters: Vec<String>,
     analysis_max_duration_ms: u64,
     detect_sex: bool,
+    sex_method: AlignmentSexMethod,
     sample_sex: Option<InferredSex>,
 }
 
@@ -58,12 +62,16 @@ impl AppReportCliState {
             root: None,
             html: false,
             open_report: false,
+            cohort: false,
             observations_format: AppOutputFormat::Tsv,
             reports_format: AppOutputFormat::Jsonl,
             loader: GenotypeLoadOptions::default(),
             filters: Vec::new(),
             analysis_max_duration_ms: 1_000,
             detect_sex: false,
+            // Reports have always decoded alignment windows for sex calls;
+            // the faster index estimate is opt-in via `--sex-method`.
+            sex_method: AlignmentSexMethod::Decode,
             sample_sex: None,
         })
     }
@@ -82,8 +90,12 @@ impl AppReportCliState {
                 self.html = true;
                 self.open_report = true;
             }
+            "--cohort" => self.cohort = true,
             "--filter" => self.filters.push(next_arg(iter, "--filter")?),
             "--detect-sex" => self.detect_sex = true,
+            "--sex-method" => {
+                self.sex_method = parse_sex_method(&next_arg(iter, "--sex-method")?)?;
+            }
             "--sample-sex" => {
                 self.sample_sex = Some(parse_sample_sex(&next_arg(iter, "--sample-sex")?)?);
             }
@@ -172,12 +184,14 @@ impl AppReportCliState {
             root,
             html: self.html,
             open_report: self.open_report,
+            cohort: self.cohort,
             observations_format: self.observations_format,
             reports_format: self.reports_format,
             loader: self.loader,
             filters: self.filters,
             analysis_max_duration_ms: self.analysis_max_duration_ms,
             detect_sex: self.detect_sex,
+            sex_method: self.sex_method,
             sample_sex: self.sample_sex,
         })
     }
@@ -237,20 +251,20 @@ fn generate_app_report(options: &AppReportOptions) -> Result<(), String> {
 
     let manifest_workspace = bioscript_reporting::FilesystemManifestWorkspace::new(&options.root);
     let manifest_path = options.manifest_path.display().to_string();
+    let plan = bioscript_reporting::ReportPlan::compile(
+        &manifest_workspace,
+        &manifest_path,
+        &options.filters,
+    )?;
     let mut observations = Vec::new();
     let mut analyses = Vec::new();
     let mut reports = Vec::new();
+    let mut cohort = bioscript_reporting::CohortAggregator::new();
 
     for input_file in &options.input_files {
         let participant_id = participant_id_from_path(input_file);
-        let inspect_options = InspectOptions {
-            input_index: options.loader.input_index.clone(),
-            reference_file: options.loader.reference_file.clone(),
-            reference_index: options.loader.reference_index.clone(),
-            detect_sex: should_detect_sex(options),
-        };
-        let mut input_inspection =
-            inspect_file(input_file, &inspect_options).map_err(|err| err.to_string())?;
+        let mut input_inspection = inspect_file(input_file, &report_inspect_options(options))
+            .map_err(|err| err.to_string())?;
         if let Some(sample_sex) = options.sample_sex {
             input_inspection.inferred_sex = Some(explicit_sample_sex_inference(sample_sex));
         }
@@ -298,9 +312,8 @@ fn generate_app_report(options: &AppReportOptions) -> Result<(), String> {
             .and_then(|value| value.to_str())
             .unwrap_or_default();
         let input_file_path = input_file.display().to_string();
-        let run = bioscript_reporting::run_report(
-            &manifest_workspace,
-            &manifest_path,
+        let run = bioscript_reporting::run_report_with_plan(
+            &plan,
             &store,
             &analysis_runner,
             bioscript_reporting::ReportInputContext {
@@ -309,10 +322,10 @@ fn generate_app_report(options: &AppReportOptions) -> Result<(), String> {
                 input_file_path: &input_file_path,
                 input_inspection: Some(&input_inspection),
             },
-            bioscript_reporting::ReportRunOptions {
-                filters: &options.filters,
-            },
         )?;
+        if options.cohort {
+            cohort.add(&run);
+        }
         observations.extend(run.observations);
         analyses.extend(run.analyses);
         reports.push(run.report);
@@ -328,8 +341,17 @@ fn generate_app_report(options: &AppReportOptions) -> Result<(), String> {
     if options.html {
         write_app_html(&options.output_dir, &observations, &reports)?;
     }
+    if options.cohort {
+        write_app_cohort(&options.output_dir, &cohort)?;
+    }
     open_app_html_report_if_requested(options);
     print_app_report_paths(&options.output_dir, options.html);
+    if options.cohort {
+        println!(
+            "cohort: {}",
+            options.output_dir.join("cohort.json").display()
+        );
+    }
     Ok(())
 }
 
@@ -373,6 +395,17 @@ fn should_detect_sex(options: &AppReportOptions) -> bool {
     options.detect_sex && options.sample_sex.is_none()
 }
 
+fn report_inspect_options(options: &AppReportOptions) -> InspectOptions {
+    InspectOptions {
+        input_index: options.loader.input_index.clone(),
+        reference_file: options.loader.reference_file.clone(),
+        reference_index: options.loader.reference_index.clone(),
+        detect_sex: should_detect_sex(options),
+        alignment_sex_method: options.sex_method,
+        ..InspectOptions::default()
+    }
+}
+
 fn open_app_html_report_if_requested(options: &AppReportOptions) {
     if options.open_report
         && let Err(err) = open_html_report(&options.output_dir.join("index.html"))
@@ -505,6 +538,7 @@ mod app_report_option_tests {
             "--root",
             ".",
             "--html",
+            "--cohort",
             "--filter",
             "tag=pgx",
             "--detect-sex",
@@ -536,11 +570,13 @@ mod app_report_option_tests {
         assert_eq!(options.output_dir, PathBuf::from("./out"));
         assert!(options.html);
         assert!(!options.open_report);
+        assert!(options.cohort);
         assert_eq!(options.filters, vec!["tag=pgx"]);
         assert_eq!(options.observations_format, AppOutputFormat::Both);
         assert_eq!(options.reports_format, AppOutputFormat::Json);
         assert_eq!(options.analysis_max_duration_ms, 2500);
         assert!(options.detect_sex);
+        assert_eq!(options.sex_method, AlignmentSexMethod::Decode);
         assert_eq!(options.sample_sex, Some(InferredSex::Female));
         assert!(!should_detect_sex(&options));
         assert_eq!(options.loader.format, Some(GenotypeSourceFormat::Vcf));
@@ -551,6 +587,38 @@ mod app_report_option_tests {
         assert!(options.loader.allow_reference_md5_mismatch);
     }
 
+    #[test]
+    fn detect_sex_keeps_decoding_unless_a_sex_method_is_given() {
+        let finish = |extra: &[&str]| {
+            let mut state = AppReportCliState::new().unwrap();
+            let mut items = vec![
+                "panel.yaml",
+                "--input-file",
+                "sample.cram",
+                "--output-dir",
+                "out",
+                "--root",
+                ".",
+                "--detect-sex",
+            ];
+            items.extend_from_slice(extra);
+            let mut iter = args(&items);
+            while let Some(arg) = iter.next() {
+                state.consume_arg(&arg, &mut iter)?;
+            }
+            state.finish().map(|options| report_inspect_options(&options))
+        };
+
+        let default = finish(&[]).unwrap();
+        assert!(default.detect_sex);
+        assert_eq!(default.alignment_sex_method, AlignmentSexMethod::Decode);
+        let index = finish(&["--sex-method", "index"]).unwrap();
+        assert_eq!(index.alignment_sex_method, AlignmentSexMethod::Index);
+        assert!(finish(&["--sex-method", "guess"])
+            .unwrap_err()
+            .contains("invalid --sex-method"));
+    }
+
     #[test]
     fn cli_state_reports_required_argument_errors() {
         let missing_manifest = finish_err(AppReportCliState::new().unwrap());
@@ -1,15 +1,17 @@
 fn write_app_observations(
     output_dir: &Path,
-    observations: &[serde_json::Value],
+    observations: &[bioscript_reporting::AppObservation],
     format: AppOutputFormat,
 ) -> Result<(), String> {
     if matches!(format, AppOutputFormat::Tsv | AppOutputFormat::Both) {
-        let out = bioscript_reporting::render_observations_tsv(observations);
-        fs::write(output_dir.join("observations.tsv"), out)
-            .map_err(|err| format!("failed to write observations.tsv: {err}"))?;
+        let path = output_dir.join("observations.tsv");
+        bioscript_reporting::write_observations_tsv(create_output_file(&path)?, observations)
+            .map_err(|err| format!("failed to write {}: {err}", path.display()))?;
     }
     if matches!(format, AppOutputFormat::Jsonl | AppOutputFormat::Both) {
-        write_jsonl(&output_dir.join("observations.jsonl"), observations)?;
+        let path = output_dir.join("observations.jsonl");
+        bioscript_reporting::write_jsonl(create_output_file(&path)?, observations)
+            .map_err(|err| format!("failed to write {}: {err}", path.display()))?;
     }
     if matches!(format, AppOutputFormat::Json) {
         write_json_pretty(
@@ -46,25 +48,47 @@ fn write_app_reports(
 }
 
 fn write_jsonl(path: &Path, rows: &[serde_json::Value]) -> Result<(), String> {
-    let out = bioscript_reporting::render_jsonl(rows)?;
-    fs::write(path, out).map_err(|err| format!("failed to write {}: {err}", path.display()))
+    bioscript_reporting::write_jsonl(create_output_file(path)?, rows)
+        .map_err(|err| format!("failed to write {}: {err}", path.display()))
 }
 
 fn write_json_pretty(path: &Path, value: &serde_json::Value) -> Result<(), String> {
-    let text = serde_json::to_string_pretty(value).map_err(|err| err.to_string())?;
-    fs::write(path, text).map_err(|err| format!("failed to write {}: {err}", path.display()))
+    let mut writer = create_output_file(path)?;
+    serde_json::to_writer_pretty(&mut writer, value)
+        .map_err(|err| format!("failed to write {}: {err}", path.display()))?;
+    std::io::Write::flush(&mut writer)
+        .map_err(|err| format!("failed to write {}: {err}", path.display()))
+}
+
+/// Buffered output file, so report artifacts are streamed to disk instead of
+/// being rendered into memory first.
+fn create_output_file(path: &Path) -> Result<std::io::BufWriter<fs::File>, String> {
+    fs::File::create(path)
+        .map(std::io::BufWriter::new)
+        .map_err(|err| format!("failed to write {}: {err}", path.display()))
 }
 
 fn write_app_html(
     output_dir: &Path,
-    observations: &[serde_json::Value],
+    observations: &[bioscript_reporting::AppObservation],
     reports: &[serde_json::Value],
 ) -> Result<(), String> {
-    let out = bioscript_reporting::render_app_html_document(observations, reports)?;
-    fs::write(output_dir.join("index.html"), out)
+    let path = output_dir.join("index.html");
+    bioscript_reporting::write_app_html_document(create_output_file(&path)?, observations, reports)
         .map_err(|err| format!("failed to write index.html: {err}"))
 }
 
+/// Single-pass cohort outputs: `cohort.json` and `cohort_alleles.tsv`.
+fn write_app_cohort(
+    output_dir: &Path,
+    cohort: &bioscript_reporting::CohortAggregator,
+) -> Result<(), String> {
+    let path = output_dir.join("cohort.json");
+    cohort.write_summary_json(create_output_file(&path)?)?;
+    let path = output_dir.join("cohort_alleles.tsv");
+    cohort.write_alleles_tsv(create_output_file(&path)?)
+}
+
 #[cfg(test)]
 mod app_report_output_tests {
     use super::*;
@@ -85,11 +109,12 @@ mod app_report_output_tests {
 
     #[test]
     fn writes_observation_outputs_for_each_format() {
-        let rows = vec![serde_json::json!({
-            "participant_id": "p1",
-            "gene": "CYP2D6",
-            "genotype": "A/G"
-        })];
+        let rows = vec![bioscript_reporting::AppObservation {
+            participant_id: "p1".to_owned(),
+            gene: "CYP2D6".to_owned(),
+            genotype: "A/G".to_owned(),
+            ..bioscript_reporting::AppObservation::default()
+        }];
 
         let dir = temp_dir("observations");
         write_app_observations(&dir, &rows, AppOutputFormat::Both).unwrap();
@@ -118,7 +143,10 @@ mod app_report_output_tests {
             "participant": {"id": "p1"},
             "observations": []
         })];
-        let observations = vec![serde_json::json!({"participant_id": "p1"})];
+        let observations = vec![bioscript_reporting::AppObservation {
+            participant_id: "p1".to_owned(),
+            ..bioscript_reporting::AppObservation::default()
+        }];
 
         write_app_analyses(&dir, &analyses).unwrap();
         assert!(fs::read_to_string(dir.join("analysis.jsonl"))
@@ -138,6 +166,12 @@ mod app_report_output_tests {
             .unwrap()
             .contains("<!doctype html>"));
 
+        write_app_cohort(&dir, &bioscript_reporting::CohortAggregator::new()).unwrap();
+        let cohort: serde_json::Value =
+            serde_json::from_str(&fs::read_to_string(dir.join("cohort.json")).unwrap()).unwrap();
+        assert_eq!(cohort["schema"], "bioscript:cohort-summary:1.0");
+        assert!(dir.join("cohort_alleles.tsv").exists());
+
         fs::remove_dir_all(dir).unwrap();
     }
 
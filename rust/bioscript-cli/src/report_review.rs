@@ -14,7 +14,7 @@ struct ReviewCase {
 }
 
 struct ReviewCaseReport {
-    observations: Vec<serde_json::Value>,
+    observations: Vec<bioscript_reporting::AppObservation>,
     analyses: Vec<serde_json::Value>,
     report: serde_json::Value,
 }
@@ -89,6 +89,11 @@ fn generate_review_report(options: &ReviewReportOptions) -> Result<(), String> {
 
     let manifest_workspace = bioscript_reporting::FilesystemManifestWorkspace::new(&options.root);
     let manifest_path = options.manifest_path.display().to_string();
+    let plan = bioscript_reporting::ReportPlan::compile(
+        &manifest_workspace,
+        &manifest_path,
+        &options.filters,
+    )?;
     let cases = load_review_cases(&options.cases_path)?;
     let mut observations = Vec::new();
     let mut analyses = Vec::new();
@@ -104,8 +109,7 @@ fn generate_review_report(options: &ReviewReportOptions) -> Result<(), String> {
     for case in cases {
         let case_report = generate_review_case_report(
             options,
-            &manifest_workspace,
-            &manifest_path,
+            &plan,
             &review_temp_dir,
             &case,
         )?;
@@ -140,8 +144,7 @@ fn generate_review_report(options: &ReviewReportOptions) -> Result<(), String> {
 
 fn generate_review_case_report(
     options: &ReviewReportOptions,
-    manifest_workspace: &bioscript_reporting::FilesystemManifestWorkspace,
-    manifest_path: &str,
+    plan: &bioscript_reporting::ReportPlan,
     review_temp_dir: &Path,
     case: &ReviewCase,
 ) -> Result<ReviewCaseReport, String> {
@@ -173,9 +176,8 @@ fn generate_review_case_report(
         .and_then(|value| value.to_str())
         .unwrap_or_default();
     let synthetic_input_path = synthetic_input.display().to_string();
-    let run_result = bioscript_reporting::run_report(
-        manifest_workspace,
-        manifest_path,
+    let run_result = bioscript_reporting::run_report_with_plan(
+        plan,
         &store,
         &analysis_runner,
         bioscript_reporting::ReportInputContext {
@@ -184,9 +186,6 @@ fn generate_review_case_report(
             input_file_path: &synthetic_input_path,
             input_inspection: None,
         },
-        bioscript_reporting::ReportRunOptions {
-            filters: &options.filters,
-        },
     );
     let cleanup = fs::remove_file(&temp_path);
     if let Err(err) = cleanup {
@@ -206,6 +206,36 @@ fn inspect_subcommand_reports_detected_vendor_and_platform() {
     assert!(stdout.contains("duration_ms\t"));
 }
 
+#[test]
+fn inspect_subcommand_streams_jsonl_for_many_inputs() {
+    let root = repo_root();
+    let fixtures = root.join("rust/bioscript-formats/tests/fixtures");
+
+    let output = Command::new(env!("CARGO_BIN_EXE_bioscript"))
+        .current_dir(&root)
+        .arg("inspect")
+        .arg(fixtures.join("ancestrydna_v2_sample.txt"))
+        .arg(fixtures.join("familytreedna_sample.csv"))
+        .arg(fixtures.join("missing.txt"))
+        .arg("--threads")
+        .arg("2")
+        .output()
+        .unwrap();
+
+    assert!(
+        output.status.success(),
+        "stderr: {}",
+        String::from_utf8_lossy(&output.stderr)
+    );
+    let stdout = String::from_utf8_lossy(&output.stdout);
+    let records = stdout.lines().collect::<Vec<_>>();
+    assert_eq!(records.len(), 3);
+    assert!(records[0].contains("\"vendor\":\"AncestryDNA\""));
+    assert!(records[1].contains("familytreedna_sample.csv"));
+    assert!(records[1].contains("\"status\":\"ok\""));
+    assert!(records[2].contains("\"status\":\"error\""));
+}
+
 #[test]
 fn variant_manifest_runs_directly_via_cli() {
     let root = repo_root();
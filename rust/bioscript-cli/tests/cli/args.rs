@@ -86,6 +86,14 @@ fn cli_rejects_missing_values_and_unexpected_arguments() {
             vec!["validate-panels", "--report"],
             "--report requires a path",
         ),
+        (
+            vec!["liftover-23andme", "--output-dri", "out", "in.txt"],
+            "usage: bioscript liftover-23andme",
+        ),
+        (
+            vec!["liftover-23andme", "in.txt", "--unmaped", "u.tsv"],
+            "usage: bioscript liftover-23andme",
+        ),
     ] {
         let output = run_bioscript(&root, args);
         assert!(!output.status.success(), "expected failure for {expected}");
@@ -1,5 +1,6 @@
 mod error;
 mod observation;
+pub mod profile;
 mod report;
 mod variant;
 
@@ -8,6 +9,7 @@ pub use observation::{
     CallStatus, CoverageStatus, EvidenceType, MatchStatus, OBSERVATION_TSV_HEADERS,
     ObservationKind, ObservationOutcome, ObservationRecord, Zygosity,
 };
+pub use profile::{ProfileCounter, ProfileCounters, ProfileScope};
 pub use report::{
     ReportField, ReportRecord, ReportStatus, ReportTiming, ReportTimingBreakdown, ReportValue,
 };
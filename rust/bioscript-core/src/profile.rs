@@ -0,0 +1,303 @@
+//! Typed work counters shared by genotype backends, native tools, and the
+//! runtime's stage timings.
+//!
+//! Backends call [`record`] as they read bytes, decode records, or hit a
+//! cache. The runtime opens a [`ProfileScope`] around each host call, so those
+//! counts land on the stage that caused them. With no open scope, `record` is
+//! a thread-local check and nothing else.
+//!
+//! Genotype backends also open a labelled scope with [`enter_backend`], so a
+//! stage reports which backend (`text`, `vcf`, `bcf`, `cram`, `bam`, ...) did
+//! the work alongside its inclusive totals.
+
+use std::{
+    cell::RefCell,
+    collections::BTreeMap,
+    marker::PhantomData,
+    sync::{
+        Arc, Mutex, PoisonError,
+        atomic::{AtomicU64, Ordering},
+    },
+};
+
+const COUNTER_COUNT: usize = 10;
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq, PartialOrd, Ord, Hash)]
+pub enum ProfileCounter {
+    BytesRead,
+    LinesScanned,
+    RecordsDecoded,
+    ContainersDecoded,
+    IndexQueries,
+    VariantsQueried,
+    VariantsResolved,
+    CacheHits,
+    CacheMisses,
+    WorkerThreads,
+}
+
+impl ProfileCounter {
+    pub const ALL: [Self; COUNTER_COUNT] = [
+        Self::BytesRead,
+        Self::LinesScanned,
+        Self::RecordsDecoded,
+        Self::ContainersDecoded,
+        Self::IndexQueries,
+        Self::VariantsQueried,
+        Self::VariantsResolved,
+        Self::CacheHits,
+        Self::CacheMisses,
+        Self::WorkerThreads,
+    ];
+
+    #[must_use]
+    pub fn as_str(self) -> &'static str {
+        match self {
+            Self::BytesRead => "bytes_read",
+            Self::LinesScanned => "lines_scanned",
+            Self::RecordsDecoded => "records_decoded",
+            Self::ContainersDecoded => "containers_decoded",
+            Self::IndexQueries => "index_queries",
+            Self::VariantsQueried => "variants_queried",
+            Self::VariantsResolved => "variants_resolved",
+            Self::CacheHits => "cache_hits",
+            Self::CacheMisses => "cache_misses",
+            Self::WorkerThreads => "worker_threads",
+        }
+    }
+}
+
+type CounterValues = BTreeMap<ProfileCounter, u64>;
+
+/// Counter set for one profiled stage. Every increment is also forwarded to
+/// the enclosing stage's counters, so parent spans report inclusive totals.
+/// Increments made under a backend label are additionally tallied per label.
+#[derive(Debug, Default)]
+pub struct ProfileCounters {
+    values: [AtomicU64; COUNTER_COUNT],
+    parent: Option<Arc<ProfileCounters>>,
+    label: Option<&'static str>,
+    labelled: Mutex<BTreeMap<&'static str, CounterValues>>,
+}
+
+impl ProfileCounters {
+    #[must_use]
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Counters nested under whichever scope is active on this thread.
+    #[must_use]
+    pub fn nested() -> Self {
+        Self {
+            parent: current_counters(),
+            ..Self::default()
+        }
+    }
+
+    /// Counters nested under the active scope that attribute their work to
+    /// `label`.
+    #[must_use]
+    pub fn labelled(label: &'static str) -> Self {
+        Self {
+            label: Some(label),
+            ..Self::nested()
+        }
+    }
+
+    /// The enclosing stage's counters, if any.
+    #[must_use]
+    pub fn parent(&self) -> Option<&Arc<ProfileCounters>> {
+        self.parent.as_ref()
+    }
+
+    pub fn add(&self, counter: ProfileCounter, amount: u64) {
+        self.add_labelled(counter, amount, None);
+    }
+
+    /// `label` comes from a nested scope; the innermost label wins.
+    fn add_labelled(&self, counter: ProfileCounter, amount: u64, label: Option<&'static str>) {
+        self.values[counter as usize].fetch_add(amount, Ordering::Relaxed);
+        let label = label.or(self.label);
+        if let Some(label) = label {
+            *self
+                .labelled
+                .lock()
+                .unwrap_or_else(PoisonError::into_inner)
+                .entry(label)
+                .or_default()
+                .entry(counter)
+                .or_default() += amount;
+        }
+        if let Some(parent) = &self.parent {
+            parent.add_labelled(counter, amount, label);
+        }
+    }
+
+    #[must_use]
+    pub fn get(&self, counter: ProfileCounter) -> u64 {
+        self.values[counter as usize].load(Ordering::Relaxed)
+    }
+
+    /// Non-zero counters, keyed in declaration order.
+    #[must_use]
+    pub fn snapshot(&self) -> BTreeMap<ProfileCounter, u64> {
+        ProfileCounter::ALL
+            .into_iter()
+            .filter_map(|counter| {
+                let value = self.get(counter);
+                (value > 0).then_some((counter, value))
+            })
+            .collect()
+    }
+
+    /// Non-zero counters broken down by the backend label they were recorded
+    /// under. Work recorded outside any labelled scope is not included.
+    #[must_use]
+    pub fn labelled_snapshot(&self) -> BTreeMap<&'static str, CounterValues> {
+        self.labelled
+            .lock()
+            .unwrap_or_else(PoisonError::into_inner)
+            .clone()
+    }
+}
+
+thread_local! {
+    static ACTIVE: RefCell<Vec<Arc<ProfileCounters>>> = const { RefCell::new(Vec::new()) };
+}
+
+/// Adds `amount` to `counter` on the innermost active scope, if any.
+pub fn record(counter: ProfileCounter, amount: u64) {
+    if amount == 0 {
+        return;
+    }
+    ACTIVE.with(|stack| {
+        if let Some(top) = stack.borrow().last() {
+            top.add(counter, amount);
+        }
+    });
+}
+
+/// Innermost active counters, for handing to worker threads that should
+/// report into the caller's stage.
+#[must_use]
+pub fn current_counters() -> Option<Arc<ProfileCounters>> {
+    ACTIVE.with(|stack| stack.borrow().last().cloned())
+}
+
+/// Attribute work on this thread to `backend` until the returned scope is
+/// dropped. Does nothing when no stage is being profiled.
+#[must_use = "the scope closes as soon as it is dropped"]
+pub fn enter_backend(backend: &'static str) -> Option<ProfileScope> {
+    current_counters()
+        .is_some()
+        .then(|| ProfileScope::enter(Arc::new(ProfileCounters::labelled(backend))))
+}
+
+/// Makes `counters` the target of [`record`] on this thread until dropped.
+#[must_use = "the scope closes as soon as it is dropped"]
+pub struct ProfileScope {
+    depth: usize,
+    _not_send: PhantomData<*const ()>,
+}
+
+impl ProfileScope {
+    pub fn enter(counters: Arc<ProfileCounters>) -> Self {
+        let depth = ACTIVE.with(|stack| {
+            let mut stack = stack.borrow_mut();
+            stack.push(counters);
+            stack.len()
+        });
+        Self {
+            depth,
+            _not_send: PhantomData,
+        }
+    }
+}
+
+impl Drop for ProfileScope {
+    fn drop(&mut self) {
+        ACTIVE.with(|stack| stack.borrow_mut().truncate(self.depth - 1));
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn record_without_scope_is_a_noop() {
+        record(ProfileCounter::BytesRead, 10);
+        assert!(current_counters().is_none());
+    }
+
+    #[test]
+    fn nested_scopes_roll_counts_up_to_parents() {
+        let outer = Arc::new(ProfileCounters::new());
+        let _outer_scope = ProfileScope::enter(Arc::clone(&outer));
+        record(ProfileCounter::LinesScanned, 2);
+        {
+            let inner = Arc::new(ProfileCounters::nested());
+            let _inner_scope = ProfileScope::enter(Arc::clone(&inner));
+            record(ProfileCounter::RecordsDecoded, 5);
+            record(ProfileCounter::CacheHits, 0);
+            assert_eq!(
+                inner.snapshot(),
+                BTreeMap::from([(ProfileCounter::RecordsDecoded, 5)])
+            );
+        }
+        record(ProfileCounter::LinesScanned, 1);
+        assert_eq!(outer.get(ProfileCounter::LinesScanned), 3);
+        assert_eq!(outer.get(ProfileCounter::RecordsDecoded), 5);
+        assert_eq!(outer.get(ProfileCounter::CacheHits), 0);
+    }
+
+    #[test]
+    fn backend_scopes_label_counts_for_every_ancestor() {
+        assert!(enter_backend("vcf").is_none());
+        let outer = Arc::new(ProfileCounters::new());
+        let _outer_scope = ProfileScope::enter(Arc::clone(&outer));
+        record(ProfileCounter::VariantsQueried, 1);
+        {
+            let _cached = enter_backend("cached");
+            record(ProfileCounter::CacheMisses, 1);
+            let _cram = enter_backend("cram");
+            let inherited = current_counters();
+            std::thread::spawn(move || {
+                let _worker_scope = inherited.map(ProfileScope::enter);
+                record(ProfileCounter::ContainersDecoded, 3);
+            })
+            .join()
+            .unwrap();
+        }
+        assert_eq!(outer.get(ProfileCounter::ContainersDecoded), 3);
+        assert_eq!(
+            outer.labelled_snapshot(),
+            BTreeMap::from([
+                ("cached", BTreeMap::from([(ProfileCounter::CacheMisses, 1)])),
+                (
+                    "cram",
+                    BTreeMap::from([(ProfileCounter::ContainersDecoded, 3)])
+                ),
+            ])
+        );
+    }
+
+    #[test]
+    fn worker_threads_report_into_the_callers_scope() {
+        let counters = Arc::new(ProfileCounters::new());
+        let _scope = ProfileScope::enter(Arc::clone(&counters));
+        let inherited = current_counters();
+        std::thread::spawn(move || {
+            let _worker_scope = inherited.map(ProfileScope::enter);
+            record(ProfileCounter::ContainersDecoded, 4);
+        })
+        .join()
+        .unwrap();
+        assert_eq!(counters.get(ProfileCounter::ContainersDecoded), 4);
+        assert_eq!(
+            ProfileCounter::ContainersDecoded.as_str(),
+            "containers_decoded"
+        );
+    }
+}
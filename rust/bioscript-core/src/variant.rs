@@ -1,6 +1,6 @@
 use std::collections::BTreeMap;
 
-#[derive(Debug, Clone, PartialEq, Eq)]
+#[derive(Debug, Clone, PartialEq, Eq, Hash)]
 pub struct GenomicLocus {
     pub chrom: String,
     pub start: i64,
@@ -13,7 +13,7 @@ pub enum Assembly {
     Grch38,
 }
 
-#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Hash)]
 pub enum VariantKind {
     Snp,
     Insertion,
@@ -22,7 +22,7 @@ pub enum VariantKind {
     Other,
 }
 
-#[derive(Debug, Clone, Default, PartialEq, Eq)]
+#[derive(Debug, Clone, Default, PartialEq, Eq, Hash)]
 pub struct VariantSpec {
     pub rsids: Vec<String>,
     pub grch37: Option<GenomicLocus>,
@@ -1,7 +1,5 @@
 use std::{
-    env,
-    fmt::Write as _,
-    fs,
+    env, fs,
     path::{Path, PathBuf},
     time::Instant,
 };
@@ -9,7 +7,7 @@ use std::{
 use bioscript_formats::{
     GenotypeLoadOptions, GenotypeSourceFormat, PrepareRequest, prepare_indexes,
 };
-use bioscript_runtime::{BioscriptRuntime, RuntimeConfig, StageTiming};
+use bioscript_runtime::{BioscriptRuntime, RuntimeConfig, StageTiming, write_timing_report};
 use monty::MontyObject;
 
 use crate::{
@@ -60,7 +58,8 @@ pub fn run_file_request(request: RunFileRequest) -> Result<RunFileResult, String
     if let Some(timing_path) = request.timing_report_path {
         let mut all_timings = ffi_timings;
         all_timings.extend(runtime.timing_snapshot());
-        write_timing_report(&PathBuf::from(timing_path), &all_timings)?;
+        write_timing_report(Path::new(&timing_path), &all_timings)
+            .map_err(|err| err.to_string())?;
     }
 
     Ok(RunFileResult { ok: true })
@@ -159,11 +158,11 @@ fn run_auto_index(
     {
         loader.reference_index = Some(ref_idx);
     }
-    ffi_timings.push(StageTiming {
-        stage: "auto_index".to_owned(),
-        duration_ms: auto_index_started.elapsed().as_millis(),
-        detail: "prepare_indexes".to_owned(),
-    });
+    ffi_timings.push(StageTiming::new(
+        "auto_index",
+        auto_index_started.elapsed(),
+        "prepare_indexes",
+    ));
     Ok(())
 }
 
@@ -199,26 +198,3 @@ pub(crate) fn build_loader(request: &RunFileRequest) -> Result<GenotypeLoadOptio
     loader.allow_reference_md5_mismatch = request.allow_md5_mismatch.unwrap_or(false);
     Ok(loader)
 }
-
-fn write_timing_report(path: &PathBuf, timings: &[StageTiming]) -> Result<(), String> {
-    if let Some(parent) = path.parent() {
-        fs::create_dir_all(parent).map_err(|err| {
-            format!(
-                "failed to create timing report dir {}: {err}",
-                parent.display()
-            )
-        })?;
-    }
-    let mut output = String::from("stage\tduration_ms\tdetail\n");
-    for timing in timings {
-        let _ = writeln!(
-            output,
-            "{}\t{}\t{}\n",
-            timing.stage,
-            timing.duration_ms,
-            timing.detail.replace('\t', " ")
-        );
-    }
-    fs::write(path, output)
-        .map_err(|err| format!("failed to write timing report {}: {err}", path.display()))
-}
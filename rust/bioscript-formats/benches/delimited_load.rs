@@ -0,0 +1,83 @@
+//! Compares loading delimited genotype text from memory on one thread
+//! against parsing it in chunks on worker threads, for 23andMe-style,
+//! AncestryDNA and GSGT inputs grown from the `tests/fixtures` samples.
+//!
+//! Run with `cargo bench -p bioscript-formats --bench delimited_load`, and
+//! optionally pass the input size in MiB (default 64).
+
+use std::{
+    io::{self, Write as _},
+    time::{Duration, Instant},
+};
+
+use bioscript_formats::{GenotypeLoadOptions, GenotypeSourceFormat, GenotypeStore};
+
+#[path = "../tests/support/delimited_fixture.rs"]
+mod delimited_fixture;
+
+use delimited_fixture::enlarged_fixture;
+
+fn main() {
+    let mib = std::env::args()
+        .skip(1)
+        .find_map(|arg| arg.parse::<usize>().ok())
+        .unwrap_or(64);
+    let cores = std::thread::available_parallelism().map_or(1, usize::from);
+    println!("{mib} MiB per input, {cores} cores");
+    println!("{:<40} {:>12} {:>12}", "input", "latency", "throughput");
+
+    let inputs = [
+        (
+            "23andMe (genesforgood_sample.txt)",
+            "genesforgood_sample.txt",
+            4,
+            2,
+        ),
+        (
+            "AncestryDNA (ancestrydna_v2_sample.txt)",
+            "ancestrydna_v2_sample.txt",
+            7,
+            2,
+        ),
+        (
+            "GSGT (carigenetics_gsgt_sample.txt)",
+            "carigenetics_gsgt_sample.txt",
+            11,
+            5,
+        ),
+    ];
+    for (label, name, head_lines, pos_col) in inputs {
+        let (text, _) = enlarged_fixture(name, head_lines, pos_col, mib * 1024 * 1024);
+        for (mode, workers) in [("1 thread", Some(1)), ("all cores", None)] {
+            measure(&format!("{label} {mode}"), text.len(), || {
+                GenotypeStore::from_bytes_with_options(
+                    name,
+                    text.as_bytes(),
+                    &GenotypeLoadOptions {
+                        format: Some(GenotypeSourceFormat::Text),
+                        text_parse_workers: workers,
+                        ..GenotypeLoadOptions::default()
+                    },
+                )
+                .unwrap();
+            });
+        }
+    }
+}
+
+#[allow(clippy::cast_precision_loss)]
+fn measure(label: &str, bytes: usize, run: impl Fn()) {
+    run();
+    let mut best = Duration::MAX;
+    for _ in 0..5 {
+        let started = Instant::now();
+        run();
+        best = best.min(started.elapsed());
+    }
+    let _ = writeln!(
+        io::stdout(),
+        "{label:<40} {:>10.1}ms {:>8.1} MiB/s",
+        best.as_secs_f64() * 1000.0,
+        bytes as f64 / (1024.0 * 1024.0) / best.as_secs_f64()
+    );
+}
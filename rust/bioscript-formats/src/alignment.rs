@@ -11,21 +11,38 @@ use crate::genotype::GenotypeLoadOptions;
 
 mod bam_fastq;
 mod bam_stream;
+mod block_cache;
 mod cram_stream;
 mod readers;
 
 pub use bam_fastq::{FastqPairSummary, write_bam_region_fastq_pair};
 pub use bam_stream::{DepthSummary, query_bam_depth_summary, query_bam_records, write_bam_region};
+pub use block_cache::BlockCacheReader;
 pub use readers::{
     build_bam_indexed_reader_from_reader, build_cram_indexed_reader_from_reader,
     build_reference_repository_from_readers, generate_bam_bai_bytes, generate_bam_bai_reader,
     generate_cram_crai_bytes, generate_cram_crai_reader, generate_fasta_fai_bytes,
-    generate_fasta_fai_reader, generate_vcf_tbi_bytes, parse_bai_bytes, parse_crai_bytes,
-    parse_fai_bytes, parse_tbi_bytes,
+    generate_fasta_fai_reader, generate_vcf_tbi_bytes, generate_vcf_tbi_reader, parse_bai_bytes,
+    parse_crai_bytes, parse_fai_bytes, parse_tbi_bytes,
 };
 
-pub(crate) use cram_stream::for_each_raw_cram_record_with_reader_inner;
-pub(crate) use readers::{build_cram_indexed_reader_from_path, build_reference_repository};
+pub(crate) use cram_stream::{
+    alignment_record_intersects_interval, build_region as build_cram_region,
+    for_each_decoded_cram_record_with_reader_inner, for_each_raw_cram_record_with_reader_inner,
+    missing_contig as missing_cram_contig, resolve_reference_sequence_id,
+};
+pub(crate) use readers::{
+    build_cram_indexed_reader_from_path, build_reference_repository, open_cached_cram_reader,
+};
+
+/// Indexed CRAM reader a path-backed backend keeps open between lookups.
+pub(crate) type CramFileReader =
+    cram::io::indexed_reader::IndexedReader<BlockCacheReader<std::fs::File>>;
+
+/// Indexed BAM reader a path-backed backend keeps open between lookups.
+pub(crate) type BamFileReader = noodles::bam::io::indexed_reader::IndexedReader<
+    noodles::bgzf::io::Reader<BlockCacheReader<std::fs::File>>,
+>;
 
 #[derive(Debug, Clone, Copy, PartialEq, Eq)]
 pub enum AlignmentOpKind {
@@ -132,6 +149,33 @@ where
     )
 }
 
+/// First and last container offset the CRAI selects for each locus, or
+/// `None` when the contig is absent or no container overlaps. The header is
+/// read once for the whole list; lookup scheduling uses the spans to keep
+/// variants that share containers on one worker.
+pub(crate) fn cram_container_spans<R: Read + Seek>(
+    reader: &mut cram::io::indexed_reader::IndexedReader<R>,
+    label: &str,
+    loci: &[GenomicLocus],
+) -> Result<Vec<Option<(u64, u64)>>, RuntimeError> {
+    reader
+        .get_mut()
+        .seek(std::io::SeekFrom::Start(0))
+        .map_err(|err| RuntimeError::Io(format!("failed to rewind CRAM {label}: {err}")))?;
+    let header = reader
+        .read_header()
+        .map_err(|err| RuntimeError::Io(format!("failed to read CRAM header {label}: {err}")))?;
+    Ok(loci
+        .iter()
+        .map(|locus| {
+            let region = cram_stream::build_region(&header, locus)?;
+            let containers =
+                cram_stream::select_query_containers(reader.index(), &header, &region).ok()?;
+            Some((containers.first()?.offset, containers.last()?.offset))
+        })
+        .collect())
+}
+
 /// Iterate raw CRAM records intersecting `locus`, streaming from an
 /// already-built CRAM `IndexedReader`. The raw variant preserves the
 /// `cram::Record` handle so callers can pull base+quality at a specific
@@ -0,0 +1,293 @@
+use std::{
+    collections::HashMap,
+    io::{self, Read, Seek, SeekFrom},
+};
+
+use bioscript_core::{ProfileCounter, profile};
+
+/// Block size for path-backed readers.
+const BLOCK_SIZE: usize = 64 * 1024;
+/// Blocks fetched in one read once access looks sequential.
+const READ_AHEAD_BLOCKS: usize = 4;
+
+/// `Read + Seek` adapter that keeps recently read fixed-size blocks of the
+/// underlying source in memory, evicting the least recently used block once
+/// `budget_bytes` is exceeded.
+///
+/// Persistent CRAM/BAM readers sit on top of this: every query rewinds to the
+/// header and then seeks to the containers (or BGZF blocks) the index selects,
+/// so repeated and neighbouring lookups are served from memory instead of
+/// re-reading the file. A miss directly after the previously fetched run is
+/// treated as a sequential scan and reads several blocks ahead in one call.
+/// Reads of at least a block that are not cached go straight to the source,
+/// as they do with `BufReader`, and a zero budget passes every read through.
+pub struct BlockCacheReader<R> {
+    inner: R,
+    position: u64,
+    len: u64,
+    block_size: usize,
+    budget_blocks: usize,
+    blocks: HashMap<u64, CachedBlock>,
+    tick: u64,
+    /// End of the last fetched run; a miss here continues a sequential scan.
+    fetched_until: Option<u64>,
+}
+
+struct CachedBlock {
+    data: Vec<u8>,
+    last_used: u64,
+}
+
+impl<R: Read + Seek> BlockCacheReader<R> {
+    /// Cache `inner` in 64 KiB blocks, measuring its length with a seek.
+    pub fn new(mut inner: R, budget_bytes: usize) -> io::Result<Self> {
+        let len = inner.seek(SeekFrom::End(0))?;
+        Ok(Self::with_block_size(inner, len, budget_bytes, BLOCK_SIZE))
+    }
+
+    /// Cache `inner`, known to be `len` bytes long, in `block_size` blocks.
+    /// Sources where every read is expensive (such as a JS `readAt` callback)
+    /// use larger blocks than local files.
+    pub fn with_block_size(inner: R, len: u64, budget_bytes: usize, block_size: usize) -> Self {
+        let block_size = block_size.max(1);
+        Self {
+            inner,
+            position: 0,
+            len,
+            block_size,
+            budget_blocks: budget_bytes / block_size,
+            blocks: HashMap::new(),
+            tick: 0,
+            fetched_until: None,
+        }
+    }
+
+    fn load_block(&mut self, index: u64) -> io::Result<&CachedBlock> {
+        self.tick += 1;
+        let tick = self.tick;
+        if !self.blocks.contains_key(&index) {
+            self.fetch(index, tick)?;
+        }
+        let block = self.blocks.get_mut(&index).expect("block fetched above");
+        block.last_used = tick;
+        Ok(block)
+    }
+
+    /// Read block `index`, plus the blocks after it when the miss continues
+    /// the previous fetch, in one call to the source.
+    fn fetch(&mut self, index: u64, tick: u64) -> io::Result<()> {
+        let block_size = self.block_size as u64;
+        let start = index * block_size;
+        let blocks = if self.fetched_until == Some(start) {
+            READ_AHEAD_BLOCKS.min(self.budget_blocks)
+        } else {
+            1
+        };
+        let end = start
+            .saturating_add(blocks as u64 * block_size)
+            .min(self.len);
+        let mut data = vec![0; usize::try_from(end - start).unwrap_or(0)];
+        self.inner.seek(SeekFrom::Start(start))?;
+        self.inner.read_exact(&mut data)?;
+        profile::record(ProfileCounter::BytesRead, data.len() as u64);
+        self.fetched_until = Some(end);
+
+        for (offset, chunk) in (index..).zip(data.chunks(self.block_size)) {
+            self.insert(offset, chunk.to_vec(), tick);
+        }
+        Ok(())
+    }
+
+    fn insert(&mut self, index: u64, data: Vec<u8>, tick: u64) {
+        if !self.blocks.contains_key(&index)
+            && self.blocks.len() >= self.budget_blocks
+            && let Some(oldest) = self
+                .blocks
+                .iter()
+                .min_by_key(|(_, block)| block.last_used)
+                .map(|(index, _)| *index)
+        {
+            self.blocks.remove(&oldest);
+        }
+        self.blocks.insert(
+            index,
+            CachedBlock {
+                data,
+                last_used: tick,
+            },
+        );
+    }
+
+    /// Read at the current position without caching.
+    fn read_through(&mut self, buf: &mut [u8]) -> io::Result<usize> {
+        let remaining = usize::try_from(self.len - self.position).unwrap_or(usize::MAX);
+        let want = buf.len().min(remaining);
+        self.inner.seek(SeekFrom::Start(self.position))?;
+        let read = self.inner.read(&mut buf[..want])?;
+        profile::record(ProfileCounter::BytesRead, read as u64);
+        self.position += read as u64;
+        self.fetched_until = Some(self.position);
+        Ok(read)
+    }
+}
+
+impl<R: Read + Seek> Read for BlockCacheReader<R> {
+    fn read(&mut self, buf: &mut [u8]) -> io::Result<usize> {
+        if buf.is_empty() || self.position >= self.len {
+            return Ok(0);
+        }
+        let index = self.position / self.block_size as u64;
+        if self.budget_blocks == 0
+            || (buf.len() >= self.block_size && !self.blocks.contains_key(&index))
+        {
+            return self.read_through(buf);
+        }
+        let offset = usize::try_from(self.position % self.block_size as u64).unwrap_or(0);
+        let block = self.load_block(index)?;
+        let available = &block.data[offset.min(block.data.len())..];
+        let read = available.len().min(buf.len());
+        buf[..read].copy_from_slice(&available[..read]);
+        self.position += read as u64;
+        Ok(read)
+    }
+}
+
+impl<R: Read + Seek> Seek for BlockCacheReader<R> {
+    fn seek(&mut self, pos: SeekFrom) -> io::Result<u64> {
+        let target = match pos {
+            SeekFrom::Start(offset) => Some(offset),
+            SeekFrom::End(delta) => self.len.checked_add_signed(delta),
+            SeekFrom::Current(delta) => self.position.checked_add_signed(delta),
+        };
+        let target = target.ok_or_else(|| {
+            io::Error::new(
+                io::ErrorKind::InvalidInput,
+                "invalid seek to a negative or overflowing position",
+            )
+        })?;
+        self.position = target;
+        Ok(target)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::io::Cursor;
+
+    use super::*;
+
+    /// In-memory source that records every `(offset, len)` read it serves.
+    struct CountingSource {
+        data: Cursor<Vec<u8>>,
+        calls: Vec<(u64, usize)>,
+    }
+
+    impl Read for CountingSource {
+        fn read(&mut self, buf: &mut [u8]) -> io::Result<usize> {
+            self.calls.push((self.data.position(), buf.len()));
+            self.data.read(buf)
+        }
+    }
+
+    impl Seek for CountingSource {
+        fn seek(&mut self, pos: SeekFrom) -> io::Result<u64> {
+            self.data.seek(pos)
+        }
+    }
+
+    fn pattern(len: usize) -> Vec<u8> {
+        (0..len)
+            .map(|value| u8::try_from(value % 251).unwrap())
+            .collect()
+    }
+
+    /// Reader over `len` pattern bytes in 8-byte blocks.
+    fn counting_reader(len: usize, budget_blocks: usize) -> BlockCacheReader<CountingSource> {
+        let source = CountingSource {
+            data: Cursor::new(pattern(len)),
+            calls: Vec::new(),
+        };
+        BlockCacheReader::with_block_size(source, len as u64, budget_blocks * 8, 8)
+    }
+
+    #[test]
+    fn block_cache_reads_match_the_underlying_stream() {
+        let data = pattern(BLOCK_SIZE * 3 + 17);
+        let mut reader = BlockCacheReader::new(Cursor::new(data.clone()), BLOCK_SIZE * 2).unwrap();
+
+        let mut all = Vec::new();
+        reader.read_to_end(&mut all).unwrap();
+        assert_eq!(all, data);
+        assert!(reader.blocks.len() <= 2);
+
+        let start = BLOCK_SIZE as u64 - 3;
+        reader.seek(SeekFrom::Start(start)).unwrap();
+        let mut straddle = [0; 8];
+        reader.read_exact(&mut straddle).unwrap();
+        assert_eq!(straddle, data[BLOCK_SIZE - 3..BLOCK_SIZE + 5]);
+
+        reader.seek(SeekFrom::End(-2)).unwrap();
+        let mut tail = Vec::new();
+        reader.read_to_end(&mut tail).unwrap();
+        assert_eq!(tail, data[data.len() - 2..]);
+        let before_start = -i64::try_from(data.len()).unwrap() - 1;
+        assert!(reader.seek(SeekFrom::Current(before_start)).is_err());
+    }
+
+    #[test]
+    fn zero_budget_passes_reads_through() {
+        let mut reader = BlockCacheReader::new(Cursor::new(b"bioscript".to_vec()), 0).unwrap();
+        reader.seek(SeekFrom::Start(3)).unwrap();
+        let mut text = String::new();
+        reader.read_to_string(&mut text).unwrap();
+        assert_eq!(text, "script");
+        assert!(reader.blocks.is_empty());
+    }
+
+    #[test]
+    fn sequential_misses_read_ahead_and_seeks_do_not() {
+        let mut reader = counting_reader(64, 8);
+        let mut byte = [0u8; 1];
+        for expected in 0..64u8 {
+            reader.read_exact(&mut byte).unwrap();
+            assert_eq!(byte[0], expected);
+        }
+        assert_eq!(reader.read(&mut byte).unwrap(), 0);
+        assert_eq!(reader.inner.calls, vec![(0, 8), (8, 32), (40, 24)]);
+
+        reader.inner.calls.clear();
+        reader.seek(SeekFrom::Start(3)).unwrap();
+        reader.read_exact(&mut byte).unwrap();
+        assert_eq!(byte[0], 3);
+        assert!(reader.inner.calls.is_empty());
+    }
+
+    #[test]
+    fn least_recently_used_block_is_evicted() {
+        let mut reader = counting_reader(64, 2);
+        let mut byte = [0u8; 1];
+        for offset in [0, 32, 0, 48] {
+            reader.seek(SeekFrom::Start(offset)).unwrap();
+            reader.read_exact(&mut byte).unwrap();
+            assert_eq!(u64::from(byte[0]), offset);
+        }
+        assert!(reader.blocks.contains_key(&0));
+        assert!(!reader.blocks.contains_key(&4));
+        assert!(reader.blocks.contains_key(&6));
+    }
+
+    #[test]
+    fn large_reads_bypass_the_cache() {
+        let mut reader = counting_reader(20, 4);
+        let mut buf = [0u8; 16];
+        reader.read_exact(&mut buf).unwrap();
+        assert_eq!(buf[..], pattern(20)[..16]);
+        assert!(reader.blocks.is_empty());
+
+        let mut rest = Vec::new();
+        reader.read_to_end(&mut rest).unwrap();
+        assert_eq!(rest, pattern(20)[16..]);
+        reader.seek(SeekFrom::End(5)).unwrap();
+        assert_eq!(reader.read(&mut buf).unwrap(), 0);
+    }
+}
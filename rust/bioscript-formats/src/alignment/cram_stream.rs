@@ -12,7 +12,7 @@ use noodles::{
     },
 };
 
-use bioscript_core::{GenomicLocus, RuntimeError};
+use bioscript_core::{GenomicLocus, ProfileCounter, RuntimeError, profile};
 
 use super::{AlignmentOp, AlignmentOpKind, AlignmentRecord};
 
@@ -33,35 +33,12 @@ where
     R: Read + Seek,
     F: FnMut(AlignmentRecord) -> Result<bool, RuntimeError>,
 {
-    // Same idempotent-rewind rationale as `for_each_raw_cram_record_with_reader`
-    // — the CRAM header lives at offset 0; we must rewind before each call so
-    // callers can iterate over multiple loci with the same `IndexedReader`.
-    reader
-        .get_mut()
-        .seek(std::io::SeekFrom::Start(0))
-        .map_err(|err| RuntimeError::Io(format!("failed to rewind CRAM {label}: {err}")))?;
-    let header = reader
-        .read_header()
-        .map_err(|err| RuntimeError::Io(format!("failed to read CRAM header {label}: {err}")))?;
-
-    let region = build_region(&header, locus).ok_or_else(|| {
-        RuntimeError::Unsupported(format!(
-            "indexed CRAM does not contain contig {} for {}:{}-{}",
-            locus.chrom, locus.chrom, locus.start, locus.end
-        ))
-    })?;
-
-    let selected_containers = select_query_containers(reader.index(), &header, &region)?;
-
-    stream_selected_alignment_records(
-        label,
+    for_each_decoded_cram_record_with_reader_inner(
         reader,
-        &header,
-        &region,
-        locus.end,
-        &selected_containers,
+        label,
+        locus,
         allow_reference_md5_mismatch,
-        &mut on_record,
+        |_, alignment_record| on_record(alignment_record),
     )
 }
 
@@ -75,6 +52,29 @@ pub(crate) fn for_each_raw_cram_record_with_reader_inner<R, F>(
 where
     R: Read + Seek,
     F: FnMut(&cram::Record<'_>) -> Result<bool, RuntimeError>,
+{
+    for_each_decoded_cram_record_with_reader_inner(
+        reader,
+        label,
+        locus,
+        allow_reference_md5_mismatch,
+        |record, _| on_record(record),
+    )
+}
+
+/// Stream the records intersecting `locus`, each both raw (for base and
+/// quality lookups) and as the `AlignmentRecord` already decoded for the
+/// region test, so callers that need the CIGAR don't decode it again.
+pub(crate) fn for_each_decoded_cram_record_with_reader_inner<R, F>(
+    reader: &mut cram::io::indexed_reader::IndexedReader<R>,
+    label: &str,
+    locus: &GenomicLocus,
+    allow_reference_md5_mismatch: bool,
+    mut on_record: F,
+) -> Result<(), RuntimeError>
+where
+    R: Read + Seek,
+    F: FnMut(&cram::Record<'_>, AlignmentRecord) -> Result<bool, RuntimeError>,
 {
     // Re-seeks to position 0 before reading the header so this helper is
     // idempotent across repeated calls on the same indexed reader (e.g. a
@@ -89,12 +89,7 @@ where
         .read_header()
         .map_err(|err| RuntimeError::Io(format!("failed to read CRAM header {label}: {err}")))?;
 
-    let region = build_region(&header, locus).ok_or_else(|| {
-        RuntimeError::Unsupported(format!(
-            "indexed CRAM does not contain contig {} for {}:{}-{}",
-            locus.chrom, locus.chrom, locus.start, locus.end
-        ))
-    })?;
+    let region = build_region(&header, locus).ok_or_else(|| missing_contig(locus))?;
 
     let selected_containers = select_query_containers(reader.index(), &header, &region)?;
 
@@ -110,6 +105,13 @@ where
     )
 }
 
+pub(crate) fn missing_contig(locus: &GenomicLocus) -> RuntimeError {
+    RuntimeError::Unsupported(format!(
+        "indexed CRAM does not contain contig {} for {}:{}-{}",
+        locus.chrom, locus.chrom, locus.start, locus.end
+    ))
+}
+
 pub(crate) fn build_region(header: &sam::Header, locus: &GenomicLocus) -> Option<Region> {
     let chrom = resolve_reference_name(header, &locus.chrom)?;
     let start = Position::try_from(usize::try_from(locus.start).ok()?).ok()?;
@@ -155,35 +157,8 @@ pub(crate) fn select_query_containers(
         .collect())
 }
 
-fn stream_selected_alignment_records<R, F>(
-    label: &str,
-    reader: &mut cram::io::indexed_reader::IndexedReader<R>,
-    header: &sam::Header,
-    region: &Region,
-    locus_end: i64,
-    selected_containers: &[SelectedContainer],
-    allow_reference_md5_mismatch: bool,
-    on_record: &mut F,
-) -> Result<(), RuntimeError>
-where
-    R: Read + Seek,
-    F: FnMut(AlignmentRecord) -> Result<bool, RuntimeError>,
-{
-    stream_selected_cram_records(
-        label,
-        reader,
-        header,
-        region,
-        locus_end,
-        selected_containers,
-        allow_reference_md5_mismatch,
-        &mut |record| {
-            let alignment_record = build_alignment_record_from_cram(label, record)?;
-            on_record(alignment_record)
-        },
-    )
-}
-
+/// Stream the records of `selected_containers` that intersect `region`,
+/// handing each one over both raw and as its decoded `AlignmentRecord`.
 fn stream_selected_cram_records<R, F>(
     label: &str,
     reader: &mut cram::io::indexed_reader::IndexedReader<R>,
@@ -196,7 +171,7 @@ fn stream_selected_cram_records<R, F>(
 ) -> Result<(), RuntimeError>
 where
     R: Read + Seek,
-    F: FnMut(&cram::Record<'_>) -> Result<bool, RuntimeError>,
+    F: FnMut(&cram::Record<'_>, AlignmentRecord) -> Result<bool, RuntimeError>,
 {
     let interval = region.interval();
 
@@ -221,6 +196,7 @@ where
         if len == 0 {
             break;
         }
+        profile::record(ProfileCounter::ContainersDecoded, 1);
 
         let compression_header = container.compression_header().map_err(|err| {
             RuntimeError::Io(format!(
@@ -325,8 +301,9 @@ fn handle_decoded_cram_record<F>(
     on_record: &mut F,
 ) -> bool
 where
-    F: FnMut(&cram::Record<'_>) -> Result<bool, RuntimeError>,
+    F: FnMut(&cram::Record<'_>, AlignmentRecord) -> Result<bool, RuntimeError>,
 {
+    profile::record(ProfileCounter::RecordsDecoded, 1);
     let alignment_record = match build_alignment_record_from_cram(label, record) {
         Ok(record) => record,
         Err(err) => {
@@ -344,7 +321,7 @@ where
         return true;
     }
 
-    match on_record(record) {
+    match on_record(record, alignment_record) {
         Ok(true) => true,
         Ok(false) => {
             *stop = true;
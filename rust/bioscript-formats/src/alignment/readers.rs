@@ -106,8 +106,15 @@ pub fn parse_tbi_bytes(bytes: &[u8]) -> Result<tabix::Index, RuntimeError> {
 
 /// Generate a tabix index (`.tbi`) for an in-memory bgzipped VCF.
 pub fn generate_vcf_tbi_bytes(bytes: &[u8]) -> Result<Vec<u8>, RuntimeError> {
-    let cursor = Cursor::new(bytes);
-    let mut reader = vcf::io::Reader::new(bgzf::io::Reader::new(cursor));
+    generate_vcf_tbi_reader(Cursor::new(bytes))
+}
+
+/// Generate a tabix index (`.tbi`) from any sequential bgzipped VCF reader.
+pub fn generate_vcf_tbi_reader<R>(reader: R) -> Result<Vec<u8>, RuntimeError>
+where
+    R: Read,
+{
+    let mut reader = vcf::io::Reader::new(bgzf::io::Reader::new(reader));
     let header = reader
         .read_header()
         .map_err(|err| RuntimeError::Io(format!("failed to read VCF header: {err}")))?;
@@ -439,6 +446,39 @@ pub(crate) fn build_cram_indexed_reader_from_path(
     })
 }
 
+/// Open `path` for a backend's persistent reader over a shared reference
+/// `repository`: the CRAI index (from `--input-index`, else `<path>.crai`) is
+/// loaded once, and file reads go through a block cache bounded by
+/// `cache_bytes`.
+pub(crate) fn open_cached_cram_reader(
+    path: &Path,
+    options: &GenotypeLoadOptions,
+    repository: fasta::Repository,
+    cache_bytes: usize,
+) -> Result<super::CramFileReader, RuntimeError> {
+    let index_path = options.input_index.clone().unwrap_or_else(|| {
+        let mut default_path = path.as_os_str().to_owned();
+        default_path.push(".crai");
+        default_path.into()
+    });
+    let index = crai::fs::read(&index_path).map_err(|err| {
+        RuntimeError::Io(format!(
+            "failed to read CRAM index {} for {}: {err}",
+            index_path.display(),
+            path.display()
+        ))
+    })?;
+    let file = std::fs::File::open(path)
+        .and_then(|file| super::BlockCacheReader::new(file, cache_bytes))
+        .map_err(|err| {
+            RuntimeError::Io(format!(
+                "failed to open indexed CRAM {}: {err}",
+                path.display()
+            ))
+        })?;
+    build_cram_indexed_reader_from_reader(file, index, repository)
+}
+
 pub(crate) fn build_reference_repository(
     reference_file: &Path,
 ) -> Result<fasta::Repository, RuntimeError> {
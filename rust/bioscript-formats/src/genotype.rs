@@ -1,5 +1,3 @@
-use std::collections::HashMap;
-
 use bioscript_core::VariantObservation;
 
 mod alignment_bytes;
@@ -14,13 +12,18 @@ mod io;
 mod load;
 mod loaders;
 mod query;
+mod reader_slot;
+mod rsid_table;
+mod spec_liftover;
 mod types;
 mod vcf;
 mod vcf_tokens;
 
-pub use bam_backend::observe_bam_variant;
+pub use bam_backend::{observe_bam_variant, observe_bam_variants};
 pub(crate) use cache::{match_cached_observation, required_cache_miss};
-pub(crate) use common::{describe_query, normalize_genotype, variant_sort_key};
+pub(crate) use common::{
+    ScanCounts, describe_query, normalize_genotype, sweep_clusters, variant_sort_key,
+};
 pub use cram_backend::{
     observe_cram_deletion_with_reader, observe_cram_indel_with_reader, observe_cram_snp_with_reader,
 };
@@ -87,10 +90,8 @@ impl GenotypeStore {
         Self {
             backend: QueryBackend::RsidMap(RsidMapBackend {
                 format: GenotypeSourceFormat::Text,
-                values: HashMap::new(),
-                locus_values: HashMap::new(),
+                table: rsid_table::RsidTable::default(),
                 assembly: None,
-                source_lines: HashMap::new(),
             }),
         }
     }
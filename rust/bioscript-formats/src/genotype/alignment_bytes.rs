@@ -8,9 +8,10 @@ use noodles::cram;
 use crate::alignment;
 
 use super::cram_backend::choose_variant_locus;
+use super::reader_slot::ReaderPool;
 use super::types::{AlignmentBytesBackend, GenotypeSourceFormat};
 use super::{
-    bam_backend::observe_bam_variant, observe_cram_deletion_with_reader,
+    bam_backend::observe_bam_variants_parallel, observe_cram_deletion_with_reader,
     observe_cram_indel_with_reader, observe_cram_snp_with_reader, variant_sort_key,
 };
 
@@ -49,18 +50,22 @@ impl AlignmentBytesBackend {
         &self,
         variants: &[VariantSpec],
     ) -> Result<Vec<VariantObservation>, RuntimeError> {
-        let bai = alignment::parse_bai_bytes(&self.index)?;
-        let mut reader =
-            alignment::build_bam_indexed_reader_from_reader(Cursor::new(self.data.clone()), bai)?;
-
-        let mut indexed: Vec<(usize, &VariantSpec)> = variants.iter().enumerate().collect();
-        indexed.sort_by_cached_key(|(_, variant)| variant_sort_key(variant));
-
-        let mut results = vec![VariantObservation::default(); variants.len()];
-        for (idx, variant) in indexed {
-            results[idx] = observe_bam_variant(&mut reader, LABEL, variant)?;
-        }
-        Ok(results)
+        // Every worker reads the same borrowed payload through its own cursor.
+        // The readers borrow `self.data`, so the worker pool lives for this
+        // call only.
+        let open_reader = || {
+            let bai = alignment::parse_bai_bytes(&self.index)?;
+            alignment::build_bam_indexed_reader_from_reader(Cursor::new(self.data.as_slice()), bai)
+        };
+        let mut reader = open_reader()?;
+        observe_bam_variants_parallel(
+            &mut reader,
+            &ReaderPool::default(),
+            open_reader,
+            LABEL,
+            variants,
+            self.options.bam_lookup_workers,
+        )
     }
 
     fn lookup_cram(
@@ -6,16 +6,21 @@ use super::{
     types::{BcfBackend, DelimitedBackend, GenotypeSourceFormat, RsidMapBackend, VcfBackend},
 };
 
+/// Profiling label and `backend_name` for stores loaded from `format`.
+pub(super) fn format_backend_name(format: GenotypeSourceFormat) -> &'static str {
+    match format {
+        GenotypeSourceFormat::Text => "text",
+        GenotypeSourceFormat::Zip => "zip",
+        GenotypeSourceFormat::Vcf => "vcf",
+        GenotypeSourceFormat::Bcf => "bcf",
+        GenotypeSourceFormat::Cram => "cram",
+        GenotypeSourceFormat::Bam => "bam",
+    }
+}
+
 impl RsidMapBackend {
     pub(super) fn backend_name(&self) -> &'static str {
-        match self.format {
-            GenotypeSourceFormat::Text => "text",
-            GenotypeSourceFormat::Zip => "zip",
-            GenotypeSourceFormat::Vcf => "vcf",
-            GenotypeSourceFormat::Bcf => "bcf",
-            GenotypeSourceFormat::Cram => "cram",
-            GenotypeSourceFormat::Bam => "bam",
-        }
+        format_backend_name(self.format)
     }
 
     pub(super) fn lookup_variant(
@@ -26,7 +31,7 @@ impl RsidMapBackend {
         // best-effort fallback for aligned inputs whose variants can't be
         // genotyped here) can never resolve anything — return missing
         // rather than refusing a coordinate lookup over assembly ambiguity.
-        if self.values.is_empty() && self.locus_values.is_empty() {
+        if self.table.is_empty() {
             return Ok(VariantObservation {
                 backend: self.backend_name().to_owned(),
                 evidence: vec!["no genotype data available".to_owned()],
@@ -34,18 +39,18 @@ impl RsidMapBackend {
             });
         }
         for rsid in &variant.rsids {
-            if let Some(value) = self.values.get(rsid) {
+            if let Some(row) = self.table.by_rsid(rsid) {
                 let mut evidence = vec![format!("resolved by rsid {rsid}")];
                 // Mirror DelimitedBackend's `| source line: …` evidence so
                 // wasm-side from_bytes loads produce byte-identical reports
                 // to the CLI's path-backed DelimitedBackend.
-                if let Some(source) = self.source_lines.get(rsid) {
+                if let Some(source) = row.source_line {
                     evidence.push(format!("source line: {source}"));
                 }
                 return Ok(VariantObservation {
                     backend: self.backend_name().to_owned(),
                     matched_rsid: Some(rsid.clone()),
-                    genotype: Some(value.clone()),
+                    genotype: Some(row.genotype.to_owned()),
                     evidence,
                     ..VariantObservation::default()
                 });
@@ -53,18 +58,15 @@ impl RsidMapBackend {
         }
 
         if let Some(locus) = delimited_locus_for_assembly(variant, self.assembly)
-            && let Some((value, matched_rsid, source)) = self.locus_values.get(&(
-                locus.chrom.trim_start_matches("chr").to_ascii_lowercase(),
-                locus.start,
-            ))
+            && let Some(row) = self.table.by_locus(&locus.chrom, locus.start)
         {
             return Ok(VariantObservation {
                 backend: self.backend_name().to_owned(),
-                matched_rsid: matched_rsid.clone(),
-                genotype: Some(value.clone()),
+                matched_rsid: row.rsid,
+                genotype: Some(row.genotype.to_owned()),
                 evidence: vec![
                     format!("resolved by locus {}:{}", locus.chrom, locus.start),
-                    format!("source line: {source}"),
+                    format!("source line: {}", row.source_line.unwrap_or_default()),
                 ],
                 ..VariantObservation::default()
             });
@@ -113,14 +115,7 @@ pub(crate) fn delimited_locus_for_assembly(
 
 impl DelimitedBackend {
     pub(super) fn backend_name(&self) -> &'static str {
-        match self.format {
-            GenotypeSourceFormat::Text => "text",
-            GenotypeSourceFormat::Zip => "zip",
-            GenotypeSourceFormat::Vcf => "vcf",
-            GenotypeSourceFormat::Bcf => "bcf",
-            GenotypeSourceFormat::Cram => "cram",
-            GenotypeSourceFormat::Bam => "bam",
-        }
+        format_backend_name(self.format)
     }
 
     pub(super) fn get(&self, rsid: &str) -> Result<Option<String>, RuntimeError> {
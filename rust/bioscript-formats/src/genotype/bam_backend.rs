@@ -1,16 +1,8 @@
-use std::{
-    collections::{BTreeMap, BTreeSet},
-    fs::File,
-    io::{Read, Seek},
-};
+use std::io::{Read, Seek};
 
-use bioscript_core::{
-    Assembly, GenomicLocus, RuntimeError, VariantKind, VariantObservation, VariantSpec,
-};
+use bioscript_core::{RuntimeError, VariantObservation, VariantSpec};
 
-use crate::alignment;
-
-use super::{types::BamBackend, variant_sort_key};
+use super::{reader_slot::reader_cache_bytes, types::BamBackend};
 
 impl BamBackend {
     pub(crate) fn backend_name(&self) -> &'static str {
@@ -36,455 +28,55 @@ impl BamBackend {
                 self.path.display()
             ))
         })?;
-        let index_bytes = std::fs::read(index_path).map_err(|err| {
-            RuntimeError::Io(format!(
-                "failed to read BAM index {}: {err}",
-                index_path.display()
-            ))
-        })?;
-        let bai = alignment::parse_bai_bytes(&index_bytes)?;
-        let file = File::open(&self.path).map_err(|err| {
-            RuntimeError::Io(format!("failed to open BAM {}: {err}", self.path.display()))
-        })?;
-        let mut reader = alignment::build_bam_indexed_reader_from_reader(file, bai)?;
         let label = self.path.display().to_string();
-
-        let mut indexed: Vec<(usize, &VariantSpec)> = variants.iter().enumerate().collect();
-        indexed.sort_by_cached_key(|(_, variant)| variant_sort_key(variant));
-
-        let mut results = vec![VariantObservation::default(); variants.len()];
-        for (idx, variant) in indexed {
-            results[idx] = observe_bam_variant(&mut reader, &label, variant)?;
-        }
-        Ok(results)
-    }
-}
-
-pub fn observe_bam_variant<R: Read + Seek>(
-    reader: &mut noodles::bam::io::indexed_reader::IndexedReader<noodles::bgzf::io::Reader<R>>,
-    label: &str,
-    variant: &VariantSpec,
-) -> Result<VariantObservation, RuntimeError> {
-    let assembly = variant
-        .grch38
-        .as_ref()
-        .map(|_| Assembly::Grch38)
-        .or_else(|| variant.grch37.as_ref().map(|_| Assembly::Grch37));
-    let locus = variant
-        .grch38
-        .as_ref()
-        .or(variant.grch37.as_ref())
-        .ok_or_else(|| {
-            RuntimeError::Io(format!(
-                "variant {} has no GRCh37/GRCh38 locus",
-                variant.rsids.first().map_or("variant", String::as_str)
-            ))
-        })?;
-    let locus = GenomicLocus {
-        chrom: locus.chrom.clone(),
-        start: locus.start,
-        end: locus.end,
-    };
-    match variant.kind.unwrap_or(VariantKind::Snp) {
-        VariantKind::Snp => {
-            let ref_char = variant
-                .reference
-                .as_deref()
-                .and_then(|s| s.chars().next())
-                .ok_or_else(|| {
-                    RuntimeError::Io(format!(
-                        "variant {} missing reference allele",
-                        variant.rsids.first().map_or("variant", String::as_str)
-                    ))
-                })?;
-            let alt_char = variant
-                .alternate
-                .as_deref()
-                .and_then(|s| s.chars().next())
-                .ok_or_else(|| {
-                    RuntimeError::Io(format!(
-                        "variant {} missing alternate allele",
-                        variant.rsids.first().map_or("variant", String::as_str)
-                    ))
-                })?;
-            observe_bam_snp_with_reader(
-                reader,
-                label,
-                &locus,
-                ref_char,
-                alt_char,
-                &variant.observed_alternates,
-                variant.rsids.first().cloned(),
-                assembly,
-            )
-        }
-        VariantKind::Deletion => {
-            observe_bam_deletion_with_reader(reader, label, &locus, variant, assembly)
-        }
-        VariantKind::Insertion | VariantKind::Indel => {
-            let reference = variant.reference.as_deref().ok_or_else(|| {
-                RuntimeError::Io(format!(
-                    "variant {} missing reference allele",
-                    variant.rsids.first().map_or("variant", String::as_str)
-                ))
-            })?;
-            let alternate = variant.alternate.as_deref().ok_or_else(|| {
-                RuntimeError::Io(format!(
-                    "variant {} missing alternate allele",
-                    variant.rsids.first().map_or("variant", String::as_str)
-                ))
-            })?;
-            let alternate_lengths = indel_alternate_lengths(variant, alternate);
-            observe_bam_indel_with_reader(
-                reader,
-                label,
-                &locus,
-                reference,
-                alternate,
-                &alternate_lengths,
-                variant.rsids.first().cloned(),
-                assembly,
-            )
-        }
-        other @ VariantKind::Other => Err(RuntimeError::Io(format!(
-            "variant {} kind {:?} not supported on BAM via wasm",
-            variant.rsids.first().map_or("variant", String::as_str),
-            other
-        ))),
-    }
-}
-
-fn observe_bam_snp_with_reader<R: Read + Seek>(
-    reader: &mut noodles::bam::io::indexed_reader::IndexedReader<noodles::bgzf::io::Reader<R>>,
-    label: &str,
-    locus: &GenomicLocus,
-    reference: char,
-    mut alternate: char,
-    observed_alternates: &[String],
-    matched_rsid: Option<String>,
-    assembly: Option<Assembly>,
-) -> Result<VariantObservation, RuntimeError> {
-    use noodles::core::Position;
-    let mut counts = BamSnpPileupCounts::default();
-    let header = read_bam_header(reader, label)?;
-    let region = bam_region(&header, locus)?;
-    let target_position = Position::try_from(usize::try_from(locus.start).map_err(|_| {
-        RuntimeError::InvalidArguments("SNP locus start is out of range".to_owned())
-    })?)
-    .map_err(|_| RuntimeError::InvalidArguments("SNP locus start is out of range".to_owned()))?;
-
-    let query = reader
-        .query(&header, &region)
-        .map_err(|err| RuntimeError::Io(format!("failed to query BAM {label}: {err}")))?;
-    for result in query.records() {
-        let record = result
-            .map_err(|err| RuntimeError::Io(format!("failed to read BAM record {label}: {err}")))?;
-        let flags = record.flags();
-        if flags.is_unmapped() {
-            counts.filtered_unmapped += 1;
-            continue;
-        }
-        if flags.is_secondary() {
-            counts.filtered_secondary += 1;
-            continue;
-        }
-        if flags.is_qc_fail() {
-            counts.filtered_qc_fail += 1;
-            continue;
-        }
-        if flags.is_duplicate() {
-            counts.filtered_duplicate += 1;
-            continue;
-        }
-        if flags.is_segmented() && !flags.is_properly_segmented() {
-            counts.filtered_improper_pair += 1;
-            continue;
-        }
-
-        let Some((base, base_quality)) =
-            bam_base_quality_at_reference_position(&record, target_position)?
-        else {
-            continue;
+        // The session and worker readers share one parsed BAI and split the
+        // block-cache budget.
+        let cache_bytes = reader_cache_bytes(
+            self.options.alignment_cache_bytes,
+            self.options.bam_lookup_workers,
+        );
+        let open = || {
+            let bai = self
+                .index
+                .with(|| read_bai(index_path), |bai| Ok(bai.clone()))?;
+            open_bam_reader(&self.path, bai, cache_bytes)
         };
-        let normalized_base = normalize_pileup_base(base);
-        let is_reverse = flags.is_reverse_complemented();
-        if let Some(base) = normalized_base {
-            counts.raw_depth += 1;
-            *counts.raw_base_counts.entry(base.to_string()).or_insert(0) += 1;
-            let strand_counts = if is_reverse {
-                &mut counts.raw_reverse_counts
-            } else {
-                &mut counts.raw_forward_counts
-            };
-            *strand_counts.entry(base.to_string()).or_insert(0) += 1;
-            if base == reference {
-                counts.raw_ref_count += 1;
-            } else if base == alternate {
-                counts.raw_alt_count += 1;
-            }
-        }
-
-        if base_quality < 13 {
-            counts.filtered_low_base_quality += 1;
-            continue;
-        }
 
-        let Some(base) = normalized_base else {
-            counts.filtered_non_acgt += 1;
-            continue;
-        };
-
-        counts.filtered_depth += 1;
-        *counts
-            .filtered_base_counts
-            .entry(base.to_string())
-            .or_insert(0) += 1;
-        if base == reference {
-            counts.filtered_ref_count += 1;
-        } else if base == alternate {
-            counts.filtered_alt_count += 1;
-        }
-    }
-
-    alternate = select_observed_snp_alternate(
-        reference,
-        alternate,
-        observed_alternates,
-        &counts.filtered_base_counts,
-        &counts.raw_base_counts,
-    );
-    recount_bam_snp_counts(&mut counts, reference, alternate);
-    let ref_count = counts.filtered_ref_count;
-    let alt_count = counts.filtered_alt_count;
-    let depth = counts.filtered_depth;
-    let evidence = counts.evidence_lines(
-        &format!("{}:{}-{}", locus.chrom, locus.start, locus.end),
-        locus.start,
-    );
-    Ok(VariantObservation {
-        backend: "bam".to_owned(),
-        matched_rsid,
-        assembly,
-        genotype: infer_snp_genotype(reference, alternate, ref_count, alt_count, depth),
-        ref_count: Some(ref_count),
-        alt_count: Some(alt_count),
-        depth: Some(depth),
-        raw_counts: counts.raw_base_counts,
-        decision: Some(describe_snp_decision_rule(
-            reference, alternate, ref_count, alt_count, depth,
-        )),
-        evidence,
-    })
-}
-
-fn select_observed_snp_alternate(
-    reference: char,
-    preferred_alternate: char,
-    observed_alternates: &[String],
-    filtered_base_counts: &BTreeMap<String, u32>,
-    raw_base_counts: &BTreeMap<String, u32>,
-) -> char {
-    let preferred_alternate = preferred_alternate.to_ascii_uppercase();
-    let reference = reference.to_ascii_uppercase();
-    let mut candidates = BTreeSet::from([preferred_alternate]);
-    candidates.extend(
-        observed_alternates
-            .iter()
-            .filter_map(|alt| alt.trim().chars().next())
-            .map(|alt| alt.to_ascii_uppercase())
-            .filter(|alt| *alt != reference),
-    );
-    candidates
-        .into_iter()
-        .max_by_key(|candidate| {
-            let key = candidate.to_string();
-            (
-                filtered_base_counts.get(&key).copied().unwrap_or(0),
-                raw_base_counts.get(&key).copied().unwrap_or(0),
-                u8::from(*candidate == preferred_alternate),
+        self.reader.with(&open, |reader| {
+            observe_bam_variants_parallel(
+                reader,
+                &self.worker_readers,
+                &open,
+                &label,
+                variants,
+                self.options.bam_lookup_workers,
             )
         })
-        .unwrap_or(preferred_alternate)
-}
-
-fn recount_bam_snp_counts(counts: &mut BamSnpPileupCounts, reference: char, alternate: char) {
-    let reference = reference.to_ascii_uppercase().to_string();
-    let alternate = alternate.to_ascii_uppercase().to_string();
-    counts.filtered_ref_count = counts
-        .filtered_base_counts
-        .get(&reference)
-        .copied()
-        .unwrap_or(0);
-    counts.filtered_alt_count = counts
-        .filtered_base_counts
-        .get(&alternate)
-        .copied()
-        .unwrap_or(0);
-    counts.raw_ref_count = counts.raw_base_counts.get(&reference).copied().unwrap_or(0);
-    counts.raw_alt_count = counts.raw_base_counts.get(&alternate).copied().unwrap_or(0);
-}
-
-fn observe_bam_deletion_with_reader<R: Read + Seek>(
-    reader: &mut noodles::bam::io::indexed_reader::IndexedReader<noodles::bgzf::io::Reader<R>>,
-    label: &str,
-    locus: &GenomicLocus,
-    variant: &VariantSpec,
-    assembly: Option<Assembly>,
-) -> Result<VariantObservation, RuntimeError> {
-    let deletion_length = variant.deletion_length.ok_or_else(|| {
-        RuntimeError::InvalidArguments("deletion variant requires deletion_length".to_owned())
-    })?;
-    let reference = variant.reference.clone().unwrap_or_else(|| "I".to_owned());
-    let alternate = variant.alternate.clone().unwrap_or_else(|| "D".to_owned());
-    let anchor_pos = locus.start.saturating_sub(1);
-    let anchor_locus = GenomicLocus {
-        chrom: locus.chrom.clone(),
-        start: anchor_pos,
-        end: anchor_pos,
-    };
-
-    let mut alt_count = 0u32;
-    let mut ref_count = 0u32;
-    let mut depth = 0u32;
-
-    let header = read_bam_header(reader, label)?;
-    let region = bam_region(&header, &anchor_locus)?;
-    let query = reader
-        .query(&header, &region)
-        .map_err(|err| RuntimeError::Io(format!("failed to query BAM {label}: {err}")))?;
-    for result in query.records() {
-        let record = result
-            .map_err(|err| RuntimeError::Io(format!("failed to read BAM record {label}: {err}")))?;
-        let alignment_record = bam_alignment_record(label, &record)?;
-        if alignment_record.is_unmapped || !spans_position(&alignment_record, anchor_pos) {
-            continue;
-        }
-        depth += 1;
-        match indel_at_anchor(&alignment_record, anchor_pos) {
-            Some((alignment::AlignmentOpKind::Deletion, len)) if len == deletion_length => {
-                alt_count += 1;
-            }
-            _ => ref_count += 1,
-        }
     }
-
-    Ok(VariantObservation {
-        backend: "bam".to_owned(),
-        matched_rsid: variant.rsids.first().cloned(),
-        assembly,
-        genotype: infer_copy_number_genotype(&reference, &alternate, ref_count, alt_count, depth),
-        ref_count: Some(ref_count),
-        alt_count: Some(alt_count),
-        depth: Some(depth),
-        raw_counts: BTreeMap::new(),
-        decision: Some(describe_copy_number_decision_rule(
-            &reference, &alternate, ref_count, alt_count, depth,
-        )),
-        evidence: vec![format!(
-            "observed BAM deletion anchor {}:{} len={} depth={} ref_count={} alt_count={}",
-            locus.chrom, anchor_pos, deletion_length, depth, ref_count, alt_count
-        )],
-    })
 }
 
-fn observe_bam_indel_with_reader<R: Read + Seek>(
+/// Observe a single variant; batches should use one `observe_bam_variants`
+/// call so nearby variants share their read pass.
+pub fn observe_bam_variant<R: Read + Seek>(
     reader: &mut noodles::bam::io::indexed_reader::IndexedReader<noodles::bgzf::io::Reader<R>>,
     label: &str,
-    locus: &GenomicLocus,
-    reference: &str,
-    alternate: &str,
-    alternate_lengths: &[usize],
-    matched_rsid: Option<String>,
-    assembly: Option<Assembly>,
+    variant: &VariantSpec,
 ) -> Result<VariantObservation, RuntimeError> {
-    let mut alt_count = 0u32;
-    let mut ref_count = 0u32;
-    let mut depth = 0u32;
-    let mut matching_alt_lengths = std::collections::BTreeSet::new();
-
-    let header = read_bam_header(reader, label)?;
-    let region = bam_region(&header, locus)?;
-    let query = reader
-        .query(&header, &region)
-        .map_err(|err| RuntimeError::Io(format!("failed to query BAM {label}: {err}")))?;
-    for result in query.records() {
-        let record = result
-            .map_err(|err| RuntimeError::Io(format!("failed to read BAM record {label}: {err}")))?;
-        let alignment_record = bam_alignment_record(label, &record)?;
-        if alignment_record.is_unmapped || !record_overlaps_locus(&alignment_record, locus) {
-            continue;
-        }
-        let classification = classify_expected_indel_lengths(
-            &alignment_record,
-            locus,
-            reference.len(),
-            alternate_lengths,
-        )?;
-        if !classification.covering {
-            continue;
-        }
-        depth += 1;
-        if classification.matches_alt {
-            alt_count += 1;
-            matching_alt_lengths.insert(classification.observed_len);
-        } else if classification.reference_like {
-            ref_count += 1;
-        }
-    }
-
-    let evidence_label = if matching_alt_lengths.is_empty() {
-        "none".to_owned()
-    } else {
-        matching_alt_lengths
-            .into_iter()
-            .map(|len| len.to_string())
-            .collect::<Vec<_>>()
-            .join(",")
-    };
-
-    Ok(VariantObservation {
-        backend: "bam".to_owned(),
-        matched_rsid,
-        assembly,
-        genotype: infer_copy_number_genotype(reference, alternate, ref_count, alt_count, depth),
-        ref_count: Some(ref_count),
-        alt_count: Some(alt_count),
-        depth: Some(depth),
-        raw_counts: BTreeMap::new(),
-        decision: Some(describe_copy_number_decision_rule(
-            reference, alternate, ref_count, alt_count, depth,
-        )),
-        evidence: vec![format!(
-            "observed BAM indel at {}:{}-{} depth={} ref_count={} alt_count={} matching_alt_lengths={}",
-            locus.chrom, locus.start, locus.end, depth, ref_count, alt_count, evidence_label
-        )],
-    })
-}
-
-fn indel_alternate_lengths(variant: &VariantSpec, fallback_alternate: &str) -> Vec<usize> {
-    let mut lengths = variant
-        .observed_alternates
-        .iter()
-        .map(String::len)
-        .filter(|len| *len > 0)
-        .collect::<Vec<_>>();
-    if lengths.is_empty() {
-        lengths.push(fallback_alternate.len());
-    }
-    lengths.sort_unstable();
-    lengths.dedup();
-    lengths
+    let mut results = observe_bam_variants(reader, label, std::slice::from_ref(variant))?;
+    Ok(results.pop().unwrap_or_default())
 }
 
 #[path = "bam_backend/pileup.rs"]
 mod pileup;
 #[path = "bam_backend/query.rs"]
 mod query;
-
-use pileup::{
-    BamSnpPileupCounts, bam_alignment_record, bam_base_quality_at_reference_position,
-    classify_expected_indel_lengths, describe_copy_number_decision_rule,
-    describe_snp_decision_rule, indel_at_anchor, infer_copy_number_genotype, infer_snp_genotype,
-    normalize_pileup_base, record_overlaps_locus, spans_position,
-};
-use query::{bam_region, read_bam_header};
+#[path = "bam_backend/sites.rs"]
+mod sites;
+#[path = "bam_backend/sweep.rs"]
+mod sweep;
+#[path = "bam_backend/workers.rs"]
+mod workers;
+
+use query::{open_bam_reader, read_bai};
+pub use sweep::observe_bam_variants;
+pub(crate) use workers::observe_bam_variants_parallel;
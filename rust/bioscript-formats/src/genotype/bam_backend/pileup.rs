@@ -1,7 +1,7 @@
-use std::collections::BTreeMap;
+use std::collections::{BTreeMap, BTreeSet};
 
 use crate::alignment::{AlignmentOp, AlignmentOpKind, AlignmentRecord};
-use bioscript_core::{GenomicLocus, RuntimeError};
+use bioscript_core::{GenomicLocus, RuntimeError, VariantSpec};
 
 pub(super) fn bam_base_quality_at_reference_position(
     record: &noodles::bam::Record,
@@ -409,3 +409,72 @@ pub(super) fn describe_copy_number_decision_rule(
         "copy-number genotype rule: alt_fraction={alt_fraction:.3} with thresholds ref<=0.200, het=(0.200,0.800), alt>=0.800; counts alt={alt_count} depth={depth} for {reference}->{alternate}"
     )
 }
+
+pub(super) fn select_observed_snp_alternate(
+    reference: char,
+    preferred_alternate: char,
+    observed_alternates: &[String],
+    filtered_base_counts: &BTreeMap<String, u32>,
+    raw_base_counts: &BTreeMap<String, u32>,
+) -> char {
+    let preferred_alternate = preferred_alternate.to_ascii_uppercase();
+    let reference = reference.to_ascii_uppercase();
+    let mut candidates = BTreeSet::from([preferred_alternate]);
+    candidates.extend(
+        observed_alternates
+            .iter()
+            .filter_map(|alt| alt.trim().chars().next())
+            .map(|alt| alt.to_ascii_uppercase())
+            .filter(|alt| *alt != reference),
+    );
+    candidates
+        .into_iter()
+        .max_by_key(|candidate| {
+            let key = candidate.to_string();
+            (
+                filtered_base_counts.get(&key).copied().unwrap_or(0),
+                raw_base_counts.get(&key).copied().unwrap_or(0),
+                u8::from(*candidate == preferred_alternate),
+            )
+        })
+        .unwrap_or(preferred_alternate)
+}
+
+pub(super) fn recount_bam_snp_counts(
+    counts: &mut BamSnpPileupCounts,
+    reference: char,
+    alternate: char,
+) {
+    let reference = reference.to_ascii_uppercase().to_string();
+    let alternate = alternate.to_ascii_uppercase().to_string();
+    counts.filtered_ref_count = counts
+        .filtered_base_counts
+        .get(&reference)
+        .copied()
+        .unwrap_or(0);
+    counts.filtered_alt_count = counts
+        .filtered_base_counts
+        .get(&alternate)
+        .copied()
+        .unwrap_or(0);
+    counts.raw_ref_count = counts.raw_base_counts.get(&reference).copied().unwrap_or(0);
+    counts.raw_alt_count = counts.raw_base_counts.get(&alternate).copied().unwrap_or(0);
+}
+
+pub(super) fn indel_alternate_lengths(
+    variant: &VariantSpec,
+    fallback_alternate: &str,
+) -> Vec<usize> {
+    let mut lengths = variant
+        .observed_alternates
+        .iter()
+        .map(String::len)
+        .filter(|len| *len > 0)
+        .collect::<Vec<_>>();
+    if lengths.is_empty() {
+        lengths.push(fallback_alternate.len());
+    }
+    lengths.sort_unstable();
+    lengths.dedup();
+    lengths
+}
@@ -1,6 +1,37 @@
-use std::io::{Read, Seek};
+use std::{
+    fs::File,
+    io::{Read, Seek},
+    path::Path,
+};
 
-use bioscript_core::{GenomicLocus, RuntimeError};
+use bioscript_core::{GenomicLocus, ProfileCounter, RuntimeError, profile};
+use noodles::bam;
+
+use crate::alignment::{self, BamFileReader, BlockCacheReader};
+
+/// Read and parse the BAI at `index_path`.
+pub(super) fn read_bai(index_path: &Path) -> Result<bam::bai::Index, RuntimeError> {
+    let index_bytes = std::fs::read(index_path).map_err(|err| {
+        RuntimeError::Io(format!(
+            "failed to read BAM index {}: {err}",
+            index_path.display()
+        ))
+    })?;
+    alignment::parse_bai_bytes(&index_bytes)
+}
+
+/// Open a persistent BAM reader over an already parsed `bai`, reading BGZF
+/// blocks through a cache bounded by `cache_bytes`.
+pub(super) fn open_bam_reader(
+    path: &Path,
+    bai: bam::bai::Index,
+    cache_bytes: usize,
+) -> Result<BamFileReader, RuntimeError> {
+    let file = File::open(path)
+        .and_then(|file| BlockCacheReader::new(file, cache_bytes))
+        .map_err(|err| RuntimeError::Io(format!("failed to open BAM {}: {err}", path.display())))?;
+    alignment::build_bam_indexed_reader_from_reader(file, bai)
+}
 
 pub(super) fn read_bam_header<R: Read + Seek>(
     reader: &mut noodles::bam::io::indexed_reader::IndexedReader<noodles::bgzf::io::Reader<R>>,
@@ -19,15 +50,25 @@ pub(super) fn bam_region(
     header: &noodles::sam::Header,
     locus: &GenomicLocus,
 ) -> Result<noodles::core::Region, RuntimeError> {
-    let chrom = resolve_bam_reference_name(header, &locus.chrom).ok_or_else(|| {
+    let chrom = bam_reference_name(header, locus)?;
+    profile::record(ProfileCounter::IndexQueries, 1);
+    format!("{chrom}:{}-{}", locus.start, locus.end)
+        .parse()
+        .map_err(|err| RuntimeError::Io(format!("invalid BAM query region: {err}")))
+}
+
+/// Name `locus.chrom` has in the BAM header, trying `chr`-prefixed and
+/// unprefixed spellings.
+pub(super) fn bam_reference_name(
+    header: &noodles::sam::Header,
+    locus: &GenomicLocus,
+) -> Result<String, RuntimeError> {
+    resolve_bam_reference_name(header, &locus.chrom).ok_or_else(|| {
         RuntimeError::Unsupported(format!(
             "indexed BAM does not contain contig {} for {}:{}-{}",
             locus.chrom, locus.chrom, locus.start, locus.end
         ))
-    })?;
-    format!("{chrom}:{}-{}", locus.start, locus.end)
-        .parse()
-        .map_err(|err| RuntimeError::Io(format!("invalid BAM query region: {err}")))
+    })
 }
 
 fn resolve_bam_reference_name(header: &noodles::sam::Header, chrom: &str) -> Option<String> {
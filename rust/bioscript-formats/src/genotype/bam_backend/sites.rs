@@ -0,0 +1,479 @@
+use std::collections::{BTreeMap, BTreeSet};
+
+use bioscript_core::{
+    Assembly, GenomicLocus, RuntimeError, VariantKind, VariantObservation, VariantSpec,
+};
+use noodles::core::Position;
+
+use crate::alignment::{AlignmentOpKind, AlignmentRecord};
+
+use super::pileup::{
+    BamSnpPileupCounts, bam_base_quality_at_reference_position, classify_expected_indel_lengths,
+    describe_copy_number_decision_rule, describe_snp_decision_rule, indel_alternate_lengths,
+    indel_at_anchor, infer_copy_number_genotype, infer_snp_genotype, normalize_pileup_base,
+    record_overlaps_locus, recount_bam_snp_counts, select_observed_snp_alternate, spans_position,
+};
+
+/// One variant's pileup state during a BAM sweep.
+///
+/// `window` is the region a standalone lookup of this variant would query;
+/// the sweep feeds the site every record that query would have returned, so
+/// the finished observation does not depend on which other variants shared
+/// the read pass.
+pub(super) struct BamSite {
+    pub(super) window: GenomicLocus,
+    accumulator: SiteAccumulator,
+}
+
+enum SiteAccumulator {
+    Snp(SnpSite),
+    Deletion(DeletionSite),
+    Indel(IndelSite),
+}
+
+struct SnpSite {
+    locus: GenomicLocus,
+    reference: char,
+    alternate: char,
+    observed_alternates: Vec<String>,
+    matched_rsid: Option<String>,
+    assembly: Option<Assembly>,
+    target_position: Position,
+    counts: BamSnpPileupCounts,
+}
+
+struct DeletionSite {
+    locus: GenomicLocus,
+    deletion_length: usize,
+    reference: String,
+    alternate: String,
+    anchor_pos: i64,
+    matched_rsid: Option<String>,
+    assembly: Option<Assembly>,
+    ref_count: u32,
+    alt_count: u32,
+    depth: u32,
+}
+
+struct IndelSite {
+    locus: GenomicLocus,
+    reference: String,
+    alternate: String,
+    alternate_lengths: Vec<usize>,
+    matched_rsid: Option<String>,
+    assembly: Option<Assembly>,
+    ref_count: u32,
+    alt_count: u32,
+    depth: u32,
+    matching_alt_lengths: BTreeSet<usize>,
+}
+
+impl BamSite {
+    pub(super) fn new(variant: &VariantSpec) -> Result<Self, RuntimeError> {
+        let assembly = variant
+            .grch38
+            .as_ref()
+            .map(|_| Assembly::Grch38)
+            .or_else(|| variant.grch37.as_ref().map(|_| Assembly::Grch37));
+        let locus = variant
+            .grch38
+            .as_ref()
+            .or(variant.grch37.as_ref())
+            .ok_or_else(|| {
+                RuntimeError::Io(format!(
+                    "variant {} has no GRCh37/GRCh38 locus",
+                    variant_label(variant)
+                ))
+            })?;
+        let locus = GenomicLocus {
+            chrom: locus.chrom.clone(),
+            start: locus.start,
+            end: locus.end,
+        };
+        match variant.kind.unwrap_or(VariantKind::Snp) {
+            VariantKind::Snp => SnpSite::new(variant, locus, assembly).map(|site| Self {
+                window: site.locus.clone(),
+                accumulator: SiteAccumulator::Snp(site),
+            }),
+            VariantKind::Deletion => DeletionSite::new(variant, locus, assembly).map(|site| Self {
+                window: GenomicLocus {
+                    chrom: site.locus.chrom.clone(),
+                    start: site.anchor_pos,
+                    end: site.anchor_pos,
+                },
+                accumulator: SiteAccumulator::Deletion(site),
+            }),
+            VariantKind::Insertion | VariantKind::Indel => IndelSite::new(variant, locus, assembly)
+                .map(|site| Self {
+                    window: site.locus.clone(),
+                    accumulator: SiteAccumulator::Indel(site),
+                }),
+            other @ VariantKind::Other => Err(RuntimeError::Io(format!(
+                "variant {} kind {:?} not supported on BAM via wasm",
+                variant_label(variant),
+                other
+            ))),
+        }
+    }
+
+    /// Deletion and indel evidence is read from the decoded CIGAR; SNP
+    /// pileups read the raw record directly.
+    pub(super) fn needs_alignment(&self) -> bool {
+        !matches!(self.accumulator, SiteAccumulator::Snp(_))
+    }
+
+    /// Feed one record that overlaps `window`. `alignment` is the decoded
+    /// form of `record` and is present whenever `needs_alignment` is true.
+    pub(super) fn observe(
+        &mut self,
+        record: &noodles::bam::Record,
+        alignment: Option<&AlignmentRecord>,
+    ) -> Result<(), RuntimeError> {
+        match (&mut self.accumulator, alignment) {
+            (SiteAccumulator::Snp(site), _) => site.observe(record),
+            (SiteAccumulator::Deletion(site), Some(alignment)) => {
+                site.observe(alignment);
+                Ok(())
+            }
+            (SiteAccumulator::Indel(site), Some(alignment)) => site.observe(alignment),
+            (SiteAccumulator::Deletion(_) | SiteAccumulator::Indel(_), None) => Ok(()),
+        }
+    }
+
+    pub(super) fn finish(self) -> VariantObservation {
+        match self.accumulator {
+            SiteAccumulator::Snp(site) => site.finish(),
+            SiteAccumulator::Deletion(site) => site.finish(),
+            SiteAccumulator::Indel(site) => site.finish(),
+        }
+    }
+}
+
+impl SnpSite {
+    fn new(
+        variant: &VariantSpec,
+        locus: GenomicLocus,
+        assembly: Option<Assembly>,
+    ) -> Result<Self, RuntimeError> {
+        let reference = first_allele_char(variant.reference.as_deref()).ok_or_else(|| {
+            RuntimeError::Io(format!(
+                "variant {} missing reference allele",
+                variant_label(variant)
+            ))
+        })?;
+        let alternate = first_allele_char(variant.alternate.as_deref()).ok_or_else(|| {
+            RuntimeError::Io(format!(
+                "variant {} missing alternate allele",
+                variant_label(variant)
+            ))
+        })?;
+        let target_position = usize::try_from(locus.start)
+            .ok()
+            .and_then(|start| Position::try_from(start).ok())
+            .ok_or_else(|| {
+                RuntimeError::InvalidArguments("SNP locus start is out of range".to_owned())
+            })?;
+        Ok(Self {
+            locus,
+            reference,
+            alternate,
+            observed_alternates: variant.observed_alternates.clone(),
+            matched_rsid: variant.rsids.first().cloned(),
+            assembly,
+            target_position,
+            counts: BamSnpPileupCounts::default(),
+        })
+    }
+
+    fn observe(&mut self, record: &noodles::bam::Record) -> Result<(), RuntimeError> {
+        let counts = &mut self.counts;
+        let flags = record.flags();
+        if flags.is_unmapped() {
+            counts.filtered_unmapped += 1;
+            return Ok(());
+        }
+        if flags.is_secondary() {
+            counts.filtered_secondary += 1;
+            return Ok(());
+        }
+        if flags.is_qc_fail() {
+            counts.filtered_qc_fail += 1;
+            return Ok(());
+        }
+        if flags.is_duplicate() {
+            counts.filtered_duplicate += 1;
+            return Ok(());
+        }
+        if flags.is_segmented() && !flags.is_properly_segmented() {
+            counts.filtered_improper_pair += 1;
+            return Ok(());
+        }
+
+        let Some((base, base_quality)) =
+            bam_base_quality_at_reference_position(record, self.target_position)?
+        else {
+            return Ok(());
+        };
+        let normalized_base = normalize_pileup_base(base);
+        let is_reverse = flags.is_reverse_complemented();
+        if let Some(base) = normalized_base {
+            counts.raw_depth += 1;
+            *counts.raw_base_counts.entry(base.to_string()).or_insert(0) += 1;
+            let strand_counts = if is_reverse {
+                &mut counts.raw_reverse_counts
+            } else {
+                &mut counts.raw_forward_counts
+            };
+            *strand_counts.entry(base.to_string()).or_insert(0) += 1;
+            if base == self.reference {
+                counts.raw_ref_count += 1;
+            } else if base == self.alternate {
+                counts.raw_alt_count += 1;
+            }
+        }
+
+        if base_quality < 13 {
+            counts.filtered_low_base_quality += 1;
+            return Ok(());
+        }
+
+        let Some(base) = normalized_base else {
+            counts.filtered_non_acgt += 1;
+            return Ok(());
+        };
+
+        counts.filtered_depth += 1;
+        *counts
+            .filtered_base_counts
+            .entry(base.to_string())
+            .or_insert(0) += 1;
+        if base == self.reference {
+            counts.filtered_ref_count += 1;
+        } else if base == self.alternate {
+            counts.filtered_alt_count += 1;
+        }
+        Ok(())
+    }
+
+    fn finish(self) -> VariantObservation {
+        let Self {
+            locus,
+            reference,
+            alternate,
+            observed_alternates,
+            matched_rsid,
+            assembly,
+            mut counts,
+            ..
+        } = self;
+        let alternate = select_observed_snp_alternate(
+            reference,
+            alternate,
+            &observed_alternates,
+            &counts.filtered_base_counts,
+            &counts.raw_base_counts,
+        );
+        recount_bam_snp_counts(&mut counts, reference, alternate);
+        let ref_count = counts.filtered_ref_count;
+        let alt_count = counts.filtered_alt_count;
+        let depth = counts.filtered_depth;
+        let evidence = counts.evidence_lines(
+            &format!("{}:{}-{}", locus.chrom, locus.start, locus.end),
+            locus.start,
+        );
+        VariantObservation {
+            backend: "bam".to_owned(),
+            matched_rsid,
+            assembly,
+            genotype: infer_snp_genotype(reference, alternate, ref_count, alt_count, depth),
+            ref_count: Some(ref_count),
+            alt_count: Some(alt_count),
+            depth: Some(depth),
+            raw_counts: counts.raw_base_counts,
+            decision: Some(describe_snp_decision_rule(
+                reference, alternate, ref_count, alt_count, depth,
+            )),
+            evidence,
+        }
+    }
+}
+
+impl DeletionSite {
+    fn new(
+        variant: &VariantSpec,
+        locus: GenomicLocus,
+        assembly: Option<Assembly>,
+    ) -> Result<Self, RuntimeError> {
+        let deletion_length = variant.deletion_length.ok_or_else(|| {
+            RuntimeError::InvalidArguments("deletion variant requires deletion_length".to_owned())
+        })?;
+        Ok(Self {
+            anchor_pos: locus.start.saturating_sub(1),
+            locus,
+            deletion_length,
+            reference: variant.reference.clone().unwrap_or_else(|| "I".to_owned()),
+            alternate: variant.alternate.clone().unwrap_or_else(|| "D".to_owned()),
+            matched_rsid: variant.rsids.first().cloned(),
+            assembly,
+            ref_count: 0,
+            alt_count: 0,
+            depth: 0,
+        })
+    }
+
+    fn observe(&mut self, alignment: &AlignmentRecord) {
+        if alignment.is_unmapped || !spans_position(alignment, self.anchor_pos) {
+            return;
+        }
+        self.depth += 1;
+        match indel_at_anchor(alignment, self.anchor_pos) {
+            Some((AlignmentOpKind::Deletion, len)) if len == self.deletion_length => {
+                self.alt_count += 1;
+            }
+            _ => self.ref_count += 1,
+        }
+    }
+
+    fn finish(self) -> VariantObservation {
+        let Self {
+            locus,
+            deletion_length,
+            reference,
+            alternate,
+            anchor_pos,
+            matched_rsid,
+            assembly,
+            ref_count,
+            alt_count,
+            depth,
+        } = self;
+        VariantObservation {
+            backend: "bam".to_owned(),
+            matched_rsid,
+            assembly,
+            genotype: infer_copy_number_genotype(
+                &reference, &alternate, ref_count, alt_count, depth,
+            ),
+            ref_count: Some(ref_count),
+            alt_count: Some(alt_count),
+            depth: Some(depth),
+            raw_counts: BTreeMap::new(),
+            decision: Some(describe_copy_number_decision_rule(
+                &reference, &alternate, ref_count, alt_count, depth,
+            )),
+            evidence: vec![format!(
+                "observed BAM deletion anchor {}:{} len={} depth={} ref_count={} alt_count={}",
+                locus.chrom, anchor_pos, deletion_length, depth, ref_count, alt_count
+            )],
+        }
+    }
+}
+
+impl IndelSite {
+    fn new(
+        variant: &VariantSpec,
+        locus: GenomicLocus,
+        assembly: Option<Assembly>,
+    ) -> Result<Self, RuntimeError> {
+        let reference = variant.reference.clone().ok_or_else(|| {
+            RuntimeError::Io(format!(
+                "variant {} missing reference allele",
+                variant_label(variant)
+            ))
+        })?;
+        let alternate = variant.alternate.clone().ok_or_else(|| {
+            RuntimeError::Io(format!(
+                "variant {} missing alternate allele",
+                variant_label(variant)
+            ))
+        })?;
+        Ok(Self {
+            alternate_lengths: indel_alternate_lengths(variant, &alternate),
+            locus,
+            reference,
+            alternate,
+            matched_rsid: variant.rsids.first().cloned(),
+            assembly,
+            ref_count: 0,
+            alt_count: 0,
+            depth: 0,
+            matching_alt_lengths: BTreeSet::new(),
+        })
+    }
+
+    fn observe(&mut self, alignment: &AlignmentRecord) -> Result<(), RuntimeError> {
+        if alignment.is_unmapped || !record_overlaps_locus(alignment, &self.locus) {
+            return Ok(());
+        }
+        let classification = classify_expected_indel_lengths(
+            alignment,
+            &self.locus,
+            self.reference.len(),
+            &self.alternate_lengths,
+        )?;
+        if !classification.covering {
+            return Ok(());
+        }
+        self.depth += 1;
+        if classification.matches_alt {
+            self.alt_count += 1;
+            self.matching_alt_lengths
+                .insert(classification.observed_len);
+        } else if classification.reference_like {
+            self.ref_count += 1;
+        }
+        Ok(())
+    }
+
+    fn finish(self) -> VariantObservation {
+        let Self {
+            locus,
+            reference,
+            alternate,
+            matched_rsid,
+            assembly,
+            ref_count,
+            alt_count,
+            depth,
+            matching_alt_lengths,
+            ..
+        } = self;
+        let evidence_label = if matching_alt_lengths.is_empty() {
+            "none".to_owned()
+        } else {
+            matching_alt_lengths
+                .into_iter()
+                .map(|len| len.to_string())
+                .collect::<Vec<_>>()
+                .join(",")
+        };
+
+        VariantObservation {
+            backend: "bam".to_owned(),
+            matched_rsid,
+            assembly,
+            genotype: infer_copy_number_genotype(
+                &reference, &alternate, ref_count, alt_count, depth,
+            ),
+            ref_count: Some(ref_count),
+            alt_count: Some(alt_count),
+            depth: Some(depth),
+            raw_counts: BTreeMap::new(),
+            decision: Some(describe_copy_number_decision_rule(
+                &reference, &alternate, ref_count, alt_count, depth,
+            )),
+            evidence: vec![format!(
+                "observed BAM indel at {}:{}-{} depth={} ref_count={} alt_count={} matching_alt_lengths={}",
+                locus.chrom, locus.start, locus.end, depth, ref_count, alt_count, evidence_label
+            )],
+        }
+    }
+}
+
+fn variant_label(variant: &VariantSpec) -> &str {
+    variant.rsids.first().map_or("variant", String::as_str)
+}
+
+fn first_allele_char(allele: Option<&str>) -> Option<char> {
+    allele.and_then(|s| s.chars().next())
+}
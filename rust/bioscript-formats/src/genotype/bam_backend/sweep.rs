@@ -0,0 +1,226 @@
+use std::{
+    io::{Read, Seek},
+    ops::Range,
+};
+
+use bioscript_core::{
+    GenomicLocus, ProfileCounter, RuntimeError, VariantObservation, VariantSpec, profile,
+};
+use noodles::{bam::io::indexed_reader::IndexedReader, bgzf, sam::alignment::Record as _};
+
+use crate::alignment::resolve_reference_sequence_id;
+use crate::genotype::{sweep_clusters, variant_sort_key};
+
+use super::{
+    pileup::bam_alignment_record,
+    query::{bam_reference_name, bam_region, read_bam_header},
+    sites::BamSite,
+};
+
+/// A site placed on a BAM contig, with the output slot it fills.
+pub(super) struct SweepSite {
+    output: usize,
+    reference_sequence_id: usize,
+    chrom: String,
+    site: BamSite,
+}
+
+/// Sites of one batch placed on the BAM contigs and sorted for the sweep,
+/// with the clusters of nearby windows that each take one region query.
+pub(super) struct SweepPlan {
+    pub(super) header: noodles::sam::Header,
+    pub(super) sites: Vec<SweepSite>,
+    pub(super) clusters: Vec<Range<usize>>,
+    result_len: usize,
+}
+
+impl SweepPlan {
+    /// Observations in the order the variants were planned in.
+    pub(super) fn finish(self) -> Vec<VariantObservation> {
+        let mut results = vec![VariantObservation::default(); self.result_len];
+        for entry in self.sites {
+            results[entry.output] = entry.site.finish();
+        }
+        results
+    }
+}
+
+/// Observe `variants` with one sweep per cluster of nearby windows.
+///
+/// Sites are sorted by contig and window start, windows within
+/// `SWEEP_MERGE_GAP` are merged into a single region query, and every record
+/// that query returns is decoded once and offered to each site whose own
+/// window it overlaps. Sites behind the current record are retired, so the
+/// active set stays as small as the local variant density. Results are
+/// returned in input order and match per-variant lookups exactly.
+pub fn observe_bam_variants<R: Read + Seek>(
+    reader: &mut IndexedReader<bgzf::io::Reader<R>>,
+    label: &str,
+    variants: &[VariantSpec],
+) -> Result<Vec<VariantObservation>, RuntimeError> {
+    if variants.is_empty() {
+        return Ok(Vec::new());
+    }
+    let mut plan = plan_sweep(reader, label, variants)?;
+    for cluster in plan.clusters.clone() {
+        sweep_cluster(reader, &plan.header, label, &mut plan.sites[cluster])?;
+    }
+    Ok(plan.finish())
+}
+
+/// Read the header from `reader` and place every variant on it.
+pub(super) fn plan_sweep<R: Read + Seek>(
+    reader: &mut IndexedReader<bgzf::io::Reader<R>>,
+    label: &str,
+    variants: &[VariantSpec],
+) -> Result<SweepPlan, RuntimeError> {
+    let mut indexed: Vec<(usize, &VariantSpec)> = variants.iter().enumerate().collect();
+    indexed.sort_by_cached_key(|(_, variant)| variant_sort_key(variant));
+
+    let header = read_bam_header(reader, label)?;
+    let mut sites = Vec::with_capacity(indexed.len());
+    for (output, variant) in indexed {
+        let site = BamSite::new(variant)?;
+        let chrom = bam_reference_name(&header, &site.window)?;
+        let reference_sequence_id = resolve_reference_sequence_id(&header, chrom.as_bytes())
+            .ok_or_else(|| {
+                RuntimeError::Unsupported(format!("indexed BAM does not contain contig {chrom}"))
+            })?;
+        sites.push(SweepSite {
+            output,
+            reference_sequence_id,
+            chrom,
+            site,
+        });
+    }
+    sites.sort_by_key(|entry| {
+        (
+            entry.reference_sequence_id,
+            entry.site.window.start,
+            entry.site.window.end,
+        )
+    });
+
+    let spans = sites
+        .iter()
+        .map(|entry| {
+            (
+                entry.reference_sequence_id,
+                entry.site.window.start,
+                entry.site.window.end,
+            )
+        })
+        .collect::<Vec<_>>();
+    Ok(SweepPlan {
+        header,
+        sites,
+        clusters: sweep_clusters(&spans),
+        result_len: variants.len(),
+    })
+}
+
+/// Sweep one cluster of sorted sites with a single region query.
+pub(super) fn sweep_cluster<R: Read + Seek>(
+    reader: &mut IndexedReader<bgzf::io::Reader<R>>,
+    header: &noodles::sam::Header,
+    label: &str,
+    sites: &mut [SweepSite],
+) -> Result<(), RuntimeError> {
+    let Some(first) = sites.first() else {
+        return Ok(());
+    };
+    let reference_sequence_id = first.reference_sequence_id;
+    let region = bam_region(
+        header,
+        &GenomicLocus {
+            chrom: first.chrom.clone(),
+            start: first.site.window.start,
+            end: sites
+                .iter()
+                .map(|entry| entry.site.window.end)
+                .max()
+                .unwrap_or(first.site.window.end),
+        },
+    )?;
+
+    let query = reader
+        .query(header, &region)
+        .map_err(|err| RuntimeError::Io(format!("failed to query BAM {label}: {err}")))?;
+    // `sites` is sorted by window start: `next` is the first site no record
+    // has reached yet and `active` holds reached sites still ahead of the
+    // sweep position.
+    let mut next = 0;
+    let mut active: Vec<usize> = Vec::new();
+    let mut overlapping: Vec<usize> = Vec::new();
+    for result in query.records() {
+        let record = result
+            .map_err(|err| RuntimeError::Io(format!("failed to read BAM record {label}: {err}")))?;
+        profile::record(ProfileCounter::RecordsDecoded, 1);
+        let Some((start, end)) = record_span(&record, reference_sequence_id, label)? else {
+            continue;
+        };
+
+        while next < sites.len() && sites[next].site.window.start <= end {
+            active.push(next);
+            next += 1;
+        }
+        active.retain(|&site| sites[site].site.window.end >= start);
+        overlapping.clear();
+        overlapping.extend(
+            active
+                .iter()
+                .copied()
+                .filter(|&site| sites[site].site.window.start <= end),
+        );
+        if overlapping.is_empty() {
+            continue;
+        }
+
+        let alignment = if overlapping
+            .iter()
+            .any(|&site| sites[site].site.needs_alignment())
+        {
+            Some(bam_alignment_record(label, &record)?)
+        } else {
+            None
+        };
+        for &site in &overlapping {
+            sites[site].site.observe(&record, alignment.as_ref())?;
+        }
+    }
+    Ok(())
+}
+
+/// Reference interval of `record` as the BAM index query tests it: records
+/// on another contig or without an alignment start and end are never
+/// returned for a region, so they feed no site.
+fn record_span(
+    record: &noodles::bam::Record,
+    reference_sequence_id: usize,
+    label: &str,
+) -> Result<Option<(i64, i64)>, RuntimeError> {
+    let read_error =
+        |err: std::io::Error| RuntimeError::Io(format!("failed to read BAM record {label}: {err}"));
+    let Some(record_reference_sequence_id) = record
+        .reference_sequence_id()
+        .transpose()
+        .map_err(read_error)?
+    else {
+        return Ok(None);
+    };
+    if record_reference_sequence_id != reference_sequence_id {
+        return Ok(None);
+    }
+    let (Some(start), Some(end)) = (
+        record.alignment_start().transpose().map_err(read_error)?,
+        record.alignment_end().transpose().map_err(read_error)?,
+    ) else {
+        return Ok(None);
+    };
+    let position = |position: noodles::core::Position| {
+        i64::try_from(usize::from(position)).map_err(|_| {
+            RuntimeError::Unsupported(format!("record alignment exceeds i64 range in {label}"))
+        })
+    };
+    Ok(Some((position(start)?, position(end)?)))
+}
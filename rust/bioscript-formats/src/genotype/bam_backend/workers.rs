@@ -0,0 +1,168 @@
+use std::{
+    io::{Read, Seek},
+    ops::Range,
+    thread,
+};
+
+use bioscript_core::{
+    ProfileCounter, ProfileScope, RuntimeError, VariantObservation, VariantSpec, profile,
+};
+use noodles::{bam::io::indexed_reader::IndexedReader, bgzf};
+
+use super::sweep::{SweepSite, observe_bam_variants, plan_sweep, sweep_cluster};
+use crate::genotype::reader_slot::{ReaderPool, lookup_worker_limit};
+
+/// Observe `variants` like `observe_bam_variants`, spreading the sweep
+/// clusters over worker threads.
+///
+/// Clusters are split into contiguous batches of similar site counts. The
+/// calling thread sweeps the first batch with `reader`; worker `n` uses slot
+/// `n` of `worker_readers`, opening it through `open_worker_reader` on first
+/// use, so each thread inflates and decodes the BGZF blocks of its own
+/// regions and keeps its reader and block cache for the next call.
+/// Results are identical to the single-threaded sweep and come back in input
+/// order.
+pub(crate) fn observe_bam_variants_parallel<R, S, O>(
+    reader: &mut IndexedReader<bgzf::io::Reader<R>>,
+    worker_readers: &ReaderPool<IndexedReader<bgzf::io::Reader<S>>>,
+    open_worker_reader: O,
+    label: &str,
+    variants: &[VariantSpec],
+    requested_workers: Option<usize>,
+) -> Result<Vec<VariantObservation>, RuntimeError>
+where
+    R: Read + Seek,
+    S: Read + Seek + Send,
+    O: Fn() -> Result<IndexedReader<bgzf::io::Reader<S>>, RuntimeError> + Sync,
+{
+    if variants.is_empty() {
+        return Ok(Vec::new());
+    }
+    if bam_lookup_worker_count(requested_workers, variants.len()) == 1 {
+        return observe_bam_variants(reader, label, variants);
+    }
+
+    let mut plan = plan_sweep(reader, label, variants)?;
+    let workers = bam_lookup_worker_count(requested_workers, plan.clusters.len());
+    let batches = cluster_batches(&plan.clusters, workers);
+    let header = &plan.header;
+
+    let mut work = Vec::with_capacity(batches.len());
+    let mut rest: &mut [SweepSite] = &mut plan.sites;
+    let mut offset = 0;
+    for batch in batches {
+        let clusters = &plan.clusters[batch];
+        let batch_end = clusters.last().map_or(offset, |cluster| cluster.end);
+        let (sites, tail) = std::mem::take(&mut rest).split_at_mut(batch_end - offset);
+        let clusters = clusters
+            .iter()
+            .map(|cluster| cluster.start - offset..cluster.end - offset)
+            .collect::<Vec<_>>();
+        work.push((sites, clusters));
+        rest = tail;
+        offset = batch_end;
+    }
+
+    let mut work = work.into_iter();
+    let Some((primary_sites, primary_clusters)) = work.next() else {
+        return Ok(plan.finish());
+    };
+    let slots = worker_readers.slots(work.len());
+    thread::scope(|scope| {
+        let open_worker_reader = &open_worker_reader;
+        let handles = work
+            .zip(slots)
+            .map(|((sites, clusters), slot)| {
+                let counters = profile::current_counters();
+                profile::record(ProfileCounter::WorkerThreads, 1);
+                scope.spawn(move || -> Result<(), RuntimeError> {
+                    let _profile_scope = counters.map(ProfileScope::enter);
+                    slot.with(open_worker_reader, |worker_reader| {
+                        clusters.into_iter().try_for_each(|cluster| {
+                            sweep_cluster(worker_reader, header, label, &mut sites[cluster])
+                        })
+                    })
+                })
+            })
+            .collect::<Vec<_>>();
+
+        let mut result = primary_clusters.into_iter().try_for_each(|cluster| {
+            sweep_cluster(reader, header, label, &mut primary_sites[cluster])
+        });
+        for handle in handles {
+            let worker = handle
+                .join()
+                .map_err(|_| RuntimeError::Io("BAM lookup worker panicked".to_owned()))
+                .and_then(|worker| worker);
+            if result.is_ok() {
+                result = worker;
+            }
+        }
+        result
+    })?;
+
+    Ok(plan.finish())
+}
+
+/// Worker threads for a BAM batch. `requested` comes from
+/// `GenotypeLoadOptions::bam_lookup_workers`; without it the pool is sized
+/// by `lookup_worker_limit`. There is no point running more workers than
+/// sweep clusters, since each cluster is one region query.
+fn bam_lookup_worker_count(requested: Option<usize>, cluster_count: usize) -> usize {
+    lookup_worker_limit(requested).min(cluster_count).max(1)
+}
+
+/// Split sorted `clusters` into at most `workers` contiguous runs holding
+/// roughly the same number of sites.
+fn cluster_batches(clusters: &[Range<usize>], workers: usize) -> Vec<Range<usize>> {
+    let (Some(first), Some(last)) = (clusters.first(), clusters.last()) else {
+        return Vec::new();
+    };
+    let target = (last.end - first.start).div_ceil(workers.max(1));
+    let mut batches = Vec::with_capacity(workers);
+    let mut batch_start = 0;
+    for (index, cluster) in clusters.iter().enumerate() {
+        let batch_sites = cluster.end - clusters[batch_start].start;
+        if batch_sites >= target && batches.len() + 1 < workers {
+            batches.push(batch_start..index + 1);
+            batch_start = index + 1;
+        }
+    }
+    if batch_start < clusters.len() {
+        batches.push(batch_start..clusters.len());
+    }
+    batches
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn cluster_batches_balance_sites_across_workers() {
+        let clusters = [0..1, 1..2, 2..6, 6..7, 7..8, 8..9, 9..10];
+        assert_eq!(cluster_batches(&clusters, 2), vec![0..3, 3..7]);
+        assert_eq!(cluster_batches(&clusters, 1), vec![0..7]);
+        assert_eq!(cluster_batches(&clusters, 7), vec![0..2, 2..3, 3..5, 5..7]);
+        assert!(cluster_batches(&[], 4).is_empty());
+    }
+
+    #[test]
+    fn cluster_batches_never_exceed_the_worker_count() {
+        let clusters = (0..20).map(|index| index..index + 1).collect::<Vec<_>>();
+        let batches = cluster_batches(&clusters, 3);
+        assert_eq!(batches, vec![0..7, 7..14, 14..20]);
+    }
+
+    #[test]
+    fn worker_count_is_bounded_by_cluster_count() {
+        assert_eq!(bam_lookup_worker_count(Some(8), 3), 3);
+        assert_eq!(bam_lookup_worker_count(Some(2), 10), 2);
+        assert_eq!(bam_lookup_worker_count(Some(0), 1), 1);
+        assert_eq!(bam_lookup_worker_count(Some(4), 0), 1);
+        assert_eq!(
+            bam_lookup_worker_count(None, 1000),
+            lookup_worker_limit(None)
+        );
+    }
+}
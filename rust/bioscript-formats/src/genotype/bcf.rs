@@ -4,7 +4,9 @@ use std::{
     io::{Cursor, Read},
 };
 
-use bioscript_core::{Assembly, RuntimeError, VariantKind, VariantObservation, VariantSpec};
+use bioscript_core::{
+    Assembly, ProfileCounter, RuntimeError, VariantKind, VariantObservation, VariantSpec, profile,
+};
 use noodles::bcf;
 use zip::ZipArchive;
 
@@ -270,6 +272,7 @@ fn scan_bcf_reader<R: Read>(
     let header = read_bcf_header_lenient(&mut reader, &shard.name)?;
     let string_maps = header.string_maps().clone();
 
+    let mut records_decoded = 0u64;
     for record_result in reader.records() {
         if *unresolved == 0 {
             break;
@@ -277,9 +280,11 @@ fn scan_bcf_reader<R: Read>(
         let record = record_result.map_err(|err| {
             RuntimeError::Io(format!("failed to read BCF record {}: {err}", shard.name))
         })?;
+        records_decoded += 1;
         let row = bcf_record_to_vcf_row(&header, &string_maps, &record, &shard.name)?;
         resolve_bcf_row(backend, &row, targets, results, unresolved, assembly);
     }
+    profile::record(ProfileCounter::RecordsDecoded, records_decoded);
     Ok(())
 }
 
@@ -1,4 +1,11 @@
-use bioscript_core::VariantSpec;
+use std::ops::Range;
+
+use bioscript_core::{ProfileCounter, VariantSpec, profile};
+
+/// Variant windows on the same contig that are at most this many bases apart
+/// are read with one index query. Clustered panels (APOL1, CYP2D6, HLA) then
+/// decode each overlapping read once instead of once per variant.
+const SWEEP_MERGE_GAP: i64 = 1_000;
 
 pub(crate) fn describe_query(variant: &VariantSpec) -> &'static str {
     if variant.has_coordinates() {
@@ -72,3 +79,78 @@ where
     parts.sort_by(|left, right| left.as_ref().cmp(right.as_ref()));
     parts.iter().map(AsRef::as_ref).collect()
 }
+
+/// Line and byte totals for one streaming read, flushed to the active
+/// profile scope once the loop finishes instead of per line.
+#[derive(Default)]
+pub(crate) struct ScanCounts {
+    lines: u64,
+    bytes: u64,
+}
+
+impl ScanCounts {
+    pub(crate) fn add(&mut self, bytes: usize) {
+        self.lines += 1;
+        self.bytes += bytes as u64;
+    }
+
+    pub(crate) fn record(&mut self) {
+        profile::record(
+            ProfileCounter::LinesScanned,
+            std::mem::take(&mut self.lines),
+        );
+        profile::record(ProfileCounter::BytesRead, std::mem::take(&mut self.bytes));
+    }
+}
+
+/// Split sorted `(contig, start, end)` windows into index ranges whose
+/// windows chain within `SWEEP_MERGE_GAP` of each other on one contig.
+pub(crate) fn sweep_clusters(spans: &[(usize, i64, i64)]) -> Vec<Range<usize>> {
+    let mut clusters = Vec::new();
+    let mut cluster_start = 0;
+    let mut cluster_end = i64::MIN;
+    for (index, &(contig, start, end)) in spans.iter().enumerate() {
+        let joins = index > 0
+            && spans[index - 1].0 == contig
+            && start <= cluster_end.saturating_add(SWEEP_MERGE_GAP);
+        if joins {
+            cluster_end = cluster_end.max(end);
+        } else {
+            if index > 0 {
+                clusters.push(cluster_start..index);
+            }
+            cluster_start = index;
+            cluster_end = end;
+        }
+    }
+    if !spans.is_empty() {
+        clusters.push(cluster_start..spans.len());
+    }
+    clusters
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn sweep_clusters_merge_nearby_windows_on_one_contig() {
+        let spans = [
+            (0, 100, 100),
+            (0, 150, 160),
+            (0, 1_160, 1_160),
+            (0, 5_000, 5_000),
+            (1, 5_010, 5_010),
+            (1, 5_020, 5_030),
+        ];
+        assert_eq!(sweep_clusters(&spans), vec![0..3, 3..4, 4..6]);
+        assert_eq!(sweep_clusters(&spans[..1]), vec![0..1]);
+        assert!(sweep_clusters(&[]).is_empty());
+    }
+
+    #[test]
+    fn sweep_clusters_extend_from_the_longest_window() {
+        let spans = [(0, 100, 3_000), (0, 200, 200), (0, 3_900, 3_900)];
+        assert_eq!(sweep_clusters(&spans), vec![0..3]);
+    }
+}
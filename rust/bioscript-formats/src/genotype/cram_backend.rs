@@ -12,12 +12,13 @@ use bioscript_core::{Assembly, GenomicLocus, RuntimeError, VariantSpec};
 
 use crate::alignment;
 
-use super::GenotypeLoadOptions;
-
 mod indel;
 mod observation;
 mod reader;
+mod schedule;
+mod sites;
 mod store;
+mod sweep;
 
 #[cfg(test)]
 pub(crate) use indel::{classify_expected_indel, len_as_i64};
@@ -315,28 +316,6 @@ pub(crate) fn recount_snp_pileup_counts(
     counts.raw_alt_count = counts.raw_base_counts.get(&alternate).copied().unwrap_or(0);
 }
 
-fn observe_snp_pileup(
-    cram_path: &Path,
-    options: &GenotypeLoadOptions,
-    reference_file: &Path,
-    locus: &GenomicLocus,
-    reference: char,
-    alternate: char,
-) -> Result<SnpPileupCounts, RuntimeError> {
-    let repository = alignment::build_reference_repository(reference_file)?;
-    let mut reader =
-        alignment::build_cram_indexed_reader_from_path(cram_path, options, repository)?;
-    let label = cram_path.display().to_string();
-    snp_pileup_with_reader(
-        &mut reader,
-        &label,
-        locus,
-        reference,
-        alternate,
-        options.allow_reference_md5_mismatch,
-    )
-}
-
 pub(super) fn snp_pileup_with_reader<R: Read + Seek>(
     reader: &mut cram::io::indexed_reader::IndexedReader<R>,
     label: &str,
@@ -346,11 +325,7 @@ pub(super) fn snp_pileup_with_reader<R: Read + Seek>(
     allow_reference_md5_mismatch: bool,
 ) -> Result<SnpPileupCounts, RuntimeError> {
     let mut counts = SnpPileupCounts::default();
-    let target_position = Position::try_from(usize::try_from(locus.start).map_err(|_| {
-        RuntimeError::InvalidArguments("SNP locus start is out of range".to_owned())
-    })?)
-    .map_err(|_| RuntimeError::InvalidArguments("SNP locus start is out of range".to_owned()))?;
-    let reference_base = reference as u8;
+    let target_position = snp_target_position(locus)?;
 
     alignment::for_each_raw_cram_record_with_reader_inner(
         reader,
@@ -358,77 +333,7 @@ pub(super) fn snp_pileup_with_reader<R: Read + Seek>(
         locus,
         allow_reference_md5_mismatch,
         |record| {
-            let flags = record
-                .flags()
-                .map_err(|err| RuntimeError::Io(format!("failed to read CRAM flags: {err}")))?;
-            if flags.is_unmapped() {
-                counts.filtered_unmapped += 1;
-                return Ok(true);
-            }
-            if flags.is_secondary() {
-                counts.filtered_secondary += 1;
-                return Ok(true);
-            }
-            if flags.is_qc_fail() {
-                counts.filtered_qc_fail += 1;
-                return Ok(true);
-            }
-            if flags.is_duplicate() {
-                counts.filtered_duplicate += 1;
-                return Ok(true);
-            }
-            if flags.is_segmented() && !flags.is_properly_segmented() {
-                counts.filtered_improper_pair += 1;
-                return Ok(true);
-            }
-
-            let Some((base, base_quality)) =
-                cram_base_quality_at_reference_position(record, target_position, reference_base)?
-            else {
-                return Ok(true);
-            };
-
-            let normalized_base = normalize_pileup_base(base);
-            record.mapping_quality().transpose().map_err(|err| {
-                RuntimeError::Io(format!("failed to read CRAM mapping quality: {err}"))
-            })?;
-            let is_reverse = flags.is_reverse_complemented();
-            if let Some(base) = normalized_base {
-                counts.raw_depth += 1;
-                *counts.raw_base_counts.entry(base.to_string()).or_insert(0) += 1;
-                let strand_counts = if is_reverse {
-                    &mut counts.raw_reverse_counts
-                } else {
-                    &mut counts.raw_forward_counts
-                };
-                *strand_counts.entry(base.to_string()).or_insert(0) += 1;
-                if base == reference {
-                    counts.raw_ref_count += 1;
-                } else if base == alternate {
-                    counts.raw_alt_count += 1;
-                }
-            }
-
-            if base_quality < DEFAULT_MPILEUP_MIN_BASE_QUALITY {
-                counts.filtered_low_base_quality += 1;
-                return Ok(true);
-            }
-
-            let Some(base) = normalized_base else {
-                counts.filtered_non_acgt += 1;
-                return Ok(true);
-            };
-
-            counts.filtered_depth += 1;
-            *counts
-                .filtered_base_counts
-                .entry(base.to_string())
-                .or_insert(0) += 1;
-            if base == reference {
-                counts.filtered_ref_count += 1;
-            } else if base == alternate {
-                counts.filtered_alt_count += 1;
-            }
+            count_snp_record(&mut counts, record, target_position, reference, alternate)?;
             Ok(true)
         },
     )?;
@@ -436,6 +341,96 @@ pub(super) fn snp_pileup_with_reader<R: Read + Seek>(
     Ok(counts)
 }
 
+pub(super) fn snp_target_position(locus: &GenomicLocus) -> Result<Position, RuntimeError> {
+    usize::try_from(locus.start)
+        .ok()
+        .and_then(|start| Position::try_from(start).ok())
+        .ok_or_else(|| RuntimeError::InvalidArguments("SNP locus start is out of range".to_owned()))
+}
+
+/// Add one record overlapping a SNP locus to its pileup counts.
+pub(super) fn count_snp_record(
+    counts: &mut SnpPileupCounts,
+    record: &cram::Record<'_>,
+    target_position: Position,
+    reference: char,
+    alternate: char,
+) -> Result<(), RuntimeError> {
+    let flags = record
+        .flags()
+        .map_err(|err| RuntimeError::Io(format!("failed to read CRAM flags: {err}")))?;
+    if flags.is_unmapped() {
+        counts.filtered_unmapped += 1;
+        return Ok(());
+    }
+    if flags.is_secondary() {
+        counts.filtered_secondary += 1;
+        return Ok(());
+    }
+    if flags.is_qc_fail() {
+        counts.filtered_qc_fail += 1;
+        return Ok(());
+    }
+    if flags.is_duplicate() {
+        counts.filtered_duplicate += 1;
+        return Ok(());
+    }
+    if flags.is_segmented() && !flags.is_properly_segmented() {
+        counts.filtered_improper_pair += 1;
+        return Ok(());
+    }
+
+    let Some((base, base_quality)) =
+        cram_base_quality_at_reference_position(record, target_position, reference as u8)?
+    else {
+        return Ok(());
+    };
+
+    let normalized_base = normalize_pileup_base(base);
+    record
+        .mapping_quality()
+        .transpose()
+        .map_err(|err| RuntimeError::Io(format!("failed to read CRAM mapping quality: {err}")))?;
+    let is_reverse = flags.is_reverse_complemented();
+    if let Some(base) = normalized_base {
+        counts.raw_depth += 1;
+        *counts.raw_base_counts.entry(base.to_string()).or_insert(0) += 1;
+        let strand_counts = if is_reverse {
+            &mut counts.raw_reverse_counts
+        } else {
+            &mut counts.raw_forward_counts
+        };
+        *strand_counts.entry(base.to_string()).or_insert(0) += 1;
+        if base == reference {
+            counts.raw_ref_count += 1;
+        } else if base == alternate {
+            counts.raw_alt_count += 1;
+        }
+    }
+
+    if base_quality < DEFAULT_MPILEUP_MIN_BASE_QUALITY {
+        counts.filtered_low_base_quality += 1;
+        return Ok(());
+    }
+
+    let Some(base) = normalized_base else {
+        counts.filtered_non_acgt += 1;
+        return Ok(());
+    };
+
+    counts.filtered_depth += 1;
+    *counts
+        .filtered_base_counts
+        .entry(base.to_string())
+        .or_insert(0) += 1;
+    if base == reference {
+        counts.filtered_ref_count += 1;
+    } else if base == alternate {
+        counts.filtered_alt_count += 1;
+    }
+    Ok(())
+}
+
 fn cram_base_quality_at_reference_position(
     record: &cram::Record<'_>,
     target_position: Position,
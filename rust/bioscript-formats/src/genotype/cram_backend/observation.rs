@@ -1,423 +1,78 @@
-use std::{
-    collections::{BTreeMap, BTreeSet},
-    path::Path,
-};
+use std::io::{Read, Seek};
 
 use bioscript_core::{
     Assembly, GenomicLocus, RuntimeError, VariantKind, VariantObservation, VariantSpec,
 };
 use noodles::cram;
 
-use crate::alignment::{self, AlignmentOpKind};
 use crate::genotype::types::CramBackend;
 
-use super::{
-    anchor_window, classify_expected_indel_lengths, describe_copy_number_decision_rule,
-    describe_locus, describe_snp_decision_rule, first_base, indel_at_anchor,
-    infer_copy_number_genotype, infer_snp_genotype, observe_snp_pileup, record_overlaps_locus,
-    recount_snp_pileup_counts, select_observed_snp_alternate, snp_pileup_with_reader,
-    spans_position,
-};
+use super::{sites::CramSite, sweep::observe_cram_sites};
 
 impl CramBackend {
-    pub(super) fn observe_with_reader(
+    /// Observe one variant on `reader` as a one-site sweep, so a standalone
+    /// lookup and a batched one read exactly the same records.
+    pub(super) fn observe_with_reader<R: Read + Seek>(
         &self,
-        reader: &mut cram::io::indexed_reader::IndexedReader<std::fs::File>,
+        reader: &mut cram::io::indexed_reader::IndexedReader<R>,
         label: &str,
         variant: &VariantSpec,
         assembly: Assembly,
         locus: &GenomicLocus,
     ) -> Result<VariantObservation, RuntimeError> {
-        match variant.kind.unwrap_or(VariantKind::Other) {
-            VariantKind::Snp => {
-                self.observe_snp_with_reader(reader, label, variant, assembly, locus)
-            }
-            VariantKind::Deletion => {
-                self.observe_deletion_with_reader(reader, label, variant, assembly, locus)
-            }
-            VariantKind::Insertion | VariantKind::Indel => {
-                self.observe_indel_with_reader(reader, label, variant, assembly, locus)
-            }
-            VariantKind::Other => Err(RuntimeError::Unsupported(format!(
-                "backend '{}' does not yet support {:?} observation for {}",
-                self.backend_name(),
-                variant.kind.unwrap_or(VariantKind::Other),
-                self.path.display()
-            ))),
-        }
+        let site = self.cram_site(variant, assembly, locus)?;
+        self.observe_site(reader, label, site)
     }
 
-    pub(super) fn observe_snp(
+    pub(super) fn observe_site<R: Read + Seek>(
         &self,
-        variant: &VariantSpec,
-        assembly: Assembly,
-        locus: &GenomicLocus,
-        reference_file: &Path,
-    ) -> Result<VariantObservation, RuntimeError> {
-        let reference = variant
-            .reference
-            .as_deref()
-            .and_then(first_base)
-            .ok_or_else(|| {
-                RuntimeError::InvalidArguments("SNP variant requires ref/reference".to_owned())
-            })?;
-        let alternate = variant
-            .alternate
-            .as_deref()
-            .and_then(first_base)
-            .ok_or_else(|| {
-                RuntimeError::InvalidArguments("SNP variant requires alt/alternate".to_owned())
-            })?;
-
-        let target_pos = locus.start;
-        let mut pileup = observe_snp_pileup(
-            &self.path,
-            &self.options,
-            reference_file,
-            locus,
-            reference,
-            alternate,
-        )?;
-        let alternate = select_observed_snp_alternate(
-            reference,
-            alternate,
-            &variant.observed_alternates,
-            &pileup.filtered_base_counts,
-            &pileup.raw_base_counts,
-        );
-        recount_snp_pileup_counts(&mut pileup, reference, alternate);
-        let ref_count = pileup.filtered_ref_count;
-        let alt_count = pileup.filtered_alt_count;
-        let depth = pileup.filtered_depth;
-
-        let evidence = pileup.evidence_lines(&describe_locus(locus), target_pos);
-
-        Ok(VariantObservation {
-            backend: self.backend_name().to_owned(),
-            matched_rsid: variant.rsids.first().cloned(),
-            assembly: Some(assembly),
-            genotype: infer_snp_genotype(reference, alternate, ref_count, alt_count, depth),
-            ref_count: Some(ref_count),
-            alt_count: Some(alt_count),
-            depth: Some(depth),
-            raw_counts: pileup.raw_base_counts,
-            decision: Some(describe_snp_decision_rule(
-                reference, alternate, ref_count, alt_count, depth,
-            )),
-            evidence,
-        })
-    }
-
-    fn observe_snp_with_reader(
-        &self,
-        reader: &mut cram::io::indexed_reader::IndexedReader<std::fs::File>,
+        reader: &mut cram::io::indexed_reader::IndexedReader<R>,
         label: &str,
-        variant: &VariantSpec,
-        assembly: Assembly,
-        locus: &GenomicLocus,
+        site: CramSite,
     ) -> Result<VariantObservation, RuntimeError> {
-        let reference = variant
-            .reference
-            .as_deref()
-            .and_then(first_base)
-            .ok_or_else(|| {
-                RuntimeError::InvalidArguments("SNP variant requires ref/reference".to_owned())
-            })?;
-        let alternate = variant
-            .alternate
-            .as_deref()
-            .and_then(first_base)
-            .ok_or_else(|| {
-                RuntimeError::InvalidArguments("SNP variant requires alt/alternate".to_owned())
-            })?;
-
-        let mut pileup = snp_pileup_with_reader(
+        let observed = observe_cram_sites(
             reader,
             label,
-            locus,
-            reference,
-            alternate,
+            vec![(0, site)],
             self.options.allow_reference_md5_mismatch,
         )?;
-        let alternate = select_observed_snp_alternate(
-            reference,
-            alternate,
-            &variant.observed_alternates,
-            &pileup.filtered_base_counts,
-            &pileup.raw_base_counts,
-        );
-        recount_snp_pileup_counts(&mut pileup, reference, alternate);
-        let ref_count = pileup.filtered_ref_count;
-        let alt_count = pileup.filtered_alt_count;
-        let depth = pileup.filtered_depth;
-        let evidence = pileup.evidence_lines(&describe_locus(locus), locus.start);
-
-        Ok(VariantObservation {
-            backend: self.backend_name().to_owned(),
-            matched_rsid: variant.rsids.first().cloned(),
-            assembly: Some(assembly),
-            genotype: infer_snp_genotype(reference, alternate, ref_count, alt_count, depth),
-            ref_count: Some(ref_count),
-            alt_count: Some(alt_count),
-            depth: Some(depth),
-            raw_counts: pileup.raw_base_counts,
-            decision: Some(describe_snp_decision_rule(
-                reference, alternate, ref_count, alt_count, depth,
-            )),
-            evidence,
-        })
-    }
-
-    pub(super) fn observe_deletion(
-        &self,
-        variant: &VariantSpec,
-        assembly: Assembly,
-        locus: &GenomicLocus,
-        reference_file: &Path,
-    ) -> Result<VariantObservation, RuntimeError> {
-        let deletion_length = variant.deletion_length.ok_or_else(|| {
-            RuntimeError::InvalidArguments("deletion variant requires deletion_length".to_owned())
-        })?;
-        let reference = variant.reference.clone().unwrap_or_else(|| "I".to_owned());
-        let alternate = variant.alternate.clone().unwrap_or_else(|| "D".to_owned());
-        let anchor_pos = locus.start.saturating_sub(1);
-
-        let mut alt_count = 0u32;
-        let mut ref_count = 0u32;
-        let mut depth = 0u32;
-
-        alignment::for_each_cram_record(
-            &self.path,
-            &self.options,
-            reference_file,
-            &anchor_window(locus),
-            |record| {
-                if record.is_unmapped || !spans_position(&record, anchor_pos) {
-                    return Ok(true);
-                }
-                depth += 1;
-                match indel_at_anchor(&record, anchor_pos) {
-                    Some((AlignmentOpKind::Deletion, len)) if len == deletion_length => {
-                        alt_count += 1;
-                    }
-                    _ => ref_count += 1,
-                }
-                Ok(true)
-            },
-        )?;
-
-        Ok(VariantObservation {
-            backend: self.backend_name().to_owned(),
-            matched_rsid: variant.rsids.first().cloned(),
-            assembly: Some(assembly),
-            genotype: infer_copy_number_genotype(
-                &reference, &alternate, ref_count, alt_count, depth,
-            ),
-            ref_count: Some(ref_count),
-            alt_count: Some(alt_count),
-            depth: Some(depth),
-            raw_counts: BTreeMap::new(),
-            decision: Some(describe_copy_number_decision_rule(
-                &reference, &alternate, ref_count, alt_count, depth,
-            )),
-            evidence: vec![format!(
-                "observed deletion anchor {}:{} len={} depth={} ref_count={} alt_count={}",
-                locus.chrom, anchor_pos, deletion_length, depth, ref_count, alt_count
-            )],
-        })
-    }
-
-    fn observe_deletion_with_reader(
-        &self,
-        reader: &mut cram::io::indexed_reader::IndexedReader<std::fs::File>,
-        label: &str,
-        variant: &VariantSpec,
-        assembly: Assembly,
-        locus: &GenomicLocus,
-    ) -> Result<VariantObservation, RuntimeError> {
-        let deletion_length = variant.deletion_length.ok_or_else(|| {
-            RuntimeError::InvalidArguments("deletion variant requires deletion_length".to_owned())
-        })?;
-        let reference = variant.reference.clone().unwrap_or_else(|| "I".to_owned());
-        let alternate = variant.alternate.clone().unwrap_or_else(|| "D".to_owned());
-        let anchor_pos = locus.start.saturating_sub(1);
-
-        let mut alt_count = 0u32;
-        let mut ref_count = 0u32;
-        let mut depth = 0u32;
-
-        alignment::for_each_cram_record_with_reader(
-            reader,
-            label,
-            &anchor_window(locus),
-            |record| {
-                if record.is_unmapped || !spans_position(&record, anchor_pos) {
-                    return Ok(true);
-                }
-                depth += 1;
-                match indel_at_anchor(&record, anchor_pos) {
-                    Some((AlignmentOpKind::Deletion, len)) if len == deletion_length => {
-                        alt_count += 1;
-                    }
-                    _ => ref_count += 1,
-                }
-                Ok(true)
-            },
-        )?;
-
-        Ok(VariantObservation {
-            backend: self.backend_name().to_owned(),
-            matched_rsid: variant.rsids.first().cloned(),
-            assembly: Some(assembly),
-            genotype: infer_copy_number_genotype(
-                &reference, &alternate, ref_count, alt_count, depth,
-            ),
-            ref_count: Some(ref_count),
-            alt_count: Some(alt_count),
-            depth: Some(depth),
-            raw_counts: BTreeMap::new(),
-            decision: Some(describe_copy_number_decision_rule(
-                &reference, &alternate, ref_count, alt_count, depth,
-            )),
-            evidence: vec![format!(
-                "observed deletion anchor {}:{} len={} depth={} ref_count={} alt_count={}",
-                locus.chrom, anchor_pos, deletion_length, depth, ref_count, alt_count
-            )],
-        })
+        Ok(observed
+            .into_iter()
+            .next()
+            .map(|(_, observation)| observation)
+            .unwrap_or_default())
     }
 
-    pub(super) fn observe_indel(
+    /// Pileup site for `variant`, or the backend's unsupported-kind error.
+    pub(super) fn cram_site(
         &self,
         variant: &VariantSpec,
         assembly: Assembly,
         locus: &GenomicLocus,
-        reference_file: &Path,
-    ) -> Result<VariantObservation, RuntimeError> {
-        let reference = variant.reference.clone().ok_or_else(|| {
-            RuntimeError::InvalidArguments("indel variant requires ref/reference".to_owned())
-        })?;
-        let alternate = variant.alternate.clone().ok_or_else(|| {
-            RuntimeError::InvalidArguments("indel variant requires alt/alternate".to_owned())
-        })?;
-        let alternate_lengths = indel_alternate_lengths(variant, &alternate);
-        let records =
-            alignment::query_cram_records(&self.path, &self.options, reference_file, locus)?;
-
-        let mut alt_count = 0u32;
-        let mut ref_count = 0u32;
-        let mut depth = 0u32;
-        let mut matching_alt_lengths = BTreeSet::new();
-
-        for record in records {
-            if record.is_unmapped {
-                continue;
-            }
-            if !record_overlaps_locus(&record, locus) {
-                continue;
-            }
-            let classification = classify_expected_indel_lengths(
-                &record,
-                locus,
-                reference.len(),
-                &alternate_lengths,
-            )?;
-            if !classification.covering {
-                continue;
-            }
-            depth += 1;
-            if classification.matches_alt {
-                alt_count += 1;
-                matching_alt_lengths.insert(classification.observed_len);
-            } else if classification.reference_like {
-                ref_count += 1;
-            }
-        }
-
-        let evidence_label = if matching_alt_lengths.is_empty() {
-            "none".to_owned()
-        } else {
-            matching_alt_lengths
-                .into_iter()
-                .map(|len| len.to_string())
-                .collect::<Vec<_>>()
-                .join(",")
-        };
-
-        Ok(VariantObservation {
-            backend: self.backend_name().to_owned(),
-            matched_rsid: variant.rsids.first().cloned(),
-            assembly: Some(assembly),
-            genotype: infer_copy_number_genotype(
-                &reference, &alternate, ref_count, alt_count, depth,
-            ),
-            ref_count: Some(ref_count),
-            alt_count: Some(alt_count),
-            depth: Some(depth),
-            raw_counts: BTreeMap::new(),
-            decision: Some(describe_copy_number_decision_rule(
-                &reference, &alternate, ref_count, alt_count, depth,
-            )),
-            evidence: vec![format!(
-                "observed indel at {} depth={} ref_count={} alt_count={} matching_alt_lengths={}",
-                describe_locus(locus),
-                depth,
-                ref_count,
-                alt_count,
-                evidence_label
-            )],
+    ) -> Result<CramSite, RuntimeError> {
+        CramSite::new(variant, assembly, locus)?.ok_or_else(|| {
+            RuntimeError::Unsupported(format!(
+                "backend '{}' does not yet support {:?} observation for {}",
+                self.backend_name(),
+                variant.kind.unwrap_or(VariantKind::Other),
+                self.path.display()
+            ))
         })
     }
-
-    fn observe_indel_with_reader(
-        &self,
-        reader: &mut cram::io::indexed_reader::IndexedReader<std::fs::File>,
-        label: &str,
-        variant: &VariantSpec,
-        assembly: Assembly,
-        locus: &GenomicLocus,
-    ) -> Result<VariantObservation, RuntimeError> {
-        let reference = variant.reference.clone().ok_or_else(|| {
-            RuntimeError::InvalidArguments("indel variant requires ref/reference".to_owned())
-        })?;
-        let alternate = variant.alternate.clone().ok_or_else(|| {
-            RuntimeError::InvalidArguments("indel variant requires alt/alternate".to_owned())
-        })?;
-        let alternate_lengths = indel_alternate_lengths(variant, &alternate);
-
-        super::observe_cram_indel_with_reader(
-            reader,
-            label,
-            locus,
-            &reference,
-            &alternate,
-            &alternate_lengths,
-            variant.rsids.first().cloned(),
-            Some(assembly),
-        )
-    }
-}
-
-fn indel_alternate_lengths(variant: &VariantSpec, fallback_alternate: &str) -> Vec<usize> {
-    let mut lengths = variant
-        .observed_alternates
-        .iter()
-        .map(String::len)
-        .filter(|len| *len > 0)
-        .collect::<Vec<_>>();
-    if lengths.is_empty() {
-        lengths.push(fallback_alternate.len());
-    }
-    lengths.sort_unstable();
-    lengths.dedup();
-    lengths
 }
 
 #[cfg(test)]
 mod tests {
-    use std::{fs, path::PathBuf};
+    use std::{fs, path::PathBuf, sync::Arc};
+
+    use bioscript_core::{ProfileCounter, ProfileCounters, ProfileScope};
 
     use super::*;
-    use crate::genotype::GenotypeLoadOptions;
+    use crate::alignment;
+    use crate::genotype::{
+        GenotypeLoadOptions,
+        reader_slot::{ReaderPool, ReaderSlot},
+    };
 
     fn fixtures_dir() -> PathBuf {
         PathBuf::from(env!("CARGO_MANIFEST_DIR")).join("tests/fixtures")
@@ -440,6 +95,9 @@ mod tests {
                 reference_file: Some(dir.join("mini.fa")),
                 ..GenotypeLoadOptions::default()
             },
+            reader: ReaderSlot::default(),
+            worker_readers: ReaderPool::default(),
+            repository: ReaderSlot::default(),
         }
     }
 
@@ -533,6 +191,148 @@ mod tests {
         assert!(err.to_string().contains("does not yet support"));
     }
 
+    #[test]
+    fn single_and_batch_lookups_share_the_persistent_reader() {
+        let backend = backend();
+        let snp = VariantSpec {
+            rsids: vec!["mini_snp".to_owned()],
+            grch38: Some(locus()),
+            reference: Some("A".to_owned()),
+            alternate: Some("C".to_owned()),
+            kind: Some(VariantKind::Snp),
+            ..VariantSpec::default()
+        };
+        let single = backend.lookup_variant(&snp).unwrap();
+        assert_eq!(single.depth, Some(50));
+        assert!(format!("{:?}", backend.reader).contains("open: true"));
+
+        let batch = backend
+            .clone()
+            .lookup_variants(std::slice::from_ref(&snp))
+            .unwrap();
+        assert_eq!(batch, vec![single]);
+    }
+
+    #[test]
+    fn worker_pool_matches_serial_lookups() {
+        let snp = VariantSpec {
+            rsids: vec!["mini_snp".to_owned()],
+            grch38: Some(locus()),
+            reference: Some("A".to_owned()),
+            alternate: Some("C".to_owned()),
+            kind: Some(VariantKind::Snp),
+            ..VariantSpec::default()
+        };
+        let deletion = VariantSpec {
+            rsids: vec!["mini_del".to_owned()],
+            grch38: Some(locus()),
+            reference: Some("I".to_owned()),
+            alternate: Some("D".to_owned()),
+            kind: Some(VariantKind::Deletion),
+            deletion_length: Some(1),
+            ..VariantSpec::default()
+        };
+        // Reads cover 500..2549, so 2900 falls outside every container and
+        // forms its own locality group next to the container at 1000.
+        let uncovered = VariantSpec {
+            rsids: vec!["mini_uncovered".to_owned()],
+            grch38: Some(GenomicLocus {
+                chrom: "chr_test".to_owned(),
+                start: 2900,
+                end: 2900,
+            }),
+            ..snp.clone()
+        };
+        let variants = [snp, uncovered, deletion];
+        let serial = {
+            let mut backend = backend();
+            backend.options.cram_lookup_workers = Some(1);
+            backend.lookup_variants(&variants).unwrap()
+        };
+        assert_eq!(serial[0].matched_rsid.as_deref(), Some("mini_snp"));
+        assert_eq!(serial[1].matched_rsid.as_deref(), Some("mini_uncovered"));
+        assert_eq!(serial[2].matched_rsid.as_deref(), Some("mini_del"));
+
+        let mut backend = backend();
+        backend.options.cram_lookup_workers = Some(4);
+        let counters = Arc::new(ProfileCounters::new());
+        let _scope = ProfileScope::enter(Arc::clone(&counters));
+        assert_eq!(backend.lookup_variants(&variants).unwrap(), serial);
+        assert_eq!(counters.get(ProfileCounter::WorkerThreads), 1);
+        assert!(format!("{:?}", backend.worker_readers).contains("open: 1"));
+        assert!(format!("{:?}", backend.repository).contains("open: true"));
+
+        // A second call reuses the pooled worker reader.
+        assert_eq!(backend.lookup_variants(&variants).unwrap(), serial);
+        assert_eq!(counters.get(ProfileCounter::WorkerThreads), 2);
+        assert!(format!("{:?}", backend.worker_readers).contains("open: 1"));
+    }
+
+    #[test]
+    fn clustered_batch_matches_single_lookups_with_fewer_container_decodes() {
+        let at = |start| GenomicLocus {
+            chrom: "chr_test".to_owned(),
+            start,
+            end: start,
+        };
+        let snp = |rsid: &str, start| VariantSpec {
+            rsids: vec![rsid.to_owned()],
+            grch38: Some(at(start)),
+            reference: Some("A".to_owned()),
+            alternate: Some("C".to_owned()),
+            kind: Some(VariantKind::Snp),
+            ..VariantSpec::default()
+        };
+        let variants = [
+            snp("snp_1000", 1000),
+            snp("snp_600", 600),
+            VariantSpec {
+                rsids: vec!["del_1000".to_owned()],
+                grch38: Some(at(1000)),
+                reference: Some("I".to_owned()),
+                alternate: Some("D".to_owned()),
+                kind: Some(VariantKind::Deletion),
+                deletion_length: Some(1),
+                ..VariantSpec::default()
+            },
+            VariantSpec {
+                rsids: vec!["indel_700".to_owned()],
+                grch38: Some(at(700)),
+                reference: Some("A".to_owned()),
+                alternate: Some("AT".to_owned()),
+                kind: Some(VariantKind::Insertion),
+                ..VariantSpec::default()
+            },
+            snp("snp_1500", 1500),
+        ];
+
+        let single_counters = Arc::new(ProfileCounters::new());
+        let singles = {
+            let _scope = ProfileScope::enter(Arc::clone(&single_counters));
+            let backend = backend();
+            variants
+                .iter()
+                .map(|variant| backend.lookup_variant(variant).unwrap())
+                .collect::<Vec<_>>()
+        };
+
+        let batch_counters = Arc::new(ProfileCounters::new());
+        let batch = {
+            let _scope = ProfileScope::enter(Arc::clone(&batch_counters));
+            let mut backend = backend();
+            backend.options.cram_lookup_workers = Some(1);
+            backend.lookup_variants(&variants).unwrap()
+        };
+
+        assert_eq!(batch, singles);
+        assert_eq!(batch[0].depth, Some(50));
+        assert_eq!(batch[2].matched_rsid.as_deref(), Some("del_1000"));
+        assert!(
+            batch_counters.get(ProfileCounter::ContainersDecoded)
+                < single_counters.get(ProfileCounter::ContainersDecoded)
+        );
+    }
+
     #[test]
     fn observe_with_reader_reports_required_variant_fields() {
         let backend = backend();
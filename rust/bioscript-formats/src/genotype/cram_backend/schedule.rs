@@ -0,0 +1,112 @@
+use crate::genotype::reader_slot::lookup_worker_limit;
+
+/// Group lookup jobs by the CRAM containers their loci resolve to.
+///
+/// `spans` pairs a job id with the first and last container offset the index
+/// selects for it. Jobs are ordered by file position and a job whose span
+/// overlaps the current group's span joins that group, so two workers never
+/// decode the same container. Jobs without a span (unknown contig, no
+/// overlapping container) are cheap and each form their own trailing group.
+pub(super) fn locality_groups(spans: &[(usize, Option<(u64, u64)>)]) -> Vec<Vec<usize>> {
+    let mut located = spans
+        .iter()
+        .filter_map(|(job, span)| span.map(|span| (span, *job)))
+        .collect::<Vec<_>>();
+    located.sort_unstable();
+
+    let mut groups: Vec<Vec<usize>> = Vec::new();
+    let mut group_end = None;
+    for ((start, end), job) in located {
+        match (groups.last_mut(), group_end) {
+            (Some(group), Some(current_end)) if start <= current_end => {
+                group.push(job);
+                group_end = Some(end.max(current_end));
+            }
+            _ => {
+                groups.push(vec![job]);
+                group_end = Some(end);
+            }
+        }
+    }
+    groups.extend(
+        spans
+            .iter()
+            .filter(|(_, span)| span.is_none())
+            .map(|(job, _)| vec![*job]),
+    );
+    groups
+}
+
+/// Split `groups` into at most `worker_count` batches of adjacent groups with
+/// roughly equal job counts, keeping each worker on one stretch of the file.
+pub(super) fn contiguous_batches(groups: Vec<Vec<usize>>, worker_count: usize) -> Vec<Vec<usize>> {
+    let total = groups.iter().map(Vec::len).sum::<usize>();
+    let target = total.div_ceil(worker_count.max(1));
+    let mut batches = Vec::new();
+    let mut current = Vec::new();
+    for group in groups {
+        current.extend(group);
+        if current.len() >= target && batches.len() + 1 < worker_count {
+            batches.push(std::mem::take(&mut current));
+        }
+    }
+    if !current.is_empty() {
+        batches.push(current);
+    }
+    batches
+}
+
+/// Worker threads for a CRAM batch. `requested` comes from
+/// `GenotypeLoadOptions::cram_lookup_workers`; without it the pool is sized
+/// by `lookup_worker_limit`. Either way there is no point running more
+/// workers than container-disjoint groups.
+pub(super) fn cram_lookup_worker_count(requested: Option<usize>, group_count: usize) -> usize {
+    lookup_worker_limit(requested).min(group_count).max(1)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn locality_groups_merge_jobs_that_share_containers() {
+        let spans = [
+            (0, Some((500, 500))),
+            (1, Some((100, 200))),
+            (2, None),
+            (3, Some((200, 300))),
+            (4, Some((900, 900))),
+            (5, Some((500, 600))),
+        ];
+        assert_eq!(
+            locality_groups(&spans),
+            vec![vec![1, 3], vec![0, 5], vec![4], vec![2]]
+        );
+        assert!(locality_groups(&[]).is_empty());
+    }
+
+    #[test]
+    fn contiguous_batches_balance_jobs_without_splitting_groups() {
+        let groups = vec![vec![0, 1, 2], vec![3], vec![4], vec![5, 6], vec![7]];
+        assert_eq!(
+            contiguous_batches(groups.clone(), 2),
+            vec![vec![0, 1, 2, 3], vec![4, 5, 6, 7]]
+        );
+        assert_eq!(contiguous_batches(groups.clone(), 1).len(), 1);
+        assert_eq!(contiguous_batches(groups, 10).len(), 5);
+        assert!(contiguous_batches(Vec::new(), 4).is_empty());
+    }
+
+    #[test]
+    fn worker_count_is_bounded_by_groups_and_request() {
+        assert_eq!(cram_lookup_worker_count(Some(8), 3), 3);
+        assert_eq!(cram_lookup_worker_count(Some(2), 8), 2);
+        assert_eq!(cram_lookup_worker_count(Some(4), 0), 1);
+        assert!(cram_lookup_worker_count(Some(0), 4) >= 1);
+        assert!(cram_lookup_worker_count(None, 4) <= 4);
+        assert_eq!(
+            cram_lookup_worker_count(None, 1000),
+            lookup_worker_limit(None)
+        );
+    }
+}
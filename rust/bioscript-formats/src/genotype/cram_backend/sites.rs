@@ -0,0 +1,393 @@
+use std::collections::{BTreeMap, BTreeSet};
+
+use bioscript_core::{
+    Assembly, GenomicLocus, RuntimeError, VariantKind, VariantObservation, VariantSpec,
+};
+use noodles::{core::Position, cram};
+
+use crate::alignment::{AlignmentOpKind, AlignmentRecord};
+
+use super::{
+    SnpPileupCounts, anchor_window, classify_expected_indel_lengths, count_snp_record,
+    describe_copy_number_decision_rule, describe_locus, describe_snp_decision_rule, first_base,
+    indel_at_anchor, infer_copy_number_genotype, infer_snp_genotype, record_overlaps_locus,
+    recount_snp_pileup_counts, select_observed_snp_alternate, snp_target_position, spans_position,
+};
+
+/// One variant's pileup state during a CRAM sweep.
+///
+/// `window` is the locus a standalone query of this variant reads (the
+/// anchor base for deletions); the sweep offers the site every record that
+/// intersects it, so the finished observation does not depend on which other
+/// variants shared the container decode.
+pub(super) struct CramSite {
+    pub(super) window: GenomicLocus,
+    accumulator: SiteAccumulator,
+}
+
+enum SiteAccumulator {
+    Snp(SnpSite),
+    Deletion(DeletionSite),
+    Indel(IndelSite),
+}
+
+struct SnpSite {
+    locus: GenomicLocus,
+    reference: char,
+    alternate: char,
+    observed_alternates: Vec<String>,
+    matched_rsid: Option<String>,
+    assembly: Assembly,
+    target_position: Position,
+    counts: SnpPileupCounts,
+}
+
+struct DeletionSite {
+    locus: GenomicLocus,
+    deletion_length: usize,
+    reference: String,
+    alternate: String,
+    anchor_pos: i64,
+    matched_rsid: Option<String>,
+    assembly: Assembly,
+    ref_count: u32,
+    alt_count: u32,
+    depth: u32,
+}
+
+struct IndelSite {
+    locus: GenomicLocus,
+    reference: String,
+    alternate: String,
+    alternate_lengths: Vec<usize>,
+    matched_rsid: Option<String>,
+    assembly: Assembly,
+    ref_count: u32,
+    alt_count: u32,
+    depth: u32,
+    matching_alt_lengths: BTreeSet<usize>,
+}
+
+impl CramSite {
+    /// Site for `variant` at `locus`. Returns `None` for kinds the CRAM
+    /// backend cannot observe so the caller can name the backend in its error.
+    pub(super) fn new(
+        variant: &VariantSpec,
+        assembly: Assembly,
+        locus: &GenomicLocus,
+    ) -> Result<Option<Self>, RuntimeError> {
+        let site = match variant.kind.unwrap_or(VariantKind::Other) {
+            VariantKind::Snp => {
+                let site = SnpSite::new(variant, assembly, locus)?;
+                Self {
+                    window: site.locus.clone(),
+                    accumulator: SiteAccumulator::Snp(site),
+                }
+            }
+            VariantKind::Deletion => {
+                let site = DeletionSite::new(variant, assembly, locus)?;
+                Self {
+                    window: anchor_window(locus),
+                    accumulator: SiteAccumulator::Deletion(site),
+                }
+            }
+            VariantKind::Insertion | VariantKind::Indel => {
+                let site = IndelSite::new(variant, assembly, locus)?;
+                Self {
+                    window: site.locus.clone(),
+                    accumulator: SiteAccumulator::Indel(site),
+                }
+            }
+            VariantKind::Other => return Ok(None),
+        };
+        Ok(Some(site))
+    }
+
+    /// Feed one record that intersects `window`, both raw (SNP base and
+    /// quality) and decoded (deletion and indel CIGAR evidence).
+    pub(super) fn observe(
+        &mut self,
+        record: &cram::Record<'_>,
+        alignment: &AlignmentRecord,
+    ) -> Result<(), RuntimeError> {
+        match &mut self.accumulator {
+            SiteAccumulator::Snp(site) => count_snp_record(
+                &mut site.counts,
+                record,
+                site.target_position,
+                site.reference,
+                site.alternate,
+            ),
+            SiteAccumulator::Deletion(site) => {
+                site.observe(alignment);
+                Ok(())
+            }
+            SiteAccumulator::Indel(site) => site.observe(alignment),
+        }
+    }
+
+    pub(super) fn finish(self) -> VariantObservation {
+        match self.accumulator {
+            SiteAccumulator::Snp(site) => site.finish(),
+            SiteAccumulator::Deletion(site) => site.finish(),
+            SiteAccumulator::Indel(site) => site.finish(),
+        }
+    }
+}
+
+impl SnpSite {
+    fn new(
+        variant: &VariantSpec,
+        assembly: Assembly,
+        locus: &GenomicLocus,
+    ) -> Result<Self, RuntimeError> {
+        let reference = variant
+            .reference
+            .as_deref()
+            .and_then(first_base)
+            .ok_or_else(|| {
+                RuntimeError::InvalidArguments("SNP variant requires ref/reference".to_owned())
+            })?;
+        let alternate = variant
+            .alternate
+            .as_deref()
+            .and_then(first_base)
+            .ok_or_else(|| {
+                RuntimeError::InvalidArguments("SNP variant requires alt/alternate".to_owned())
+            })?;
+        Ok(Self {
+            target_position: snp_target_position(locus)?,
+            locus: locus.clone(),
+            reference,
+            alternate,
+            observed_alternates: variant.observed_alternates.clone(),
+            matched_rsid: variant.rsids.first().cloned(),
+            assembly,
+            counts: SnpPileupCounts::default(),
+        })
+    }
+
+    fn finish(self) -> VariantObservation {
+        let Self {
+            locus,
+            reference,
+            alternate,
+            observed_alternates,
+            matched_rsid,
+            assembly,
+            mut counts,
+            ..
+        } = self;
+        let alternate = select_observed_snp_alternate(
+            reference,
+            alternate,
+            &observed_alternates,
+            &counts.filtered_base_counts,
+            &counts.raw_base_counts,
+        );
+        recount_snp_pileup_counts(&mut counts, reference, alternate);
+        let ref_count = counts.filtered_ref_count;
+        let alt_count = counts.filtered_alt_count;
+        let depth = counts.filtered_depth;
+        let evidence = counts.evidence_lines(&describe_locus(&locus), locus.start);
+        VariantObservation {
+            backend: "cram".to_owned(),
+            matched_rsid,
+            assembly: Some(assembly),
+            genotype: infer_snp_genotype(reference, alternate, ref_count, alt_count, depth),
+            ref_count: Some(ref_count),
+            alt_count: Some(alt_count),
+            depth: Some(depth),
+            raw_counts: counts.raw_base_counts,
+            decision: Some(describe_snp_decision_rule(
+                reference, alternate, ref_count, alt_count, depth,
+            )),
+            evidence,
+        }
+    }
+}
+
+impl DeletionSite {
+    fn new(
+        variant: &VariantSpec,
+        assembly: Assembly,
+        locus: &GenomicLocus,
+    ) -> Result<Self, RuntimeError> {
+        let deletion_length = variant.deletion_length.ok_or_else(|| {
+            RuntimeError::InvalidArguments("deletion variant requires deletion_length".to_owned())
+        })?;
+        Ok(Self {
+            anchor_pos: locus.start.saturating_sub(1),
+            locus: locus.clone(),
+            deletion_length,
+            reference: variant.reference.clone().unwrap_or_else(|| "I".to_owned()),
+            alternate: variant.alternate.clone().unwrap_or_else(|| "D".to_owned()),
+            matched_rsid: variant.rsids.first().cloned(),
+            assembly,
+            ref_count: 0,
+            alt_count: 0,
+            depth: 0,
+        })
+    }
+
+    fn observe(&mut self, alignment: &AlignmentRecord) {
+        if alignment.is_unmapped || !spans_position(alignment, self.anchor_pos) {
+            return;
+        }
+        self.depth += 1;
+        match indel_at_anchor(alignment, self.anchor_pos) {
+            Some((AlignmentOpKind::Deletion, len)) if len == self.deletion_length => {
+                self.alt_count += 1;
+            }
+            _ => self.ref_count += 1,
+        }
+    }
+
+    fn finish(self) -> VariantObservation {
+        let Self {
+            locus,
+            deletion_length,
+            reference,
+            alternate,
+            anchor_pos,
+            matched_rsid,
+            assembly,
+            ref_count,
+            alt_count,
+            depth,
+        } = self;
+        VariantObservation {
+            backend: "cram".to_owned(),
+            matched_rsid,
+            assembly: Some(assembly),
+            genotype: infer_copy_number_genotype(
+                &reference, &alternate, ref_count, alt_count, depth,
+            ),
+            ref_count: Some(ref_count),
+            alt_count: Some(alt_count),
+            depth: Some(depth),
+            raw_counts: BTreeMap::new(),
+            decision: Some(describe_copy_number_decision_rule(
+                &reference, &alternate, ref_count, alt_count, depth,
+            )),
+            evidence: vec![format!(
+                "observed deletion anchor {}:{} len={} depth={} ref_count={} alt_count={}",
+                locus.chrom, anchor_pos, deletion_length, depth, ref_count, alt_count
+            )],
+        }
+    }
+}
+
+impl IndelSite {
+    fn new(
+        variant: &VariantSpec,
+        assembly: Assembly,
+        locus: &GenomicLocus,
+    ) -> Result<Self, RuntimeError> {
+        let reference = variant.reference.clone().ok_or_else(|| {
+            RuntimeError::InvalidArguments("indel variant requires ref/reference".to_owned())
+        })?;
+        let alternate = variant.alternate.clone().ok_or_else(|| {
+            RuntimeError::InvalidArguments("indel variant requires alt/alternate".to_owned())
+        })?;
+        Ok(Self {
+            alternate_lengths: indel_alternate_lengths(variant, &alternate),
+            locus: locus.clone(),
+            reference,
+            alternate,
+            matched_rsid: variant.rsids.first().cloned(),
+            assembly,
+            ref_count: 0,
+            alt_count: 0,
+            depth: 0,
+            matching_alt_lengths: BTreeSet::new(),
+        })
+    }
+
+    fn observe(&mut self, alignment: &AlignmentRecord) -> Result<(), RuntimeError> {
+        if alignment.is_unmapped || !record_overlaps_locus(alignment, &self.locus) {
+            return Ok(());
+        }
+        let classification = classify_expected_indel_lengths(
+            alignment,
+            &self.locus,
+            self.reference.len(),
+            &self.alternate_lengths,
+        )?;
+        if !classification.covering {
+            return Ok(());
+        }
+        self.depth += 1;
+        if classification.matches_alt {
+            self.alt_count += 1;
+            self.matching_alt_lengths
+                .insert(classification.observed_len);
+        } else if classification.reference_like {
+            self.ref_count += 1;
+        }
+        Ok(())
+    }
+
+    fn finish(self) -> VariantObservation {
+        let Self {
+            locus,
+            reference,
+            alternate,
+            matched_rsid,
+            assembly,
+            ref_count,
+            alt_count,
+            depth,
+            matching_alt_lengths,
+            ..
+        } = self;
+        let evidence_label = if matching_alt_lengths.is_empty() {
+            "none".to_owned()
+        } else {
+            matching_alt_lengths
+                .into_iter()
+                .map(|len| len.to_string())
+                .collect::<Vec<_>>()
+                .join(",")
+        };
+
+        VariantObservation {
+            backend: "cram".to_owned(),
+            matched_rsid,
+            assembly: Some(assembly),
+            genotype: infer_copy_number_genotype(
+                &reference, &alternate, ref_count, alt_count, depth,
+            ),
+            ref_count: Some(ref_count),
+            alt_count: Some(alt_count),
+            depth: Some(depth),
+            raw_counts: BTreeMap::new(),
+            decision: Some(describe_copy_number_decision_rule(
+                &reference, &alternate, ref_count, alt_count, depth,
+            )),
+            evidence: vec![format!(
+                "observed indel at {} depth={} ref_count={} alt_count={} matching_alt_lengths={}",
+                describe_locus(&locus),
+                depth,
+                ref_count,
+                alt_count,
+                evidence_label
+            )],
+        }
+    }
+}
+
+fn indel_alternate_lengths(variant: &VariantSpec, fallback_alternate: &str) -> Vec<usize> {
+    let mut lengths = variant
+        .observed_alternates
+        .iter()
+        .map(String::len)
+        .filter(|len| *len > 0)
+        .collect::<Vec<_>>();
+    if lengths.is_empty() {
+        lengths.push(fallback_alternate.len());
+    }
+    lengths.sort_unstable();
+    lengths.dedup();
+    lengths
+}
@@ -1,10 +1,18 @@
-use std::{env, fmt::Write as _, path::Path, thread};
+use std::{fmt::Write as _, path::Path, thread};
 
-use bioscript_core::{RuntimeError, VariantKind, VariantObservation, VariantSpec};
+use bioscript_core::{
+    GenomicLocus, ProfileCounter, ProfileScope, RuntimeError, VariantObservation, VariantSpec,
+    profile,
+};
 
-use crate::alignment;
+use crate::alignment::{self, CramFileReader};
+use crate::genotype::reader_slot::reader_cache_bytes;
 
-use super::choose_variant_locus;
+use super::{
+    choose_variant_locus,
+    schedule::{contiguous_batches, cram_lookup_worker_count, locality_groups},
+    sweep::observe_cram_sites,
+};
 use crate::genotype::{describe_query, types::CramBackend};
 
 impl CramBackend {
@@ -57,25 +65,12 @@ impl CramBackend {
             return Err(RuntimeError::Unsupported(detail));
         };
 
-        let observation = match variant.kind.unwrap_or(VariantKind::Other) {
-            VariantKind::Snp => self.observe_snp(variant, assembly, &locus, reference_file)?,
-            VariantKind::Deletion => {
-                self.observe_deletion(variant, assembly, &locus, reference_file)?
-            }
-            VariantKind::Insertion | VariantKind::Indel => {
-                self.observe_indel(variant, assembly, &locus, reference_file)?
-            }
-            VariantKind::Other => {
-                return Err(RuntimeError::Unsupported(format!(
-                    "backend '{}' does not yet support {:?} observation for {}",
-                    self.backend_name(),
-                    variant.kind.unwrap_or(VariantKind::Other),
-                    self.path.display()
-                )));
-            }
-        };
-
-        Ok(observation)
+        // Validate the variant before the reader is opened, so a bad spec
+        // fails the same way with or without a readable CRAM.
+        let site = self.cram_site(variant, assembly, &locus)?;
+        self.with_session_reader(reference_file, |reader, label| {
+            self.observe_site(reader, label, site)
+        })
     }
 
     pub(crate) fn lookup_variants(
@@ -92,109 +87,156 @@ impl CramBackend {
         let mut indexed: Vec<(usize, &VariantSpec)> = variants.iter().enumerate().collect();
         indexed.sort_by_cached_key(|(_, variant)| crate::genotype::variant_sort_key(variant));
 
-        let worker_count = cram_lookup_worker_count(indexed.len());
+        let requested = self.options.cram_lookup_workers;
+        if indexed.len() <= 1 || requested == Some(1) {
+            return self.lookup_variants_serial(reference_file, &indexed);
+        }
+
+        let groups = self.locality_groups(reference_file, &indexed)?;
+        let worker_count = cram_lookup_worker_count(requested, groups.len());
         if worker_count <= 1 {
             return self.lookup_variants_serial(reference_file, &indexed);
         }
 
-        let jobs = indexed
+        let batches = contiguous_batches(groups, worker_count)
             .into_iter()
-            .map(|(idx, variant)| (idx, variant.clone()))
+            .map(|batch| {
+                batch
+                    .into_iter()
+                    .map(|job| indexed[job])
+                    .collect::<Vec<_>>()
+            })
             .collect::<Vec<_>>();
-        self.lookup_variants_parallel(reference_file, &jobs, worker_count)
+        self.lookup_variants_parallel(reference_file, batches, variants.len())
     }
 
-    fn lookup_variants_serial(
+    /// Group positions in `indexed` by the CRAM containers their loci touch,
+    /// using the persistent reader's index.
+    fn locality_groups(
         &self,
         reference_file: &Path,
         indexed: &[(usize, &VariantSpec)],
-    ) -> Result<Vec<VariantObservation>, RuntimeError> {
-        let repository = alignment::build_reference_repository(reference_file)?;
-        let mut reader =
-            alignment::build_cram_indexed_reader_from_path(&self.path, &self.options, repository)?;
+    ) -> Result<Vec<Vec<usize>>, RuntimeError> {
+        let loci = indexed
+            .iter()
+            .map(|(_, variant)| {
+                choose_variant_locus(variant, reference_file).map(|(_, locus)| GenomicLocus {
+                    start: locus.start.saturating_sub(1),
+                    ..locus
+                })
+            })
+            .collect::<Vec<_>>();
+        let located = loci.iter().flatten().cloned().collect::<Vec<_>>();
+        let mut spans = self
+            .with_session_reader(reference_file, |reader, label| {
+                alignment::cram_container_spans(reader, label, &located)
+            })?
+            .into_iter();
+        let spans = loci
+            .iter()
+            .enumerate()
+            .map(|(job, locus)| (job, locus.as_ref().and_then(|_| spans.next().flatten())))
+            .collect::<Vec<_>>();
+        Ok(locality_groups(&spans))
+    }
+
+    /// Run `query` against this backend's persistent reader, opening it on
+    /// first use. The reader keeps the CRAI index, FASTA repository and block
+    /// cache warm across lookups.
+    pub(super) fn with_session_reader<T>(
+        &self,
+        reference_file: &Path,
+        query: impl FnOnce(&mut CramFileReader, &str) -> Result<T, RuntimeError>,
+    ) -> Result<T, RuntimeError> {
         let label = self.path.display().to_string();
+        self.reader.with(
+            || self.open_reader(reference_file),
+            |reader| query(reader, &label),
+        )
+    }
+
+    /// Open a session or worker reader. Every reader shares the backend's
+    /// reference repository and gets an equal share of
+    /// `alignment_cache_bytes`.
+    fn open_reader(&self, reference_file: &Path) -> Result<CramFileReader, RuntimeError> {
+        let repository = self.repository.with(
+            || alignment::build_reference_repository(reference_file),
+            |repository| Ok(repository.clone()),
+        )?;
+        let cache_bytes = reader_cache_bytes(
+            self.options.alignment_cache_bytes,
+            self.options.cram_lookup_workers,
+        );
+        alignment::open_cached_cram_reader(&self.path, &self.options, repository, cache_bytes)
+    }
 
+    fn lookup_variants_serial(
+        &self,
+        reference_file: &Path,
+        indexed: &[(usize, &VariantSpec)],
+    ) -> Result<Vec<VariantObservation>, RuntimeError> {
         let result_len = indexed
             .iter()
             .map(|(idx, _)| *idx)
             .max()
             .map_or(0, |idx| idx + 1);
+        let observations = self.with_session_reader(reference_file, |reader, label| {
+            self.observe_batch(reader, label, reference_file, indexed)
+        })?;
         let mut results = vec![VariantObservation::default(); result_len];
-        for (idx, variant) in indexed {
-            let Some((assembly, locus)) = choose_variant_locus(variant, reference_file) else {
-                results[*idx] = self.unsupported_locus_observation(variant, reference_file);
-                continue;
-            };
-            results[*idx] =
-                self.observe_with_reader(&mut reader, &label, variant, assembly, &locus)?;
+        for (idx, observation) in observations {
+            results[idx] = observation;
         }
 
         Ok(results)
     }
 
+    /// Run one batch per worker. The calling thread takes the first batch on
+    /// the session reader; worker `n` reuses slot `n` of `worker_readers`, so
+    /// repeated parallel lookups keep every worker's CRAI and block cache warm
+    /// instead of reopening the CRAM per call. All readers share one FASTA
+    /// repository and split `alignment_cache_bytes` between them.
     fn lookup_variants_parallel(
         &self,
         reference_file: &Path,
-        jobs: &[(usize, VariantSpec)],
-        worker_count: usize,
+        batches: Vec<Vec<(usize, &VariantSpec)>>,
+        result_len: usize,
     ) -> Result<Vec<VariantObservation>, RuntimeError> {
-        let result_len = jobs
-            .iter()
-            .map(|(idx, _)| *idx)
-            .max()
-            .map_or(0, |idx| idx + 1);
-        let chunk_size = jobs.len().div_ceil(worker_count);
-        let path = self.path.clone();
-        let options = self.options.clone();
-        let reference_file = reference_file.to_path_buf();
-
-        let mut handles = Vec::new();
-        for chunk in jobs.chunks(chunk_size) {
-            let chunk = chunk.to_vec();
-            let worker = CramBackend {
-                path: path.clone(),
-                options: options.clone(),
-            };
-            let reference_file = reference_file.clone();
-            handles.push(thread::spawn(
-                move || -> Result<Vec<(usize, VariantObservation)>, RuntimeError> {
-                    let repository = alignment::build_reference_repository(&reference_file)?;
-                    let mut reader = alignment::build_cram_indexed_reader_from_path(
-                        &worker.path,
-                        &worker.options,
-                        repository,
-                    )?;
-                    let label = worker.path.display().to_string();
-                    let mut observations = Vec::with_capacity(chunk.len());
-
-                    for (idx, variant) in chunk {
-                        let observation = if let Some((assembly, locus)) =
-                            choose_variant_locus(&variant, &reference_file)
-                        {
-                            worker.observe_with_reader(
-                                &mut reader,
-                                &label,
-                                &variant,
-                                assembly,
-                                &locus,
-                            )?
-                        } else {
-                            worker.unsupported_locus_observation(&variant, &reference_file)
-                        };
-                        observations.push((idx, observation));
-                    }
-
-                    Ok(observations)
-                },
-            ));
-        }
+        let mut batches = batches.into_iter();
+        let primary = batches.next().unwrap_or_default();
+        let slots = self.worker_readers.slots(batches.len());
+
+        let gathered = thread::scope(|scope| {
+            let handles = batches
+                .zip(slots)
+                .map(|(batch, slot)| {
+                    let counters = profile::current_counters();
+                    profile::record(ProfileCounter::WorkerThreads, 1);
+                    scope.spawn(move || {
+                        let _profile_scope = counters.map(ProfileScope::enter);
+                        let label = self.path.display().to_string();
+                        slot.with(
+                            || self.open_reader(reference_file),
+                            |reader| self.observe_batch(reader, &label, reference_file, &batch),
+                        )
+                    })
+                })
+                .collect::<Vec<_>>();
+            let mut gathered = vec![self.with_session_reader(reference_file, |reader, label| {
+                self.observe_batch(reader, label, reference_file, &primary)
+            })];
+            gathered.extend(handles.into_iter().map(|handle| {
+                handle
+                    .join()
+                    .map_err(|_| RuntimeError::Io("CRAM lookup worker panicked".to_owned()))
+                    .and_then(|observations| observations)
+            }));
+            gathered
+        });
 
         let mut results = vec![VariantObservation::default(); result_len];
-        for handle in handles {
-            let observations = handle
-                .join()
-                .map_err(|_| RuntimeError::Io("CRAM lookup worker panicked".to_owned()))??;
-            for (idx, observation) in observations {
+        for observations in gathered {
+            for (idx, observation) in observations? {
                 results[idx] = observation;
             }
         }
@@ -202,6 +244,37 @@ impl CramBackend {
         Ok(results)
     }
 
+    /// Observe one batch with a single sweep over its sites. Variants
+    /// without usable coordinates are reported without touching the CRAM.
+    fn observe_batch(
+        &self,
+        reader: &mut CramFileReader,
+        label: &str,
+        reference_file: &Path,
+        batch: &[(usize, &VariantSpec)],
+    ) -> Result<Vec<(usize, VariantObservation)>, RuntimeError> {
+        let mut observations = Vec::with_capacity(batch.len());
+        let mut sites = Vec::with_capacity(batch.len());
+        for (idx, variant) in batch {
+            match choose_variant_locus(variant, reference_file) {
+                Some((assembly, locus)) => {
+                    sites.push((*idx, self.cram_site(variant, assembly, &locus)?));
+                }
+                None => observations.push((
+                    *idx,
+                    self.unsupported_locus_observation(variant, reference_file),
+                )),
+            }
+        }
+        observations.extend(observe_cram_sites(
+            reader,
+            label,
+            sites,
+            self.options.allow_reference_md5_mismatch,
+        )?);
+        Ok(observations)
+    }
+
     fn unsupported_locus_observation(
         &self,
         variant: &VariantSpec,
@@ -224,24 +297,6 @@ impl CramBackend {
     }
 }
 
-const DEFAULT_MAX_CRAM_WORKERS: usize = 1;
-
-fn cram_lookup_worker_count(job_count: usize) -> usize {
-    if job_count <= 1 {
-        return 1;
-    }
-
-    let requested = env::var("BIOSCRIPT_CRAM_THREADS")
-        .ok()
-        .and_then(|value| value.parse::<usize>().ok())
-        .filter(|value| *value > 0);
-    let available = thread::available_parallelism().map_or(1, usize::from);
-
-    requested
-        .unwrap_or_else(|| available.min(DEFAULT_MAX_CRAM_WORKERS))
-        .min(job_count)
-}
-
 #[cfg(test)]
 mod tests {
     use std::path::{Path, PathBuf};
@@ -249,7 +304,7 @@ mod tests {
     use bioscript_core::{GenomicLocus, VariantKind};
 
     use super::*;
-    use crate::genotype::GenotypeLoadOptions;
+    use crate::genotype::reader_slot::{ReaderPool, ReaderSlot};
 
     fn backend(reference_file: Option<PathBuf>) -> CramBackend {
         CramBackend {
@@ -258,6 +313,9 @@ mod tests {
                 reference_file,
                 ..GenotypeLoadOptions::default()
             },
+            reader: ReaderSlot::default(),
+            worker_readers: ReaderPool::default(),
+            repository: ReaderSlot::default(),
         }
     }
 
@@ -308,6 +366,9 @@ mod tests {
                 input_index: Some(PathBuf::from("sample.cram.crai")),
                 ..GenotypeLoadOptions::default()
             },
+            reader: ReaderSlot::default(),
+            worker_readers: ReaderPool::default(),
+            repository: ReaderSlot::default(),
         };
 
         let err = store
@@ -326,36 +387,6 @@ mod tests {
         assert!(message.contains("input index sample.cram.crai"));
     }
 
-    #[test]
-    fn cram_lookup_worker_count_bounds_requested_and_available_workers() {
-        unsafe {
-            env::remove_var("BIOSCRIPT_CRAM_THREADS");
-        }
-        assert_eq!(cram_lookup_worker_count(0), 1);
-        assert_eq!(cram_lookup_worker_count(1), 1);
-        assert_eq!(cram_lookup_worker_count(8), 1);
-
-        unsafe {
-            env::set_var("BIOSCRIPT_CRAM_THREADS", "2");
-        }
-        assert_eq!(cram_lookup_worker_count(8), 2);
-        assert_eq!(cram_lookup_worker_count(1), 1);
-
-        unsafe {
-            env::set_var("BIOSCRIPT_CRAM_THREADS", "999");
-        }
-        assert_eq!(cram_lookup_worker_count(3), 3);
-
-        unsafe {
-            env::set_var("BIOSCRIPT_CRAM_THREADS", "0");
-        }
-        assert!(cram_lookup_worker_count(2) >= 1);
-
-        unsafe {
-            env::remove_var("BIOSCRIPT_CRAM_THREADS");
-        }
-    }
-
     #[test]
     fn cram_lookup_variant_rejects_unsupported_kind_after_locus_resolution() {
         let store = backend(Some(PathBuf::from("GRCh38.fa")));
@@ -0,0 +1,136 @@
+use std::io::{Read, Seek};
+
+use bioscript_core::{GenomicLocus, RuntimeError, VariantObservation};
+use noodles::{core::region::Interval, cram};
+
+use crate::alignment;
+use crate::genotype::sweep_clusters;
+
+use super::sites::CramSite;
+
+/// A site placed on a CRAM contig, with the output slot it fills.
+struct SweepSite {
+    output: usize,
+    reference_sequence_id: usize,
+    interval: Interval,
+    site: CramSite,
+}
+
+/// Observe `sites` with one sweep per cluster of nearby windows.
+///
+/// Sites are sorted by contig and window start, windows within
+/// `SWEEP_MERGE_GAP` share one CRAI container selection, and every record
+/// in those containers is decoded once and offered to each site whose own
+/// window it intersects. Sites behind the current record are retired, so the
+/// active set stays as small as the local variant density. Each result
+/// keeps the output slot it was given and matches a one-site sweep exactly.
+pub(super) fn observe_cram_sites<R: Read + Seek>(
+    reader: &mut cram::io::indexed_reader::IndexedReader<R>,
+    label: &str,
+    sites: Vec<(usize, CramSite)>,
+    allow_reference_md5_mismatch: bool,
+) -> Result<Vec<(usize, VariantObservation)>, RuntimeError> {
+    if sites.is_empty() {
+        return Ok(Vec::new());
+    }
+    reader
+        .get_mut()
+        .seek(std::io::SeekFrom::Start(0))
+        .map_err(|err| RuntimeError::Io(format!("failed to rewind CRAM {label}: {err}")))?;
+    let header = reader
+        .read_header()
+        .map_err(|err| RuntimeError::Io(format!("failed to read CRAM header {label}: {err}")))?;
+
+    let mut placed = Vec::with_capacity(sites.len());
+    for (output, site) in sites {
+        let region = alignment::build_cram_region(&header, &site.window)
+            .ok_or_else(|| alignment::missing_cram_contig(&site.window))?;
+        let reference_sequence_id =
+            alignment::resolve_reference_sequence_id(&header, region.name())
+                .ok_or_else(|| alignment::missing_cram_contig(&site.window))?;
+        placed.push(SweepSite {
+            output,
+            reference_sequence_id,
+            interval: region.interval(),
+            site,
+        });
+    }
+    placed.sort_by_key(|entry| {
+        (
+            entry.reference_sequence_id,
+            entry.site.window.start,
+            entry.site.window.end,
+        )
+    });
+
+    let spans = placed
+        .iter()
+        .map(|entry| {
+            (
+                entry.reference_sequence_id,
+                entry.site.window.start,
+                entry.site.window.end,
+            )
+        })
+        .collect::<Vec<_>>();
+    for cluster in sweep_clusters(&spans) {
+        sweep_cluster(
+            reader,
+            label,
+            &mut placed[cluster],
+            allow_reference_md5_mismatch,
+        )?;
+    }
+
+    Ok(placed
+        .into_iter()
+        .map(|entry| (entry.output, entry.site.finish()))
+        .collect())
+}
+
+/// Sweep one cluster of sorted sites with a single container selection.
+fn sweep_cluster<R: Read + Seek>(
+    reader: &mut cram::io::indexed_reader::IndexedReader<R>,
+    label: &str,
+    sites: &mut [SweepSite],
+    allow_reference_md5_mismatch: bool,
+) -> Result<(), RuntimeError> {
+    let Some(first) = sites.first() else {
+        return Ok(());
+    };
+    let locus = GenomicLocus {
+        chrom: first.site.window.chrom.clone(),
+        start: first.site.window.start,
+        end: sites
+            .iter()
+            .map(|entry| entry.site.window.end)
+            .max()
+            .unwrap_or(first.site.window.end),
+    };
+
+    // `sites` is sorted by window start: `next` is the first site no record
+    // has reached yet and `active` holds reached sites still ahead of the
+    // sweep position.
+    let mut next = 0;
+    let mut active: Vec<usize> = Vec::new();
+    alignment::for_each_decoded_cram_record_with_reader_inner(
+        reader,
+        label,
+        &locus,
+        allow_reference_md5_mismatch,
+        |record, decoded| {
+            while next < sites.len() && sites[next].site.window.start <= decoded.end {
+                active.push(next);
+                next += 1;
+            }
+            active.retain(|&site| sites[site].site.window.end >= decoded.start);
+            for &site in &active {
+                let entry = &mut sites[site];
+                if alignment::alignment_record_intersects_interval(&decoded, entry.interval) {
+                    entry.site.observe(record, &decoded)?;
+                }
+            }
+            Ok(true)
+        },
+    )
+}
@@ -76,6 +76,7 @@ pub(crate) fn detect_delimiter(lines: &[String]) -> Delimiter {
 }
 
 #[allow(dead_code)]
+#[derive(Clone)]
 pub(crate) struct RowParser {
     delimiter: Delimiter,
     header: Option<Vec<String>>,
@@ -101,6 +102,12 @@ impl RowParser {
         }
     }
 
+    /// True once the column layout is fixed; every later line is parsed
+    /// independently of the lines around it.
+    pub(crate) fn has_header(&self) -> bool {
+        self.header.is_some()
+    }
+
     pub(crate) fn consume_line(
         &mut self,
         line: &str,
@@ -66,7 +66,7 @@ enum Phase {
 /// Streaming GSGT row parser. Feed it every line of the file in order; it
 /// skips the metadata block, learns the columns, then yields one
 /// `ParsedDelimitedRow` per usable data row.
-#[derive(Debug)]
+#[derive(Debug, Clone)]
 pub(crate) struct GsgtParser {
     phase: Phase,
     cols: Option<GsgtColumns>,
@@ -80,6 +80,11 @@ impl GsgtParser {
         }
     }
 
+    /// True once the column header is parsed and only data rows remain.
+    pub(crate) fn in_body(&self) -> bool {
+        self.phase == Phase::Body
+    }
+
     pub(crate) fn consume(
         &mut self,
         line: &str,
@@ -12,7 +12,7 @@ use bioscript_core::{RuntimeError, VariantObservation, VariantSpec};
 
 use super::{
     super::{
-        GenotypeSourceFormat, backends::delimited_locus_for_assembly, describe_query,
+        GenotypeSourceFormat, ScanCounts, backends::delimited_locus_for_assembly, describe_query,
         types::DelimitedBackend, variant_sort_key,
     },
     DelimitedColumnIndexes, GsgtParser, detect_delimiter, is_no_call as gsgt_is_no_call,
@@ -196,6 +196,7 @@ pub(crate) fn scan_delimited_variants(
         }
     }
 
+    let mut scanned = ScanCounts::default();
     let mut scan_reader = |reader: &mut dyn BufRead| -> Result<(), RuntimeError> {
         let mut probe_lines = Vec::new();
         let mut buf = String::new();
@@ -210,6 +211,7 @@ pub(crate) fn scan_delimited_variants(
             if bytes == 0 {
                 break;
             }
+            scanned.add(bytes);
             probe_lines.push(buf.trim_end_matches(['\n', '\r']).to_owned());
         }
 
@@ -325,6 +327,7 @@ pub(crate) fn scan_delimited_variants(
             if bytes == 0 {
                 break;
             }
+            scanned.add(bytes);
             if process_line(buf.trim_end_matches(['\n', '\r']))? {
                 break;
             }
@@ -376,6 +379,7 @@ pub(crate) fn scan_delimited_variants(
             ));
         }
     }
+    scanned.record();
 
     for (idx, variant) in indexed {
         if results[idx].genotype.is_none() {
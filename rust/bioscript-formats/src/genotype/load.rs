@@ -12,6 +12,7 @@ use bioscript_core::RuntimeError;
 use super::{
     io::{detect_source_format, looks_like_vcf_lines, read_lines_from_reader, select_zip_entry},
     loaders,
+    reader_slot::{ReaderPool, ReaderSlot},
     types::{
         AlignmentBytesBackend, BamBackend, BcfBackend, BcfSource, CramBackend, DelimitedBackend,
         GenotypeLoadOptions, GenotypeSourceFormat, GenotypeStore, QueryBackend, VcfBackend,
@@ -63,10 +64,12 @@ impl GenotypeStore {
     ) -> Result<Self, RuntimeError> {
         if let Some(format) = options.format {
             return match format {
-                GenotypeSourceFormat::Text => {
-                    let reader = BufReader::new(Cursor::new(bytes));
-                    Self::from_delimited_reader(GenotypeSourceFormat::Text, reader, name)
-                }
+                GenotypeSourceFormat::Text => loaders::from_delimited_bytes(
+                    GenotypeSourceFormat::Text,
+                    bytes,
+                    name,
+                    options.text_parse_workers,
+                ),
                 GenotypeSourceFormat::Zip => Self::from_zip_bytes(name, bytes),
                 GenotypeSourceFormat::Vcf => Self::from_vcf_bytes(name, bytes),
                 GenotypeSourceFormat::Bcf => Ok(Self::from_bcf_bytes(name, bytes, options)),
@@ -106,8 +109,12 @@ impl GenotypeStore {
                 name,
             );
         }
-        let reader = BufReader::new(Cursor::new(bytes));
-        Self::from_delimited_reader(GenotypeSourceFormat::Text, reader, name)
+        loaders::from_delimited_bytes(
+            GenotypeSourceFormat::Text,
+            bytes,
+            name,
+            options.text_parse_workers,
+        )
     }
 
     fn from_zip_bytes(name: &str, bytes: &[u8]) -> Result<Self, RuntimeError> {
@@ -328,6 +335,9 @@ impl GenotypeStore {
             backend: QueryBackend::Cram(CramBackend {
                 path: path.to_path_buf(),
                 options: options.clone(),
+                reader: ReaderSlot::default(),
+                worker_readers: ReaderPool::default(),
+                repository: ReaderSlot::default(),
             }),
         })
     }
@@ -337,6 +347,9 @@ impl GenotypeStore {
             backend: QueryBackend::Bam(BamBackend {
                 path: path.to_path_buf(),
                 options: options.clone(),
+                reader: ReaderSlot::default(),
+                worker_readers: ReaderPool::default(),
+                index: ReaderSlot::default(),
             }),
         }
     }
@@ -1,21 +1,33 @@
-use std::{collections::HashMap, io::BufRead};
+use std::{
+    collections::{HashMap, hash_map::Entry},
+    io::BufRead,
+};
 
-use bioscript_core::{Assembly, RuntimeError};
+use bioscript_core::{Assembly, RuntimeError, profile};
 
 use crate::inspect::{AssemblyAnchorScorer, detect_assembly};
 
+use super::backends::format_backend_name;
+use super::delimited::{ParsedDelimitedRow, sanitize_evidence_line};
+use super::rsid_table::{RsidTable, RsidTableBuilder};
 use super::{
-    COMMENT_PREFIXES, GenotypeSourceFormat, GenotypeStore, GsgtParser, QueryBackend, RowParser,
-    RsidMapBackend, delimited::sanitize_evidence_line, detect_delimiter, gsgt_is_no_call,
-    lines_look_like_gsgt, vcf_tokens::genotype_from_vcf_gt,
+    COMMENT_PREFIXES, Delimiter, GenotypeSourceFormat, GenotypeStore, GsgtParser, QueryBackend,
+    RowParser, RsidMapBackend, ScanCounts, detect_delimiter, gsgt_is_no_call, lines_look_like_gsgt,
+    vcf_tokens::genotype_from_vcf_gt,
 };
 
+mod chunked;
+
+pub(crate) use chunked::from_delimited_bytes;
+
 pub(crate) fn from_vcf_reader<R: BufRead>(
     mut reader: R,
     label: &str,
 ) -> Result<GenotypeStore, RuntimeError> {
-    let mut values = HashMap::new();
+    let _backend = profile::enter_backend(format_backend_name(GenotypeSourceFormat::Vcf));
+    let mut table = RsidTableBuilder::default();
     let mut buf = String::new();
+    let mut scanned = ScanCounts::default();
     loop {
         buf.clear();
         let bytes = reader
@@ -24,15 +36,15 @@ pub(crate) fn from_vcf_reader<R: BufRead>(
         if bytes == 0 {
             break;
         }
-        read_vcf_rsid_line(buf.trim_end_matches(['\n', '\r']), &mut values);
+        scanned.add(bytes);
+        read_vcf_rsid_line(buf.trim_end_matches(['\n', '\r']), &mut table)?;
     }
+    scanned.record();
 
     Ok(from_rsid_map(
         GenotypeSourceFormat::Vcf,
-        values,
-        HashMap::new(),
+        table.finish(),
         None,
-        HashMap::new(),
     ))
 }
 
@@ -41,53 +53,24 @@ pub(crate) fn from_delimited_reader<R: BufRead>(
     mut reader: R,
     label: &str,
 ) -> Result<GenotypeStore, RuntimeError> {
-    // Buffer lines up to the first non-empty/non-comment line so delimiter
-    // detection sees representative input, then stream the rest directly.
-    let mut prelude: Vec<String> = Vec::new();
+    let _backend = profile::enter_backend(format_backend_name(format));
     let mut buf = String::new();
-    let mut delimiter = None;
-    loop {
-        buf.clear();
-        let bytes = reader
-            .read_line(&mut buf)
-            .map_err(|err| RuntimeError::Io(format!("failed to read {label}: {err}")))?;
-        if bytes == 0 {
-            break;
-        }
-        let line = buf.trim_end_matches(['\n', '\r']).to_owned();
-        let trimmed = line.trim();
-        let is_data = !trimmed.is_empty()
-            && !COMMENT_PREFIXES
-                .iter()
-                .any(|prefix| trimmed.starts_with(prefix));
-        prelude.push(line);
-        if is_data {
-            delimiter = Some(detect_delimiter(&prelude));
-            break;
-        }
-    }
+    let mut scanned = ScanCounts::default();
+    let (prelude, delimiter) = read_prelude(&mut reader, &mut buf, label, &mut scanned)?;
 
+    scanned.record();
     if lines_look_like_gsgt(&prelude) {
         return from_gsgt_reader(format, &prelude, reader, &mut buf, label);
     }
 
-    let mut parser = RowParser::new(delimiter.unwrap_or(super::Delimiter::Tab));
+    let mut parser = RowParser::new(delimiter);
     // Build from declared metadata first; only fall back to the rsID/locus
     // anchor vote when the file gives us no idea (per spec / no blind guess).
     let meta_assembly = detect_assembly(&label.to_ascii_lowercase(), &prelude);
     let mut scorer = meta_assembly.is_none().then(AssemblyAnchorScorer::new);
-    let mut values = HashMap::new();
-    let mut locus_values = HashMap::new();
-    let mut source_lines = HashMap::new();
+    let mut table = RsidTableBuilder::default();
     for line in prelude {
-        consume_delimited_line(
-            &mut parser,
-            &line,
-            &mut values,
-            &mut locus_values,
-            &mut source_lines,
-            scorer.as_mut(),
-        )?;
+        consume_delimited_line(&mut parser, &line, &mut table, scorer.as_mut())?;
     }
     loop {
         buf.clear();
@@ -97,24 +80,51 @@ pub(crate) fn from_delimited_reader<R: BufRead>(
         if bytes == 0 {
             break;
         }
+        scanned.add(bytes);
         consume_delimited_line(
             &mut parser,
             buf.trim_end_matches(['\n', '\r']),
-            &mut values,
-            &mut locus_values,
-            &mut source_lines,
+            &mut table,
             scorer.as_mut(),
         )?;
     }
+    scanned.record();
 
     let assembly = meta_assembly.or_else(|| scorer.as_ref().and_then(AssemblyAnchorScorer::decide));
-    Ok(from_rsid_map(
-        format,
-        values,
-        locus_values,
-        assembly,
-        source_lines,
-    ))
+    Ok(from_rsid_map(format, table.finish(), assembly))
+}
+
+/// Buffer lines up to the first non-empty/non-comment line so delimiter
+/// detection sees representative input; the caller streams the rest.
+fn read_prelude<R: BufRead>(
+    reader: &mut R,
+    buf: &mut String,
+    label: &str,
+    scanned: &mut ScanCounts,
+) -> Result<(Vec<String>, Delimiter), RuntimeError> {
+    let mut prelude: Vec<String> = Vec::new();
+    loop {
+        buf.clear();
+        let bytes = reader
+            .read_line(buf)
+            .map_err(|err| RuntimeError::Io(format!("failed to read {label}: {err}")))?;
+        if bytes == 0 {
+            break;
+        }
+        scanned.add(bytes);
+        let line = buf.trim_end_matches(['\n', '\r']).to_owned();
+        let trimmed = line.trim();
+        let is_data = !trimmed.is_empty()
+            && !COMMENT_PREFIXES
+                .iter()
+                .any(|prefix| trimmed.starts_with(prefix));
+        prelude.push(line);
+        if is_data {
+            let delimiter = detect_delimiter(&prelude);
+            return Ok((prelude, delimiter));
+        }
+    }
+    Ok((prelude, Delimiter::Tab))
 }
 
 struct GsgtMergeGroup {
@@ -125,47 +135,112 @@ struct GsgtMergeGroup {
     source_line: String,
 }
 
-/// GSGT loader: parse the Final Report, merge replicate probes keyed by
-/// `(chrom, pos, rsid)` (spec §5), then build the in-memory rsid/locus maps.
-fn from_gsgt_reader<R: BufRead>(
-    format: GenotypeSourceFormat,
-    prelude: &[String],
-    mut reader: R,
-    buf: &mut String,
-    label: &str,
-) -> Result<GenotypeStore, RuntimeError> {
-    let mut parser = GsgtParser::new();
-    // Insertion-ordered groups so output is deterministic.
-    let mut order: Vec<(String, i64, String)> = Vec::new();
-    let mut groups: HashMap<(String, i64, String), GsgtMergeGroup> = HashMap::new();
+/// GSGT replicate probes keyed by `(chrom, pos, rsid)` (spec §5), in
+/// first-seen order so output is deterministic.
+#[derive(Default)]
+struct GsgtGroups {
+    order: Vec<(String, i64, String)>,
+    groups: HashMap<(String, i64, String), GsgtMergeGroup>,
+}
 
-    let ingest = |row: super::delimited::ParsedDelimitedRow,
-                  order: &mut Vec<(String, i64, String)>,
-                  groups: &mut HashMap<(String, i64, String), GsgtMergeGroup>| {
-        let (Some(chrom), Some(position)) = (row.chrom.clone(), row.position) else {
+impl GsgtGroups {
+    fn ingest(&mut self, row: ParsedDelimitedRow) {
+        let (Some(chrom), Some(position)) = (row.chrom, row.position) else {
             return;
         };
         let chrom_norm = chrom.trim_start_matches("chr").to_ascii_lowercase();
         let rsid_key = row.rsid.clone().unwrap_or_default();
         let key = (chrom_norm, position, rsid_key);
-        let entry = groups.entry(key.clone()).or_insert_with(|| {
+        let order = &mut self.order;
+        let entry = self.groups.entry(key).or_insert_with_key(|key| {
             order.push(key.clone());
             GsgtMergeGroup {
                 chrom,
                 position,
-                rsid: row.rsid.clone(),
+                rsid: row.rsid,
                 genotypes: Vec::new(),
-                source_line: row.raw_line.clone(),
+                source_line: row.raw_line,
             }
         });
         entry.genotypes.push(row.genotype);
-    };
+    }
+
+    /// Add the groups ingested from rows that follow this set's rows, as if
+    /// they had been ingested here.
+    fn extend(&mut self, mut later: Self) {
+        for key in later.order {
+            let Some(group) = later.groups.remove(&key) else {
+                continue;
+            };
+            match self.groups.entry(key) {
+                Entry::Occupied(mut entry) => entry.get_mut().genotypes.extend(group.genotypes),
+                Entry::Vacant(entry) => {
+                    self.order.push(entry.key().clone());
+                    entry.insert(group);
+                }
+            }
+        }
+    }
+
+    /// Merge each group to one call and build the in-memory rsid/locus maps.
+    fn into_store(
+        mut self,
+        format: GenotypeSourceFormat,
+        prelude: &[String],
+        label: &str,
+    ) -> Result<GenotypeStore, RuntimeError> {
+        // GSGT Final Reports declare no build; try real metadata first (none
+        // here), then resolve the assembly from the rsID/locus anchor vote
+        // over the merged calls instead of blindly assuming GRCh38.
+        let meta_assembly = detect_assembly(&label.to_ascii_lowercase(), prelude);
+        let mut scorer = meta_assembly.is_none().then(AssemblyAnchorScorer::new);
+
+        let mut table = RsidTableBuilder::default();
+        for key in self.order {
+            let group = self
+                .groups
+                .remove(&key)
+                .expect("group recorded in order exists");
+            let genotype = merge_genotypes(&group.genotypes);
+            if let Some(scorer) = scorer.as_mut() {
+                scorer.observe(
+                    group.rsid.as_deref().unwrap_or(""),
+                    &group.chrom,
+                    group.position,
+                    &genotype,
+                );
+            }
+            table.push(
+                group.rsid.as_deref(),
+                Some((group.chrom.as_str(), group.position)),
+                &genotype,
+                Some(group.source_line.as_str()),
+            )?;
+        }
+
+        let assembly =
+            meta_assembly.or_else(|| scorer.as_ref().and_then(AssemblyAnchorScorer::decide));
+        Ok(from_rsid_map(format, table.finish(), assembly))
+    }
+}
 
+/// GSGT loader: parse the Final Report, merge replicate probes keyed by
+/// `(chrom, pos, rsid)` (spec §5), then build the in-memory rsid/locus maps.
+fn from_gsgt_reader<R: BufRead>(
+    format: GenotypeSourceFormat,
+    prelude: &[String],
+    mut reader: R,
+    buf: &mut String,
+    label: &str,
+) -> Result<GenotypeStore, RuntimeError> {
+    let mut parser = GsgtParser::new();
+    let mut groups = GsgtGroups::default();
     for line in prelude {
         if let Some(row) = parser.consume(line)? {
-            ingest(row, &mut order, &mut groups);
+            groups.ingest(row);
         }
     }
+    let mut scanned = ScanCounts::default();
     loop {
         buf.clear();
         let bytes = reader
@@ -174,54 +249,14 @@ fn from_gsgt_reader<R: BufRead>(
         if bytes == 0 {
             break;
         }
+        scanned.add(bytes);
         if let Some(row) = parser.consume(buf.trim_end_matches(['\n', '\r']))? {
-            ingest(row, &mut order, &mut groups);
+            groups.ingest(row);
         }
     }
+    scanned.record();
 
-    // GSGT Final Reports declare no build; try real metadata first (none
-    // here), then resolve the assembly from the rsID/locus anchor vote over
-    // the merged calls instead of blindly assuming GRCh38.
-    let meta_assembly = detect_assembly(&label.to_ascii_lowercase(), prelude);
-    let mut scorer = meta_assembly.is_none().then(AssemblyAnchorScorer::new);
-
-    let mut values = HashMap::new();
-    let mut locus_values = HashMap::new();
-    let mut source_lines = HashMap::new();
-    for key in order {
-        let group = groups.remove(&key).expect("group recorded in order exists");
-        let genotype = merge_genotypes(&group.genotypes);
-        let chrom_norm = group.chrom.trim_start_matches("chr").to_ascii_lowercase();
-        if let Some(scorer) = scorer.as_mut() {
-            scorer.observe(
-                group.rsid.as_deref().unwrap_or(""),
-                &group.chrom,
-                group.position,
-                &genotype,
-            );
-        }
-        locus_values.insert(
-            (chrom_norm, group.position),
-            (
-                genotype.clone(),
-                group.rsid.clone(),
-                group.source_line.clone(),
-            ),
-        );
-        if let Some(rsid) = group.rsid {
-            values.insert(rsid.clone(), genotype);
-            source_lines.insert(rsid, group.source_line);
-        }
-    }
-
-    let assembly = meta_assembly.or_else(|| scorer.as_ref().and_then(AssemblyAnchorScorer::decide));
-    Ok(from_rsid_map(
-        format,
-        values,
-        locus_values,
-        assembly,
-        source_lines,
-    ))
+    groups.into_store(format, prelude, label)
 }
 
 /// Collapse a replicate-probe group to one genotype: drop no-calls; if none
@@ -240,33 +275,31 @@ fn merge_genotypes(genotypes: &[String]) -> String {
 }
 
 pub(crate) fn from_vcf_lines(lines: Vec<String>) -> Result<GenotypeStore, RuntimeError> {
-    let mut values = HashMap::new();
+    let mut table = RsidTableBuilder::default();
     for line in lines {
-        read_vcf_rsid_line(line.trim(), &mut values);
+        read_vcf_rsid_line(line.trim(), &mut table)?;
     }
     Ok(from_rsid_map(
         GenotypeSourceFormat::Vcf,
-        values,
-        HashMap::new(),
+        table.finish(),
         None,
-        HashMap::new(),
     ))
 }
 
-fn read_vcf_rsid_line(line: &str, values: &mut HashMap<String, String>) {
+fn read_vcf_rsid_line(line: &str, table: &mut RsidTableBuilder) -> Result<(), RuntimeError> {
     let trimmed = line.trim();
     if trimmed.is_empty() || trimmed.starts_with("##") || trimmed.starts_with("#CHROM") {
-        return;
+        return Ok(());
     }
 
     let fields: Vec<&str> = trimmed.split('\t').collect();
     if fields.len() < 10 {
-        return;
+        return Ok(());
     }
 
     let rsid = fields[2].trim();
     if rsid.is_empty() || rsid == "." {
-        return;
+        return Ok(());
     }
 
     let reference = fields[3].trim();
@@ -276,21 +309,20 @@ fn read_vcf_rsid_line(line: &str, values: &mut HashMap<String, String>) {
         .filter(|alt| !alt.is_empty() && *alt != ".")
         .collect();
     if reference.is_empty() || alternates.is_empty() {
-        return;
+        return Ok(());
     }
 
     let sample_gt = fields[9].split(':').next().unwrap_or(".");
-    if let Some(genotype) = genotype_from_vcf_gt(sample_gt, reference, &alternates) {
-        values.insert(rsid.to_owned(), genotype);
+    match genotype_from_vcf_gt(sample_gt, reference, &alternates) {
+        Some(genotype) => table.push(Some(rsid), None, &genotype, None),
+        None => Ok(()),
     }
 }
 
 fn consume_delimited_line(
     parser: &mut RowParser,
     line: &str,
-    values: &mut HashMap<String, String>,
-    locus_values: &mut HashMap<(String, i64), (String, Option<String>, String)>,
-    source_lines: &mut HashMap<String, String>,
+    table: &mut RsidTableBuilder,
     scorer: Option<&mut AssemblyAnchorScorer>,
 ) -> Result<(), RuntimeError> {
     if let Some(row) = parser.consume_record(line)? {
@@ -305,18 +337,14 @@ fn consume_delimited_line(
                 &row.genotype,
             );
         }
-        if let (Some(chrom), Some(position)) = (row.chrom.as_ref(), row.position) {
-            locus_values.insert(
-                (
-                    chrom.trim_start_matches("chr").to_ascii_lowercase(),
-                    position,
-                ),
-                (row.genotype.clone(), row.rsid.clone(), source_line.clone()),
-            );
-        }
-        if let Some(rsid) = row.rsid {
-            values.insert(rsid.clone(), row.genotype);
-            source_lines.insert(rsid, source_line);
+        let locus = row.chrom.as_deref().zip(row.position);
+        if row.rsid.is_some() || locus.is_some() {
+            table.push(
+                row.rsid.as_deref(),
+                locus,
+                &row.genotype,
+                Some(source_line.as_str()),
+            )?;
         }
     }
     Ok(())
@@ -324,18 +352,14 @@ fn consume_delimited_line(
 
 fn from_rsid_map(
     format: GenotypeSourceFormat,
-    values: HashMap<String, String>,
-    locus_values: HashMap<(String, i64), (String, Option<String>, String)>,
+    table: RsidTable,
     assembly: Option<Assembly>,
-    source_lines: HashMap<String, String>,
 ) -> GenotypeStore {
     GenotypeStore {
         backend: QueryBackend::RsidMap(RsidMapBackend {
             format,
-            values,
-            locus_values,
+            table,
             assembly,
-            source_lines,
         }),
     }
 }
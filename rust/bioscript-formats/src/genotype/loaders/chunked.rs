@@ -0,0 +1,241 @@
+//! Parallel parsing of uncompressed delimited genotype text held in memory.
+//!
+//! Only the head of a file is stateful: the prelude fixes the delimiter, and
+//! the first rows fix the column header (or the GSGT `[Data]` columns). After
+//! that every line parses on its own, so the rest of the buffer is cut into
+//! chunks on line boundaries and parsed on worker threads. Chunk results are
+//! combined in input order — rsID tables appended, anchor votes summed, GSGT
+//! replicate groups extended — so the store matches a sequential load.
+
+use std::thread;
+
+use bioscript_core::{ProfileCounter, ProfileScope, RuntimeError, profile};
+
+use crate::inspect::{AssemblyAnchorScorer, detect_assembly};
+
+use super::{
+    GenotypeSourceFormat, GenotypeStore, GsgtGroups, GsgtParser, RowParser, RsidTableBuilder,
+    ScanCounts, consume_delimited_line, format_backend_name, from_delimited_reader, from_rsid_map,
+    lines_look_like_gsgt, read_prelude,
+};
+
+/// Each worker parses at least this much text; smaller inputs stay on the
+/// streaming path.
+const MIN_CHUNK_BYTES: usize = 1024 * 1024;
+
+/// Load delimited text from `bytes`, parsing on up to `workers` threads
+/// (`GenotypeLoadOptions::text_parse_workers`). Small inputs, text that is
+/// not UTF-8 and wasm32 builds go through `from_delimited_reader` instead.
+pub(crate) fn from_delimited_bytes(
+    format: GenotypeSourceFormat,
+    bytes: &[u8],
+    label: &str,
+    workers: Option<usize>,
+) -> Result<GenotypeStore, RuntimeError> {
+    let workers = text_parse_worker_count(workers, bytes.len());
+    let text = match std::str::from_utf8(bytes) {
+        Ok(text) if workers > 1 => text,
+        _ => return from_delimited_reader(format, bytes, label),
+    };
+    let _backend = profile::enter_backend(format_backend_name(format));
+
+    let mut reader = bytes;
+    let mut buf = String::new();
+    let mut scanned = ScanCounts::default();
+    let (prelude, delimiter) = read_prelude(&mut reader, &mut buf, label, &mut scanned)?;
+    // `read_line` stops after a `\n`, so the unread suffix starts on a
+    // character boundary.
+    let mut rest = &text[text.len() - reader.len()..];
+    if lines_look_like_gsgt(&prelude) {
+        return from_gsgt_text(format, &prelude, rest, label, workers, scanned);
+    }
+
+    let mut parser = RowParser::new(delimiter);
+    let meta_assembly = detect_assembly(&label.to_ascii_lowercase(), &prelude);
+    let mut scorer = meta_assembly.is_none().then(AssemblyAnchorScorer::new);
+    let mut table = RsidTableBuilder::default();
+    for line in &prelude {
+        consume_delimited_line(&mut parser, line, &mut table, scorer.as_mut())?;
+    }
+    while !parser.has_header() {
+        let Some(line) = take_line(&mut rest, &mut scanned) else {
+            break;
+        };
+        consume_delimited_line(&mut parser, line, &mut table, scorer.as_mut())?;
+    }
+    scanned.record();
+
+    let vote = scorer.is_some();
+    let chunks = parse_chunks(rest, workers, |mut chunk| {
+        let mut parser = parser.clone();
+        let mut table = RsidTableBuilder::default();
+        let mut scorer = vote.then(AssemblyAnchorScorer::new);
+        let mut scanned = ScanCounts::default();
+        while let Some(line) = take_line(&mut chunk, &mut scanned) {
+            consume_delimited_line(&mut parser, line, &mut table, scorer.as_mut())?;
+        }
+        scanned.record();
+        Ok((table, scorer))
+    })?;
+    for (chunk_table, chunk_scorer) in chunks {
+        table.append(chunk_table)?;
+        if let (Some(scorer), Some(chunk_scorer)) = (scorer.as_mut(), chunk_scorer.as_ref()) {
+            scorer.merge(chunk_scorer);
+        }
+    }
+
+    let assembly = meta_assembly.or_else(|| scorer.as_ref().and_then(AssemblyAnchorScorer::decide));
+    Ok(from_rsid_map(format, table.finish(), assembly))
+}
+
+fn from_gsgt_text(
+    format: GenotypeSourceFormat,
+    prelude: &[String],
+    mut rest: &str,
+    label: &str,
+    workers: usize,
+    mut scanned: ScanCounts,
+) -> Result<GenotypeStore, RuntimeError> {
+    let mut parser = GsgtParser::new();
+    let mut groups = GsgtGroups::default();
+    for line in prelude {
+        if let Some(row) = parser.consume(line)? {
+            groups.ingest(row);
+        }
+    }
+    while !parser.in_body() {
+        let Some(line) = take_line(&mut rest, &mut scanned) else {
+            break;
+        };
+        if let Some(row) = parser.consume(line)? {
+            groups.ingest(row);
+        }
+    }
+    scanned.record();
+
+    let chunks = parse_chunks(rest, workers, |mut chunk| {
+        let mut parser = parser.clone();
+        let mut groups = GsgtGroups::default();
+        let mut scanned = ScanCounts::default();
+        while let Some(line) = take_line(&mut chunk, &mut scanned) {
+            if let Some(row) = parser.consume(line)? {
+                groups.ingest(row);
+            }
+        }
+        scanned.record();
+        Ok(groups)
+    })?;
+    for chunk_groups in chunks {
+        groups.extend(chunk_groups);
+    }
+    groups.into_store(format, prelude, label)
+}
+
+/// Worker threads for parsing `len` bytes. `requested` comes from
+/// `GenotypeLoadOptions::text_parse_workers`; without it the pool is sized
+/// to the available cores. wasm32-unknown-unknown cannot spawn threads.
+fn text_parse_worker_count(requested: Option<usize>, len: usize) -> usize {
+    if cfg!(target_arch = "wasm32") {
+        return 1;
+    }
+    let workers = requested
+        .filter(|value| *value > 0)
+        .unwrap_or_else(|| thread::available_parallelism().map_or(1, usize::from));
+    workers.min(len / MIN_CHUNK_BYTES).max(1)
+}
+
+/// Parse `text` as `workers` chunks cut after a `\n`. The calling thread
+/// parses the first chunk; results come back in input order, and the first
+/// failing chunk's error wins.
+fn parse_chunks<T, F>(text: &str, workers: usize, parse: F) -> Result<Vec<T>, RuntimeError>
+where
+    T: Send,
+    F: Fn(&str) -> Result<T, RuntimeError> + Sync,
+{
+    let mut chunks = split_chunks(text, workers).into_iter();
+    let Some(primary) = chunks.next() else {
+        return Ok(Vec::new());
+    };
+    thread::scope(|scope| {
+        let parse = &parse;
+        let handles = chunks
+            .map(|chunk| {
+                let counters = profile::current_counters();
+                profile::record(ProfileCounter::WorkerThreads, 1);
+                scope.spawn(move || {
+                    let _profile_scope = counters.map(ProfileScope::enter);
+                    parse(chunk)
+                })
+            })
+            .collect::<Vec<_>>();
+
+        let mut results = vec![parse(primary)];
+        for handle in handles {
+            results.push(
+                handle
+                    .join()
+                    .map_err(|_| RuntimeError::Io("genotype text parse worker panicked".to_owned()))
+                    .and_then(|result| result),
+            );
+        }
+        results.into_iter().collect()
+    })
+}
+
+/// Cut `text` into at most `parts` pieces of similar size, each ending after
+/// a `\n` (or at the end of `text`).
+fn split_chunks(text: &str, parts: usize) -> Vec<&str> {
+    let target = text.len().div_ceil(parts.max(1)).max(1);
+    let mut chunks = Vec::with_capacity(parts);
+    let mut rest = text;
+    while !rest.is_empty() {
+        let end = if chunks.len() + 1 >= parts || rest.len() <= target {
+            rest.len()
+        } else {
+            rest.as_bytes()[target..]
+                .iter()
+                .position(|byte| *byte == b'\n')
+                .map_or(rest.len(), |offset| target + offset + 1)
+        };
+        let (chunk, tail) = rest.split_at(end);
+        chunks.push(chunk);
+        rest = tail;
+    }
+    chunks
+}
+
+/// Split the next line off `text`, without its line ending.
+fn take_line<'a>(text: &mut &'a str, scanned: &mut ScanCounts) -> Option<&'a str> {
+    if text.is_empty() {
+        return None;
+    }
+    let end = text.find('\n').map_or(text.len(), |offset| offset + 1);
+    let (line, rest) = text.split_at(end);
+    *text = rest;
+    scanned.add(line.len());
+    Some(line.trim_end_matches(['\n', '\r']))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn chunks_end_on_line_boundaries() {
+        let text = "a\nbb\nccc\ndddd\ne";
+        let chunks = split_chunks(text, 3);
+        assert_eq!(chunks, vec!["a\nbb\nccc\n", "dddd\ne"]);
+        assert_eq!(chunks.concat(), text);
+        assert_eq!(split_chunks(text, 1), vec![text]);
+        assert_eq!(split_chunks(text, 15).len(), 5);
+        assert_eq!(split_chunks("one line", 4), vec!["one line"]);
+        assert!(split_chunks("", 4).is_empty());
+    }
+
+    #[test]
+    fn small_inputs_stay_on_one_thread() {
+        assert_eq!(text_parse_worker_count(Some(8), MIN_CHUNK_BYTES - 1), 1);
+        assert_eq!(text_parse_worker_count(Some(8), MIN_CHUNK_BYTES * 3), 3);
+        assert_eq!(text_parse_worker_count(Some(2), MIN_CHUNK_BYTES * 3), 2);
+    }
+}
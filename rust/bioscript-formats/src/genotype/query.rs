@@ -1,5 +1,10 @@
-use bioscript_core::{RuntimeError, VariantObservation, VariantSpec};
+use std::borrow::Cow;
 
+use bioscript_core::{
+    Assembly, ProfileCounter, RuntimeError, VariantObservation, VariantSpec, profile,
+};
+
+use super::spec_liftover::lift_grch37_only_specs;
 use super::types::QueryBackend;
 use super::{
     BackendCapabilities, GenotypeStore, QueryKind, match_cached_observation, required_cache_miss,
@@ -58,9 +63,20 @@ impl GenotypeStore {
         }
     }
 
+    /// Build that coordinate lookups resolve against. Text, zip, and VCF
+    /// bytes parsed into an in-memory rsid map report the build detected from
+    /// delimited text (VCF bytes report none) and ignore
+    /// `GenotypeLoadOptions::assembly`; every other store reports the build
+    /// passed in the load options.
+    pub fn assembly(&self) -> Option<Assembly> {
+        self.backend.declared_assembly()
+    }
+
     pub fn get(&self, rsid: &str) -> Result<Option<String>, RuntimeError> {
         match &self.backend {
-            QueryBackend::RsidMap(map) => Ok(map.values.get(rsid).cloned()),
+            QueryBackend::RsidMap(map) => {
+                Ok(map.table.by_rsid(rsid).map(|row| row.genotype.to_owned()))
+            }
             QueryBackend::Delimited(backend) => backend.get(rsid),
             QueryBackend::Vcf(backend) => backend.get(rsid),
             QueryBackend::Bcf(backend) => backend.get(rsid),
@@ -111,6 +127,32 @@ impl GenotypeStore {
         &self,
         variant: &VariantSpec,
     ) -> Result<VariantObservation, RuntimeError> {
+        let _backend = profile::enter_backend(self.backend_name());
+        let observation = self.query_variant(variant)?;
+        record_lookup_counters(std::slice::from_ref(&observation));
+        Ok(observation)
+    }
+
+    pub fn lookup_variants(
+        &self,
+        variants: &[VariantSpec],
+    ) -> Result<Vec<VariantObservation>, RuntimeError> {
+        let _backend = profile::enter_backend(self.backend_name());
+        let observations = self.query_variants(variants)?;
+        record_lookup_counters(&observations);
+        Ok(observations)
+    }
+
+    fn query_variant(&self, variant: &VariantSpec) -> Result<VariantObservation, RuntimeError> {
+        let lifted = if matches!(self.backend, QueryBackend::Cached { .. }) {
+            Cow::Borrowed(std::slice::from_ref(variant))
+        } else {
+            lift_grch37_only_specs(
+                self.backend.declared_assembly(),
+                std::slice::from_ref(variant),
+            )?
+        };
+        let variant = &lifted[0];
         match &self.backend {
             QueryBackend::RsidMap(map) => map.lookup_variant(variant),
             QueryBackend::Delimited(backend) => backend.lookup_variant(variant),
@@ -125,20 +167,23 @@ impl GenotypeStore {
                 require_hit,
             } => {
                 if let Some(hit) = match_cached_observation(observations, variant) {
+                    profile::record(ProfileCounter::CacheHits, 1);
                     return Ok(hit.clone());
                 }
+                profile::record(ProfileCounter::CacheMisses, 1);
                 if *require_hit {
                     return Err(required_cache_miss(variant));
                 }
                 let inner = GenotypeStore {
                     backend: (**fallback).clone(),
                 };
-                inner.lookup_variant(variant)
+                let _backend = profile::enter_backend(inner.backend_name());
+                inner.query_variant(variant)
             }
         }
     }
 
-    pub fn lookup_variants(
+    fn query_variants(
         &self,
         variants: &[VariantSpec],
     ) -> Result<Vec<VariantObservation>, RuntimeError> {
@@ -165,17 +210,25 @@ impl GenotypeStore {
                     miss_specs.push(spec.clone());
                 }
             }
+            profile::record(
+                ProfileCounter::CacheHits,
+                (variants.len() - miss_specs.len()) as u64,
+            );
+            profile::record(ProfileCounter::CacheMisses, miss_specs.len() as u64);
             if !miss_specs.is_empty() {
                 let inner = GenotypeStore {
                     backend: (**fallback).clone(),
                 };
-                let resolved = inner.lookup_variants(&miss_specs)?;
+                let _backend = profile::enter_backend(inner.backend_name());
+                let resolved = inner.query_variants(&miss_specs)?;
                 for (idx, observation) in miss_indices.into_iter().zip(resolved) {
                     results[idx] = Some(observation);
                 }
             }
             return Ok(results.into_iter().map(Option::unwrap_or_default).collect());
         }
+        let lifted = lift_grch37_only_specs(self.backend.declared_assembly(), variants)?;
+        let variants = lifted.as_ref();
         if let QueryBackend::Delimited(backend) = &self.backend {
             return backend.lookup_variants(variants);
         }
@@ -199,8 +252,19 @@ impl GenotypeStore {
 
         let mut results = vec![VariantObservation::default(); variants.len()];
         for (original_idx, variant) in indexed {
-            results[original_idx] = self.lookup_variant(variant)?;
+            results[original_idx] = self.query_variant(variant)?;
         }
         Ok(results)
     }
 }
+
+fn record_lookup_counters(observations: &[VariantObservation]) {
+    profile::record(ProfileCounter::VariantsQueried, observations.len() as u64);
+    profile::record(
+        ProfileCounter::VariantsResolved,
+        observations
+            .iter()
+            .filter(|observation| observation.genotype.is_some())
+            .count() as u64,
+    );
+}
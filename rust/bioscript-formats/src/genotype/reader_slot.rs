@@ -0,0 +1,200 @@
+use std::{
+    fmt,
+    sync::{Arc, Mutex, PoisonError},
+    thread,
+};
+
+use bioscript_core::RuntimeError;
+
+/// Lookup workers when the load options leave the count unset. Every worker
+/// keeps its own reader, so the default pool stays small even on many-core
+/// hosts.
+const DEFAULT_LOOKUP_WORKERS: usize = 4;
+
+/// Most readers a backend's parallel lookups use at once (the session reader
+/// plus its pooled workers) for a requested worker count.
+pub(crate) fn lookup_worker_limit(requested: Option<usize>) -> usize {
+    requested.filter(|value| *value > 0).unwrap_or_else(|| {
+        thread::available_parallelism().map_or(1, |cores| cores.get().min(DEFAULT_LOOKUP_WORKERS))
+    })
+}
+
+/// Block-cache budget for each of a backend's readers, so the session reader
+/// and up to `lookup_worker_limit(requested) - 1` pooled workers together
+/// stay within `alignment_cache_bytes`.
+pub(crate) fn reader_cache_bytes(alignment_cache_bytes: usize, requested: Option<usize>) -> usize {
+    alignment_cache_bytes / lookup_worker_limit(requested)
+}
+
+/// Lazily opened reader shared by clones of a path-backed backend.
+///
+/// CRAM/BAM backends keep their indexed reader (parsed index, header, FASTA
+/// repository, block cache) here between lookups instead of reopening the
+/// file for every `lookup_variant`/`lookup_variants` call. A query error drops
+/// the reader so the next lookup starts from a fresh handle.
+pub(crate) struct ReaderSlot<T>(Arc<Mutex<Option<T>>>);
+
+impl<T> ReaderSlot<T> {
+    pub(crate) fn with<U>(
+        &self,
+        open: impl FnOnce() -> Result<T, RuntimeError>,
+        query: impl FnOnce(&mut T) -> Result<U, RuntimeError>,
+    ) -> Result<U, RuntimeError> {
+        let mut slot = self.0.lock().unwrap_or_else(PoisonError::into_inner);
+        let reader = match &mut *slot {
+            Some(reader) => reader,
+            empty => empty.insert(open()?),
+        };
+        let result = query(reader);
+        if result.is_err() {
+            *slot = None;
+        }
+        result
+    }
+
+    fn is_open(&self) -> bool {
+        self.0.try_lock().is_ok_and(|slot| slot.is_some())
+    }
+}
+
+/// Per-worker [`ReaderSlot`]s for a backend's parallel lookup path.
+///
+/// Worker `n` of every parallel `lookup_variants` call reuses slot `n`, so
+/// each worker keeps its own parsed index, reference repository and block
+/// cache across calls instead of reopening the file per batch. The pool is
+/// shared by clones of the backend and grows to the largest worker count
+/// requested so far.
+pub(crate) struct ReaderPool<T>(Arc<Mutex<Vec<ReaderSlot<T>>>>);
+
+impl<T> ReaderPool<T> {
+    /// The first `count` worker slots, opening none of them.
+    pub(crate) fn slots(&self, count: usize) -> Vec<ReaderSlot<T>> {
+        let mut slots = self.0.lock().unwrap_or_else(PoisonError::into_inner);
+        if slots.len() < count {
+            slots.resize_with(count, ReaderSlot::default);
+        }
+        slots[..count].to_vec()
+    }
+
+    fn open_count(&self) -> usize {
+        self.0.try_lock().map_or(0, |slots| {
+            slots.iter().filter(|slot| slot.is_open()).count()
+        })
+    }
+}
+
+impl<T> Default for ReaderPool<T> {
+    fn default() -> Self {
+        Self(Arc::new(Mutex::new(Vec::new())))
+    }
+}
+
+impl<T> Clone for ReaderPool<T> {
+    fn clone(&self) -> Self {
+        Self(Arc::clone(&self.0))
+    }
+}
+
+impl<T> fmt::Debug for ReaderPool<T> {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.debug_struct("ReaderPool")
+            .field("open", &self.open_count())
+            .finish()
+    }
+}
+
+impl<T> Default for ReaderSlot<T> {
+    fn default() -> Self {
+        Self(Arc::new(Mutex::new(None)))
+    }
+}
+
+impl<T> Clone for ReaderSlot<T> {
+    fn clone(&self) -> Self {
+        Self(Arc::clone(&self.0))
+    }
+}
+
+impl<T> fmt::Debug for ReaderSlot<T> {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.debug_struct("ReaderSlot")
+            .field("open", &self.is_open())
+            .finish()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn reader_slot_opens_once_and_resets_after_errors() {
+        let slot = ReaderSlot::<u32>::default();
+        let mut opened = 0;
+        let mut open = || {
+            opened += 1;
+            Ok(10)
+        };
+        assert_eq!(slot.with(&mut open, |value| Ok(*value + 1)).unwrap(), 11);
+        assert_eq!(
+            slot.clone()
+                .with(&mut open, |value| {
+                    *value += 5;
+                    Ok(*value)
+                })
+                .unwrap(),
+            15
+        );
+        assert!(format!("{slot:?}").contains("open: true"));
+
+        let err = slot
+            .with(&mut open, |_| {
+                Err::<(), _>(RuntimeError::Io("broken".to_owned()))
+            })
+            .unwrap_err();
+        assert!(err.to_string().contains("broken"));
+        assert!(!slot.is_open());
+        assert_eq!(slot.with(&mut open, |value| Ok(*value)).unwrap(), 10);
+        assert_eq!(opened, 2);
+    }
+
+    #[test]
+    fn lookup_readers_share_the_cache_budget() {
+        assert_eq!(lookup_worker_limit(Some(8)), 8);
+        assert!((1..=DEFAULT_LOOKUP_WORKERS).contains(&lookup_worker_limit(None)));
+        assert_eq!(lookup_worker_limit(Some(0)), lookup_worker_limit(None));
+        assert_eq!(reader_cache_bytes(64, Some(4)), 16);
+        assert_eq!(reader_cache_bytes(64, Some(1)), 64);
+        assert!(reader_cache_bytes(64, None) * lookup_worker_limit(None) <= 64);
+    }
+
+    #[test]
+    fn reader_pool_hands_each_worker_the_same_slot_across_calls() {
+        let pool = ReaderPool::<u32>::default();
+        let mut opened = 0;
+        for _ in 0..3 {
+            for (worker, slot) in pool.clone().slots(2).into_iter().enumerate() {
+                let seed = u32::try_from(worker).unwrap();
+                slot.with(
+                    || {
+                        opened += 1;
+                        Ok(seed)
+                    },
+                    |value| {
+                        *value += 10;
+                        Ok(())
+                    },
+                )
+                .unwrap();
+            }
+        }
+        assert_eq!(opened, 2);
+        assert_eq!(pool.open_count(), 2);
+        assert!(format!("{pool:?}").contains("open: 2"));
+
+        let slots = pool.slots(1);
+        assert_eq!(slots[0].with(|| Ok(0), |value| Ok(*value)).unwrap(), 30);
+        assert_eq!(pool.slots(4).len(), 4);
+        assert_eq!(pool.open_count(), 2);
+    }
+}
@@ -0,0 +1,431 @@
+//! Columnar storage behind `RsidMapBackend`.
+//!
+//! A chip file loaded into memory has hundreds of thousands of rows, and a
+//! map of small heap strings per row (rsid, genotype, chromosome, source
+//! line) costs far more than the text itself. `RsidTable` keeps one row per
+//! parsed input row in parallel columns: genotypes and chromosomes are codes
+//! into small tables, `rs<digits>` ids are stored as integers, and source
+//! lines are spans of one shared text buffer. Lookups binary-search sorted
+//! `(key, row)` indexes built once in `RsidTableBuilder::finish`.
+
+use std::collections::HashMap;
+
+use bioscript_core::RuntimeError;
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq, PartialOrd, Ord)]
+enum RowRsid {
+    None,
+    /// `rs<n>` in canonical form, stored as `n`.
+    Rs(u64),
+    /// Any other id (e.g. 23andMe `i`-ids), as an index into `names`.
+    Named(u32),
+}
+
+/// Byte range of a source line in `RsidTable::text`.
+#[derive(Debug, Clone, Copy)]
+struct Span {
+    start: u32,
+    len: u32,
+}
+
+/// One row as seen by a lookup.
+pub(crate) struct RsidRow<'a> {
+    pub(crate) genotype: &'a str,
+    pub(crate) rsid: Option<String>,
+    pub(crate) source_line: Option<&'a str>,
+}
+
+#[derive(Debug, Clone, Default)]
+pub(crate) struct RsidTable {
+    genotypes: Vec<Box<str>>,
+    chroms: Vec<Box<str>>,
+    names: Vec<Box<str>>,
+    text: String,
+    row_genotypes: Vec<u32>,
+    row_rsids: Vec<RowRsid>,
+    row_lines: Vec<Option<Span>>,
+    /// `(n, row)` for `rs<n>` ids, sorted by `n`; the last row per id wins.
+    rs_index: Vec<(u64, u32)>,
+    /// `(name, row)` for other ids, sorted by `names[name]`.
+    named_index: Vec<(u32, u32)>,
+    /// `(chrom, position, row)`, sorted; the last row per locus wins.
+    locus_index: Vec<(u32, i64, u32)>,
+}
+
+impl RsidTable {
+    /// True when no row can be found by rsid or locus.
+    pub(crate) fn is_empty(&self) -> bool {
+        self.rs_index.is_empty() && self.named_index.is_empty() && self.locus_index.is_empty()
+    }
+
+    pub(crate) fn by_rsid(&self, rsid: &str) -> Option<RsidRow<'_>> {
+        let row = if let Some(number) = parse_rs_number(rsid) {
+            let found = self.rs_index.binary_search_by_key(&number, |(key, _)| *key);
+            self.rs_index[found.ok()?].1
+        } else {
+            let found = self
+                .named_index
+                .binary_search_by(|(name, _)| (*self.names[*name as usize]).cmp(rsid));
+            self.named_index[found.ok()?].1
+        };
+        Some(self.row(row))
+    }
+
+    /// Row at `chrom:position`; `chrom` is matched without a `chr` prefix and
+    /// case-insensitively, as stored.
+    pub(crate) fn by_locus(&self, chrom: &str, position: i64) -> Option<RsidRow<'_>> {
+        let chrom = normalize_chrom(chrom);
+        let code = self.chroms.iter().position(|known| **known == *chrom)?;
+        let code = u32::try_from(code).ok()?;
+        let found = self
+            .locus_index
+            .binary_search_by_key(&(code, position), |(chrom, pos, _)| (*chrom, *pos));
+        Some(self.row(self.locus_index[found.ok()?].2))
+    }
+
+    fn row(&self, row: u32) -> RsidRow<'_> {
+        let row = row as usize;
+        RsidRow {
+            genotype: &self.genotypes[self.row_genotypes[row] as usize],
+            rsid: match self.row_rsids[row] {
+                RowRsid::None => None,
+                RowRsid::Rs(number) => Some(format!("rs{number}")),
+                RowRsid::Named(name) => Some(self.names[name as usize].to_string()),
+            },
+            source_line: self.row_lines[row].map(|span| {
+                let start = span.start as usize;
+                &self.text[start..start + span.len as usize]
+            }),
+        }
+    }
+}
+
+/// Accumulates rows in input order; `finish` builds the lookup indexes.
+#[derive(Default)]
+pub(crate) struct RsidTableBuilder {
+    table: RsidTable,
+    genotype_codes: HashMap<Box<str>, u32>,
+    name_codes: HashMap<Box<str>, u32>,
+    chrom_codes: HashMap<Box<str>, u32>,
+    loci: Vec<(u32, i64, u32)>,
+}
+
+impl RsidTableBuilder {
+    /// Add one input row. A later row with the same rsid or locus replaces
+    /// the earlier one for that key, like repeated map inserts.
+    pub(crate) fn push(
+        &mut self,
+        rsid: Option<&str>,
+        locus: Option<(&str, i64)>,
+        genotype: &str,
+        source_line: Option<&str>,
+    ) -> Result<(), RuntimeError> {
+        let row = code(self.table.row_genotypes.len())?;
+        let genotype = intern(
+            &mut self.table.genotypes,
+            &mut self.genotype_codes,
+            genotype,
+        )?;
+        let rsid = match rsid {
+            None => RowRsid::None,
+            Some(rsid) => {
+                if let Some(number) = parse_rs_number(rsid) {
+                    self.table.rs_index.push((number, row));
+                    RowRsid::Rs(number)
+                } else {
+                    let name = intern(&mut self.table.names, &mut self.name_codes, rsid)?;
+                    self.table.named_index.push((name, row));
+                    RowRsid::Named(name)
+                }
+            }
+        };
+        if let Some((chrom, position)) = locus {
+            let chrom = intern(
+                &mut self.table.chroms,
+                &mut self.chrom_codes,
+                &normalize_chrom(chrom),
+            )?;
+            self.loci.push((chrom, position, row));
+        }
+        let line = match source_line {
+            Some(line) => {
+                let end = code(self.table.text.len() + line.len())?;
+                let len = code(line.len())?;
+                self.table.text.push_str(line);
+                Some(Span {
+                    start: end - len,
+                    len,
+                })
+            }
+            None => None,
+        };
+
+        self.table.row_genotypes.push(genotype);
+        self.table.row_rsids.push(rsid);
+        self.table.row_lines.push(line);
+        Ok(())
+    }
+
+    /// Append the rows of `other`, built from input that follows this
+    /// builder's, as if they had been pushed here one by one.
+    pub(crate) fn append(&mut self, other: Self) -> Result<(), RuntimeError> {
+        let row_offset = code(self.table.row_genotypes.len())?;
+        code(self.table.row_genotypes.len() + other.table.row_genotypes.len())?;
+        let text_offset = code(self.table.text.len())?;
+        code(self.table.text.len() + other.table.text.len())?;
+        let genotypes = other
+            .table
+            .genotypes
+            .iter()
+            .map(|value| intern(&mut self.table.genotypes, &mut self.genotype_codes, value))
+            .collect::<Result<Vec<_>, _>>()?;
+        let names = other
+            .table
+            .names
+            .iter()
+            .map(|value| intern(&mut self.table.names, &mut self.name_codes, value))
+            .collect::<Result<Vec<_>, _>>()?;
+        let chroms = other
+            .table
+            .chroms
+            .iter()
+            .map(|value| intern(&mut self.table.chroms, &mut self.chrom_codes, value))
+            .collect::<Result<Vec<_>, _>>()?;
+
+        let table = other.table;
+        self.table.text.push_str(&table.text);
+        self.table.row_genotypes.extend(
+            table
+                .row_genotypes
+                .iter()
+                .map(|genotype| genotypes[*genotype as usize]),
+        );
+        self.table
+            .row_rsids
+            .extend(table.row_rsids.iter().map(|rsid| match rsid {
+                RowRsid::Named(name) => RowRsid::Named(names[*name as usize]),
+                other => *other,
+            }));
+        self.table
+            .row_lines
+            .extend(table.row_lines.iter().map(|line| {
+                line.map(|span| Span {
+                    start: span.start + text_offset,
+                    len: span.len,
+                })
+            }));
+        self.table.rs_index.extend(
+            table
+                .rs_index
+                .iter()
+                .map(|(number, row)| (*number, row + row_offset)),
+        );
+        self.table.named_index.extend(
+            table
+                .named_index
+                .iter()
+                .map(|(name, row)| (names[*name as usize], row + row_offset)),
+        );
+        self.loci.extend(
+            other.loci.iter().map(|(chrom, position, row)| {
+                (chroms[*chrom as usize], *position, row + row_offset)
+            }),
+        );
+        Ok(())
+    }
+
+    pub(crate) fn finish(self) -> RsidTable {
+        let mut table = self.table;
+        // Sort each index by key with the newest row first, then keep the
+        // first entry per key.
+        table
+            .rs_index
+            .sort_unstable_by(|left, right| left.0.cmp(&right.0).then(right.1.cmp(&left.1)));
+        table.rs_index.dedup_by_key(|(key, _)| *key);
+
+        let names = &table.names;
+        table.named_index.sort_unstable_by(|left, right| {
+            names[left.0 as usize]
+                .cmp(&names[right.0 as usize])
+                .then(right.1.cmp(&left.1))
+        });
+        table.named_index.dedup_by_key(|(name, _)| *name);
+
+        let mut loci = self.loci;
+        loci.sort_unstable_by(|left, right| {
+            (left.0, left.1)
+                .cmp(&(right.0, right.1))
+                .then(right.2.cmp(&left.2))
+        });
+        loci.dedup_by_key(|(chrom, position, _)| (*chrom, *position));
+        table.locus_index = loci;
+
+        table.text.shrink_to_fit();
+        table.row_genotypes.shrink_to_fit();
+        table.row_rsids.shrink_to_fit();
+        table.row_lines.shrink_to_fit();
+        table.rs_index.shrink_to_fit();
+        table.named_index.shrink_to_fit();
+        table.locus_index.shrink_to_fit();
+        table
+    }
+}
+
+/// `n` for a canonical `rs<n>` id; ids with leading zeros or other text stay
+/// names so every stored id renders back exactly as it was written.
+fn parse_rs_number(rsid: &str) -> Option<u64> {
+    let digits = rsid.strip_prefix("rs")?;
+    let canonical = !digits.is_empty()
+        && digits.len() <= 18
+        && digits.bytes().all(|byte| byte.is_ascii_digit())
+        && (digits == "0" || !digits.starts_with('0'));
+    canonical.then(|| digits.parse().ok()).flatten()
+}
+
+fn normalize_chrom(chrom: &str) -> String {
+    chrom.trim_start_matches("chr").to_ascii_lowercase()
+}
+
+fn intern(
+    values: &mut Vec<Box<str>>,
+    codes: &mut HashMap<Box<str>, u32>,
+    value: &str,
+) -> Result<u32, RuntimeError> {
+    if let Some(code) = codes.get(value) {
+        return Ok(*code);
+    }
+    let next = code(values.len())?;
+    values.push(value.into());
+    codes.insert(value.into(), next);
+    Ok(next)
+}
+
+fn code(value: usize) -> Result<u32, RuntimeError> {
+    u32::try_from(value).map_err(|_| {
+        RuntimeError::Unsupported("genotype input is too large to hold in memory".to_owned())
+    })
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    type Row<'a> = (
+        Option<&'a str>,
+        Option<(&'a str, i64)>,
+        &'a str,
+        Option<&'a str>,
+    );
+
+    fn table(rows: &[Row<'_>]) -> RsidTable {
+        let mut builder = RsidTableBuilder::default();
+        for (rsid, locus, genotype, line) in rows {
+            builder.push(*rsid, *locus, genotype, *line).unwrap();
+        }
+        builder.finish()
+    }
+
+    #[test]
+    fn rows_resolve_by_rsid_and_locus() {
+        let table = table(&[
+            (
+                Some("rs10"),
+                Some(("chr1", 100)),
+                "AG",
+                Some("rs10\t1\t100\tAG"),
+            ),
+            (Some("i7001"), Some(("X", 5)), "CC", Some("i7001\tX\t5\tCC")),
+            (None, Some(("MT", 7)), "T", None),
+            (Some("rs010"), None, "GG", None),
+        ]);
+
+        let row = table.by_rsid("rs10").unwrap();
+        assert_eq!(row.genotype, "AG");
+        assert_eq!(row.source_line, Some("rs10\t1\t100\tAG"));
+        assert_eq!(table.by_rsid("i7001").unwrap().genotype, "CC");
+        assert_eq!(table.by_rsid("rs010").unwrap().genotype, "GG");
+        assert!(table.by_rsid("rs11").is_none());
+        assert!(table.by_rsid("RS10").is_none());
+
+        let row = table.by_locus("1", 100).unwrap();
+        assert_eq!(row.rsid.as_deref(), Some("rs10"));
+        let row = table.by_locus("chrx", 5).unwrap();
+        assert_eq!(row.rsid.as_deref(), Some("i7001"));
+        assert_eq!(row.source_line, Some("i7001\tX\t5\tCC"));
+        let row = table.by_locus("mt", 7).unwrap();
+        assert_eq!((row.genotype, row.rsid, row.source_line), ("T", None, None));
+        assert!(table.by_locus("2", 100).is_none());
+        assert!(table.by_locus("1", 101).is_none());
+    }
+
+    #[test]
+    fn later_rows_replace_earlier_ones_per_key() {
+        let table = table(&[
+            (Some("rs1"), Some(("1", 10)), "AA", Some("first")),
+            (Some("rs2"), Some(("1", 10)), "CC", Some("second")),
+            (Some("rs1"), Some(("1", 20)), "GG", Some("third")),
+        ]);
+        let row = table.by_rsid("rs1").unwrap();
+        assert_eq!((row.genotype, row.source_line), ("GG", Some("third")));
+        let row = table.by_locus("1", 10).unwrap();
+        assert_eq!((row.genotype, row.rsid.as_deref()), ("CC", Some("rs2")));
+        assert_eq!(table.genotypes.len(), 3);
+        assert!(!table.is_empty());
+        assert!(RsidTable::default().is_empty());
+    }
+
+    #[test]
+    fn appended_builders_match_one_builder() {
+        let rows: [Row<'_>; 5] = [
+            (Some("rs1"), Some(("1", 10)), "AA", Some("a")),
+            (Some("i5"), Some(("2", 20)), "CT", Some("b")),
+            (Some("rs1"), Some(("X", 30)), "GG", Some("c")),
+            (None, Some(("1", 10)), "CT", Some("d")),
+            (Some("i5"), None, "TT", None),
+        ];
+        let mut first = RsidTableBuilder::default();
+        let mut second = RsidTableBuilder::default();
+        for (index, (rsid, locus, genotype, line)) in rows.iter().enumerate() {
+            let builder = if index < 2 { &mut first } else { &mut second };
+            builder.push(*rsid, *locus, genotype, *line).unwrap();
+        }
+        first.append(second).unwrap();
+        let appended = first.finish();
+        let whole = table(&rows);
+
+        let view = |row: Option<RsidRow<'_>>| {
+            row.map(|row| {
+                (
+                    row.genotype.to_owned(),
+                    row.rsid,
+                    row.source_line.map(str::to_owned),
+                )
+            })
+        };
+        for rsid in ["rs1", "i5", "rs2"] {
+            assert_eq!(view(appended.by_rsid(rsid)), view(whole.by_rsid(rsid)));
+        }
+        for (chrom, position) in [("1", 10), ("2", 20), ("x", 30), ("3", 1)] {
+            assert_eq!(
+                view(appended.by_locus(chrom, position)),
+                view(whole.by_locus(chrom, position))
+            );
+        }
+        assert_eq!(
+            view(appended.by_locus("1", 10)),
+            Some(("CT".to_owned(), None, Some("d".to_owned())))
+        );
+        assert_eq!(appended.genotypes.len(), 4);
+    }
+
+    #[test]
+    fn only_canonical_rs_ids_are_numeric() {
+        assert_eq!(parse_rs_number("rs123"), Some(123));
+        assert_eq!(parse_rs_number("rs0"), Some(0));
+        assert_eq!(parse_rs_number("rs0123"), None);
+        assert_eq!(parse_rs_number("rs"), None);
+        assert_eq!(parse_rs_number("rs12a"), None);
+        assert_eq!(parse_rs_number("i123"), None);
+        assert_eq!(parse_rs_number("rs1234567890123456789"), None);
+    }
+}
@@ -0,0 +1,150 @@
+use std::{borrow::Cow, collections::BTreeMap};
+
+use bioscript_core::{Assembly, GenomicLocus, RuntimeError, VariantSpec};
+
+use crate::liftover::bundled_grch37_to_grch38_chain;
+
+use super::types::QueryBackend;
+
+impl QueryBackend {
+    /// Assembly the caller declared for the input through
+    /// `GenotypeLoadOptions::assembly` (or the rsid map's own assembly).
+    pub(super) fn declared_assembly(&self) -> Option<Assembly> {
+        match self {
+            QueryBackend::RsidMap(map) => map.assembly,
+            QueryBackend::Delimited(backend) => backend.options.assembly,
+            QueryBackend::Vcf(backend) => backend.options.assembly,
+            QueryBackend::Bcf(backend) => backend.options.assembly,
+            QueryBackend::Cram(backend) => backend.options.assembly,
+            QueryBackend::Bam(backend) => backend.options.assembly,
+            QueryBackend::AlignmentBytes(backend) => backend.options.assembly,
+            QueryBackend::Cached { fallback, .. } => fallback.declared_assembly(),
+        }
+    }
+}
+
+/// Fill in `GRCh38` loci for specs that only carry `GRCh37` coordinates when
+/// the input is declared `GRCh38`.
+///
+/// Start and end of every such locus are grouped by chromosome, sorted and
+/// lifted with one `ChainIndex::lookup_many` sweep per chromosome. A locus
+/// that does not lift cleanly (unmapped, reverse strand, split across
+/// contigs, or changed length) stays `GRCh37`-only, so the backend sees the
+/// spec unchanged.
+pub(super) fn lift_grch37_only_specs(
+    assembly: Option<Assembly>,
+    variants: &[VariantSpec],
+) -> Result<Cow<'_, [VariantSpec]>, RuntimeError> {
+    if assembly != Some(Assembly::Grch38) || !variants.iter().any(needs_lift) {
+        return Ok(Cow::Borrowed(variants));
+    }
+    let chain = bundled_grch37_to_grch38_chain()?;
+
+    let mut by_chrom: BTreeMap<&str, Vec<(i64, usize)>> = BTreeMap::new();
+    for (index, variant) in variants.iter().enumerate() {
+        if let Some(locus) = variant.grch37.as_ref().filter(|_| needs_lift(variant)) {
+            let points = by_chrom.entry(locus.chrom.as_str()).or_default();
+            points.push((locus.start, index * 2));
+            points.push((locus.end, index * 2 + 1));
+        }
+    }
+
+    let mut lifted = vec![None; variants.len() * 2];
+    for (chrom, mut points) in by_chrom {
+        points.sort_unstable();
+        let positions = points.iter().map(|(pos, _)| *pos).collect::<Vec<_>>();
+        let loci = chain.lookup_many(Assembly::Grch37, Assembly::Grch38, chrom, &positions);
+        for ((_, slot), locus) in points.into_iter().zip(loci) {
+            lifted[slot] = locus;
+        }
+    }
+
+    let mut variants = variants.to_vec();
+    for (index, variant) in variants.iter_mut().enumerate() {
+        let (Some(start), Some(end), Some(source)) = (
+            lifted[index * 2].take(),
+            lifted[index * 2 + 1].take(),
+            variant.grch37.as_ref(),
+        ) else {
+            continue;
+        };
+        if start.chrom == end.chrom
+            && start.strand == '+'
+            && end.strand == '+'
+            && end.pos - start.pos == source.end - source.start
+        {
+            variant.grch38 = Some(GenomicLocus {
+                chrom: start.chrom,
+                start: start.pos,
+                end: end.pos,
+            });
+        }
+    }
+    Ok(Cow::Owned(variants))
+}
+
+fn needs_lift(variant: &VariantSpec) -> bool {
+    variant.grch37.is_some() && variant.grch38.is_none()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn grch37_spec(chrom: &str, start: i64, end: i64) -> VariantSpec {
+        VariantSpec {
+            rsids: vec!["rs1800437".to_owned()],
+            grch37: Some(GenomicLocus {
+                chrom: chrom.to_owned(),
+                start,
+                end,
+            }),
+            ..VariantSpec::default()
+        }
+    }
+
+    #[test]
+    fn grch37_only_specs_gain_grch38_loci_for_grch38_inputs() {
+        let both = VariantSpec {
+            grch38: Some(GenomicLocus {
+                chrom: "1".to_owned(),
+                start: 5,
+                end: 5,
+            }),
+            ..grch37_spec("1", 10, 10)
+        };
+        let variants = vec![
+            grch37_spec("19", 46_181_392, 46_181_392),
+            both.clone(),
+            grch37_spec("chr19", 46_181_392, 46_181_393),
+            grch37_spec("bogus", 10, 10),
+        ];
+
+        let unchanged = lift_grch37_only_specs(Some(Assembly::Grch37), &variants).unwrap();
+        assert!(matches!(unchanged, Cow::Borrowed(_)));
+        assert!(matches!(
+            lift_grch37_only_specs(None, &variants).unwrap(),
+            Cow::Borrowed(_)
+        ));
+
+        let lifted = lift_grch37_only_specs(Some(Assembly::Grch38), &variants).unwrap();
+        assert_eq!(
+            lifted[0].grch38,
+            Some(GenomicLocus {
+                chrom: "19".to_owned(),
+                start: 45_678_134,
+                end: 45_678_134,
+            })
+        );
+        assert_eq!(lifted[1], both);
+        assert_eq!(
+            lifted[2]
+                .grch38
+                .as_ref()
+                .map(|locus| (locus.start, locus.end)),
+            Some((45_678_134, 45_678_135))
+        );
+        assert_eq!(lifted[3].grch38, None);
+        assert_eq!(lifted[0].grch37, variants[0].grch37);
+    }
+}
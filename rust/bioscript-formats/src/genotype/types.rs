@@ -1,9 +1,16 @@
-use std::{collections::HashMap, path::PathBuf, str::FromStr};
+use std::{path::PathBuf, str::FromStr};
 
 use bioscript_core::{Assembly, VariantObservation};
+use noodles::{bam, fasta};
 
+use crate::alignment::{BamFileReader, CramFileReader};
 use crate::inspect::InferredSex;
 
+use super::{
+    reader_slot::{ReaderPool, ReaderSlot},
+    rsid_table::RsidTable,
+};
+
 #[derive(Debug, Clone)]
 pub struct GenotypeStore {
     pub(crate) backend: QueryBackend,
@@ -40,14 +47,12 @@ pub(crate) enum QueryBackend {
 #[derive(Debug, Clone)]
 pub(crate) struct RsidMapBackend {
     pub(crate) format: GenotypeSourceFormat,
-    pub(crate) values: HashMap<String, String>,
-    pub(crate) locus_values: HashMap<(String, i64), (String, Option<String>, String)>,
+    /// Rows by rsid and by locus. Rows keep their original input line, so
+    /// wasm-side `from_bytes` loads can emit the same `| source line: …`
+    /// evidence that the CLI's path-backed `DelimitedBackend` does on every
+    /// lookup; in-memory maps without a line representation store none.
+    pub(crate) table: RsidTable,
     pub(crate) assembly: Option<Assembly>,
-    /// Original input line per rsid, retained so wasm-side `from_bytes` loads
-    /// can emit the same `| source line: …` evidence that the CLI's
-    /// path-backed `DelimitedBackend` does on every lookup. Empty for
-    /// in-memory maps that don't have a line representation.
-    pub(crate) source_lines: HashMap<String, String>,
 }
 
 #[derive(Debug, Clone)]
@@ -91,12 +96,22 @@ pub(crate) enum BcfSource {
 pub(crate) struct CramBackend {
     pub(crate) path: PathBuf,
     pub(crate) options: GenotypeLoadOptions,
+    pub(crate) reader: ReaderSlot<CramFileReader>,
+    /// Readers for the extra workers of parallel `lookup_variants` calls.
+    pub(crate) worker_readers: ReaderPool<CramFileReader>,
+    /// Reference repository shared by the session and worker readers.
+    pub(crate) repository: ReaderSlot<fasta::Repository>,
 }
 
 #[derive(Debug, Clone)]
 pub(crate) struct BamBackend {
     pub(crate) path: PathBuf,
     pub(crate) options: GenotypeLoadOptions,
+    pub(crate) reader: ReaderSlot<BamFileReader>,
+    /// Readers for the extra workers of parallel `lookup_variants` calls.
+    pub(crate) worker_readers: ReaderPool<BamFileReader>,
+    /// BAI parsed on first use; every reader starts from a clone of it.
+    pub(crate) index: ReaderSlot<bam::bai::Index>,
 }
 
 #[derive(Debug, Clone)]
@@ -152,6 +167,8 @@ impl FromStr for GenotypeSourceFormat {
     }
 }
 
+const DEFAULT_ALIGNMENT_CACHE_BYTES: usize = 64 * 1024 * 1024;
+
 #[derive(Debug, Clone)]
 pub struct GenotypeLoadOptions {
     pub format: Option<GenotypeSourceFormat>,
@@ -162,6 +179,23 @@ pub struct GenotypeLoadOptions {
     pub inferred_sex: Option<InferredSex>,
     pub impute_vcf_missing_as_reference: bool,
     pub allow_reference_md5_mismatch: bool,
+    /// Memory budget, in bytes, for raw CRAM/BAM file blocks cached by a
+    /// backend's persistent readers. The session reader and the pooled
+    /// lookup workers split it evenly. `0` disables block caching.
+    pub alignment_cache_bytes: usize,
+    /// Worker threads for CRAM `lookup_variants` batches. `None` sizes the
+    /// pool from available cores, up to four; either way it never exceeds
+    /// the number of variant groups that touch disjoint CRAM containers.
+    pub cram_lookup_workers: Option<usize>,
+    /// Worker threads for BAM `lookup_variants` batches. `None` sizes the
+    /// pool from available cores, up to four; either way it never exceeds
+    /// the number of sweep clusters, and each worker keeps its own reader.
+    pub bam_lookup_workers: Option<usize>,
+    /// Worker threads for parsing uncompressed delimited text loaded from
+    /// bytes. `None` sizes the pool from available cores; either way each
+    /// worker gets at least 1 MiB of text, and wasm32 always parses on the
+    /// calling thread.
+    pub text_parse_workers: Option<usize>,
 }
 
 impl Default for GenotypeLoadOptions {
@@ -175,6 +209,10 @@ impl Default for GenotypeLoadOptions {
             inferred_sex: None,
             impute_vcf_missing_as_reference: true,
             allow_reference_md5_mismatch: false,
+            alignment_cache_bytes: DEFAULT_ALIGNMENT_CACHE_BYTES,
+            cram_lookup_workers: None,
+            bam_lookup_workers: None,
+            text_parse_workers: None,
         }
     }
 }
@@ -14,7 +14,8 @@ use crate::alignment;
 use crate::inspect::detect_assembly;
 
 use super::{
-    describe_query, genotype_from_vcf_gt, is_bgzf_path, types::VcfBackend, variant_sort_key,
+    ScanCounts, describe_query, genotype_from_vcf_gt, is_bgzf_path, types::VcfBackend,
+    variant_sort_key,
 };
 
 mod matching;
@@ -130,6 +131,7 @@ pub(crate) fn scan_vcf_variants(
     };
 
     let mut buf = String::new();
+    let mut scanned = ScanCounts::default();
     loop {
         buf.clear();
         let bytes = reader.read_line(&mut buf).map_err(|err| {
@@ -141,10 +143,12 @@ pub(crate) fn scan_vcf_variants(
         if bytes == 0 || unresolved == 0 {
             break;
         }
+        scanned.add(bytes);
         if let Some(row) = parse_vcf_record(buf.trim_end_matches(['\n', '\r']))? {
             resolve_vcf_row(backend, &row, &targets, &mut results, &mut unresolved);
         }
     }
+    scanned.record();
 
     for (idx, variant) in indexed {
         if results[idx].genotype.is_none() {
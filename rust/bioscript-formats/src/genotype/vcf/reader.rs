@@ -5,7 +5,9 @@ use noodles::core::{Position, Region};
 use noodles::csi::{self, BinningIndex};
 use noodles::tabix;
 
-use bioscript_core::{Assembly, GenomicLocus, RuntimeError, VariantObservation, VariantSpec};
+use bioscript_core::{
+    Assembly, GenomicLocus, ProfileCounter, RuntimeError, VariantObservation, VariantSpec, profile,
+};
 
 use super::{matching::vcf_row_genotype_for_variant, parse_vcf_record, vcf_row_matches_variant};
 
@@ -81,6 +83,7 @@ where
     let query = indexed.query(&region).map_err(|err| {
         RuntimeError::Io(format!("{label}: tabix query for {locus_label}: {err}"))
     })?;
+    profile::record(ProfileCounter::IndexQueries, 1);
 
     let expected_reference = assembly_reference.unwrap_or(reference);
     let reference_str = expected_reference.to_ascii_uppercase().to_string();
@@ -91,6 +94,7 @@ where
     for record_result in query {
         let record = record_result
             .map_err(|err| RuntimeError::Io(format!("{label}: tabix record iter: {err}")))?;
+        profile::record(ProfileCounter::RecordsDecoded, 1);
         let line: &str = record.as_ref();
         let Some(row) = parse_vcf_record(line)? else {
             continue;
@@ -193,11 +197,13 @@ where
     let query = indexed.query(&region).map_err(|err| {
         RuntimeError::Io(format!("{label}: tabix query for {locus_label}: {err}"))
     })?;
+    profile::record(ProfileCounter::IndexQueries, 1);
 
     let mut saw_any = false;
     for record_result in query {
         let record = record_result
             .map_err(|err| RuntimeError::Io(format!("{label}: tabix record iter: {err}")))?;
+        profile::record(ProfileCounter::RecordsDecoded, 1);
         let line: &str = record.as_ref();
         let Some(row) = parse_vcf_record(line)? else {
             continue;
@@ -1,4 +1,7 @@
-use std::path::{Path, PathBuf};
+use std::{
+    io::BufRead,
+    path::{Path, PathBuf},
+};
 
 #[cfg(not(target_arch = "wasm32"))]
 use std::time::Instant;
@@ -35,9 +38,10 @@ mod assembly_anchors;
 mod heuristics;
 mod io;
 mod render;
+mod scan;
 mod sex;
 
-pub(crate) use assembly_anchors::{AssemblyAnchorScorer, assembly_from_text_bytes};
+pub(crate) use assembly_anchors::AssemblyAnchorScorer;
 pub(crate) use heuristics::*;
 pub(crate) use io::*;
 #[cfg(test)]
@@ -80,12 +84,28 @@ pub struct SourceMetadata {
     pub evidence: Vec<String>,
 }
 
+/// How sex is inferred for BAM/CRAM inputs.
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Default)]
+pub enum AlignmentSexMethod {
+    /// Index-only estimate, decoding sampled windows only when the index
+    /// cannot call the sex and a CRAM reference is available.
+    #[default]
+    Auto,
+    /// X/Y/autosome densities from BAI read counts or CRAI slice sizes.
+    /// Returns in milliseconds and never touches the reference.
+    Index,
+    /// Decode reads in fixed autosome/X/Y windows (CRAM only). Slower and
+    /// needs `reference_file`, but gives higher-confidence calls.
+    Decode,
+}
+
 #[derive(Debug, Clone, PartialEq, Eq, Default)]
 pub struct InspectOptions {
     pub input_index: Option<PathBuf>,
     pub reference_file: Option<PathBuf>,
     pub reference_index: Option<PathBuf>,
     pub detect_sex: bool,
+    pub alignment_sex_method: AlignmentSexMethod,
 }
 
 #[derive(Debug, Clone, PartialEq, Eq)]
@@ -124,6 +144,8 @@ pub fn inspect_bytes(
     let mut evidence = Vec::new();
     let mut warnings = Vec::new();
     let path = Path::new(name);
+    let mut sample_lines = Vec::new();
+    let mut reader: Box<dyn BufRead + '_> = Box::new(std::io::empty());
 
     if lower.ends_with(".zip") {
         let selected_entry = select_zip_entry_from_bytes(bytes)?;
@@ -140,21 +162,9 @@ pub fn inspect_bytes(
                 .push("selected BCF zip entry".to_owned());
             return Ok(inspection);
         }
-        let sample_lines = read_zip_sample_lines_from_bytes(bytes, &selected_entry)?;
-        let mut inspection = inspect_from_textual_sample(
-            path,
-            FileContainer::Zip,
-            &selected_entry,
-            &sample_lines,
-            options,
-        );
-        if options.detect_sex {
-            inspection.inferred_sex = Some(sex::infer_sex_from_zip_bytes(
-                bytes,
-                &selected_entry,
-                inspection.detected_kind,
-            )?);
-        }
+        let mut inspection = with_zip_text_entry_from_bytes(bytes, &selected_entry, |reader| {
+            inspect_zip_text_entry(path, &selected_entry, reader, options)
+        })?;
         inspection.duration_ms = started.elapsed().as_millis();
         return Ok(inspection);
     }
@@ -172,43 +182,26 @@ pub fn inspect_bytes(
         evidence.push("reference fasta extension".to_owned());
         DetectedKind::ReferenceFasta
     } else {
-        let sample_lines = read_plain_sample_lines_from_bytes(&lower, bytes)?;
-        let sample_lower = sample_lines.join("\n").to_ascii_lowercase();
-        if looks_like_vcf_lines(&sample_lines) {
-            evidence.push("vcf header markers".to_owned());
-            DetectedKind::Vcf
-        } else if looks_like_genotype_text(&sample_lines) {
-            if sample_lower.contains("rsid") || sample_lower.contains("allele1") {
-                evidence.push("genotype-like sampled rows and headers".to_owned());
-            } else {
-                evidence.push("genotype-like sampled rows".to_owned());
-            }
-            DetectedKind::GenotypeText
-        } else {
-            warnings.push("file did not match known textual heuristics".to_owned());
-            DetectedKind::Unknown
-        }
+        let mut text = text_reader(&lower, bytes);
+        sample_lines = read_sample_lines(&mut *text)?;
+        reader = text;
+        classify_text_sample(&sample_lines, &mut evidence, &mut warnings)
     };
 
-    let sample_lines = match detected_kind {
-        DetectedKind::AlignmentCram | DetectedKind::AlignmentBam | DetectedKind::ReferenceFasta => {
-            Vec::new()
-        }
-        DetectedKind::Bcf => Vec::new(),
-        _ => read_plain_sample_lines_from_bytes(&lower, bytes)?,
-    };
     let inspection_context = inspect_context_name(&lower, options);
     let source = detect_source(&inspection_context, &sample_lines, detected_kind);
-    // Declared metadata first; fall back to the rsID/locus anchor vote over
-    // the buffer only when the file declares no build (e.g. a GSGT report).
-    let assembly = detect_assembly(&inspection_context, &sample_lines).or_else(|| {
-        matches!(
-            detected_kind,
-            DetectedKind::GenotypeText | DetectedKind::Vcf
-        )
-        .then(|| assembly_from_text_bytes(bytes))
-        .flatten()
-    });
+    // Declared metadata first; the rsID/locus anchor vote over the rest of
+    // the stream runs only when the file declares no build (e.g. a GSGT
+    // report).
+    let declared_assembly = detect_assembly(&inspection_context, &sample_lines);
+    let scan = scan::scan_text_rows(
+        &mut *reader,
+        &sample_lines,
+        detected_kind,
+        declared_assembly.is_none(),
+        options.detect_sex,
+    )?;
+    let assembly = declared_assembly.or(scan.assembly);
     let phased = (detected_kind == DetectedKind::Vcf)
         .then(|| detect_vcf_phasing(&sample_lines))
         .flatten();
@@ -225,10 +218,6 @@ pub fn inspect_bytes(
         .clone()
         .or_else(|| options.reference_index.clone());
     let confidence = classify_confidence(detected_kind, &sample_lines, source.as_ref());
-    let inferred_sex = options
-        .detect_sex
-        .then(|| sex::infer_sex_from_bytes(name, bytes, detected_kind))
-        .transpose()?;
 
     Ok(FileInspection {
         path: path.to_path_buf(),
@@ -242,7 +231,7 @@ pub fn inspect_bytes(
         has_index,
         index_path,
         reference_matches: None,
-        inferred_sex,
+        inferred_sex: scan.inferred_sex,
         evidence,
         warnings,
         duration_ms: started.elapsed().as_millis(),
@@ -254,6 +243,8 @@ pub fn inspect_file(path: &Path, options: &InspectOptions) -> Result<FileInspect
     let lower = path.to_string_lossy().to_ascii_lowercase();
     let mut evidence = Vec::new();
     let mut warnings = Vec::new();
+    let mut sample_lines = Vec::new();
+    let mut reader: Box<dyn BufRead> = Box::new(std::io::empty());
 
     if lower.ends_with(".zip") {
         let selected_entry = select_zip_entry(path)?;
@@ -270,18 +261,9 @@ pub fn inspect_file(path: &Path, options: &InspectOptions) -> Result<FileInspect
                 .push("selected BCF zip entry".to_owned());
             return Ok(inspection);
         }
-        let sample_lines = read_zip_sample_lines(path, &selected_entry)?;
-        let mut inspection = inspect_from_textual_sample(
-            path,
-            FileContainer::Zip,
-            &selected_entry,
-            &sample_lines,
-            options,
-        );
-        if options.detect_sex {
-            inspection.inferred_sex =
-                Some(sex::infer_sex_from_path(path, inspection.detected_kind)?);
-        }
+        let mut inspection = with_zip_text_entry(path, &selected_entry, |reader| {
+            inspect_zip_text_entry(path, &selected_entry, reader, options)
+        })?;
         inspection.duration_ms = started.elapsed().as_millis();
         return Ok(inspection);
     }
@@ -299,64 +281,38 @@ pub fn inspect_file(path: &Path, options: &InspectOptions) -> Result<FileInspect
         evidence.push("reference fasta extension".to_owned());
         DetectedKind::ReferenceFasta
     } else {
-        let sample_lines = read_plain_sample_lines(path)?;
-        let sample_lower = sample_lines.join("\n").to_ascii_lowercase();
-        if looks_like_vcf_lines(&sample_lines) {
-            evidence.push("vcf header markers".to_owned());
-            DetectedKind::Vcf
-        } else if looks_like_genotype_text(&sample_lines) {
-            if sample_lower.contains("rsid") || sample_lower.contains("allele1") {
-                evidence.push("genotype-like sampled rows and headers".to_owned());
-            } else {
-                evidence.push("genotype-like sampled rows".to_owned());
-            }
-            DetectedKind::GenotypeText
-        } else {
-            warnings.push("file did not match known textual heuristics".to_owned());
-            DetectedKind::Unknown
-        }
+        let mut text = open_plain_text(path)?;
+        sample_lines = read_sample_lines(&mut *text)?;
+        reader = text;
+        classify_text_sample(&sample_lines, &mut evidence, &mut warnings)
     };
 
-    let sample_lines = match detected_kind {
-        DetectedKind::AlignmentCram | DetectedKind::AlignmentBam | DetectedKind::ReferenceFasta => {
-            Vec::new()
-        }
-        DetectedKind::Bcf => Vec::new(),
-        _ => read_plain_sample_lines(path)?,
-    };
     let inspection_context = inspect_context_name(&lower, options);
     let source = detect_source(&inspection_context, &sample_lines, detected_kind);
-    // Declared metadata first; anchor-vote the build from the file only when
-    // it declares none.
-    let assembly = detect_assembly(&inspection_context, &sample_lines).or_else(|| {
-        matches!(
-            detected_kind,
-            DetectedKind::GenotypeText | DetectedKind::Vcf
-        )
-        .then(|| {
-            std::fs::read(path)
-                .ok()
-                .and_then(|b| assembly_from_text_bytes(&b))
-        })
-        .flatten()
-    });
+    let is_alignment = matches!(
+        detected_kind,
+        DetectedKind::AlignmentCram | DetectedKind::AlignmentBam
+    );
+    // Declared metadata first; anchor-vote the build from the rest of the
+    // stream only when the file declares none.
+    let declared_assembly = detect_assembly(&inspection_context, &sample_lines);
+    let scan = scan::scan_text_rows(
+        &mut *reader,
+        &sample_lines,
+        detected_kind,
+        declared_assembly.is_none(),
+        options.detect_sex && !is_alignment,
+    )?;
+    let assembly = declared_assembly.or(scan.assembly);
     let phased = (detected_kind == DetectedKind::Vcf)
         .then(|| detect_vcf_phasing(&sample_lines))
         .flatten();
     let (has_index, index_path) = detect_index(path, detected_kind, options);
     let confidence = classify_confidence(detected_kind, &sample_lines, source.as_ref());
-    let inferred_sex = if options.detect_sex {
-        if detected_kind == DetectedKind::AlignmentCram {
-            Some(sex::infer_sex_from_alignment_path(
-                path,
-                options,
-                detected_kind,
-            )?)
-        } else {
-            Some(sex::infer_sex_from_path(path, detected_kind)?)
-        }
+    let inferred_sex = if options.detect_sex && is_alignment {
+        Some(sex::infer_sex_from_alignment(path, options, detected_kind)?)
     } else {
-        None
+        scan.inferred_sex
     };
 
     Ok(FileInspection {
@@ -378,32 +334,63 @@ pub fn inspect_file(path: &Path, options: &InspectOptions) -> Result<FileInspect
     })
 }
 
-fn inspect_from_textual_sample(
+/// Classify sampled rows of a plain textual input.
+fn classify_text_sample(
+    sample_lines: &[String],
+    evidence: &mut Vec<String>,
+    warnings: &mut Vec<String>,
+) -> DetectedKind {
+    let sample_lower = sample_lines.join("\n").to_ascii_lowercase();
+    if looks_like_vcf_lines(sample_lines) {
+        evidence.push("vcf header markers".to_owned());
+        DetectedKind::Vcf
+    } else if looks_like_genotype_text(sample_lines) {
+        if sample_lower.contains("rsid") || sample_lower.contains("allele1") {
+            evidence.push("genotype-like sampled rows and headers".to_owned());
+        } else {
+            evidence.push("genotype-like sampled rows".to_owned());
+        }
+        DetectedKind::GenotypeText
+    } else {
+        warnings.push("file did not match known textual heuristics".to_owned());
+        DetectedKind::Unknown
+    }
+}
+
+/// Inspect a textual zip entry from one pass over its decompressed stream.
+fn inspect_zip_text_entry(
     path: &Path,
-    container: FileContainer,
     selected_entry: &str,
-    sample_lines: &[String],
+    reader: &mut dyn BufRead,
     options: &InspectOptions,
-) -> FileInspection {
+) -> Result<FileInspection, RuntimeError> {
+    let sample_lines = read_sample_lines(reader)?;
     let lower = selected_entry.to_ascii_lowercase();
     let detected_kind = if lower.ends_with(".vcf")
         || lower.ends_with(".vcf.gz")
-        || looks_like_vcf_lines(sample_lines)
+        || looks_like_vcf_lines(&sample_lines)
     {
         DetectedKind::Vcf
-    } else if looks_like_genotype_text(sample_lines) {
+    } else if looks_like_genotype_text(&sample_lines) {
         DetectedKind::GenotypeText
     } else {
         DetectedKind::Unknown
     };
     let path_lower = path.to_string_lossy().to_ascii_lowercase();
     let combined_name = format!("{path_lower}\n{lower}");
-    let source = detect_source(&combined_name, sample_lines, detected_kind);
-    let assembly = detect_assembly(&combined_name, sample_lines);
+    let source = detect_source(&combined_name, &sample_lines, detected_kind);
+    let declared_assembly = detect_assembly(&combined_name, &sample_lines);
+    let scan = scan::scan_text_rows(
+        reader,
+        &sample_lines,
+        detected_kind,
+        declared_assembly.is_none(),
+        options.detect_sex,
+    )?;
     let phased = (detected_kind == DetectedKind::Vcf)
-        .then(|| detect_vcf_phasing(sample_lines))
+        .then(|| detect_vcf_phasing(&sample_lines))
         .flatten();
-    let confidence = classify_confidence(detected_kind, sample_lines, source.as_ref());
+    let confidence = classify_confidence(detected_kind, &sample_lines, source.as_ref());
     let mut evidence = vec![format!("selected zip entry {selected_entry}")];
     if detected_kind == DetectedKind::Vcf {
         evidence.push("vcf entry markers".to_owned());
@@ -411,29 +398,24 @@ fn inspect_from_textual_sample(
         evidence.push("genotype-like sampled rows".to_owned());
     }
     let (has_index, index_path) = detect_index(path, detected_kind, options);
-    let inferred_sex = if options.detect_sex {
-        sex::infer_sex_from_text_lines(sample_lines, detected_kind).ok()
-    } else {
-        None
-    };
 
-    FileInspection {
+    Ok(FileInspection {
         path: path.to_path_buf(),
-        container,
+        container: FileContainer::Zip,
         detected_kind,
         confidence,
         source,
-        assembly,
+        assembly: declared_assembly.or(scan.assembly),
         phased,
         selected_entry: Some(selected_entry.to_owned()),
         has_index,
         index_path,
         reference_matches: None,
-        inferred_sex,
+        inferred_sex: scan.inferred_sex,
         evidence,
         warnings: Vec::new(),
         duration_ms: 0,
-    }
+    })
 }
 
 fn inspect_from_bcf(
@@ -492,13 +474,44 @@ mod tests {
     use std::path::PathBuf;
 
     #[test]
-    fn inspect_zip_entry_limited_reader_rejects_oversized_output() {
-        let mut reader = Cursor::new(b"abcdef".to_vec());
-        let err = read_entry_limited(&mut reader, 5, "inspect zip entry").unwrap_err();
+    fn inspect_zip_gzip_entry_reads_sex_rows_past_the_sample() {
+        let mut text = String::from("rsid\tchromosome\tposition\tgenotype\n");
+        for idx in 0..100 {
+            text.push_str(&format!("rs{idx}\t1\t{}\tAG\n", 10_000 + idx));
+        }
+        for marker in ["rs11575897", "rs2534636", "i3000043", "i3000045"] {
+            text.push_str(&format!("{marker}\tY\t1\tG\n"));
+        }
+        let mut gz = flate2::write::GzEncoder::new(Vec::new(), flate2::Compression::default());
+        gz.write_all(text.as_bytes()).unwrap();
+        let gz_bytes = gz.finish().unwrap();
+
+        let mut writer = zip::ZipWriter::new(Cursor::new(Vec::new()));
+        writer
+            .start_file("genome.txt.gz", zip::write::SimpleFileOptions::default())
+            .unwrap();
+        writer.write_all(&gz_bytes).unwrap();
+        let zip_bytes = writer.finish().unwrap().into_inner();
+
+        let options = InspectOptions {
+            detect_sex: true,
+            ..InspectOptions::default()
+        };
+        let inspection = inspect_bytes("genome.zip", &zip_bytes, &options).unwrap();
+        assert_eq!(inspection.detected_kind, DetectedKind::GenotypeText);
+        let inferred = inspection.inferred_sex.unwrap();
+        assert_eq!(inferred.method, "snp_array_x_y_fingerprint");
         assert!(
-            err.to_string()
-                .contains("inspect zip entry exceeds decompressed limit of 5 bytes"),
-            "{err}"
+            inferred
+                .evidence
+                .iter()
+                .any(|item| item == "male_markers_called=4")
+        );
+
+        let fasta = inspect_bytes("ref.fa", b">chr1\nACGT\n", &options).unwrap();
+        assert_eq!(
+            fasta.inferred_sex.map(|inferred| inferred.method),
+            Some("unsupported_source_type".to_owned())
         );
     }
 
@@ -694,17 +707,18 @@ mod tests {
             Some("r6")
         );
 
-        let missing = read_zip_sample_lines_from_bytes(&zip_bytes, "missing.vcf").unwrap_err();
+        let missing = with_zip_text_entry_from_bytes(&zip_bytes, "missing.vcf", read_sample_lines)
+            .unwrap_err();
         assert!(missing.to_string().contains("failed to open zip entry"));
 
         assert_eq!(
-            read_plain_sample_lines_from_bytes("sample.txt", b"rs1\t1\t10\tAG\n")
+            read_sample_lines(&mut *text_reader("sample.txt", &b"rs1\t1\t10\tAG\n"[..]))
                 .unwrap()
                 .len(),
             1
         );
         assert!(
-            read_zip_sample_lines_from_bytes(b"not a zip", "sample.txt")
+            with_zip_text_entry_from_bytes(b"not a zip", "sample.txt", read_sample_lines)
                 .unwrap_err()
                 .to_string()
                 .contains("failed to read zip bytes")
@@ -784,7 +798,12 @@ mod tests {
         let bgzf_vcf = bgzf_writer.finish().unwrap();
         let vcf_gz_path = dir.join("sample.vcf.gz");
         std::fs::write(&vcf_gz_path, &bgzf_vcf).unwrap();
-        assert_eq!(read_plain_sample_lines(&vcf_gz_path).unwrap().len(), 3);
+        assert_eq!(
+            read_sample_lines(&mut *open_plain_text(&vcf_gz_path).unwrap())
+                .unwrap()
+                .len(),
+            3
+        );
 
         let zip_path = dir.join("fallback.zip");
         let cursor = Cursor::new(Vec::new());
@@ -814,7 +833,7 @@ mod tests {
         let bytes = writer.finish().unwrap().into_inner();
         std::fs::write(&zip_gz_path, &bytes).unwrap();
         assert_eq!(
-            read_zip_sample_lines(&zip_gz_path, "nested/sample.vcf.gz")
+            with_zip_text_entry(&zip_gz_path, "nested/sample.vcf.gz", read_sample_lines)
                 .unwrap()
                 .len(),
             3
@@ -836,7 +855,7 @@ mod tests {
                 .to_string()
                 .contains("does not contain a supported file")
         );
-        let err = read_zip_sample_lines(&zip_gz_path, "missing.vcf").unwrap_err();
+        let err = with_zip_text_entry(&zip_gz_path, "missing.vcf", read_sample_lines).unwrap_err();
         assert!(err.to_string().contains("failed to open zip entry"));
 
         let source = detect_source(
@@ -154,6 +154,25 @@ impl AssemblyAnchorScorer {
         }
     }
 
+    /// Add the votes `other` collected from another part of the same file.
+    pub(crate) fn merge(&mut self, other: &Self) {
+        for (vote, extra) in self.rs.iter_mut().zip(other.rs) {
+            *vote += extra;
+        }
+        for (vote, extra) in self.loc.iter_mut().zip(other.loc) {
+            *vote += extra;
+        }
+    }
+
+    /// Every anchor so far voted for one build, and there are at least
+    /// twice `MIN_ANCHORS` of them. The anchor table is small, so a
+    /// single-build file has no rows left that could split this vote.
+    pub(crate) fn is_settled(&self) -> bool {
+        let anchors: u32 = self.rs.iter().chain(self.loc.iter()).sum();
+        let voting_builds = self.scores().iter().filter(|score| **score > 0).count();
+        anchors >= MIN_ANCHORS * 2 && voting_builds == 1
+    }
+
     fn scores(&self) -> [u32; 3] {
         [
             self.rs[0] * RSID_WEIGHT + self.loc[0] * LOCUS_WEIGHT,
@@ -191,42 +210,58 @@ impl AssemblyAnchorScorer {
     }
 }
 
-/// Vote an assembly from an in-memory text buffer (genotype text or VCF),
+/// Line layout the voter has recognised so far.
+#[derive(Debug, Clone, Copy)]
+enum VoteMode {
+    Auto,
+    GsgtMeta,
+    GsgtHdr,
+    GsgtBody(usize, usize, usize, usize, usize),
+    Vcf,
+    /// A GSGT `[Data]` header without the needed columns: no vote.
+    Abandoned,
+}
+
+/// Vote an assembly from streamed text lines (genotype text or VCF),
 /// vendor-agnostic. Handles GSGT `[Header]/[Data]`, VCF, and flat
-/// rsid/chrom/pos/genotype delimited rows. Returns `None` unless the anchor
-/// vote is confident — used only as the metadata-absent fallback.
-#[allow(clippy::items_after_statements, clippy::many_single_char_names)]
-pub(crate) fn assembly_from_text_bytes(bytes: &[u8]) -> Option<Assembly> {
-    enum Mode {
-        Auto,
-        GsgtMeta,
-        GsgtHdr,
-        GsgtBody(usize, usize, usize, usize, usize),
-        Vcf,
+/// rsid/chrom/pos/genotype delimited rows. `decide` returns `None` unless
+/// the anchor vote is confident — used only as the metadata-absent fallback.
+#[derive(Debug)]
+pub(crate) struct AssemblyLineVoter {
+    mode: VoteMode,
+    scorer: AssemblyAnchorScorer,
+}
+
+impl AssemblyLineVoter {
+    pub(crate) fn new() -> Self {
+        Self {
+            mode: VoteMode::Auto,
+            scorer: AssemblyAnchorScorer::new(),
+        }
     }
-    let text = String::from_utf8_lossy(bytes);
-    let mut scorer = AssemblyAnchorScorer::new();
-    let mut mode = Mode::Auto;
-    for raw in text.lines() {
+
+    #[allow(clippy::many_single_char_names)]
+    pub(crate) fn observe_line(&mut self, raw: &str) {
         let line = raw.trim_end_matches('\r');
         let t = line.trim();
         if t.is_empty() {
-            continue;
+            return;
         }
-        match mode {
-            Mode::Auto if t.eq_ignore_ascii_case("[header]") => {
-                mode = Mode::GsgtMeta;
+        match self.mode {
+            VoteMode::Abandoned => {}
+            VoteMode::Auto if t.eq_ignore_ascii_case("[header]") => {
+                self.mode = VoteMode::GsgtMeta;
             }
-            Mode::GsgtMeta => {
+            VoteMode::GsgtMeta => {
                 if t.eq_ignore_ascii_case("[data]") {
-                    mode = Mode::GsgtHdr;
+                    self.mode = VoteMode::GsgtHdr;
                 }
             }
-            Mode::GsgtHdr => {
+            VoteMode::GsgtHdr => {
                 let norm = |s: &str| s.trim().to_ascii_lowercase().replace([' ', '-', '_'], "");
                 let h: Vec<String> = line.split('\t').map(norm).collect();
                 let idx = |w: &str| h.iter().position(|x| x == w);
-                match (
+                self.mode = match (
                     idx("snpname"),
                     idx("chr"),
                     idx("position"),
@@ -234,19 +269,19 @@ pub(crate) fn assembly_from_text_bytes(bytes: &[u8]) -> Option<Assembly> {
                     idx("allele2plus"),
                 ) {
                     (Some(s), Some(c), Some(p), Some(a1), Some(a2)) => {
-                        mode = Mode::GsgtBody(s, c, p, a1, a2);
+                        VoteMode::GsgtBody(s, c, p, a1, a2)
                     }
-                    _ => return None,
-                }
+                    _ => VoteMode::Abandoned,
+                };
             }
-            Mode::GsgtBody(s, c, p, a1, a2) => {
+            VoteMode::GsgtBody(s, c, p, a1, a2) => {
                 let f: Vec<&str> = line.split('\t').collect();
                 if f.len() <= a2.max(p).max(c).max(s) {
-                    continue;
+                    return;
                 }
                 if let Ok(pos) = f[p].trim().parse::<i64>() {
                     let rsid = extract_rs(f[s]);
-                    scorer.observe(
+                    self.scorer.observe(
                         rsid.as_deref().unwrap_or(""),
                         f[c].trim(),
                         pos,
@@ -254,52 +289,68 @@ pub(crate) fn assembly_from_text_bytes(bytes: &[u8]) -> Option<Assembly> {
                     );
                 }
             }
-            Mode::Vcf => {
+            VoteMode::Vcf => {
                 let f: Vec<&str> = t.split('\t').collect();
                 if f.len() >= 5
                     && let Ok(pos) = f[1].trim().parse::<i64>()
                 {
                     let rsid = if f[2].starts_with("rs") { f[2] } else { "" };
-                    scorer.observe(rsid, f[0], pos, &format!("{}{}", f[3], f[4]));
-                }
-            }
-            Mode::Auto => {
-                if t.starts_with("##") {
-                    continue;
-                }
-                if t.starts_with("#CHROM\t") {
-                    mode = Mode::Vcf;
-                    continue;
-                }
-                if t.starts_with('#') || t.starts_with("//") {
-                    continue;
-                }
-                let f: Vec<&str> = if line.contains('\t') {
-                    line.split('\t').collect()
-                } else {
-                    line.split(',').collect()
-                };
-                if f.len() < 3 {
-                    continue;
-                }
-                let c0 = f[0].trim().trim_matches('"').to_ascii_lowercase();
-                if matches!(c0.as_str(), "rsid" | "rs id" | "snp" | "name" | "snpname") {
-                    continue; // column header row
-                }
-                if let Ok(pos) = f[2].trim().trim_matches('"').parse::<i64>() {
-                    let id = f[0].trim().trim_matches('"');
-                    let rsid = if id.starts_with("rs") || id.starts_with("RS") {
-                        id
-                    } else {
-                        ""
-                    };
-                    let gt: String = f[3..].iter().map(|x| x.trim().trim_matches('"')).collect();
-                    scorer.observe(rsid, f[1].trim().trim_matches('"'), pos, &gt);
+                    self.scorer
+                        .observe(rsid, f[0], pos, &format!("{}{}", f[3], f[4]));
                 }
             }
+            VoteMode::Auto => self.observe_flat_line(line, t),
+        }
+    }
+
+    fn observe_flat_line(&mut self, line: &str, t: &str) {
+        if t.starts_with("##") {
+            return;
+        }
+        if t.starts_with("#CHROM\t") {
+            self.mode = VoteMode::Vcf;
+            return;
+        }
+        if t.starts_with('#') || t.starts_with("//") {
+            return;
+        }
+        let f: Vec<&str> = if line.contains('\t') {
+            line.split('\t').collect()
+        } else {
+            line.split(',').collect()
+        };
+        if f.len() < 3 {
+            return;
+        }
+        let c0 = f[0].trim().trim_matches('"').to_ascii_lowercase();
+        if matches!(c0.as_str(), "rsid" | "rs id" | "snp" | "name" | "snpname") {
+            return; // column header row
+        }
+        if let Ok(pos) = f[2].trim().trim_matches('"').parse::<i64>() {
+            let id = f[0].trim().trim_matches('"');
+            let rsid = if id.starts_with("rs") || id.starts_with("RS") {
+                id
+            } else {
+                ""
+            };
+            let gt: String = f[3..].iter().map(|x| x.trim().trim_matches('"')).collect();
+            self.scorer
+                .observe(rsid, f[1].trim().trim_matches('"'), pos, &gt);
+        }
+    }
+
+    /// True once more lines cannot change `decide`: the vote was abandoned,
+    /// or it is unanimous over at least twice the minimum anchor count.
+    pub(crate) fn is_settled(&self) -> bool {
+        matches!(self.mode, VoteMode::Abandoned) || self.scorer.is_settled()
+    }
+
+    pub(crate) fn decide(&self) -> Option<Assembly> {
+        if matches!(self.mode, VoteMode::Abandoned) {
+            return None;
         }
+        self.scorer.decide()
     }
-    scorer.decide()
 }
 
 fn extract_rs(name: &str) -> Option<String> {
@@ -384,4 +435,44 @@ mod tests {
         }
         assert_eq!(s.decide(), Some(Assembly::Grch37));
     }
+
+    #[test]
+    fn line_voter_settles_once_the_vote_is_unanimous() {
+        let mut voter = AssemblyLineVoter::new();
+        voter.observe_line("rsid\tchromosome\tposition\tgenotype\r");
+        for (rsid, chrom, _p36, p37, _p38, alleles) in &ANCHORS[..7] {
+            voter.observe_line(&format!("{rsid}\t{chrom}\t{p37}\t{alleles}"));
+            assert!(!voter.is_settled());
+        }
+        let (rsid, chrom, _p36, p37, _p38, alleles) = ANCHORS[7];
+        voter.observe_line(&format!("{rsid},{chrom},{p37},{alleles}"));
+        assert!(voter.is_settled());
+        assert_eq!(voter.decide(), Some(Assembly::Grch37));
+    }
+
+    #[test]
+    fn line_voter_reads_vcf_rows_and_abandons_unusable_gsgt() {
+        let mut vcf = AssemblyLineVoter::new();
+        vcf.observe_line("##fileformat=VCFv4.2");
+        vcf.observe_line("#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tS1");
+        for (_rsid, chrom, _p36, _p37, p38, alleles) in ANCHORS {
+            vcf.observe_line(&format!(
+                "chr{chrom}\t{p38}\t.\t{alleles}\t.\t.\tPASS\t.\tGT\t0/1"
+            ));
+        }
+        assert_eq!(vcf.decide(), Some(Assembly::Grch38));
+
+        let mut gsgt = AssemblyLineVoter::new();
+        for line in [
+            "[Header]",
+            "GSGT Version\t2.0",
+            "[Data]",
+            "SNP Name\tSample ID",
+        ] {
+            gsgt.observe_line(line);
+        }
+        assert!(gsgt.is_settled());
+        gsgt.observe_line("rs1801133\t1\t11856378\tA\tG");
+        assert_eq!(gsgt.decide(), None);
+    }
 }
@@ -9,55 +9,44 @@ use flate2::read::MultiGzDecoder;
 use noodles::bgzf;
 use zip::ZipArchive;
 
-const MAX_ZIP_SAMPLE_ENTRY_BYTES: u64 = 128 * 1024 * 1024;
+/// Rows read up front for format, source and metadata detection.
+const SAMPLE_LINES: usize = 64;
 
-pub(crate) fn read_plain_sample_lines_from_bytes(
-    lower_name: &str,
-    bytes: &[u8],
-) -> Result<Vec<String>, RuntimeError> {
+/// Line reader over textual input named `lower_name`: BGZF for `.vcf.gz`,
+/// multi-member gzip for other gzip text, otherwise the bytes as they are.
+pub(crate) fn text_reader<'a, R: Read + 'a>(lower_name: &str, reader: R) -> Box<dyn BufRead + 'a> {
     if lower_name.ends_with(".vcf.gz") {
-        return read_sample_lines_from_reader(BufReader::new(bgzf::io::Reader::new(Cursor::new(
-            bytes,
-        ))));
+        return Box::new(BufReader::new(bgzf::io::Reader::new(reader)));
     }
     if is_gzip_text_name(lower_name) {
-        return read_sample_lines_from_reader(BufReader::new(MultiGzDecoder::new(Cursor::new(
-            bytes,
-        ))));
+        return Box::new(BufReader::new(MultiGzDecoder::new(reader)));
     }
-    read_sample_lines_from_reader(BufReader::new(Cursor::new(bytes)))
+    Box::new(BufReader::new(reader))
+}
+
+pub(crate) fn open_plain_text(path: &Path) -> Result<Box<dyn BufRead>, RuntimeError> {
+    let lower = path.to_string_lossy().to_ascii_lowercase();
+    let file = File::open(path)
+        .map_err(|err| RuntimeError::Io(format!("failed to open {}: {err}", path.display())))?;
+    Ok(text_reader(&lower, file))
 }
 
-pub(crate) fn read_zip_sample_lines_from_bytes(
+/// Run `read` over the decompressed text of `selected_entry`. The entry is
+/// streamed, so compressed members are never buffered whole.
+pub(crate) fn with_zip_text_entry_from_bytes<T>(
     bytes: &[u8],
     selected_entry: &str,
-) -> Result<Vec<String>, RuntimeError> {
+    read: impl FnOnce(&mut dyn BufRead) -> Result<T, RuntimeError>,
+) -> Result<T, RuntimeError> {
     let mut archive = ZipArchive::new(Cursor::new(bytes))
         .map_err(|err| RuntimeError::Io(format!("failed to read zip bytes: {err}")))?;
-    let mut entry = archive.by_name(selected_entry).map_err(|err| {
+    let entry = archive.by_name(selected_entry).map_err(|err| {
         RuntimeError::Io(format!(
             "failed to open zip entry {selected_entry} from bytes: {err}"
         ))
     })?;
-    if selected_entry.to_ascii_lowercase().ends_with(".vcf.gz") {
-        let inner = read_entry_limited(
-            &mut entry,
-            MAX_ZIP_SAMPLE_ENTRY_BYTES,
-            &format!("compressed zip entry {selected_entry}"),
-        )?;
-        let reader = bgzf::io::Reader::new(Cursor::new(inner));
-        return read_sample_lines_from_reader(BufReader::new(reader));
-    }
-    if is_gzip_text_name(&selected_entry.to_ascii_lowercase()) {
-        let inner = read_entry_limited(
-            &mut entry,
-            MAX_ZIP_SAMPLE_ENTRY_BYTES,
-            &format!("compressed zip entry {selected_entry}"),
-        )?;
-        let reader = MultiGzDecoder::new(Cursor::new(inner));
-        return read_sample_lines_from_reader(BufReader::new(reader));
-    }
-    read_sample_lines_from_reader(BufReader::new(entry))
+    let mut reader = text_reader(&selected_entry.to_ascii_lowercase(), entry);
+    read(&mut *reader)
 }
 
 pub(crate) fn select_zip_entry_from_bytes(bytes: &[u8]) -> Result<String, RuntimeError> {
@@ -97,60 +86,23 @@ pub(crate) fn select_zip_entry_from_bytes(bytes: &[u8]) -> Result<String, Runtim
     })
 }
 
-pub(crate) fn read_plain_sample_lines(path: &Path) -> Result<Vec<String>, RuntimeError> {
-    let lower = path.to_string_lossy().to_ascii_lowercase();
-    let file = File::open(path)
-        .map_err(|err| RuntimeError::Io(format!("failed to open {}: {err}", path.display())))?;
-    if lower.ends_with(".vcf.gz") {
-        return read_sample_lines_from_reader(BufReader::new(bgzf::io::Reader::new(file)));
-    }
-    if is_gzip_text_name(&lower) {
-        return read_sample_lines_from_reader(BufReader::new(MultiGzDecoder::new(file)));
-    }
-    read_sample_lines_from_reader(BufReader::new(file))
-}
-
-pub(crate) fn read_zip_sample_lines(
+pub(crate) fn with_zip_text_entry<T>(
     path: &Path,
     selected_entry: &str,
-) -> Result<Vec<String>, RuntimeError> {
+    read: impl FnOnce(&mut dyn BufRead) -> Result<T, RuntimeError>,
+) -> Result<T, RuntimeError> {
     let file = File::open(path)
         .map_err(|err| RuntimeError::Io(format!("failed to open zip {}: {err}", path.display())))?;
     let mut archive = ZipArchive::new(file)
         .map_err(|err| RuntimeError::Io(format!("failed to read zip {}: {err}", path.display())))?;
-    let mut entry = archive.by_name(selected_entry).map_err(|err| {
+    let entry = archive.by_name(selected_entry).map_err(|err| {
         RuntimeError::Io(format!(
             "failed to open zip entry {selected_entry} in {}: {err}",
             path.display()
         ))
     })?;
-
-    if selected_entry.to_ascii_lowercase().ends_with(".vcf.gz") {
-        let bytes = read_entry_limited(
-            &mut entry,
-            MAX_ZIP_SAMPLE_ENTRY_BYTES,
-            &format!(
-                "compressed zip entry {selected_entry} in {}",
-                path.display()
-            ),
-        )?;
-        let reader = bgzf::io::Reader::new(Cursor::new(bytes));
-        return read_sample_lines_from_reader(BufReader::new(reader));
-    }
-    if is_gzip_text_name(&selected_entry.to_ascii_lowercase()) {
-        let bytes = read_entry_limited(
-            &mut entry,
-            MAX_ZIP_SAMPLE_ENTRY_BYTES,
-            &format!(
-                "compressed zip entry {selected_entry} in {}",
-                path.display()
-            ),
-        )?;
-        let reader = MultiGzDecoder::new(Cursor::new(bytes));
-        return read_sample_lines_from_reader(BufReader::new(reader));
-    }
-
-    read_sample_lines_from_reader(BufReader::new(entry))
+    let mut reader = text_reader(&selected_entry.to_ascii_lowercase(), entry);
+    read(&mut *reader)
 }
 
 fn is_gzip_text_name(lower_name: &str) -> bool {
@@ -164,28 +116,11 @@ fn is_gzip_text_name(lower_name: &str) -> bool {
         || (lower_name.ends_with(".bgz") && !lower_name.ends_with(".vcf.bgz"))
 }
 
-pub(crate) fn read_entry_limited<R: Read>(
-    reader: &mut R,
-    max_bytes: u64,
-    label: &str,
-) -> Result<Vec<u8>, RuntimeError> {
-    let mut bytes = Vec::new();
-    reader
-        .take(max_bytes.saturating_add(1))
-        .read_to_end(&mut bytes)
-        .map_err(|err| RuntimeError::Io(format!("failed to read {label}: {err}")))?;
-    if u64::try_from(bytes.len()).unwrap_or(u64::MAX) > max_bytes {
-        return Err(RuntimeError::InvalidArguments(format!(
-            "{label} exceeds decompressed limit of {max_bytes} bytes"
-        )));
-    }
-    Ok(bytes)
-}
-
-fn read_sample_lines_from_reader<R: BufRead>(mut reader: R) -> Result<Vec<String>, RuntimeError> {
+/// The first rows of `reader`, leaving it positioned after them.
+pub(crate) fn read_sample_lines(reader: &mut dyn BufRead) -> Result<Vec<String>, RuntimeError> {
     let mut out = Vec::new();
     let mut buf = String::new();
-    for _ in 0..64 {
+    for _ in 0..SAMPLE_LINES {
         buf.clear();
         let bytes = reader
             .read_line(&mut buf)
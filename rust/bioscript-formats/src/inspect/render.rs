@@ -8,73 +8,91 @@ use super::{
 impl FileInspection {
     #[must_use]
     pub fn render_text(&self) -> String {
-        let mut lines = Vec::new();
-        lines.push(format!("path\t{}", self.path.display()));
-        lines.push(format!("container\t{}", render_container(self.container)));
-        lines.push(format!("kind\t{}", render_kind(self.detected_kind)));
-        lines.push(format!(
-            "confidence\t{}",
-            render_confidence(self.confidence)
-        ));
-        lines.push(format!("assembly\t{}", render_assembly(self.assembly)));
-        lines.push(format!("phased\t{}", render_bool(self.phased)));
-        lines.push(format!(
-            "selected_entry\t{}",
-            self.selected_entry.as_deref().unwrap_or("")
-        ));
-        lines.push(format!("has_index\t{}", render_bool(self.has_index)));
-        lines.push(format!(
-            "index_path\t{}",
-            self.index_path
-                .as_ref()
-                .map(|path| path.display().to_string())
-                .unwrap_or_default()
-        ));
-        lines.push(format!(
-            "reference_matches\t{}",
-            render_bool(self.reference_matches)
-        ));
+        self.render_fields()
+            .into_iter()
+            .map(|(key, value)| format!("{key}\t{value}"))
+            .collect::<Vec<_>>()
+            .join("\n")
+    }
+
+    /// The `render_text` rows as `(key, value)` pairs, in output order.
+    #[must_use]
+    pub fn render_fields(&self) -> Vec<(&'static str, String)> {
+        let mut fields = vec![
+            ("path", self.path.display().to_string()),
+            ("container", render_container(self.container).to_owned()),
+            ("kind", render_kind(self.detected_kind).to_owned()),
+            ("confidence", render_confidence(self.confidence).to_owned()),
+            ("assembly", render_assembly(self.assembly).to_owned()),
+            ("phased", render_bool(self.phased).to_owned()),
+            (
+                "selected_entry",
+                self.selected_entry.clone().unwrap_or_default(),
+            ),
+            ("has_index", render_bool(self.has_index).to_owned()),
+            (
+                "index_path",
+                self.index_path
+                    .as_ref()
+                    .map(|path| path.display().to_string())
+                    .unwrap_or_default(),
+            ),
+            (
+                "reference_matches",
+                render_bool(self.reference_matches).to_owned(),
+            ),
+        ];
         if let Some(inferred) = &self.inferred_sex {
-            lines.push(format!(
-                "inferred_sex\t{}",
-                render_inferred_sex(inferred.sex)
-            ));
-            lines.push(format!(
-                "sex_confidence\t{}",
-                render_sex_confidence(inferred.confidence)
-            ));
-            lines.push(format!("sex_method\t{}", inferred.method));
-            lines.push(format!("sex_evidence\t{}", inferred.evidence.join(" | ")));
+            fields.extend([
+                ("inferred_sex", render_inferred_sex(inferred.sex).to_owned()),
+                (
+                    "sex_confidence",
+                    render_sex_confidence(inferred.confidence).to_owned(),
+                ),
+                ("sex_method", inferred.method.clone()),
+                ("sex_evidence", inferred.evidence.join(" | ")),
+            ]);
         } else {
-            lines.push("inferred_sex\t".to_owned());
-            lines.push("sex_confidence\t".to_owned());
-            lines.push("sex_method\t".to_owned());
-            lines.push("sex_evidence\t".to_owned());
+            fields.extend(
+                [
+                    "inferred_sex",
+                    "sex_confidence",
+                    "sex_method",
+                    "sex_evidence",
+                ]
+                .map(|key| (key, String::new())),
+            );
         }
         if let Some(source) = &self.source {
-            lines.push(format!(
-                "vendor\t{}",
-                source.vendor.as_deref().unwrap_or_default()
-            ));
-            lines.push(format!(
-                "platform_version\t{}",
-                source.platform_version.as_deref().unwrap_or_default()
-            ));
-            lines.push(format!(
-                "source_confidence\t{}",
-                render_confidence(source.confidence)
-            ));
-            lines.push(format!("source_evidence\t{}", source.evidence.join(" | ")));
+            fields.extend([
+                ("vendor", source.vendor.clone().unwrap_or_default()),
+                (
+                    "platform_version",
+                    source.platform_version.clone().unwrap_or_default(),
+                ),
+                (
+                    "source_confidence",
+                    render_confidence(source.confidence).to_owned(),
+                ),
+                ("source_evidence", source.evidence.join(" | ")),
+            ]);
         } else {
-            lines.push("vendor\t".to_owned());
-            lines.push("platform_version\t".to_owned());
-            lines.push("source_confidence\t".to_owned());
-            lines.push("source_evidence\t".to_owned());
+            fields.extend(
+                [
+                    "vendor",
+                    "platform_version",
+                    "source_confidence",
+                    "source_evidence",
+                ]
+                .map(|key| (key, String::new())),
+            );
         }
-        lines.push(format!("evidence\t{}", self.evidence.join(" | ")));
-        lines.push(format!("warnings\t{}", self.warnings.join(" | ")));
-        lines.push(format!("duration_ms\t{}", self.duration_ms));
-        lines.join("\n")
+        fields.extend([
+            ("evidence", self.evidence.join(" | ")),
+            ("warnings", self.warnings.join(" | ")),
+            ("duration_ms", self.duration_ms.to_string()),
+        ]);
+        fields
     }
 }
 
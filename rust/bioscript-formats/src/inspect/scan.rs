@@ -0,0 +1,80 @@
+use std::io::BufRead;
+
+use bioscript_core::{Assembly, RuntimeError};
+
+use super::{DetectedKind, SexInference, assembly_anchors::AssemblyLineVoter, sex::SexAccumulator};
+
+/// Row-level results of a textual inspection.
+#[derive(Debug, Default)]
+pub(crate) struct TextScan {
+    pub(crate) assembly: Option<Assembly>,
+    pub(crate) inferred_sex: Option<SexInference>,
+}
+
+/// Finish a textual inspection on the stream the sample came from.
+///
+/// `sample_lines` are the first rows of `reader`, already consumed for format
+/// detection; they are fed to the detectors before the rest of the stream.
+/// The rsID/locus anchor vote runs only when `vote_assembly` is set and
+/// stops once it is settled. Sex inference keeps reading to the end of the
+/// stream, since X and Y rows sort last in most exports. With neither
+/// detector active nothing past the sample is read.
+pub(crate) fn scan_text_rows(
+    reader: &mut dyn BufRead,
+    sample_lines: &[String],
+    kind: DetectedKind,
+    vote_assembly: bool,
+    detect_sex: bool,
+) -> Result<TextScan, RuntimeError> {
+    let mut detectors = RowDetectors {
+        voter: (vote_assembly && matches!(kind, DetectedKind::GenotypeText | DetectedKind::Vcf))
+            .then(AssemblyLineVoter::new),
+        sex: detect_sex.then(|| SexAccumulator::new(sample_lines, kind)),
+    };
+    for line in sample_lines {
+        if detectors.is_done() {
+            break;
+        }
+        detectors.observe(line)?;
+    }
+    let mut buf = Vec::new();
+    while !detectors.is_done() {
+        buf.clear();
+        // Treat a read error mid-stream (e.g. a truncated bgzf head when the
+        // wasm caller only loaded the first N MiB) as end of data and
+        // classify what was read.
+        if reader.read_until(b'\n', &mut buf).unwrap_or_default() == 0 {
+            break;
+        }
+        detectors.observe(String::from_utf8_lossy(&buf).trim_end_matches(['\n', '\r']))?;
+    }
+
+    Ok(TextScan {
+        assembly: detectors.voter.as_ref().and_then(AssemblyLineVoter::decide),
+        inferred_sex: detectors.sex.map(SexAccumulator::finish),
+    })
+}
+
+struct RowDetectors {
+    voter: Option<AssemblyLineVoter>,
+    sex: Option<SexAccumulator>,
+}
+
+impl RowDetectors {
+    fn observe(&mut self, line: &str) -> Result<(), RuntimeError> {
+        if let Some(voter) = self.voter.as_mut().filter(|voter| !voter.is_settled()) {
+            voter.observe_line(line);
+        }
+        if let Some(sex) = self.sex.as_mut() {
+            sex.observe(line)?;
+        }
+        Ok(())
+    }
+
+    fn is_done(&self) -> bool {
+        self.voter
+            .as_ref()
+            .is_none_or(AssemblyLineVoter::is_settled)
+            && self.sex.as_ref().is_none_or(SexAccumulator::is_full)
+    }
+}
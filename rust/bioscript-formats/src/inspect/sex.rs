@@ -1,11 +1,7 @@
-use std::{
-    io::{BufRead, BufReader, Cursor, Read},
-    path::Path,
-};
+use std::io::{BufRead, BufReader, Read};
 
 use bioscript_core::RuntimeError;
 use flate2::read::MultiGzDecoder;
-use zip::ZipArchive;
 
 use crate::genotype::{
     DelimitedColumnIndexes, Delimiter, GsgtParser, detect_delimiter, lines_look_like_gsgt,
@@ -15,12 +11,13 @@ use crate::genotype::{
 use super::{DetectedKind, InspectOptions};
 
 mod alignment_depth;
+mod alignment_index;
 mod calls;
 mod classify;
 
 pub use alignment_depth::infer_sex_from_alignment_reader;
 
-pub(crate) use alignment_depth::infer_sex_from_alignment_path;
+pub(crate) use alignment_index::infer_sex_from_alignment;
 use calls::{
     genotype_allele_count, is_called_genotype_text, is_called_vcf_gt, is_genotype_text_het,
     is_non_par_x, is_vcf_gt_het, normalize_chrom, vcf_gt_allele_count,
@@ -28,7 +25,8 @@ use calls::{
 use classify::{classify_stats, supports_sex_detection, unsupported_sex_inference};
 
 const MAX_SEX_DETECTION_LINES: usize = 50_000_000;
-const MAX_ZIP_ENTRY_BYTES: u64 = 256 * 1024 * 1024;
+/// Leading lines used to fix the delimiter and GSGT layout.
+const SEX_PROBE_LINES: usize = 64;
 const MALE_SPECIFIC_Y_MARKERS: &[&str] = &[
     "rs11575897",
     "rs2534636",
@@ -87,50 +85,6 @@ struct SexStats {
     x_het_gt_sites: usize,
 }
 
-pub(crate) fn infer_sex_from_path(
-    path: &Path,
-    kind: DetectedKind,
-) -> Result<SexInference, RuntimeError> {
-    if !supports_sex_detection(kind) {
-        return Ok(unsupported_sex_inference());
-    }
-    let lower = path.to_string_lossy().to_ascii_lowercase();
-    if lower.ends_with(".zip") {
-        let file = std::fs::File::open(path)
-            .map_err(|err| RuntimeError::Io(format!("failed to open {}: {err}", path.display())))?;
-        let mut archive = ZipArchive::new(file).map_err(|err| {
-            RuntimeError::Io(format!("failed to read zip {}: {err}", path.display()))
-        })?;
-        let entry_name = select_sex_detection_zip_entry(&mut archive)?;
-        let mut entry = archive.by_name(&entry_name).map_err(|err| {
-            RuntimeError::Io(format!(
-                "failed to open zip entry {entry_name} in {}: {err}",
-                path.display()
-            ))
-        })?;
-        let mut bytes = Vec::new();
-        std::io::Read::by_ref(&mut entry)
-            .take(MAX_ZIP_ENTRY_BYTES.saturating_add(1))
-            .read_to_end(&mut bytes)
-            .map_err(|err| {
-                RuntimeError::Io(format!("failed to read zip entry {entry_name}: {err}"))
-            })?;
-        if u64::try_from(bytes.len()).unwrap_or(u64::MAX) > MAX_ZIP_ENTRY_BYTES {
-            return Err(RuntimeError::InvalidArguments(format!(
-                "zip entry {entry_name} exceeds sex detection limit of {MAX_ZIP_ENTRY_BYTES} bytes"
-            )));
-        }
-        return infer_sex_from_bytes(&entry_name, &bytes, kind);
-    }
-
-    let file = std::fs::File::open(path)
-        .map_err(|err| RuntimeError::Io(format!("failed to open {}: {err}", path.display())))?;
-    if lower.ends_with(".vcf.gz") {
-        return infer_sex_from_reader(BufReader::new(MultiGzDecoder::new(file)), kind);
-    }
-    infer_sex_from_reader(BufReader::new(file), kind)
-}
-
 pub fn infer_sex_from_named_reader<R: Read>(
     name: &str,
     reader: R,
@@ -145,140 +99,105 @@ pub fn infer_sex_from_named_reader<R: Read>(
     infer_sex_from_reader(BufReader::new(reader), kind)
 }
 
-pub(crate) fn infer_sex_from_bytes(
-    name: &str,
-    bytes: &[u8],
-    kind: DetectedKind,
-) -> Result<SexInference, RuntimeError> {
-    if !supports_sex_detection(kind) {
-        return Ok(unsupported_sex_inference());
-    }
-    infer_sex_from_named_reader(name, Cursor::new(bytes), kind)
-}
-
-pub(crate) fn infer_sex_from_zip_bytes(
-    bytes: &[u8],
-    selected_entry: &str,
-    kind: DetectedKind,
-) -> Result<SexInference, RuntimeError> {
-    let mut archive = ZipArchive::new(Cursor::new(bytes))
-        .map_err(|err| RuntimeError::Io(format!("failed to read zip bytes: {err}")))?;
-    let mut entry = archive.by_name(selected_entry).map_err(|err| {
-        RuntimeError::Io(format!(
-            "failed to open zip entry {selected_entry} from bytes: {err}"
-        ))
-    })?;
-    let mut entry_bytes = Vec::new();
-    Read::by_ref(&mut entry)
-        .take(MAX_ZIP_ENTRY_BYTES.saturating_add(1))
-        .read_to_end(&mut entry_bytes)
-        .map_err(|err| {
-            RuntimeError::Io(format!("failed to read zip entry {selected_entry}: {err}"))
-        })?;
-    if u64::try_from(entry_bytes.len()).unwrap_or(u64::MAX) > MAX_ZIP_ENTRY_BYTES {
-        return Err(RuntimeError::InvalidArguments(format!(
-            "zip entry {selected_entry} exceeds sex detection limit of {MAX_ZIP_ENTRY_BYTES} bytes"
-        )));
-    }
-    infer_sex_from_bytes(selected_entry, &entry_bytes, kind)
-}
-
 pub fn infer_sex_from_text_lines(
     lines: &[String],
     kind: DetectedKind,
 ) -> Result<SexInference, RuntimeError> {
-    let mut stats = SexStats::default();
-    let delimiter = detect_delimiter(lines);
-    let is_gsgt = lines_look_like_gsgt(lines);
-    let mut gsgt = None;
-    let mut column_indexes = None;
-    let mut comment_header = None;
+    let mut accumulator = SexAccumulator::new(lines, kind);
     for line in lines {
-        update_stats_from_line(
-            &mut stats,
-            line,
-            kind,
-            delimiter,
-            is_gsgt,
-            &mut gsgt,
-            &mut column_indexes,
-            &mut comment_header,
-        )?;
-    }
-    Ok(classify_stats(&stats, kind))
+        accumulator.observe(line)?;
+    }
+    Ok(accumulator.finish())
 }
 
 fn infer_sex_from_reader<R: BufRead>(
     mut reader: R,
     kind: DetectedKind,
 ) -> Result<SexInference, RuntimeError> {
-    let mut stats = SexStats::default();
     let mut probe_lines = Vec::new();
     let mut line = String::new();
     // Treat any I/O error mid-stream (e.g. truncated bgzf head when the
     // wasm caller only loaded the first N MiB) as end-of-data: classify
     // whatever we got rather than failing the whole inspection. The CLI
     // path streams the full file so this is effectively unchanged for it.
-    for _ in 0..64 {
+    while probe_lines.len() < SEX_PROBE_LINES {
         line.clear();
-        let bytes = reader.read_line(&mut line).unwrap_or_default();
-        if bytes == 0 {
-            let delimiter = detect_delimiter(&probe_lines);
-            let is_gsgt = lines_look_like_gsgt(&probe_lines);
-            let mut gsgt = None;
-            let mut column_indexes = None;
-            let mut comment_header = None;
-            for probe_line in &probe_lines {
-                update_stats_from_line(
-                    &mut stats,
-                    probe_line,
-                    kind,
-                    delimiter,
-                    is_gsgt,
-                    &mut gsgt,
-                    &mut column_indexes,
-                    &mut comment_header,
-                )?;
-            }
-            return Ok(classify_stats(&stats, kind));
+        if reader.read_line(&mut line).unwrap_or_default() == 0 {
+            break;
         }
         probe_lines.push(line.trim_end_matches(['\n', '\r']).to_owned());
     }
-    let delimiter = detect_delimiter(&probe_lines);
-    let is_gsgt = lines_look_like_gsgt(&probe_lines);
-    let mut gsgt = None;
-    let mut column_indexes = None;
-    let mut comment_header = None;
+    let mut accumulator = SexAccumulator::new(&probe_lines, kind);
     for probe_line in &probe_lines {
-        update_stats_from_line(
-            &mut stats,
-            probe_line,
-            kind,
-            delimiter,
-            is_gsgt,
-            &mut gsgt,
-            &mut column_indexes,
-            &mut comment_header,
-        )?;
-    }
-    for _ in probe_lines.len()..MAX_SEX_DETECTION_LINES {
+        accumulator.observe(probe_line)?;
+    }
+    if probe_lines.len() < SEX_PROBE_LINES {
+        return Ok(accumulator.finish());
+    }
+    while !accumulator.is_full() {
         line.clear();
-        let bytes = reader.read_line(&mut line).unwrap_or_default();
-        if bytes == 0 {
+        if reader.read_line(&mut line).unwrap_or_default() == 0 {
             break;
         }
-        update_stats_from_line(
-            &mut stats,
-            line.trim_end_matches(['\n', '\r']),
+        accumulator.observe(line.trim_end_matches(['\n', '\r']))?;
+    }
+    Ok(accumulator.finish())
+}
+
+/// Streaming sex statistics for one genotype text or VCF input. The
+/// delimiter and GSGT layout are fixed from the probe lines, which callers
+/// then observe as the first rows of the stream.
+pub(crate) struct SexAccumulator {
+    kind: DetectedKind,
+    stats: SexStats,
+    delimiter: Delimiter,
+    is_gsgt: bool,
+    gsgt: Option<GsgtParser>,
+    column_indexes: Option<DelimitedColumnIndexes>,
+    comment_header: Option<Vec<String>>,
+    lines: usize,
+}
+
+impl SexAccumulator {
+    pub(crate) fn new(probe_lines: &[String], kind: DetectedKind) -> Self {
+        Self {
             kind,
-            delimiter,
-            is_gsgt,
-            &mut gsgt,
-            &mut column_indexes,
-            &mut comment_header,
-        )?;
-    }
-    Ok(classify_stats(&stats, kind))
+            stats: SexStats::default(),
+            delimiter: detect_delimiter(probe_lines),
+            is_gsgt: lines_look_like_gsgt(probe_lines),
+            gsgt: None,
+            column_indexes: None,
+            comment_header: None,
+            lines: 0,
+        }
+    }
+
+    pub(crate) fn observe(&mut self, line: &str) -> Result<(), RuntimeError> {
+        if self.is_full() {
+            return Ok(());
+        }
+        self.lines += 1;
+        update_stats_from_line(
+            &mut self.stats,
+            line,
+            self.kind,
+            self.delimiter,
+            self.is_gsgt,
+            &mut self.gsgt,
+            &mut self.column_indexes,
+            &mut self.comment_header,
+        )
+    }
+
+    /// Further lines cannot change the result: the kind carries no textual
+    /// sex signal or the line budget is spent.
+    pub(crate) fn is_full(&self) -> bool {
+        !supports_sex_detection(self.kind) || self.lines >= MAX_SEX_DETECTION_LINES
+    }
+
+    pub(crate) fn finish(self) -> SexInference {
+        classify_stats(&self.stats, self.kind)
+    }
 }
 
 #[allow(clippy::too_many_arguments)]
@@ -413,51 +332,10 @@ fn update_vcf_stats(stats: &mut SexStats, line: &str) {
     }
 }
 
-fn select_sex_detection_zip_entry<R: std::io::Read + std::io::Seek>(
-    archive: &mut ZipArchive<R>,
-) -> Result<String, RuntimeError> {
-    for idx in 0..archive.len() {
-        let entry = archive.by_index(idx).map_err(|err| {
-            RuntimeError::Io(format!("failed to inspect zip for sex detection: {err}"))
-        })?;
-        if entry.is_dir() || entry.name().starts_with("__MACOSX/") {
-            continue;
-        }
-        let lower = entry.name().to_ascii_lowercase();
-        if lower.ends_with(".txt")
-            || lower.ends_with(".tsv")
-            || lower.ends_with(".csv")
-            || lower.ends_with(".vcf")
-            || lower.ends_with(".vcf.gz")
-        {
-            return Ok(entry.name().to_owned());
-        }
-    }
-    Err(RuntimeError::Unsupported(
-        "zip archive does not contain a supported sex detection input".to_owned(),
-    ))
-}
-
 #[cfg(test)]
 mod tests {
     use super::*;
     use std::fmt::Write as _;
-    use std::io::Write as _;
-
-    fn zip_bytes(entries: &[(&str, &str)]) -> Vec<u8> {
-        let cursor = Cursor::new(Vec::new());
-        let mut writer = zip::ZipWriter::new(cursor);
-        let options = zip::write::SimpleFileOptions::default();
-        for (name, body) in entries {
-            if name.ends_with('/') {
-                writer.add_directory(*name, options).unwrap();
-            } else {
-                writer.start_file(*name, options).unwrap();
-                writer.write_all(body.as_bytes()).unwrap();
-            }
-        }
-        writer.finish().unwrap().into_inner()
-    }
 
     #[test]
     fn y_fingerprint_detects_male_and_female_text_exports() {
@@ -660,54 +538,21 @@ mod tests {
     }
 
     #[test]
-    fn sex_inference_bytes_and_zip_paths_cover_entry_selection_and_unsupported_kinds() {
+    fn sex_inference_named_reader_covers_unsupported_kinds() {
         let text = "rsid\tchromosome\tposition\tgenotype\nrs11575897\tY\t1\tG\n";
-        let unsupported =
-            infer_sex_from_bytes("sample.txt", text.as_bytes(), DetectedKind::ReferenceFasta)
-                .unwrap();
+        let unsupported = infer_sex_from_named_reader(
+            "sample.txt",
+            text.as_bytes(),
+            DetectedKind::ReferenceFasta,
+        )
+        .unwrap();
         assert_eq!(unsupported.sex, InferredSex::Unknown);
         assert_eq!(unsupported.method, "unsupported_source_type");
 
         let result =
-            infer_sex_from_bytes("sample.txt", text.as_bytes(), DetectedKind::GenotypeText)
-                .unwrap();
-        assert_eq!(result.method, "snp_array_x_y_fingerprint");
-
-        let archive = zip_bytes(&[
-            ("__MACOSX/._sample.txt", "ignored"),
-            ("notes.md", "ignored"),
-            ("nested/sample.txt", text),
-        ]);
-        let result =
-            infer_sex_from_zip_bytes(&archive, "nested/sample.txt", DetectedKind::GenotypeText)
+            infer_sex_from_named_reader("sample.txt", text.as_bytes(), DetectedKind::GenotypeText)
                 .unwrap();
         assert_eq!(result.method, "snp_array_x_y_fingerprint");
-
-        let err = infer_sex_from_zip_bytes(&archive, "missing.txt", DetectedKind::GenotypeText)
-            .unwrap_err();
-        assert!(
-            err.to_string()
-                .contains("failed to open zip entry missing.txt")
-        );
-
-        let bad_zip =
-            infer_sex_from_zip_bytes(b"not a zip", "sample.txt", DetectedKind::GenotypeText)
-                .unwrap_err();
-        assert!(bad_zip.to_string().contains("failed to read zip bytes"));
-
-        let mut zip = ZipArchive::new(Cursor::new(archive)).unwrap();
-        assert_eq!(
-            select_sex_detection_zip_entry(&mut zip).unwrap(),
-            "nested/sample.txt"
-        );
-
-        let unsupported_zip = zip_bytes(&[("docs/readme.md", "ignored")]);
-        let mut zip = ZipArchive::new(Cursor::new(unsupported_zip)).unwrap();
-        let err = select_sex_detection_zip_entry(&mut zip).unwrap_err();
-        assert!(
-            err.to_string()
-                .contains("does not contain a supported sex detection input")
-        );
     }
 
     #[test]
@@ -728,7 +573,7 @@ mod tests {
         text.push_str("chrX\t155000000\t.\tC\tT\t.\tPASS\t.\tGT\t0/1\n");
 
         let result =
-            infer_sex_from_bytes("sample.vcf", text.as_bytes(), DetectedKind::Vcf).unwrap();
+            infer_sex_from_named_reader("sample.vcf", text.as_bytes(), DetectedKind::Vcf).unwrap();
         assert_eq!(result.sex, InferredSex::Female);
         assert!(
             result
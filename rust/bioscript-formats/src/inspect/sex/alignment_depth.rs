@@ -103,16 +103,8 @@ fn classify_alignment_stats(stats: &AlignmentSexStats) -> SexInference {
 
     let (sex, confidence) = if autosome_mean < 5.0 {
         (InferredSex::Unknown, SexDetectionConfidence::Low)
-    } else if x_ratio >= 0.75 && y_ratio < 0.15 {
-        (InferredSex::Female, SexDetectionConfidence::High)
-    } else if x_ratio < 0.75 && y_ratio >= 0.08 {
-        (InferredSex::Male, SexDetectionConfidence::High)
-    } else if x_ratio >= 0.75 && y_ratio < 0.25 {
-        (InferredSex::Female, SexDetectionConfidence::Medium)
-    } else if x_ratio < 0.85 && y_ratio >= 0.03 {
-        (InferredSex::Male, SexDetectionConfidence::Medium)
     } else {
-        (InferredSex::Unknown, SexDetectionConfidence::Low)
+        classify_depth_ratios(x_ratio, y_ratio)
     };
 
     let evidence = vec![
@@ -137,6 +129,25 @@ fn classify_alignment_stats(stats: &AlignmentSexStats) -> SexInference {
     }
 }
 
+/// Sex call from X and Y depth relative to the autosomes: two X copies and
+/// no Y read female, one X and a covered Y read male.
+pub(super) fn classify_depth_ratios(
+    x_ratio: f64,
+    y_ratio: f64,
+) -> (InferredSex, SexDetectionConfidence) {
+    if x_ratio >= 0.75 && y_ratio < 0.15 {
+        (InferredSex::Female, SexDetectionConfidence::High)
+    } else if x_ratio < 0.75 && y_ratio >= 0.08 {
+        (InferredSex::Male, SexDetectionConfidence::High)
+    } else if x_ratio >= 0.75 && y_ratio < 0.25 {
+        (InferredSex::Female, SexDetectionConfidence::Medium)
+    } else if x_ratio < 0.85 && y_ratio >= 0.03 {
+        (InferredSex::Male, SexDetectionConfidence::Medium)
+    } else {
+        (InferredSex::Unknown, SexDetectionConfidence::Low)
+    }
+}
+
 fn sample_alignment_sex_windows_with_reader<R: Read + std::io::Seek>(
     reader: &mut noodles::cram::io::indexed_reader::IndexedReader<R>,
     label: &str,
@@ -258,7 +269,7 @@ fn mean_records(records: usize, windows: usize) -> f64 {
     }
 }
 
-fn ratio_to_autosome(value: f64, autosome_mean: f64) -> f64 {
+pub(super) fn ratio_to_autosome(value: f64, autosome_mean: f64) -> f64 {
     if autosome_mean <= f64::EPSILON {
         0.0
     } else {
@@ -0,0 +1,388 @@
+use std::{
+    fs::File,
+    path::{Path, PathBuf},
+};
+
+use bioscript_core::RuntimeError;
+use noodles::{bam, cram, cram::crai, sam};
+
+use crate::inspect::{AlignmentSexMethod, DetectedKind, InspectOptions};
+
+use super::{
+    InferredSex, SexDetectionConfidence, SexInference,
+    alignment_depth::{classify_depth_ratios, infer_sex_from_alignment_path, ratio_to_autosome},
+    calls::normalize_chrom,
+    unsupported_sex_inference,
+};
+
+const INDEX_SEX_METHOD: &str = "alignment_index_x_y_density_ratio";
+
+/// Read length assumed when turning BAI read counts into a coarse depth.
+const INDEX_ASSUMED_READ_LEN: f64 = 150.0;
+
+/// Per-contig load an alignment index carries without decoding records.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+enum IndexLoadUnit {
+    /// Mapped read counts from the BAI metadata pseudo-bin.
+    MappedReads,
+    /// Compressed slice bytes summed from CRAI entries.
+    SliceBytes,
+}
+
+impl IndexLoadUnit {
+    fn name(self) -> &'static str {
+        match self {
+            Self::MappedReads => "mapped_reads",
+            Self::SliceBytes => "slice_bytes",
+        }
+    }
+
+    /// Autosome load per kilobase below which the ratios are too noisy to
+    /// call: roughly 0.15x depth of 150 bp reads.
+    fn min_autosome_per_kb(self) -> f64 {
+        match self {
+            Self::MappedReads => 1.0,
+            Self::SliceBytes => 50.0,
+        }
+    }
+}
+
+/// Reference length and index load summed over autosomes, X and Y.
+#[derive(Debug, Default)]
+struct IndexLoad {
+    autosome_bases: u64,
+    autosome_load: u64,
+    x_bases: u64,
+    x_load: u64,
+    y_bases: u64,
+    y_load: u64,
+}
+
+impl IndexLoad {
+    fn add(&mut self, name: &str, length: usize, load: u64) {
+        let (bases, total) = match normalize_chrom(name).as_str() {
+            "X" => (&mut self.x_bases, &mut self.x_load),
+            "Y" => (&mut self.y_bases, &mut self.y_load),
+            chrom if chrom.parse::<u8>().is_ok_and(|n| (1..=22).contains(&n)) => {
+                (&mut self.autosome_bases, &mut self.autosome_load)
+            }
+            _ => return,
+        };
+        *bases = bases.saturating_add(u64::try_from(length).unwrap_or(u64::MAX));
+        *total = total.saturating_add(load);
+    }
+}
+
+/// Sex inference for an alignment file using the method `options` selects.
+///
+/// `Auto` answers from the index alone and only decodes sampled windows
+/// when the index cannot call the sex and a CRAM reference is available.
+pub(crate) fn infer_sex_from_alignment(
+    path: &Path,
+    options: &InspectOptions,
+    kind: DetectedKind,
+) -> Result<SexInference, RuntimeError> {
+    match options.alignment_sex_method {
+        AlignmentSexMethod::Decode => infer_sex_from_alignment_path(path, options, kind),
+        AlignmentSexMethod::Index => infer_sex_from_alignment_index(path, options, kind),
+        AlignmentSexMethod::Auto => {
+            let inference = infer_sex_from_alignment_index(path, options, kind)?;
+            if inference.sex != InferredSex::Unknown
+                || kind != DetectedKind::AlignmentCram
+                || options.reference_file.is_none()
+            {
+                return Ok(inference);
+            }
+            infer_sex_from_alignment_path(path, options, kind)
+        }
+    }
+}
+
+/// Index-only sex and coverage estimate. Only the header and the BAI/CRAI
+/// are read: BAM contigs contribute their mapped read counts and CRAM
+/// contigs their compressed slice bytes, each normalised by contig length.
+/// Whole-chromosome densities are not corrected for mappability, so calls
+/// are capped at medium confidence; `AlignmentSexMethod::Decode` remains the
+/// higher-confidence path.
+fn infer_sex_from_alignment_index(
+    path: &Path,
+    options: &InspectOptions,
+    kind: DetectedKind,
+) -> Result<SexInference, RuntimeError> {
+    if !matches!(
+        kind,
+        DetectedKind::AlignmentBam | DetectedKind::AlignmentCram
+    ) {
+        return Ok(unsupported_sex_inference());
+    }
+    let Some(index_path) = alignment_index_path(path, options, kind) else {
+        return Ok(SexInference {
+            sex: InferredSex::Unknown,
+            confidence: SexDetectionConfidence::Low,
+            method: INDEX_SEX_METHOD.to_owned(),
+            evidence: vec!["index-only sex detection requires --input-index".to_owned()],
+        });
+    };
+
+    let (load, unit) = if kind == DetectedKind::AlignmentBam {
+        (
+            bam_index_load(path, &index_path)?,
+            IndexLoadUnit::MappedReads,
+        )
+    } else {
+        (
+            cram_index_load(path, &index_path)?,
+            IndexLoadUnit::SliceBytes,
+        )
+    };
+    let mut inference = classify_index_load(&load, unit);
+    inference
+        .evidence
+        .insert(0, format!("index={}", index_path.display()));
+    Ok(inference)
+}
+
+/// `--input-index`, else the conventional `.bai`/`.crai` sibling.
+fn alignment_index_path(
+    path: &Path,
+    options: &InspectOptions,
+    kind: DetectedKind,
+) -> Option<PathBuf> {
+    if let Some(index) = options.input_index.as_ref() {
+        return Some(index.clone());
+    }
+    let extension = if kind == DetectedKind::AlignmentBam {
+        "bai"
+    } else {
+        "crai"
+    };
+    let mut sibling = path.as_os_str().to_owned();
+    sibling.push(".");
+    sibling.push(extension);
+    [PathBuf::from(sibling), path.with_extension(extension)]
+        .into_iter()
+        .find(|candidate| candidate.exists())
+}
+
+fn bam_index_load(path: &Path, index_path: &Path) -> Result<IndexLoad, RuntimeError> {
+    let index = bam::bai::fs::read(index_path).map_err(|err| {
+        RuntimeError::Io(format!(
+            "failed to read BAM index {}: {err}",
+            index_path.display()
+        ))
+    })?;
+    let header = open_file(path).and_then(|file| {
+        bam::io::Reader::new(file)
+            .read_header()
+            .map_err(|err| header_error(path, &err))
+    })?;
+    let mut load = IndexLoad::default();
+    for ((name, reference_sequence), indexed) in header
+        .reference_sequences()
+        .iter()
+        .zip(index.reference_sequences())
+    {
+        let mapped = indexed
+            .metadata()
+            .map_or(0, |metadata| metadata.mapped_record_count());
+        load.add(&name.to_string(), reference_sequence.length().get(), mapped);
+    }
+    Ok(load)
+}
+
+fn cram_index_load(path: &Path, index_path: &Path) -> Result<IndexLoad, RuntimeError> {
+    let index = crai::fs::read(index_path).map_err(|err| {
+        RuntimeError::Io(format!(
+            "failed to read CRAM index {}: {err}",
+            index_path.display()
+        ))
+    })?;
+    let header: sam::Header = open_file(path).and_then(|file| {
+        cram::io::Reader::new(file)
+            .read_header()
+            .map_err(|err| header_error(path, &err))
+    })?;
+    let mut slice_bytes = vec![0u64; header.reference_sequences().len()];
+    for record in &index {
+        if let Some(total) = record
+            .reference_sequence_id()
+            .and_then(|id| slice_bytes.get_mut(id))
+        {
+            *total = total.saturating_add(record.slice_length());
+        }
+    }
+    let mut load = IndexLoad::default();
+    for ((name, reference_sequence), bytes) in header.reference_sequences().iter().zip(slice_bytes)
+    {
+        load.add(&name.to_string(), reference_sequence.length().get(), bytes);
+    }
+    Ok(load)
+}
+
+fn open_file(path: &Path) -> Result<File, RuntimeError> {
+    File::open(path)
+        .map_err(|err| RuntimeError::Io(format!("failed to open {}: {err}", path.display())))
+}
+
+fn header_error(path: &Path, err: &std::io::Error) -> RuntimeError {
+    RuntimeError::Io(format!(
+        "failed to read alignment header {}: {err}",
+        path.display()
+    ))
+}
+
+fn classify_index_load(load: &IndexLoad, unit: IndexLoadUnit) -> SexInference {
+    let autosome_per_kb = per_kb(load.autosome_load, load.autosome_bases);
+    let x_per_kb = per_kb(load.x_load, load.x_bases);
+    let y_per_kb = per_kb(load.y_load, load.y_bases);
+    let x_ratio = ratio_to_autosome(x_per_kb, autosome_per_kb);
+    let y_ratio = ratio_to_autosome(y_per_kb, autosome_per_kb);
+
+    let (sex, confidence) = if load.x_bases == 0 || autosome_per_kb < unit.min_autosome_per_kb() {
+        (InferredSex::Unknown, SexDetectionConfidence::Low)
+    } else {
+        match classify_depth_ratios(x_ratio, y_ratio) {
+            (sex, SexDetectionConfidence::High) => (sex, SexDetectionConfidence::Medium),
+            call => call,
+        }
+    };
+
+    let mut evidence = vec![
+        format!("index_load_unit={}", unit.name()),
+        format!("autosome_bases={}", load.autosome_bases),
+        format!("autosome_load={}", load.autosome_load),
+        format!("x_bases={}", load.x_bases),
+        format!("x_load={}", load.x_load),
+        format!("y_bases={}", load.y_bases),
+        format!("y_load={}", load.y_load),
+        format!("autosome_load_per_kb={autosome_per_kb:.2}"),
+        format!("x_load_per_kb={x_per_kb:.2}"),
+        format!("y_load_per_kb={y_per_kb:.2}"),
+        format!("x_to_autosome_ratio={x_ratio:.3}"),
+        format!("y_to_autosome_ratio={y_ratio:.3}"),
+    ];
+    if unit == IndexLoadUnit::MappedReads {
+        evidence.push(format!(
+            "estimated_autosome_depth={:.1}",
+            autosome_per_kb * INDEX_ASSUMED_READ_LEN / 1000.0
+        ));
+        evidence.push(format!("assumed_read_length={INDEX_ASSUMED_READ_LEN}"));
+    }
+
+    SexInference {
+        sex,
+        confidence,
+        method: INDEX_SEX_METHOD.to_owned(),
+        evidence,
+    }
+}
+
+#[allow(clippy::cast_precision_loss)]
+fn per_kb(load: u64, bases: u64) -> f64 {
+    if bases == 0 {
+        0.0
+    } else {
+        load as f64 * 1000.0 / bases as f64
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn load(unit_scale: u64, x_per_mb: u64, y_per_mb: u64) -> IndexLoad {
+        let mut load = IndexLoad::default();
+        load.add("chr1", 248_000_000, 248 * 6_000 * unit_scale);
+        load.add("2", 242_000_000, 242 * 6_000 * unit_scale);
+        load.add("chrX", 156_000_000, 156 * x_per_mb * unit_scale);
+        load.add("chrY", 57_000_000, 57 * y_per_mb * unit_scale);
+        load.add("chrUn_KI270302v1", 2_274, 9_999_999);
+        load.add("chrM", 16_569, 9_999_999);
+        load
+    }
+
+    #[test]
+    fn index_load_keeps_only_autosomes_x_and_y() {
+        let load = load(1, 6_000, 0);
+        assert_eq!(load.autosome_bases, 490_000_000);
+        assert_eq!(load.autosome_load, 490 * 6_000);
+        assert_eq!(load.x_bases, 156_000_000);
+        assert_eq!(load.y_load, 0);
+    }
+
+    #[test]
+    fn classifies_index_densities_with_capped_confidence() {
+        let female = classify_index_load(&load(1, 6_000, 30), IndexLoadUnit::MappedReads);
+        assert_eq!(female.sex, InferredSex::Female);
+        assert_eq!(female.confidence, SexDetectionConfidence::Medium);
+        assert_eq!(female.method, INDEX_SEX_METHOD);
+        assert!(
+            female
+                .evidence
+                .contains(&"estimated_autosome_depth=0.9".to_owned())
+        );
+
+        let male = classify_index_load(&load(40, 3_000, 1_200), IndexLoadUnit::SliceBytes);
+        assert_eq!(male.sex, InferredSex::Male);
+        assert_eq!(male.confidence, SexDetectionConfidence::Medium);
+        assert!(
+            male.evidence
+                .contains(&"index_load_unit=slice_bytes".to_owned())
+        );
+        assert!(
+            !male
+                .evidence
+                .iter()
+                .any(|item| item.starts_with("estimated_autosome_depth="))
+        );
+
+        let sparse = classify_index_load(&load(1, 0, 0), IndexLoadUnit::SliceBytes);
+        assert_eq!(sparse.sex, InferredSex::Unknown);
+        assert_eq!(sparse.confidence, SexDetectionConfidence::Low);
+    }
+
+    fn fixtures_dir() -> PathBuf {
+        PathBuf::from(env!("CARGO_MANIFEST_DIR")).join("tests/fixtures")
+    }
+
+    #[test]
+    fn index_method_reads_only_the_cram_header_and_crai() {
+        let cram = fixtures_dir().join("mini.cram");
+        let options = InspectOptions {
+            alignment_sex_method: AlignmentSexMethod::Index,
+            ..InspectOptions::default()
+        };
+        let inference =
+            infer_sex_from_alignment(&cram, &options, DetectedKind::AlignmentCram).unwrap();
+        assert_eq!(inference.sex, InferredSex::Unknown);
+        assert_eq!(inference.method, INDEX_SEX_METHOD);
+        assert!(inference.evidence[0].ends_with("mini.cram.crai"));
+        assert!(inference.evidence.contains(&"autosome_bases=0".to_owned()));
+
+        let missing = infer_sex_from_alignment(
+            Path::new("missing.bam"),
+            &options,
+            DetectedKind::AlignmentBam,
+        )
+        .unwrap();
+        assert_eq!(missing.sex, InferredSex::Unknown);
+        assert!(missing.evidence[0].contains("--input-index"));
+    }
+
+    #[test]
+    fn auto_method_falls_back_to_decoding_when_the_index_cannot_call() {
+        let dir = fixtures_dir();
+        let options = InspectOptions {
+            input_index: Some(dir.join("mini.cram.crai")),
+            reference_file: Some(dir.join("mini.fa")),
+            ..InspectOptions::default()
+        };
+        let err = infer_sex_from_alignment(
+            &dir.join("mini.cram"),
+            &options,
+            DetectedKind::AlignmentCram,
+        )
+        .unwrap_err();
+        assert!(err.to_string().contains("does not contain contig"));
+    }
+}
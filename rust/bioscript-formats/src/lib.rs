@@ -17,13 +17,15 @@ mod prepare;
 pub use genotype::{
     BackendCapabilities, GenotypeLoadOptions, GenotypeSourceFormat, GenotypeStore, QueryKind,
     choose_variant_locus_for_assembly, detect_vcf_assembly, imputed_reference_observation,
-    observe_bam_variant, observe_cram_deletion_with_reader, observe_cram_indel_with_reader,
-    observe_cram_snp_with_reader, observe_vcf_snp_with_reader, observe_vcf_variant_with_reader,
+    observe_bam_variant, observe_bam_variants, observe_cram_deletion_with_reader,
+    observe_cram_indel_with_reader, observe_cram_snp_with_reader, observe_vcf_snp_with_reader,
+    observe_vcf_variant_with_reader,
 };
 pub use inspect::{
-    DetectedKind, DetectionConfidence, FileContainer, FileInspection, InferredSex, InspectOptions,
-    SexDetectionConfidence, SexInference, SourceMetadata, infer_sex_from_alignment_reader,
-    infer_sex_from_named_reader, infer_sex_from_text_lines, inspect_bytes, inspect_file,
+    AlignmentSexMethod, DetectedKind, DetectionConfidence, FileContainer, FileInspection,
+    InferredSex, InspectOptions, SexDetectionConfidence, SexInference, SourceMetadata,
+    infer_sex_from_alignment_reader, infer_sex_from_named_reader, infer_sex_from_text_lines,
+    inspect_bytes, inspect_file,
 };
 pub use liftover::{
     ChainIndex, LiftOverOptions, LiftedLocus, LiftoverStats, convert_23andme_grch37_to_grch38,
@@ -1,20 +1,16 @@
 use std::{
-    cmp::Ordering,
-    collections::HashMap,
     fs::File,
-    io::{self, BufRead, BufReader, Cursor, Write},
+    io::{self, BufRead, BufReader, Read, Write},
     path::Path,
+    thread,
 };
 
-use bioscript_core::{Assembly, RuntimeError};
-use flate2::read::GzDecoder;
+use bioscript_core::RuntimeError;
 
-const HG19_TO_HG38_CHAIN_GZ: &[u8] = include_bytes!("../assets/liftover/hg19ToHg38.over.chain.gz");
+mod chain_index;
 
-const PRIMARY_CHROMS: [&str; 25] = [
-    "1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14", "15", "16", "17",
-    "18", "19", "20", "21", "22", "X", "Y", "MT",
-];
+pub(crate) use chain_index::bundled_grch37_to_grch38_chain;
+pub use chain_index::{ChainIndex, grch37_to_grch38_chain};
 
 #[derive(Debug, Clone, Copy, PartialEq, Eq)]
 pub struct LiftOverOptions {
@@ -43,210 +39,13 @@ pub struct LiftoverStats {
     pub reverse_strand_genotypes: u64,
 }
 
-#[derive(Debug, Clone)]
-pub struct ChainIndex {
-    from: Assembly,
-    to: Assembly,
-    blocks_by_chrom: HashMap<String, ChromBlocks>,
-}
-
-#[derive(Debug, Clone)]
-struct ChromBlocks {
-    starts: Vec<i64>,
-    blocks: Vec<ChainBlock>,
-}
-
-#[derive(Debug, Clone)]
-struct ChainBlock {
-    source_start: i64,
-    source_end: i64,
-    target_start: i64,
-    target_name: String,
-    target_size: i64,
-    target_strand: char,
-    score: i64,
-    index: usize,
-}
-
-#[derive(Debug, Clone)]
-struct ChainHeader {
-    score: i64,
-    source_name: String,
-    source_pos: i64,
-    target_name: String,
-    target_size: i64,
-    target_strand: char,
-    target_pos: i64,
-    index: usize,
-}
-
-impl ChainIndex {
-    pub fn from_reader<R: BufRead>(
-        from: Assembly,
-        to: Assembly,
-        reader: R,
-        options: LiftOverOptions,
-    ) -> Result<Self, RuntimeError> {
-        if (from, to) != (Assembly::Grch37, Assembly::Grch38) {
-            return Err(RuntimeError::Unsupported(
-                "liftover currently supports only GRCh37 to GRCh38".to_owned(),
-            ));
-        }
-
-        let mut blocks_by_chrom: HashMap<String, Vec<ChainBlock>> = HashMap::new();
-        let mut current: Option<ChainHeader> = None;
-        let mut chain_index = 0usize;
-
-        for raw in reader.lines() {
-            let raw =
-                raw.map_err(|err| RuntimeError::Io(format!("failed to read chain: {err}")))?;
-            let line = raw.trim();
-            if line.is_empty() {
-                current = None;
-                continue;
-            }
-
-            let parts: Vec<&str> = line.split_whitespace().collect();
-            if parts.first() == Some(&"chain") {
-                current = parse_chain_header(&parts, chain_index, options.primary_only)?;
-                if current.is_some() {
-                    chain_index += 1;
-                }
-                continue;
-            }
-
-            let Some(header) = current.as_mut() else {
-                continue;
-            };
-            let size = parse_i64(parts[0], "chain block size")?;
-            let source_start = header.source_pos;
-            let target_start = header.target_pos;
-            let source_end = source_start + size;
-
-            blocks_by_chrom
-                .entry(header.source_name.clone())
-                .or_default()
-                .push(ChainBlock {
-                    source_start,
-                    source_end,
-                    target_start,
-                    target_name: header.target_name.clone(),
-                    target_size: header.target_size,
-                    target_strand: header.target_strand,
-                    score: header.score,
-                    index: header.index,
-                });
-
-            if parts.len() == 3 {
-                header.source_pos = source_end + parse_i64(parts[1], "chain dt")?;
-                header.target_pos = target_start + size + parse_i64(parts[2], "chain dq")?;
-            } else {
-                current = None;
-            }
-        }
-
-        let blocks_by_chrom = blocks_by_chrom
-            .into_iter()
-            .map(|(chrom, mut blocks)| {
-                blocks.sort_by(|a, b| {
-                    a.source_start
-                        .cmp(&b.source_start)
-                        .then_with(|| b.score.cmp(&a.score))
-                        .then_with(|| a.index.cmp(&b.index))
-                });
-                let starts = blocks.iter().map(|block| block.source_start).collect();
-                (chrom, ChromBlocks { starts, blocks })
-            })
-            .collect();
-
-        Ok(Self {
-            from,
-            to,
-            blocks_by_chrom,
-        })
-    }
-
-    pub fn lookup(
-        &self,
-        from: Assembly,
-        to: Assembly,
-        chrom: &str,
-        pos1: i64,
-    ) -> Option<LiftedLocus> {
-        if from != self.from || to != self.to || pos1 <= 0 {
-            return None;
-        }
-
-        let source_chrom = chain_chrom(chrom);
-        let chrom_blocks = self
-            .blocks_by_chrom
-            .get(&source_chrom)
-            .or_else(|| self.blocks_by_chrom.get(chrom))?;
-        let pos0 = pos1 - 1;
-        let mut i = chrom_blocks.starts.partition_point(|start| *start <= pos0);
-        if i == 0 {
-            return None;
-        }
-        i -= 1;
-
-        let mut best: Option<&ChainBlock> = None;
-        loop {
-            let block = &chrom_blocks.blocks[i];
-            if block.source_start <= pos0
-                && pos0 < block.source_end
-                && best.is_none_or(|candidate| compare_blocks(block, candidate).is_gt())
-            {
-                best = Some(block);
-            }
-
-            if let Some(candidate) = best
-                && chrom_blocks.starts[i] < candidate.source_start - 1_000_000
-            {
-                break;
-            }
-            if best.is_none() && pos0 - chrom_blocks.starts[i] > 10_000_000 {
-                break;
-            }
-            if i == 0 {
-                break;
-            }
-            i -= 1;
-        }
-
-        let best = best?;
-        let offset = pos0 - best.source_start;
-        let target_pos0 = if best.target_strand == '+' {
-            best.target_start + offset
-        } else {
-            best.target_size - (best.target_start + offset) - 1
-        };
-
-        Some(LiftedLocus {
-            chrom: canon_chrom(&best.target_name),
-            pos: target_pos0 + 1,
-            strand: best.target_strand,
-            score: best.score,
-        })
-    }
-}
-
-pub fn grch37_to_grch38_chain() -> Result<ChainIndex, RuntimeError> {
-    let reader = BufReader::new(GzDecoder::new(Cursor::new(HG19_TO_HG38_CHAIN_GZ)));
-    ChainIndex::from_reader(
-        Assembly::Grch37,
-        Assembly::Grch38,
-        reader,
-        LiftOverOptions::default(),
-    )
-}
-
 pub fn convert_23andme_grch37_to_grch38(
     input_path: &Path,
     output_path: &Path,
     unmapped_path: &Path,
 ) -> Result<LiftoverStats, RuntimeError> {
-    let chain = grch37_to_grch38_chain()?;
-    convert_23andme_with_chain(input_path, output_path, unmapped_path, &chain)
+    let chain = bundled_grch37_to_grch38_chain()?;
+    convert_23andme_with_chain(input_path, output_path, unmapped_path, chain)
 }
 
 pub fn convert_23andme_with_chain(
@@ -271,178 +70,257 @@ pub fn convert_23andme_with_chain(
     convert_23andme_reader_with_chain(BufReader::new(input), &mut output, &mut unmapped, chain)
 }
 
+/// Lift a 23andMe export, reading it in line-aligned blocks of roughly
+/// `LIFTOVER_CHUNK_BYTES` that are lifted on scoped worker threads and
+/// written back in input order. Output, unmapped report and stats match a
+/// line-by-line pass.
 pub fn convert_23andme_reader_with_chain<R: BufRead, W: Write, U: Write>(
     reader: R,
     output: &mut W,
     unmapped: &mut U,
     chain: &ChainIndex,
+) -> Result<LiftoverStats, RuntimeError> {
+    let workers = thread::available_parallelism().map_or(1, usize::from);
+    lift_23andme_chunks(
+        reader,
+        output,
+        unmapped,
+        chain,
+        LIFTOVER_CHUNK_BYTES,
+        workers,
+    )
+}
+
+fn lift_23andme_chunks<R: BufRead, W: Write, U: Write>(
+    mut reader: R,
+    output: &mut W,
+    unmapped: &mut U,
+    chain: &ChainIndex,
+    chunk_bytes: u64,
+    workers: usize,
 ) -> Result<LiftoverStats, RuntimeError> {
     let mut stats = LiftoverStats::default();
     let mut added_note = false;
     writeln!(unmapped, "rsid\tchromosome\tposition\tgenotype\treason")
         .map_err(write_error("unmapped report"))?;
 
-    for raw in reader.lines() {
-        let raw =
-            raw.map_err(|err| RuntimeError::Io(format!("failed to read 23andMe txt: {err}")))?;
-        let line = raw.trim_end_matches(['\n', '\r']);
-        if line.starts_with('#') {
-            if !added_note && line.contains("reference human assembly build 37") {
-                writeln!(
-                    output,
-                    "# Coordinates lifted from reference human assembly build 37 to build 38 / GRCh38."
-                )
-                .map_err(write_error("lifted 23andMe output"))?;
-                writeln!(
-                    output,
-                    "# Genotype bases were reverse-complemented for markers mapping through reverse-strand chains."
-                )
-                .map_err(write_error("lifted 23andMe output"))?;
-                added_note = true;
-            }
-            writeln!(
-                output,
-                "{}",
-                line.replace("build 37", "build 38 / GRCh38")
-                    .replace("Annotation Release 104", "GRCh38")
-            )
-            .map_err(write_error("lifted 23andMe output"))?;
-            continue;
+    let mut chunks = (0..workers.max(1))
+        .map(|_| LiftChunk::default())
+        .collect::<Vec<_>>();
+    loop {
+        let mut filled = 0;
+        while filled < chunks.len() && chunks[filled].fill(&mut reader, chunk_bytes)? {
+            filled += 1;
         }
-
-        if line.is_empty() {
-            writeln!(output).map_err(write_error("lifted 23andMe output"))?;
-            continue;
+        if filled == 0 {
+            return Ok(stats);
         }
 
-        stats.total_markers += 1;
-        let mut fields: Vec<String> = line.split('\t').map(ToOwned::to_owned).collect();
-        if fields.len() < 4 {
-            stats.unmapped += 1;
-            writeln!(unmapped, "{line}\tmalformed").map_err(write_error("unmapped report"))?;
-            continue;
+        let active = &mut chunks[..filled];
+        if let [chunk] = active {
+            chunk.lift(chain)?;
+        } else {
+            thread::scope(|scope| {
+                let handles = active
+                    .iter_mut()
+                    .map(|chunk| scope.spawn(|| chunk.lift(chain)))
+                    .collect::<Vec<_>>();
+                handles.into_iter().try_for_each(|handle| {
+                    handle
+                        .join()
+                        .map_err(|_| RuntimeError::Io("liftover worker panicked".to_owned()))?
+                })
+            })?;
         }
 
-        let Ok(pos) = fields[2].parse::<i64>() else {
-            stats.unmapped += 1;
-            writeln!(
-                unmapped,
-                "{}\t{}\t{}\t{}\tnon_integer_position",
-                fields[0], fields[1], fields[2], fields[3]
-            )
-            .map_err(write_error("unmapped report"))?;
-            continue;
-        };
-
-        let Some(lifted) = chain.lookup(Assembly::Grch37, Assembly::Grch38, &fields[1], pos) else {
-            stats.unmapped += 1;
-            writeln!(
-                unmapped,
-                "{}\t{}\t{}\t{}\tno_primary_mapping",
-                fields[0], fields[1], fields[2], fields[3]
-            )
-            .map_err(write_error("unmapped report"))?;
-            continue;
-        };
-
-        if lifted.strand == '-' {
-            fields[3] = revcomp_genotype(&fields[3]);
-            stats.reverse_strand_genotypes += 1;
+        for chunk in active.iter() {
+            chunk.write(output, unmapped, &mut added_note)?;
+            stats.total_markers += chunk.stats.total_markers;
+            stats.mapped += chunk.stats.mapped;
+            stats.unmapped += chunk.stats.unmapped;
+            stats.reverse_strand_genotypes += chunk.stats.reverse_strand_genotypes;
+        }
+        if filled < chunks.len() {
+            return Ok(stats);
         }
-        fields[1] = lifted.chrom;
-        fields[2] = lifted.pos.to_string();
-        writeln!(output, "{}", fields.join("\t")).map_err(write_error("lifted 23andMe output"))?;
-        stats.mapped += 1;
     }
+}
 
-    Ok(stats)
+const LIFTOVER_CHUNK_BYTES: u64 = 4 * 1024 * 1024;
+
+/// One block of input lines plus the lifted output, unmapped rows and stats
+/// for it. Buffers are reused from block to block.
+#[derive(Default)]
+struct LiftChunk {
+    input: Vec<u8>,
+    lifted: Vec<u8>,
+    unmapped: Vec<u8>,
+    stats: LiftoverStats,
+    /// Offset in `lifted` of the first build 37 header line; the coordinate
+    /// note goes there if no earlier block already carried one.
+    note_at: Option<usize>,
 }
 
-fn parse_chain_header(
-    parts: &[&str],
-    index: usize,
-    primary_only: bool,
-) -> Result<Option<ChainHeader>, RuntimeError> {
-    if parts.len() < 13 {
-        return Err(RuntimeError::Io("malformed chain header".to_owned()));
-    }
-    let source_name = parts[2].to_owned();
-    let source_strand = parts[4];
-    let source_pos = parse_i64(parts[5], "chain tStart")?;
-    let target_name = parts[7].to_owned();
-    let target_size = parse_i64(parts[8], "chain qSize")?;
-    let target_strand = parts[9].chars().next().unwrap_or('+');
-    let target_pos = parse_i64(parts[10], "chain qStart")?;
-
-    if source_strand != "+" {
-        return Ok(None);
+impl LiftChunk {
+    fn fill<R: BufRead>(&mut self, reader: &mut R, chunk_bytes: u64) -> Result<bool, RuntimeError> {
+        let read_error = |err| RuntimeError::Io(format!("failed to read 23andMe txt: {err}"));
+        self.input.clear();
+        reader
+            .by_ref()
+            .take(chunk_bytes)
+            .read_to_end(&mut self.input)
+            .map_err(read_error)?;
+        if self.input.last().is_some_and(|byte| *byte != b'\n') {
+            reader
+                .read_until(b'\n', &mut self.input)
+                .map_err(read_error)?;
+        }
+        Ok(!self.input.is_empty())
     }
-    if primary_only
-        && (!is_primary_chrom(&canon_chrom(&source_name))
-            || !is_primary_chrom(&canon_chrom(&target_name)))
-    {
-        return Ok(None);
+
+    fn lift(&mut self, chain: &ChainIndex) -> Result<(), RuntimeError> {
+        let input = std::mem::take(&mut self.input);
+        let result = self.lift_lines(&input, chain);
+        self.input = input;
+        result
     }
 
-    Ok(Some(ChainHeader {
-        score: parse_i64(parts[1], "chain score")?,
-        source_name,
-        source_pos,
-        target_name,
-        target_size,
-        target_strand,
-        target_pos,
-        index,
-    }))
-}
+    fn lift_lines(&mut self, input: &[u8], chain: &ChainIndex) -> Result<(), RuntimeError> {
+        self.lifted.clear();
+        self.unmapped.clear();
+        self.stats = LiftoverStats::default();
+        self.note_at = None;
+        let text = std::str::from_utf8(input).map_err(|_| {
+            RuntimeError::Io(
+                "failed to read 23andMe txt: stream did not contain valid UTF-8".to_owned(),
+            )
+        })?;
 
-fn compare_blocks(a: &ChainBlock, b: &ChainBlock) -> Ordering {
-    a.score.cmp(&b.score).then_with(|| b.index.cmp(&a.index))
-}
+        for line in text.lines() {
+            let line = line.trim_end_matches(['\n', '\r']);
+            if line.starts_with('#') {
+                if self.note_at.is_none() && line.contains("reference human assembly build 37") {
+                    self.note_at = Some(self.lifted.len());
+                }
+                self.lifted.extend_from_slice(
+                    line.replace("build 37", "build 38 / GRCh38")
+                        .replace("Annotation Release 104", "GRCh38")
+                        .as_bytes(),
+                );
+                self.lifted.push(b'\n');
+                continue;
+            }
+            if line.is_empty() {
+                self.lifted.push(b'\n');
+                continue;
+            }
+            self.stats.total_markers += 1;
+            self.lift_marker(line, chain);
+        }
+        Ok(())
+    }
 
-fn parse_i64(value: &str, label: &str) -> Result<i64, RuntimeError> {
-    value
-        .parse::<i64>()
-        .map_err(|err| RuntimeError::Io(format!("failed to parse {label} '{value}': {err}")))
-}
+    fn lift_marker(&mut self, line: &str, chain: &ChainIndex) {
+        let mut fields = line.splitn(5, '\t');
+        let (Some(rsid), Some(chrom), Some(position), Some(genotype)) =
+            (fields.next(), fields.next(), fields.next(), fields.next())
+        else {
+            self.stats.unmapped += 1;
+            push_row(&mut self.unmapped, &[line, "malformed"]);
+            return;
+        };
 
-fn canon_chrom(name: &str) -> String {
-    let stripped = name.strip_prefix("chr").unwrap_or(name);
-    if stripped == "M" {
-        "MT".to_owned()
-    } else {
-        stripped.to_owned()
+        let Ok(pos) = position.parse::<i64>() else {
+            self.stats.unmapped += 1;
+            push_row(
+                &mut self.unmapped,
+                &[rsid, chrom, position, genotype, "non_integer_position"],
+            );
+            return;
+        };
+        let Some(lifted) = chain.lift(chrom, pos) else {
+            self.stats.unmapped += 1;
+            push_row(
+                &mut self.unmapped,
+                &[rsid, chrom, position, genotype, "no_primary_mapping"],
+            );
+            return;
+        };
+
+        let out = &mut self.lifted;
+        out.extend_from_slice(rsid.as_bytes());
+        out.push(b'\t');
+        out.extend_from_slice(lifted.chrom.as_bytes());
+        out.push(b'\t');
+        write!(out, "{}", lifted.pos).expect("writing to a Vec cannot fail");
+        out.push(b'\t');
+        if lifted.reverse {
+            out.extend(genotype.bytes().map(complement_base));
+            self.stats.reverse_strand_genotypes += 1;
+        } else {
+            out.extend_from_slice(genotype.as_bytes());
+        }
+        if let Some(rest) = fields.next() {
+            out.push(b'\t');
+            out.extend_from_slice(rest.as_bytes());
+        }
+        out.push(b'\n');
+        self.stats.mapped += 1;
     }
-}
 
-fn chain_chrom(name: &str) -> String {
-    let canon = canon_chrom(name);
-    if canon == "MT" {
-        "chrM".to_owned()
-    } else {
-        format!("chr{canon}")
+    fn write<W: Write, U: Write>(
+        &self,
+        output: &mut W,
+        unmapped: &mut U,
+        added_note: &mut bool,
+    ) -> Result<(), RuntimeError> {
+        let mut write_lifted = |bytes: &[u8]| {
+            output
+                .write_all(bytes)
+                .map_err(write_error("lifted 23andMe output"))
+        };
+        match self.note_at {
+            Some(offset) if !*added_note => {
+                write_lifted(&self.lifted[..offset])?;
+                write_lifted(LIFTOVER_NOTE.as_bytes())?;
+                write_lifted(&self.lifted[offset..])?;
+                *added_note = true;
+            }
+            _ => write_lifted(&self.lifted)?,
+        }
+        unmapped
+            .write_all(&self.unmapped)
+            .map_err(write_error("unmapped report"))
     }
 }
 
-fn is_primary_chrom(chrom: &str) -> bool {
-    PRIMARY_CHROMS.contains(&chrom)
+const LIFTOVER_NOTE: &str = "\
+# Coordinates lifted from reference human assembly build 37 to build 38 / GRCh38.
+# Genotype bases were reverse-complemented for markers mapping through reverse-strand chains.
+";
+
+fn push_row(out: &mut Vec<u8>, fields: &[&str]) {
+    for (index, field) in fields.iter().enumerate() {
+        if index > 0 {
+            out.push(b'\t');
+        }
+        out.extend_from_slice(field.as_bytes());
+    }
+    out.push(b'\n');
 }
 
-fn revcomp_genotype(genotype: &str) -> String {
-    genotype
-        .chars()
-        .map(|ch| match ch {
-            'A' => 'T',
-            'C' => 'G',
-            'G' => 'C',
-            'T' => 'A',
-            'a' => 't',
-            'c' => 'g',
-            'g' => 'c',
-            't' => 'a',
-            other => other,
-        })
-        .collect()
+fn complement_base(base: u8) -> u8 {
+    match base {
+        b'A' => b'T',
+        b'C' => b'G',
+        b'G' => b'C',
+        b'T' => b'A',
+        b'a' => b't',
+        b'c' => b'g',
+        b'g' => b'c',
+        b't' => b'a',
+        other => other,
+    }
 }
 
 fn write_error(label: &'static str) -> impl FnOnce(io::Error) -> RuntimeError {
@@ -451,6 +329,8 @@ fn write_error(label: &'static str) -> impl FnOnce(io::Error) -> RuntimeError {
 
 #[cfg(test)]
 mod tests {
+    use bioscript_core::Assembly;
+
     use super::*;
 
     fn tiny_chain() -> ChainIndex {
@@ -530,4 +410,58 @@ rsMissing\t3\t10\tTT\n";
         let unmapped = String::from_utf8(unmapped).unwrap();
         assert!(unmapped.contains("rsMissing\t3\t10\tTT\tno_primary_mapping"));
     }
+
+    #[test]
+    fn chunked_workers_match_a_single_block() {
+        let chain = tiny_chain();
+        let input = "# header\r\n\
+# We are using reference human assembly build 37\n\
+rsForward\t1\t11\tAG\textra\tcolumns\n\
+\n\
+rsReverse\t2\t50\tAC\r\n\
+rsShort\t1\t11\n\
+# reference human assembly build 37 again\n\
+rsBadPos\t1\tten\tAA\n\
+rsMissing\t3\t10\tTT\n\
+rsLast\tchr1\t27\tCT";
+        let run = |chunk_bytes, workers| {
+            let mut out = Vec::new();
+            let mut unmapped = Vec::new();
+            let stats = lift_23andme_chunks(
+                BufReader::new(input.as_bytes()),
+                &mut out,
+                &mut unmapped,
+                &chain,
+                chunk_bytes,
+                workers,
+            )
+            .unwrap();
+            (stats, out, unmapped)
+        };
+
+        let (stats, out, unmapped) = run(LIFTOVER_CHUNK_BYTES, 1);
+        assert_eq!(
+            stats,
+            LiftoverStats {
+                total_markers: 6,
+                mapped: 3,
+                unmapped: 3,
+                reverse_strand_genotypes: 1,
+            }
+        );
+        let out = String::from_utf8(out.clone()).unwrap();
+        assert_eq!(out.matches("# Coordinates lifted").count(), 1);
+        assert!(out.contains("rsForward\t1\t101\tAG\textra\tcolumns\n"));
+        assert!(out.ends_with("rsLast\t1\t117\tCT\n"));
+        let unmapped = String::from_utf8(unmapped).unwrap();
+        assert!(unmapped.contains("rsShort\t1\t11\tmalformed\n"));
+        assert!(unmapped.contains("rsBadPos\t1\tten\tAA\tnon_integer_position\n"));
+
+        for (chunk_bytes, workers) in [(1, 1), (16, 3), (64, 2), (4096, 8)] {
+            let (chunked_stats, chunked_out, chunked_unmapped) = run(chunk_bytes, workers);
+            assert_eq!(chunked_stats, stats);
+            assert_eq!(String::from_utf8(chunked_out).unwrap(), out);
+            assert_eq!(String::from_utf8(chunked_unmapped).unwrap(), unmapped);
+        }
+    }
 }
@@ -0,0 +1,462 @@
+use std::{
+    cmp::Ordering,
+    collections::HashMap,
+    io::{BufRead, BufReader, Cursor},
+    sync::OnceLock,
+};
+
+use bioscript_core::{Assembly, RuntimeError};
+use flate2::read::GzDecoder;
+
+use super::{LiftOverOptions, LiftedLocus};
+
+const HG19_TO_HG38_CHAIN_GZ: &[u8] =
+    include_bytes!("../../assets/liftover/hg19ToHg38.over.chain.gz");
+
+const PRIMARY_CHROMS: [&str; 25] = [
+    "1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14", "15", "16", "17",
+    "18", "19", "20", "21", "22", "X", "Y", "MT",
+];
+
+static GRCH37_TO_GRCH38: OnceLock<Result<ChainIndex, RuntimeError>> = OnceLock::new();
+
+/// Compiled liftover chain.
+///
+/// Blocks are kept per canonical source chromosome (`1`, `X`, `MT`) as
+/// parallel arrays sorted by source start. Per-chain attributes (target
+/// contig, size, strand, score) are stored once in `chains` and target contig
+/// names are interned, so a block costs three coordinates and a chain id
+/// instead of a struct with its own `String`.
+#[derive(Debug, Clone, PartialEq, Eq)]
+pub struct ChainIndex {
+    from: Assembly,
+    to: Assembly,
+    target_names: Vec<String>,
+    chains: Vec<ChainRecord>,
+    blocks_by_chrom: HashMap<String, ChromBlocks>,
+}
+
+#[derive(Debug, Clone, Default, PartialEq, Eq)]
+struct ChromBlocks {
+    source_starts: Vec<i64>,
+    source_ends: Vec<i64>,
+    target_starts: Vec<i64>,
+    chain_ids: Vec<u32>,
+}
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+struct ChainRecord {
+    score: i64,
+    target_name: u32,
+    target_size: i64,
+    target_reverse: bool,
+}
+
+#[derive(Debug, Clone, Copy)]
+pub(super) struct Lift<'a> {
+    pub(super) chrom: &'a str,
+    pub(super) pos: i64,
+    pub(super) reverse: bool,
+    pub(super) score: i64,
+}
+
+impl From<Lift<'_>> for LiftedLocus {
+    fn from(lift: Lift<'_>) -> Self {
+        Self {
+            chrom: lift.chrom.to_owned(),
+            pos: lift.pos,
+            strand: if lift.reverse { '-' } else { '+' },
+            score: lift.score,
+        }
+    }
+}
+
+#[derive(Debug, Clone)]
+struct ChainHeader {
+    score: i64,
+    source_name: String,
+    source_pos: i64,
+    target_name: String,
+    target_size: i64,
+    target_strand: char,
+    target_pos: i64,
+}
+
+impl ChainIndex {
+    pub fn from_reader<R: BufRead>(
+        from: Assembly,
+        to: Assembly,
+        reader: R,
+        options: LiftOverOptions,
+    ) -> Result<Self, RuntimeError> {
+        if (from, to) != (Assembly::Grch37, Assembly::Grch38) {
+            return Err(RuntimeError::Unsupported(
+                "liftover currently supports only GRCh37 to GRCh38".to_owned(),
+            ));
+        }
+
+        let mut target_names = Vec::new();
+        let mut target_ids: HashMap<String, u32> = HashMap::new();
+        let mut chains: Vec<ChainRecord> = Vec::new();
+        let mut blocks_by_chrom: HashMap<String, Vec<(i64, i64, i64, u32)>> = HashMap::new();
+        let mut current: Option<(ChainHeader, u32)> = None;
+
+        for raw in reader.lines() {
+            let raw =
+                raw.map_err(|err| RuntimeError::Io(format!("failed to read chain: {err}")))?;
+            let line = raw.trim();
+            if line.is_empty() {
+                current = None;
+                continue;
+            }
+
+            let parts: Vec<&str> = line.split_whitespace().collect();
+            if parts.first() == Some(&"chain") {
+                current = None;
+                if let Some(header) = parse_chain_header(&parts, options.primary_only)? {
+                    let chain_id = u32::try_from(chains.len())
+                        .map_err(|_| RuntimeError::Io("too many chains".to_owned()))?;
+                    let canonical = canon_chrom(&header.target_name).to_owned();
+                    let next_id = u32::try_from(target_names.len())
+                        .map_err(|_| RuntimeError::Io("too many chain targets".to_owned()))?;
+                    let target_name = *target_ids.entry(canonical.clone()).or_insert_with(|| {
+                        target_names.push(canonical);
+                        next_id
+                    });
+                    chains.push(ChainRecord {
+                        score: header.score,
+                        target_name,
+                        target_size: header.target_size,
+                        target_reverse: header.target_strand != '+',
+                    });
+                    current = Some((header, chain_id));
+                }
+                continue;
+            }
+
+            let Some((header, chain_id)) = current.as_mut() else {
+                continue;
+            };
+            let size = parse_i64(parts[0], "chain block size")?;
+            let source_start = header.source_pos;
+            let target_start = header.target_pos;
+            let source_end = source_start + size;
+
+            blocks_by_chrom
+                .entry(header.source_name.clone())
+                .or_default()
+                .push((source_start, source_end, target_start, *chain_id));
+
+            if parts.len() == 3 {
+                header.source_pos = source_end + parse_i64(parts[1], "chain dt")?;
+                header.target_pos = target_start + size + parse_i64(parts[2], "chain dq")?;
+            } else {
+                current = None;
+            }
+        }
+
+        let blocks_by_chrom = blocks_by_chrom
+            .into_iter()
+            .map(|(chrom, mut blocks)| {
+                blocks.sort_by(|a, b| {
+                    a.0.cmp(&b.0)
+                        .then_with(|| chains[b.3 as usize].score.cmp(&chains[a.3 as usize].score))
+                        .then_with(|| a.3.cmp(&b.3))
+                });
+                let mut columns = ChromBlocks::default();
+                for (source_start, source_end, target_start, chain_id) in blocks {
+                    columns.source_starts.push(source_start);
+                    columns.source_ends.push(source_end);
+                    columns.target_starts.push(target_start);
+                    columns.chain_ids.push(chain_id);
+                }
+                (chrom, columns)
+            })
+            .collect();
+
+        Ok(Self {
+            from,
+            to,
+            target_names,
+            chains,
+            blocks_by_chrom,
+        })
+    }
+
+    pub fn lookup(
+        &self,
+        from: Assembly,
+        to: Assembly,
+        chrom: &str,
+        pos1: i64,
+    ) -> Option<LiftedLocus> {
+        if from != self.from || to != self.to {
+            return None;
+        }
+        self.lift(chrom, pos1).map(LiftedLocus::from)
+    }
+
+    /// Lift many positions on one source chromosome. With `positions` sorted
+    /// ascending the block cursor only moves forward, merge-style, instead of
+    /// binary-searching every position; out-of-order positions reposition the
+    /// cursor and still give the same answer as [`ChainIndex::lookup`].
+    pub fn lookup_many(
+        &self,
+        from: Assembly,
+        to: Assembly,
+        chrom: &str,
+        positions: &[i64],
+    ) -> Vec<Option<LiftedLocus>> {
+        let blocks = (from == self.from && to == self.to)
+            .then(|| self.blocks_by_chrom.get(canon_chrom(chrom)))
+            .flatten();
+        let Some(blocks) = blocks else {
+            return vec![None; positions.len()];
+        };
+
+        let mut cursor = 0;
+        let mut previous = i64::MIN;
+        positions
+            .iter()
+            .map(|pos1| {
+                if *pos1 <= 0 {
+                    return None;
+                }
+                let pos0 = pos1 - 1;
+                if pos0 < previous {
+                    cursor = blocks.source_starts.partition_point(|start| *start <= pos0);
+                } else {
+                    while blocks
+                        .source_starts
+                        .get(cursor)
+                        .is_some_and(|start| *start <= pos0)
+                    {
+                        cursor += 1;
+                    }
+                }
+                previous = pos0;
+                self.lift_before(blocks, cursor, pos0)
+                    .map(LiftedLocus::from)
+            })
+            .collect()
+    }
+
+    /// Borrowing form of [`ChainIndex::lookup`] for this index's own assembly
+    /// pair; the target contig name points into the interned name table.
+    pub(super) fn lift(&self, chrom: &str, pos1: i64) -> Option<Lift<'_>> {
+        if pos1 <= 0 {
+            return None;
+        }
+        let blocks = self.blocks_by_chrom.get(canon_chrom(chrom))?;
+        let pos0 = pos1 - 1;
+        let end = blocks.source_starts.partition_point(|start| *start <= pos0);
+        self.lift_before(blocks, end, pos0)
+    }
+
+    /// Pick the best block covering `pos0` among those before `end`, the
+    /// first block starting after `pos0`.
+    fn lift_before(&self, blocks: &ChromBlocks, end: usize, pos0: i64) -> Option<Lift<'_>> {
+        let mut i = end.checked_sub(1)?;
+
+        let mut best: Option<usize> = None;
+        loop {
+            let start = blocks.source_starts[i];
+            if start <= pos0
+                && pos0 < blocks.source_ends[i]
+                && best.is_none_or(|candidate| {
+                    self.compare_chains(blocks.chain_ids[i], blocks.chain_ids[candidate])
+                        .is_gt()
+                })
+            {
+                best = Some(i);
+            }
+
+            if let Some(candidate) = best
+                && start < blocks.source_starts[candidate] - 1_000_000
+            {
+                break;
+            }
+            if best.is_none() && pos0 - start > 10_000_000 {
+                break;
+            }
+            if i == 0 {
+                break;
+            }
+            i -= 1;
+        }
+
+        let best = best?;
+        let chain = &self.chains[blocks.chain_ids[best] as usize];
+        let target_start = blocks.target_starts[best] + (pos0 - blocks.source_starts[best]);
+        let target_pos0 = if chain.target_reverse {
+            chain.target_size - target_start - 1
+        } else {
+            target_start
+        };
+
+        Some(Lift {
+            chrom: &self.target_names[chain.target_name as usize],
+            pos: target_pos0 + 1,
+            reverse: chain.target_reverse,
+            score: chain.score,
+        })
+    }
+
+    fn compare_chains(&self, a: u32, b: u32) -> Ordering {
+        self.chains[a as usize]
+            .score
+            .cmp(&self.chains[b as usize].score)
+            .then_with(|| b.cmp(&a))
+    }
+}
+
+/// Compile the bundled hg19→hg38 chain.
+pub fn grch37_to_grch38_chain() -> Result<ChainIndex, RuntimeError> {
+    bundled_grch37_to_grch38_chain().cloned()
+}
+
+/// The bundled hg19→hg38 chain, compiled on first use and shared for the rest
+/// of the process.
+pub(crate) fn bundled_grch37_to_grch38_chain() -> Result<&'static ChainIndex, RuntimeError> {
+    GRCH37_TO_GRCH38
+        .get_or_init(|| {
+            let reader = BufReader::new(GzDecoder::new(Cursor::new(HG19_TO_HG38_CHAIN_GZ)));
+            ChainIndex::from_reader(
+                Assembly::Grch37,
+                Assembly::Grch38,
+                reader,
+                LiftOverOptions::default(),
+            )
+        })
+        .as_ref()
+        .map_err(Clone::clone)
+}
+
+fn parse_chain_header(
+    parts: &[&str],
+    primary_only: bool,
+) -> Result<Option<ChainHeader>, RuntimeError> {
+    if parts.len() < 13 {
+        return Err(RuntimeError::Io("malformed chain header".to_owned()));
+    }
+    let source_name = canon_chrom(parts[2]).to_owned();
+    let source_strand = parts[4];
+    let source_pos = parse_i64(parts[5], "chain tStart")?;
+    let target_name = parts[7].to_owned();
+    let target_size = parse_i64(parts[8], "chain qSize")?;
+    let target_strand = parts[9].chars().next().unwrap_or('+');
+    let target_pos = parse_i64(parts[10], "chain qStart")?;
+
+    if source_strand != "+" {
+        return Ok(None);
+    }
+    if primary_only
+        && (!is_primary_chrom(&source_name) || !is_primary_chrom(canon_chrom(&target_name)))
+    {
+        return Ok(None);
+    }
+
+    Ok(Some(ChainHeader {
+        score: parse_i64(parts[1], "chain score")?,
+        source_name,
+        source_pos,
+        target_name,
+        target_size,
+        target_strand,
+        target_pos,
+    }))
+}
+
+fn parse_i64(value: &str, label: &str) -> Result<i64, RuntimeError> {
+    value
+        .parse::<i64>()
+        .map_err(|err| RuntimeError::Io(format!("failed to parse {label} '{value}': {err}")))
+}
+
+fn canon_chrom(name: &str) -> &str {
+    let stripped = name.strip_prefix("chr").unwrap_or(name);
+    if stripped == "M" { "MT" } else { stripped }
+}
+
+fn is_primary_chrom(chrom: &str) -> bool {
+    PRIMARY_CHROMS.contains(&chrom)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const CHAIN: &str = "\
+chain 100 chr1 1000 + 9 30 chr1 1000 + 99 120 1\n\
+10 5 5\n\
+10\n\
+\n\
+chain 90 chr2 1000 + 49 60 chr2 1000 - 100 111 2\n\
+10\n\
+\n\
+chain 80 chr1 1000 + 9 19 chr2 1000 + 0 10 3\n\
+10\n\
+";
+
+    fn compile(text: &str) -> ChainIndex {
+        ChainIndex::from_reader(
+            Assembly::Grch37,
+            Assembly::Grch38,
+            BufReader::new(text.as_bytes()),
+            LiftOverOptions::default(),
+        )
+        .unwrap()
+    }
+
+    #[test]
+    fn compiled_index_interns_targets_and_prefers_higher_scoring_chains() {
+        let chain = compile(CHAIN);
+        assert_eq!(chain.target_names, vec!["1".to_owned(), "2".to_owned()]);
+        assert_eq!(chain.chains.len(), 3);
+        assert_eq!(chain.blocks_by_chrom["1"].chain_ids, vec![0, 2, 0]);
+
+        let lifted = chain
+            .lookup(Assembly::Grch37, Assembly::Grch38, "chr1", 12)
+            .unwrap();
+        assert_eq!(
+            (lifted.chrom.as_str(), lifted.pos, lifted.score),
+            ("1", 102, 100)
+        );
+        assert!(
+            chain
+                .lookup(Assembly::Grch37, Assembly::Grch38, "1", 0)
+                .is_none()
+        );
+    }
+
+    #[test]
+    fn lookup_many_sweep_matches_single_lookups() {
+        let chain = compile(CHAIN);
+        let positions = [-3, 5, 10, 11, 12, 19, 22, 25, 27, 34, 35, 11, 200];
+        let lifted = chain.lookup_many(Assembly::Grch37, Assembly::Grch38, "chr1", &positions);
+        assert_eq!(lifted.len(), positions.len());
+        for (pos, lifted) in positions.iter().zip(&lifted) {
+            assert_eq!(
+                *lifted,
+                chain.lookup(Assembly::Grch37, Assembly::Grch38, "1", *pos)
+            );
+        }
+        assert!(lifted[3].is_some() && lifted[8].is_some());
+        assert_eq!(
+            chain.lookup_many(Assembly::Grch38, Assembly::Grch37, "1", &[11]),
+            vec![None]
+        );
+        assert_eq!(
+            chain.lookup_many(Assembly::Grch37, Assembly::Grch38, "7", &[11, 12]),
+            vec![None, None]
+        );
+    }
+
+    #[test]
+    fn bundled_chain_is_compiled_once() {
+        let first = bundled_grch37_to_grch38_chain().unwrap();
+        let second = bundled_grch37_to_grch38_chain().unwrap();
+        assert!(std::ptr::eq(first, second));
+        assert_eq!(&grch37_to_grch38_chain().unwrap(), first);
+    }
+}
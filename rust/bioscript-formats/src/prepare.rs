@@ -12,6 +12,10 @@ use noodles::{cram, fasta};
 
 use crate::genotype::GenotypeSourceFormat;
 
+mod index_cache;
+
+use index_cache::{lock_cache_entry, source_fingerprint, write_atomically};
+
 #[derive(Debug, Clone, Default)]
 pub struct PrepareRequest {
     pub root: PathBuf,
@@ -153,6 +157,10 @@ fn ensure_alignment_index(path: &Path, cache_dir: &Path) -> Result<PathBuf, Stri
         return Ok(out);
     }
 
+    let _lock = lock_cache_entry(&out)?;
+    if out.exists() {
+        return Ok(out);
+    }
     let index = cram::fs::index(path).map_err(|err| {
         format!(
             "failed to build alignment index {} for {}: {err}",
@@ -160,12 +168,14 @@ fn ensure_alignment_index(path: &Path, cache_dir: &Path) -> Result<PathBuf, Stri
             path.display()
         )
     })?;
-    cram::crai::fs::write(&out, &index).map_err(|err| {
-        format!(
-            "failed to write alignment index {} for {}: {err}",
-            out.display(),
-            path.display()
-        )
+    write_atomically(&out, |temp| {
+        cram::crai::fs::write(temp, &index).map_err(|err| {
+            format!(
+                "failed to write alignment index {} for {}: {err}",
+                out.display(),
+                path.display()
+            )
+        })
     })?;
     Ok(out)
 }
@@ -190,13 +200,19 @@ fn ensure_reference_index(path: &Path, cache_dir: &Path) -> Result<(PathBuf, Pat
         return Ok((path.to_path_buf(), index));
     }
 
-    let cached_reference = cache_dir.join(cache_reference_name(path));
-    if !cached_reference.exists() {
-        create_reference_link(path, &cached_reference)?;
+    // Shared references are cached by content fingerprint rather than by path,
+    // so every participant run that points at the same unchanged FASTA reuses
+    // one link and one `.fai`, and an edited FASTA never reuses a stale index.
+    let cached_reference = cache_dir.join(cache_reference_name(path, &source_fingerprint(path)?));
+    let cached_index = cached_reference_index_path(&cached_reference);
+    if cached_reference.exists() && cached_index.exists() {
+        return Ok((cached_reference, cached_index));
     }
 
-    let cached_index = adjacent_reference_index(&cached_reference)
-        .unwrap_or_else(|| cached_reference_index_path(&cached_reference));
+    let _lock = lock_cache_entry(&cached_reference)?;
+    if !cached_reference.exists() {
+        write_atomically(&cached_reference, |temp| create_reference_link(path, temp))?;
+    }
     if !cached_index.exists() {
         let index = fasta::fs::index(&cached_reference).map_err(|err| {
             format!(
@@ -205,12 +221,14 @@ fn ensure_reference_index(path: &Path, cache_dir: &Path) -> Result<(PathBuf, Pat
                 cached_reference.display()
             )
         })?;
-        fasta::fai::fs::write(&cached_index, &index).map_err(|err| {
-            format!(
-                "failed to write FASTA index {} for {}: {err}",
-                cached_index.display(),
-                cached_reference.display()
-            )
+        write_atomically(&cached_index, |temp| {
+            fasta::fai::fs::write(temp, &index).map_err(|err| {
+                format!(
+                    "failed to write FASTA index {} for {}: {err}",
+                    cached_index.display(),
+                    cached_reference.display()
+                )
+            })
         })?;
     }
 
@@ -272,13 +290,14 @@ fn stable_stem(path: &Path) -> String {
         .replace(['/', ' ', ':'], "_");
     format!("{file_name}-{hash:016x}")
 }
-fn cache_reference_name(path: &Path) -> String {
+
+fn cache_reference_name(path: &Path, fingerprint: &str) -> String {
     let file_name = path
         .file_name()
         .and_then(|name| name.to_str())
         .unwrap_or("reference.fa")
         .replace(['/', ' ', ':'], "_");
-    format!("{}-ref", stable_stem(Path::new(&file_name)))
+    format!("{file_name}-{fingerprint}-ref")
 }
 
 pub fn shell_flags(prepared: &PreparedPaths) -> String {
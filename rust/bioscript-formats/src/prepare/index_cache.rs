@@ -0,0 +1,228 @@
+use std::{
+    fmt::Write as _,
+    fs,
+    io::{Read, Seek, SeekFrom},
+    path::{Path, PathBuf},
+    time::UNIX_EPOCH,
+};
+
+use sha2::{Digest, Sha256};
+
+/// Bytes hashed from the start, middle and end of a source file. Files up to
+/// three samples long are hashed in full.
+const SAMPLE_BYTES: u64 = 64 * 1024;
+
+/// Bumped whenever the fingerprint inputs or the cache layout change.
+const FINGERPRINT_VERSION: &[u8] = b"bioscript-index-cache:1";
+
+/// Content fingerprint of a source file: size, modification time and a
+/// sampled SHA-256 of its bytes. Two paths to the same unchanged file share
+/// one fingerprint, and rewriting a file in place gives it a new one, so an
+/// entry keyed by the fingerprint never outlives the content it indexed.
+pub(super) fn source_fingerprint(path: &Path) -> Result<String, String> {
+    let mut file =
+        fs::File::open(path).map_err(|err| format!("failed to open {}: {err}", path.display()))?;
+    let metadata = file
+        .metadata()
+        .map_err(|err| format!("failed to stat {}: {err}", path.display()))?;
+    let size = metadata.len();
+    let mtime = metadata
+        .modified()
+        .ok()
+        .and_then(|time| time.duration_since(UNIX_EPOCH).ok())
+        .map_or(0, |elapsed| elapsed.as_nanos());
+
+    let mut hasher = Sha256::new();
+    hasher.update(FINGERPRINT_VERSION);
+    hasher.update(size.to_le_bytes());
+    hasher.update(mtime.to_le_bytes());
+    let (offsets, sample_len) = if size <= SAMPLE_BYTES * 3 {
+        (vec![0], size)
+    } else {
+        let middle = size / 2 - SAMPLE_BYTES / 2;
+        (vec![0, middle, size - SAMPLE_BYTES], SAMPLE_BYTES)
+    };
+    let mut buffer = Vec::new();
+    for offset in offsets {
+        buffer.clear();
+        file.seek(SeekFrom::Start(offset))
+            .and_then(|_| (&mut file).take(sample_len).read_to_end(&mut buffer))
+            .map_err(|err| format!("failed to read {}: {err}", path.display()))?;
+        hasher.update(&buffer);
+    }
+
+    Ok(hasher.finalize()[..16]
+        .iter()
+        .fold(String::with_capacity(32), |mut out, byte| {
+            let _ = write!(out, "{byte:02x}");
+            out
+        }))
+}
+
+/// Exclusive lock on one cache entry, held until the guard is dropped.
+/// Concurrent `prepare` runs sharing a cache wait here instead of building the
+/// same index twice or replacing each other's output. Dropping the guard
+/// removes the `.lock` sibling before releasing the lock, so the cache
+/// directory only holds finished entries once a run completes.
+pub(super) struct CacheEntryLock {
+    path: PathBuf,
+    _file: fs::File,
+}
+
+impl Drop for CacheEntryLock {
+    fn drop(&mut self) {
+        let _ = fs::remove_file(&self.path);
+    }
+}
+
+pub(super) fn lock_cache_entry(target: &Path) -> Result<CacheEntryLock, String> {
+    let path = sibling_path(target, "lock");
+    loop {
+        let file = fs::OpenOptions::new()
+            .create(true)
+            .truncate(false)
+            .write(true)
+            .open(&path)
+            .map_err(|err| format!("failed to open cache lock {}: {err}", path.display()))?;
+        file.lock()
+            .map_err(|err| format!("failed to lock cache entry {}: {err}", path.display()))?;
+        // A previous holder may have removed the lock file while we waited on
+        // it; that lock no longer guards the entry, so open the current one.
+        if lock_file_is_current(&file, &path) {
+            return Ok(CacheEntryLock { path, _file: file });
+        }
+    }
+}
+
+#[cfg(unix)]
+fn lock_file_is_current(file: &fs::File, path: &Path) -> bool {
+    use std::os::unix::fs::MetadataExt;
+
+    match (file.metadata(), fs::metadata(path)) {
+        (Ok(held), Ok(current)) => held.dev() == current.dev() && held.ino() == current.ino(),
+        _ => false,
+    }
+}
+
+#[cfg(not(unix))]
+fn lock_file_is_current(_file: &fs::File, path: &Path) -> bool {
+    // Open files cannot be removed here, so the path can only disappear, not
+    // be replaced, while another run waits on it.
+    path.exists()
+}
+
+/// Run `write` against a temporary sibling of `target`, then rename it into
+/// place, so readers only ever see a missing or a complete cache file.
+pub(super) fn write_atomically(
+    target: &Path,
+    write: impl FnOnce(&Path) -> Result<(), String>,
+) -> Result<(), String> {
+    let temp = sibling_path(target, &format!("{}.tmp", std::process::id()));
+    if let Err(err) = write(&temp) {
+        let _ = fs::remove_file(&temp);
+        return Err(err);
+    }
+    fs::rename(&temp, target).map_err(|err| {
+        let _ = fs::remove_file(&temp);
+        format!(
+            "failed to move {} into cache as {}: {err}",
+            temp.display(),
+            target.display()
+        )
+    })
+}
+
+fn sibling_path(target: &Path, suffix: &str) -> PathBuf {
+    let mut name = target.as_os_str().to_owned();
+    name.push(".");
+    name.push(suffix);
+    PathBuf::from(name)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::time::SystemTime;
+
+    fn temp_dir(name: &str) -> PathBuf {
+        let unique = SystemTime::now()
+            .duration_since(UNIX_EPOCH)
+            .unwrap()
+            .as_nanos();
+        let dir = std::env::temp_dir().join(format!(
+            "bioscript-index-cache-{name}-{}-{unique}",
+            std::process::id()
+        ));
+        fs::create_dir_all(&dir).unwrap();
+        dir
+    }
+
+    #[test]
+    fn fingerprint_follows_sampled_content_and_size() {
+        let dir = temp_dir("fingerprint");
+        let path = dir.join("ref.fa");
+        let mut bytes = vec![b'A'; usize::try_from(SAMPLE_BYTES * 5).unwrap()];
+        fs::write(&path, &bytes).unwrap();
+        let first = source_fingerprint(&path).unwrap();
+        assert_eq!(first.len(), 32);
+        assert_eq!(source_fingerprint(&path).unwrap(), first);
+
+        let mtime = fs::metadata(&path).unwrap().modified().unwrap();
+        let middle = bytes.len() / 2;
+        bytes[middle] = b'C';
+        fs::write(&path, &bytes).unwrap();
+        fs::File::options()
+            .write(true)
+            .open(&path)
+            .unwrap()
+            .set_modified(mtime)
+            .unwrap();
+        assert_ne!(source_fingerprint(&path).unwrap(), first);
+
+        fs::remove_dir_all(dir).unwrap();
+    }
+
+    #[test]
+    fn failed_atomic_write_leaves_no_partial_file() {
+        let dir = temp_dir("atomic");
+        let target = dir.join("ref.fa.fai");
+        let err = write_atomically(&target, |temp| {
+            fs::write(temp, "partial").unwrap();
+            Err("index failed".to_owned())
+        })
+        .unwrap_err();
+        assert_eq!(err, "index failed");
+        assert!(!target.exists());
+        assert_eq!(fs::read_dir(&dir).unwrap().count(), 0);
+
+        write_atomically(&target, |temp| {
+            fs::write(temp, "chr1\t4\t6\t4\t5\n").map_err(|err| err.to_string())
+        })
+        .unwrap();
+        assert_eq!(fs::read_to_string(&target).unwrap(), "chr1\t4\t6\t4\t5\n");
+
+        fs::remove_dir_all(dir).unwrap();
+    }
+
+    #[test]
+    fn cache_entry_lock_is_removed_once_released() {
+        let dir = temp_dir("lock");
+        let target = dir.join("ref.fa.fai");
+        let lock = lock_cache_entry(&target).unwrap();
+        assert!(sibling_path(&target, "lock").exists());
+        write_atomically(&target, |temp| {
+            fs::write(temp, "chr1\t4\t6\t4\t5\n").map_err(|err| err.to_string())
+        })
+        .unwrap();
+        drop(lock);
+
+        let entries = fs::read_dir(&dir)
+            .unwrap()
+            .map(|entry| entry.unwrap().file_name())
+            .collect::<Vec<_>>();
+        assert_eq!(entries, vec![target.file_name().unwrap().to_owned()]);
+        drop(lock_cache_entry(&target).unwrap());
+
+        fs::remove_dir_all(dir).unwrap();
+    }
+}
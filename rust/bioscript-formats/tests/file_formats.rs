@@ -72,8 +72,15 @@ fn zip_bytes(entry_name: &str, contents: &[u8]) -> Vec<u8> {
     writer.finish().unwrap().into_inner()
 }
 
+#[path = "support/delimited_fixture.rs"]
+mod delimited_fixture;
+
+use delimited_fixture::enlarged_fixture;
+
 #[path = "file_formats/alignment.rs"]
 mod alignment_tests;
+#[path = "file_formats/bam.rs"]
+mod bam_tests;
 #[path = "file_formats/basic.rs"]
 mod basic;
 #[path = "file_formats/bcf.rs"]
@@ -0,0 +1,265 @@
+use std::{num::NonZero, path::Path, sync::Arc};
+
+use bioscript_core::{GenomicLocus, ProfileCounter, ProfileCounters, ProfileScope};
+use noodles::{
+    bam,
+    core::Position,
+    sam::{
+        self,
+        alignment::{
+            RecordBuf,
+            io::Write as _,
+            record::{
+                Flags,
+                cigar::{Op, op::Kind},
+            },
+            record_buf::{Cigar, Sequence},
+        },
+        header::record::value::{
+            Map,
+            map::{
+                Header, ReferenceSequence,
+                header::{sort_order::COORDINATE, tag::SORT_ORDER},
+            },
+        },
+    },
+};
+
+use super::*;
+
+/// Reads per site; the first half carry the alternate allele.
+const READS_PER_SITE: usize = 10;
+
+/// Write `dir/sample.bam` and its `.bai`: ten 40 bp reads over each of four
+/// sweep clusters on `chr_test` — two SNPs ten bases apart at 1000/1010, a
+/// 2 bp deletion after 4999, a 2 bp insertion after 9000 and a lone SNP at
+/// 15000. Returns the BAM and index paths.
+fn write_clustered_bam(dir: &Path) -> (PathBuf, PathBuf) {
+    let header = sam::Header::builder()
+        .set_header(
+            Map::<Header>::builder()
+                .insert(SORT_ORDER, COORDINATE)
+                .build()
+                .unwrap(),
+        )
+        .add_reference_sequence(
+            "chr_test",
+            Map::<ReferenceSequence>::new(NonZero::new(20_000).unwrap()),
+        )
+        .build();
+
+    let mut records = Vec::new();
+    for read in 0..READS_PER_SITE {
+        let alt = read < READS_PER_SITE / 2;
+        let mut bases = vec![b'A'; 40];
+        bases[10] = if alt { b'G' } else { b'A' };
+        bases[20] = b'T';
+        records.push(bam_read(
+            &format!("pair{read}"),
+            990,
+            vec![Op::new(Kind::Match, 40)],
+            bases,
+        ));
+    }
+    for read in 0..READS_PER_SITE {
+        let cigar = if read < READS_PER_SITE / 2 {
+            vec![
+                Op::new(Kind::Match, 20),
+                Op::new(Kind::Deletion, 2),
+                Op::new(Kind::Match, 20),
+            ]
+        } else {
+            vec![Op::new(Kind::Match, 40)]
+        };
+        records.push(bam_read(&format!("del{read}"), 4980, cigar, vec![b'C'; 40]));
+    }
+    for read in 0..READS_PER_SITE {
+        let (cigar, len) = if read < READS_PER_SITE / 2 {
+            (
+                vec![
+                    Op::new(Kind::Match, 21),
+                    Op::new(Kind::Insertion, 2),
+                    Op::new(Kind::Match, 19),
+                ],
+                42,
+            )
+        } else {
+            (vec![Op::new(Kind::Match, 40)], 40)
+        };
+        records.push(bam_read(
+            &format!("ins{read}"),
+            8980,
+            cigar,
+            vec![b'C'; len],
+        ));
+    }
+    for read in 0..READS_PER_SITE {
+        let mut bases = vec![b'A'; 40];
+        bases[10] = if read % 2 == 0 { b'G' } else { b'A' };
+        records.push(bam_read(
+            &format!("lone{read}"),
+            14_990,
+            vec![Op::new(Kind::Match, 40)],
+            bases,
+        ));
+    }
+
+    let bam_path = dir.join("sample.bam");
+    let mut writer = fs::File::create(&bam_path)
+        .map(bam::io::Writer::new)
+        .unwrap();
+    writer.write_header(&header).unwrap();
+    for record in &records {
+        writer.write_alignment_record(&header, record).unwrap();
+    }
+    writer.try_finish().unwrap();
+    drop(writer);
+
+    let bai_path = dir.join("sample.bam.bai");
+    let bai = alignment::generate_bam_bai_bytes(&fs::read(&bam_path).unwrap()).unwrap();
+    fs::write(&bai_path, bai).unwrap();
+    (bam_path, bai_path)
+}
+
+fn bam_read(name: &str, start: usize, cigar: Vec<Op>, bases: Vec<u8>) -> RecordBuf {
+    RecordBuf::builder()
+        .set_name(name)
+        .set_flags(Flags::empty())
+        .set_reference_sequence_id(0)
+        .set_alignment_start(Position::try_from(start).unwrap())
+        .set_cigar(Cigar::from(cigar))
+        .set_sequence(Sequence::from(bases))
+        .build()
+}
+
+fn locus(start: i64, end: i64) -> GenomicLocus {
+    GenomicLocus {
+        chrom: "chr_test".to_owned(),
+        start,
+        end,
+    }
+}
+
+/// One variant per fixture site, listed out of position order.
+fn clustered_variants() -> Vec<VariantSpec> {
+    let snp = |rsid: &str, position: i64, alternate: &str| VariantSpec {
+        rsids: vec![rsid.to_owned()],
+        grch38: Some(locus(position, position)),
+        reference: Some("A".to_owned()),
+        alternate: Some(alternate.to_owned()),
+        kind: Some(VariantKind::Snp),
+        ..VariantSpec::default()
+    };
+    vec![
+        snp("rs_lone", 15_000, "G"),
+        VariantSpec {
+            rsids: vec!["rs_ins".to_owned()],
+            grch38: Some(locus(9_000, 9_000)),
+            reference: Some("C".to_owned()),
+            alternate: Some("CCC".to_owned()),
+            kind: Some(VariantKind::Insertion),
+            ..VariantSpec::default()
+        },
+        snp("rs_pair_a", 1_000, "G"),
+        VariantSpec {
+            rsids: vec!["rs_del".to_owned()],
+            grch38: Some(locus(5_000, 5_001)),
+            kind: Some(VariantKind::Deletion),
+            deletion_length: Some(2),
+            ..VariantSpec::default()
+        },
+        snp("rs_pair_b", 1_010, "T"),
+    ]
+}
+
+fn bam_store(bam: &Path, bai: &Path, workers: usize) -> GenotypeStore {
+    GenotypeStore::from_file_with_options(
+        bam,
+        &GenotypeLoadOptions {
+            format: Some(GenotypeSourceFormat::Bam),
+            input_index: Some(bai.to_path_buf()),
+            bam_lookup_workers: Some(workers),
+            ..GenotypeLoadOptions::default()
+        },
+    )
+    .unwrap()
+}
+
+#[test]
+fn threaded_bam_lookups_match_the_serial_sweep() {
+    let dir = temp_dir("bam-threaded");
+    let (bam, bai) = write_clustered_bam(&dir);
+    let variants = clustered_variants();
+
+    let serial = bam_store(&bam, &bai, 1).lookup_variants(&variants).unwrap();
+    assert_eq!(serial.len(), variants.len());
+    assert_eq!(serial[2].matched_rsid.as_deref(), Some("rs_pair_a"));
+    assert_eq!(
+        (serial[2].ref_count, serial[2].alt_count, serial[2].depth),
+        (Some(5), Some(5), Some(10))
+    );
+    assert_eq!(serial[4].alt_count, Some(10));
+
+    let threaded = bam_store(&bam, &bai, 3);
+    let counters = Arc::new(ProfileCounters::new());
+    let _scope = ProfileScope::enter(Arc::clone(&counters));
+    assert_eq!(threaded.lookup_variants(&variants).unwrap(), serial);
+    let workers = counters.get(ProfileCounter::WorkerThreads);
+    assert!(workers >= 1, "no BAM lookup worker ran");
+
+    // The second call runs on the workers' pooled readers.
+    assert_eq!(threaded.lookup_variants(&variants).unwrap(), serial);
+    assert_eq!(counters.get(ProfileCounter::WorkerThreads), workers * 2);
+
+    fs::remove_dir_all(dir).unwrap();
+}
+
+#[test]
+fn clustered_sweep_matches_per_variant_lookups() {
+    let dir = temp_dir("bam-sweep");
+    let (bam, bai) = write_clustered_bam(&dir);
+    let variants = clustered_variants();
+    let open = || {
+        let index = alignment::parse_bai_bytes(&fs::read(&bai).unwrap()).unwrap();
+        alignment::build_bam_indexed_reader_from_reader(fs::File::open(&bam).unwrap(), index)
+            .unwrap()
+    };
+
+    let swept =
+        bioscript_formats::observe_bam_variants(&mut open(), "sample.bam", &variants).unwrap();
+    let mut reader = open();
+    let per_variant = variants
+        .iter()
+        .map(|variant| {
+            bioscript_formats::observe_bam_variant(&mut reader, "sample.bam", variant).unwrap()
+        })
+        .collect::<Vec<_>>();
+    assert_eq!(swept, per_variant);
+
+    let counts = swept
+        .iter()
+        .map(|observation| {
+            (
+                observation.matched_rsid.clone().unwrap(),
+                observation.ref_count,
+                observation.alt_count,
+                observation.depth,
+            )
+        })
+        .collect::<Vec<_>>();
+    let expected = |rsid: &str, ref_count: u32, alt_count: u32| {
+        (rsid.to_owned(), Some(ref_count), Some(alt_count), Some(10))
+    };
+    assert_eq!(
+        counts,
+        vec![
+            expected("rs_lone", 5, 5),
+            expected("rs_ins", 5, 5),
+            expected("rs_pair_a", 5, 5),
+            expected("rs_del", 5, 5),
+            expected("rs_pair_b", 0, 10),
+        ]
+    );
+
+    fs::remove_dir_all(dir).unwrap();
+}
@@ -357,3 +357,108 @@ fn pc0001_gsgt_matches_ddna_real_files() {
          (compared={compared} mismatch={mismatch})",
     );
 }
+
+/// Follow each data row after the first with a no-call replicate of the row
+/// before it (`r0, r1, r0', r2, r1', ...`), so every line boundary, and
+/// therefore every chunk cut, falls inside a GSGT replicate group. Rows
+/// without an rsID are dropped so every group is covered by a probe.
+fn interleave_no_call_replicates(text: &str, head_lines: usize) -> String {
+    let lines = text.lines().collect::<Vec<_>>();
+    let (head, body) = lines.split_at(head_lines);
+    let body = body
+        .iter()
+        .copied()
+        .filter(|line| {
+            line.split('\t')
+                .nth(2)
+                .is_some_and(|name| name.contains("rs1"))
+        })
+        .collect::<Vec<_>>();
+    let no_call = |line: &str| {
+        let mut fields = line.split('\t').collect::<Vec<_>>();
+        fields[10] = "-";
+        fields[11] = "-";
+        fields.join("\t")
+    };
+    let mut out = head
+        .iter()
+        .map(|line| format!("{line}\n"))
+        .collect::<String>();
+    for (index, line) in body.iter().enumerate() {
+        out.push_str(line);
+        out.push('\n');
+        if let Some(previous) = index.checked_sub(1) {
+            out.push_str(&no_call(body[previous]));
+            out.push('\n');
+        }
+    }
+    if let Some(last) = body.last() {
+        out.push_str(&no_call(last));
+        out.push('\n');
+    }
+    out
+}
+
+#[test]
+fn parallel_text_parsing_matches_sequential_load() {
+    let cases = [
+        ("genesforgood_sample.txt", 4, 2, Assembly::Grch37),
+        ("ancestrydna_v2_sample.txt", 7, 2, Assembly::Grch37),
+        ("carigenetics_gsgt_sample.txt", 11, 5, Assembly::Grch38),
+    ];
+    for (name, head_lines, pos_col, expected_assembly) in cases {
+        let (mut text, probes) = enlarged_fixture(name, head_lines, pos_col, 3 * 1024 * 1024);
+        if name.contains("gsgt") {
+            text = interleave_no_call_replicates(&text, head_lines);
+        }
+        let load = |workers| {
+            GenotypeStore::from_bytes_with_options(
+                name,
+                text.as_bytes(),
+                &GenotypeLoadOptions {
+                    format: Some(GenotypeSourceFormat::Text),
+                    text_parse_workers: Some(workers),
+                    ..GenotypeLoadOptions::default()
+                },
+            )
+            .unwrap()
+        };
+        let sequential = load(1);
+        let parallel = load(4);
+
+        assert_eq!(sequential.assembly(), Some(expected_assembly), "{name}");
+        assert_eq!(parallel.assembly(), sequential.assembly(), "{name}");
+        assert!(probes.len() > 10_000, "{name}: {} probes", probes.len());
+        for (rsid, chrom, pos) in &probes {
+            let locus = bioscript_core::GenomicLocus {
+                chrom: chrom.clone(),
+                start: *pos,
+                end: *pos,
+            };
+            let by_rsid = VariantSpec {
+                rsids: vec![rsid.clone()],
+                ..VariantSpec::default()
+            };
+            let by_locus = VariantSpec {
+                grch37: Some(locus.clone()),
+                grch38: Some(locus),
+                ..VariantSpec::default()
+            };
+            for spec in [by_rsid, by_locus] {
+                assert_eq!(
+                    sequential.lookup_variant(&spec).unwrap(),
+                    parallel.lookup_variant(&spec).unwrap(),
+                    "{name}: {rsid}"
+                );
+            }
+        }
+        if name.contains("gsgt") {
+            // The first fixture row is called GG; its no-call replicate,
+            // parsed after it, must not override the call.
+            assert_eq!(
+                parallel.get("rs1000009000001").unwrap().as_deref(),
+                Some("GG")
+            );
+        }
+    }
+}
@@ -215,6 +215,10 @@ fn indexed_vcf_missing_deletion_imputes_reference_when_region_has_unrelated_reco
     bgzf_writer.write_all(vcf_text.as_bytes()).unwrap();
     let bgzf_vcf = bgzf_writer.finish().unwrap();
     let tbi = alignment::generate_vcf_tbi_bytes(&bgzf_vcf).unwrap();
+    assert_eq!(
+        alignment::generate_vcf_tbi_reader(bgzf_vcf.as_slice()).unwrap(),
+        tbi
+    );
     fs::write(&path, bgzf_vcf).unwrap();
     fs::write(&index_path, tbi).unwrap();
 
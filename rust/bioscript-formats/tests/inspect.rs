@@ -7,8 +7,8 @@ use std::{
 
 use bioscript_core::Assembly;
 use bioscript_formats::{
-    DetectedKind, FileContainer, InferredSex, InspectOptions, SexDetectionConfidence,
-    inspect_bytes, inspect_file,
+    AlignmentSexMethod, DetectedKind, FileContainer, InferredSex, InspectOptions,
+    SexDetectionConfidence, inspect_bytes, inspect_file,
 };
 use zip::write::SimpleFileOptions;
 
@@ -570,6 +570,7 @@ fn na06985_cram_sex_detection_uses_depth_ratios_not_y_presence() {
             reference_file: Some(reference_file),
             reference_index: Some(reference_index),
             detect_sex: true,
+            alignment_sex_method: AlignmentSexMethod::Decode,
         },
     )
     .unwrap();
@@ -289,6 +289,77 @@ fn cached_fasta_reference_and_index_are_reused() {
     assert!(shell_flags(&second).contains("--reference-file"));
 }
 
+#[test]
+fn shared_reference_is_indexed_once_across_participant_roots() {
+    let shared = temp_dir("shared-fasta-reference");
+    let cwd = temp_dir("shared-fasta-cwd");
+    let reference = shared.join("ref.fa");
+    fs::write(&reference, b">chr1\nACGT\n").unwrap();
+
+    let prepared = std::thread::scope(|scope| {
+        let workers = (0..4)
+            .map(|_| {
+                scope.spawn(|| {
+                    let mut req = request(shared.clone(), cwd.clone(), PathBuf::from("cache"));
+                    req.reference_file = Some(reference.display().to_string());
+                    prepare_indexes(&req).unwrap()
+                })
+            })
+            .collect::<Vec<_>>();
+        workers
+            .into_iter()
+            .map(|worker| worker.join().unwrap())
+            .collect::<Vec<_>>()
+    });
+    for other in &prepared[1..] {
+        assert_eq!(other.reference_file, prepared[0].reference_file);
+        assert_eq!(other.reference_index, prepared[0].reference_index);
+    }
+    let cached = fs::read_dir(cwd.join("cache"))
+        .unwrap()
+        .map(|entry| entry.unwrap().file_name().to_string_lossy().into_owned())
+        .filter(|name| !name.ends_with(".lock"))
+        .collect::<Vec<_>>();
+    assert_eq!(cached.len(), 2, "{cached:?}");
+    assert!(
+        fs::read_to_string(prepared[0].reference_index.as_ref().unwrap())
+            .unwrap()
+            .starts_with("chr1\t4\t")
+    );
+}
+
+#[test]
+fn cached_reference_is_keyed_by_content_not_file_name() {
+    let first_root = temp_dir("content-key-first");
+    let second_root = temp_dir("content-key-second");
+    let cwd = temp_dir("content-key-cwd");
+    fs::write(first_root.join("ref.fa"), b">chr1\nACGT\n").unwrap();
+    fs::write(second_root.join("ref.fa"), b">chr2\nACGTACGT\n").unwrap();
+
+    let mut req = request(first_root.clone(), cwd.clone(), PathBuf::from("cache"));
+    req.reference_file = Some("ref.fa".to_owned());
+    let first = prepare_indexes(&req).unwrap();
+    req.root = second_root;
+    let second = prepare_indexes(&req).unwrap();
+
+    assert_ne!(first.reference_index, second.reference_index);
+    assert!(
+        fs::read_to_string(second.reference_index.unwrap())
+            .unwrap()
+            .starts_with("chr2\t8\t")
+    );
+
+    fs::write(first_root.join("ref.fa"), b">chr3\nAC\n").unwrap();
+    req.root = first_root;
+    let edited = prepare_indexes(&req).unwrap();
+    assert_ne!(edited.reference_index, first.reference_index);
+    assert!(
+        fs::read_to_string(edited.reference_index.unwrap())
+            .unwrap()
+            .starts_with("chr3\t2\t")
+    );
+}
+
 #[test]
 fn cached_cram_index_is_reused_when_present() {
     let root = temp_dir("cached-cram-root");
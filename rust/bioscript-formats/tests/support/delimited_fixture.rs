@@ -0,0 +1,59 @@
+//! Large delimited genotype inputs grown from the `tests/fixtures` samples,
+//! shared by the `file_formats` tests and the `delimited_load` bench.
+
+use std::{fs, path::PathBuf};
+
+/// Repeat the data rows of a fixture until the text passes `min_bytes`. Each
+/// copy prefixes rsID digits with a fixed-width copy number and shifts
+/// non-zero positions, so every copy adds distinct rows while replicate
+/// groups stay adjacent. Copy 0 keeps the fixture positions, so the
+/// fixture's anchor SNPs still vote on the assembly.
+///
+/// Returns the text and a `(rsid, chrom, position)` probe per rsID row.
+pub fn enlarged_fixture(
+    name: &str,
+    head_lines: usize,
+    pos_col: usize,
+    min_bytes: usize,
+) -> (String, Vec<(String, String, i64)>) {
+    let path = PathBuf::from(env!("CARGO_MANIFEST_DIR"))
+        .join("tests/fixtures")
+        .join(name);
+    let fixture = fs::read_to_string(path).unwrap();
+    let lines = fixture.lines().collect::<Vec<_>>();
+    let (head, body) = lines.split_at(head_lines);
+    let mut text = head
+        .iter()
+        .map(|line| format!("{line}\n"))
+        .collect::<String>();
+    let mut probes = Vec::new();
+    let mut copy = 0_i64;
+    while text.len() < min_bytes {
+        for line in body {
+            let mut fields = line
+                .split('\t')
+                .map(|field| match field.find("rs") {
+                    Some(at) if field[at + 2..].starts_with(|c: char| c.is_ascii_digit()) => {
+                        format!("{}rs1{copy:05}{}", &field[..at], &field[at + 2..])
+                    }
+                    _ => field.to_owned(),
+                })
+                .collect::<Vec<_>>();
+            let pos = fields[pos_col].parse::<i64>().unwrap_or(0);
+            if pos != 0 {
+                fields[pos_col] = (pos + copy * 100_000).to_string();
+            }
+            if let Some(rsid) = fields.iter().find(|field| field.starts_with("rs1")) {
+                probes.push((
+                    rsid.clone(),
+                    fields[pos_col - 1].clone(),
+                    pos + copy * 100_000,
+                ));
+            }
+            text.push_str(&fields.join("\t"));
+            text.push('\n');
+        }
+        copy += 1;
+    }
+    (text, probes)
+}
@@ -0,0 +1,188 @@
+//! Compares rendering report artifacts into memory against streaming them to
+//! a file, for a whole-catalogue sized observation table.
+//!
+//! Run with `cargo bench -p bioscript-reporting --bench report_render`, and
+//! optionally pass the observation count (default 50000).
+
+use std::{
+    alloc::{GlobalAlloc, Layout, System},
+    fs,
+    io::{self, Write as _},
+    path::Path,
+    sync::atomic::{AtomicUsize, Ordering},
+    time::{Duration, Instant},
+};
+
+use bioscript_reporting::AppObservation;
+
+/// System allocator that tracks live and peak heap bytes.
+struct PeakAlloc;
+
+static LIVE: AtomicUsize = AtomicUsize::new(0);
+static PEAK: AtomicUsize = AtomicUsize::new(0);
+
+unsafe impl GlobalAlloc for PeakAlloc {
+    unsafe fn alloc(&self, layout: Layout) -> *mut u8 {
+        let ptr = unsafe { System.alloc(layout) };
+        if !ptr.is_null() {
+            let live = LIVE.fetch_add(layout.size(), Ordering::Relaxed) + layout.size();
+            PEAK.fetch_max(live, Ordering::Relaxed);
+        }
+        ptr
+    }
+
+    unsafe fn dealloc(&self, ptr: *mut u8, layout: Layout) {
+        unsafe { System.dealloc(ptr, layout) };
+        LIVE.fetch_sub(layout.size(), Ordering::Relaxed);
+    }
+
+    unsafe fn realloc(&self, ptr: *mut u8, layout: Layout, new_size: usize) -> *mut u8 {
+        let new_ptr = unsafe { System.realloc(ptr, layout, new_size) };
+        if !new_ptr.is_null() {
+            let live = LIVE.fetch_add(new_size, Ordering::Relaxed) + new_size;
+            PEAK.fetch_max(live, Ordering::Relaxed);
+            LIVE.fetch_sub(layout.size(), Ordering::Relaxed);
+        }
+        new_ptr
+    }
+}
+
+#[global_allocator]
+static ALLOCATOR: PeakAlloc = PeakAlloc;
+
+fn main() {
+    let count = std::env::args()
+        .skip(1)
+        .find_map(|arg| arg.parse::<usize>().ok())
+        .unwrap_or(50_000);
+    let observations = (0..count).map(observation).collect::<Vec<_>>();
+    let reports = vec![report(&observations)];
+    let dir = std::env::temp_dir().join(format!("bioscript-report-bench-{}", std::process::id()));
+    fs::create_dir_all(&dir).unwrap();
+
+    println!("{count} observations");
+    println!(
+        "{:<32} {:>12} {:>16}",
+        "artifact", "latency", "peak heap delta"
+    );
+    measure("index.html (in memory)", || {
+        let html = bioscript_reporting::render_app_html_document(&observations, &reports).unwrap();
+        fs::write(dir.join("memory.html"), html).unwrap();
+    });
+    measure("index.html (streamed)", || {
+        bioscript_reporting::write_app_html_document(
+            output(&dir.join("streamed.html")),
+            &observations,
+            &reports,
+        )
+        .unwrap();
+    });
+    measure("observations.tsv (in memory)", || {
+        let tsv = bioscript_reporting::render_observations_tsv(&observations);
+        fs::write(dir.join("memory.tsv"), tsv).unwrap();
+    });
+    measure("observations.tsv (streamed)", || {
+        bioscript_reporting::write_observations_tsv(
+            output(&dir.join("streamed.tsv")),
+            &observations,
+        )
+        .unwrap();
+    });
+    measure("observations.jsonl (in memory)", || {
+        let jsonl = bioscript_reporting::render_jsonl(&observations).unwrap();
+        fs::write(dir.join("memory.jsonl"), jsonl).unwrap();
+    });
+    measure("observations.jsonl (streamed)", || {
+        bioscript_reporting::write_jsonl(output(&dir.join("streamed.jsonl")), &observations)
+            .unwrap();
+    });
+
+    assert_eq!(
+        fs::read(dir.join("memory.html")).unwrap(),
+        fs::read(dir.join("streamed.html")).unwrap()
+    );
+    fs::remove_dir_all(dir).unwrap();
+}
+
+#[allow(clippy::cast_precision_loss)]
+fn measure(label: &str, run: impl Fn()) {
+    run();
+    let mut best = Duration::MAX;
+    let mut peak = 0;
+    for _ in 0..5 {
+        let baseline = LIVE.load(Ordering::Relaxed);
+        PEAK.store(baseline, Ordering::Relaxed);
+        let started = Instant::now();
+        run();
+        best = best.min(started.elapsed());
+        peak = peak.max(PEAK.load(Ordering::Relaxed) - baseline);
+    }
+    let _ = writeln!(
+        io::stdout(),
+        "{label:<32} {:>10.1}ms {:>13.1} MiB",
+        best.as_secs_f64() * 1000.0,
+        peak as f64 / (1024.0 * 1024.0)
+    );
+}
+
+fn output(path: &Path) -> io::BufWriter<fs::File> {
+    io::BufWriter::new(fs::File::create(path).unwrap())
+}
+
+fn observation(index: usize) -> AppObservation {
+    let outcome = ["variant", "reference", "unknown"][index % 3];
+    let position = i64::try_from(1_000 + index).unwrap();
+    AppObservation {
+        participant_id: "P001".to_owned(),
+        assay_id: "catalogue".to_owned(),
+        assay_version: "1.0",
+        variant_key: format!("rs{index}"),
+        variant_path: format!("variants/rs{index}.yaml"),
+        rsid: Some(format!("rs{index}")),
+        gene: "GENE".to_owned(),
+        assembly: Some("grch38".to_owned()),
+        chrom: "1".to_owned(),
+        pos_start: Some(position),
+        pos_end: Some(position),
+        ref_allele: "G".to_owned(),
+        alt: "A".to_owned(),
+        alts: vec!["A".to_owned()],
+        kind: "snv".to_owned(),
+        match_status: "matched",
+        coverage_status: "covered",
+        call_status: if outcome == "unknown" {
+            "no_call"
+        } else {
+            "called"
+        },
+        genotype: "G/A".to_owned(),
+        genotype_display: "G/A".to_owned(),
+        zygosity: "het".to_owned(),
+        outcome,
+        evidence_type: "genotype_text",
+        evidence_raw: "G/A".to_owned(),
+        source: serde_json::json!({
+            "label": "dbSNP",
+            "url": format!("https://www.ncbi.nlm.nih.gov/snp/rs{index}"),
+        }),
+        ..AppObservation::default()
+    }
+}
+
+fn report(observations: &[AppObservation]) -> serde_json::Value {
+    let derived_from = observations
+        .iter()
+        .map(|item| item.variant_key.as_str())
+        .collect::<Vec<_>>();
+    serde_json::json!({
+        "schema": "bioscript:report:1.0",
+        "participant_id": "P001",
+        "assay_id": "catalogue",
+        "manifest": {"name": "catalogue", "label": "Whole catalogue"},
+        "input": {"file_name": "sample.txt", "file_path": "/data/sample.txt"},
+        "derived_from": derived_from,
+        "analyses": [],
+        "findings": [],
+        "provenance": [],
+    })
+}
@@ -1,3 +1,9 @@
+use std::io;
+
+use serde::Serialize;
+
+use crate::AppObservation;
+
 #[derive(Clone, Debug)]
 pub struct ReportArtifactTexts {
     pub observations_tsv: String,
@@ -15,7 +21,7 @@ pub fn render_input_report_artifact_texts(
 }
 
 pub fn render_report_artifact_texts(
-    observations: &[serde_json::Value],
+    observations: &[AppObservation],
     analyses: &[serde_json::Value],
     reports: &[serde_json::Value],
 ) -> Result<ReportArtifactTexts, String> {
@@ -33,28 +39,52 @@ pub fn standard_text_output() -> String {
         .to_owned()
 }
 
-pub fn render_observations_tsv(observations: &[serde_json::Value]) -> String {
-    let mut out = bioscript_core::OBSERVATION_TSV_HEADERS.join("\t");
-    out.push('\n');
+pub fn render_observations_tsv(observations: &[AppObservation]) -> String {
+    let mut out = Vec::new();
+    // Writing to a Vec cannot fail, and every field is a UTF-8 string.
+    let _ = write_observations_tsv(&mut out, observations);
+    String::from_utf8(out).unwrap_or_default()
+}
+
+/// Stream `observations.tsv` to `writer` one row at a time.
+pub fn write_observations_tsv<W: io::Write>(
+    mut writer: W,
+    observations: &[AppObservation],
+) -> Result<(), String> {
+    let write_err = |err: io::Error| format!("failed to write observations TSV: {err}");
+    writeln!(
+        writer,
+        "{}",
+        bioscript_core::OBSERVATION_TSV_HEADERS.join("\t")
+    )
+    .map_err(write_err)?;
     for observation in observations {
-        let line = bioscript_core::OBSERVATION_TSV_HEADERS
-            .iter()
-            .map(|header| json_field_as_tsv(observation.get(*header)))
-            .collect::<Vec<_>>()
-            .join("\t");
-        out.push_str(&line);
-        out.push('\n');
+        for (index, header) in bioscript_core::OBSERVATION_TSV_HEADERS.iter().enumerate() {
+            if index > 0 {
+                writer.write_all(b"\t").map_err(write_err)?;
+            }
+            writer
+                .write_all(observation.field(header).to_tsv().as_bytes())
+                .map_err(write_err)?;
+        }
+        writer.write_all(b"\n").map_err(write_err)?;
     }
-    out
+    writer.flush().map_err(write_err)
 }
 
-pub fn render_jsonl(rows: &[serde_json::Value]) -> Result<String, String> {
-    let mut out = String::new();
+pub fn render_jsonl<T: Serialize>(rows: &[T]) -> Result<String, String> {
+    let mut out = Vec::new();
+    write_jsonl(&mut out, rows)?;
+    String::from_utf8(out).map_err(|err| err.to_string())
+}
+
+/// Stream `rows` to `writer` as JSON lines.
+pub fn write_jsonl<W: io::Write, T: Serialize>(mut writer: W, rows: &[T]) -> Result<(), String> {
     for row in rows {
-        out.push_str(&serde_json::to_string(row).map_err(|err| err.to_string())?);
-        out.push('\n');
+        serde_json::to_writer(&mut writer, row).map_err(|err| err.to_string())?;
+        writer.write_all(b"\n").map_err(|err| err.to_string())?;
     }
-    Ok(out)
+    writer.flush().map_err(|err| err.to_string())
 }
 
 pub fn json_field_as_tsv(value: Option<&serde_json::Value>) -> String {
@@ -69,23 +99,24 @@ pub fn json_field_as_tsv(value: Option<&serde_json::Value>) -> String {
 mod tests {
     use serde_json::json;
 
-    use crate::AppInputReportInput;
+    use crate::{AppInputReportInput, AppObservation};
 
     use super::{
         json_field_as_tsv, render_input_report_artifact_texts, render_jsonl,
         render_observations_tsv, render_report_artifact_texts, standard_text_output,
     };
 
-    fn observation() -> serde_json::Value {
-        json!({
-            "participant_id": "P001",
-            "assay_id": "assay",
-            "assay_version": "1.0",
-            "variant_key": "rs123",
-            "rsid": "rs123",
-            "call_status": "called",
-            "outcome": "variant"
-        })
+    fn observation() -> AppObservation {
+        AppObservation {
+            participant_id: "P001".to_owned(),
+            assay_id: "assay".to_owned(),
+            assay_version: "1.0",
+            variant_key: "rs123".to_owned(),
+            rsid: Some("rs123".to_owned()),
+            call_status: "called",
+            outcome: "variant",
+            ..AppObservation::default()
+        }
     }
 
     #[test]
@@ -143,17 +174,18 @@ mod tests {
 
     #[test]
     fn low_level_serializers_escape_tsv_and_jsonl_rows() {
-        let observations = vec![json!({
-            "participant_id": "P\t001",
-            "assay_id": "assay",
-            "variant_key": "rs123",
-            "call_status": "called",
-            "facets": {"note": "a\nb"}
-        })];
+        let observations = vec![AppObservation {
+            participant_id: "P\t001".to_owned(),
+            facets: Some("a\nb".to_owned()),
+            ..observation()
+        }];
 
         let tsv = render_observations_tsv(&observations);
         assert!(tsv.contains("P 001"));
         assert!(!tsv.contains("P\t001"));
+        assert!(tsv.contains("\ta b\n"));
+        let jsonl = render_jsonl(&observations).unwrap();
+        assert!(jsonl.contains("\"participant_id\":\"P\\t001\""));
         assert_eq!(
             json_field_as_tsv(Some(&json!("line\tbreak\nvalue"))),
             "line break value"
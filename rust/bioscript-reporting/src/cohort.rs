@@ -0,0 +1,451 @@
+use std::{
+    collections::{BTreeMap, BTreeSet},
+    io,
+};
+
+use crate::{AppObservation, ReportRunResult, json_field_as_tsv};
+
+/// Distinct values tallied per analysis output key. Further values are only
+/// counted, so free-text columns do not grow the tallies with the cohort.
+const MAX_ANALYSIS_VALUES_PER_KEY: usize = 64;
+
+pub const COHORT_ALLELE_TSV_HEADERS: &[&str] = &[
+    "variant_key",
+    "rsid",
+    "gene",
+    "chrom",
+    "pos_start",
+    "allele",
+    "allele_count",
+    "allele_number",
+    "num_homo",
+    "num_hetero",
+    "num_hemi",
+    "allele_freq",
+];
+
+/// Cohort summary built in one pass over per-participant report runs.
+///
+/// Each [`ReportRunResult`] is folded in with [`CohortAggregator::add`] and can
+/// be dropped afterwards. Memory grows with the number of distinct variants,
+/// findings and analysis values, not with the number of participants.
+#[derive(Clone, Debug, Default)]
+pub struct CohortAggregator {
+    reports: usize,
+    variants: BTreeMap<String, VariantTally>,
+    findings: BTreeMap<String, FindingTally>,
+    analyses: BTreeMap<String, AnalysisTally>,
+}
+
+#[derive(Clone, Debug, Default)]
+struct VariantTally {
+    rsid: String,
+    gene: String,
+    chrom: String,
+    pos_start: String,
+    ref_allele: String,
+    alt: String,
+    observed: usize,
+    called: usize,
+    allele_number: usize,
+    outcomes: BTreeMap<String, usize>,
+    genotypes: BTreeMap<String, usize>,
+    alleles: BTreeMap<String, AlleleTally>,
+}
+
+#[derive(Clone, Debug, Default)]
+struct AlleleTally {
+    count: usize,
+    homozygous: usize,
+    heterozygous: usize,
+    /// Single-allele calls, e.g. male X/Y genotypes such as `A`.
+    hemizygous: usize,
+}
+
+#[derive(Clone, Debug, Default)]
+struct FindingTally {
+    schema: String,
+    label: String,
+    reports: usize,
+}
+
+#[derive(Clone, Debug, Default)]
+struct AnalysisTally {
+    label: String,
+    reports: usize,
+    rows: usize,
+    values: BTreeMap<String, BTreeMap<String, usize>>,
+    other_values: BTreeMap<String, usize>,
+}
+
+impl CohortAggregator {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    pub fn reports(&self) -> usize {
+        self.reports
+    }
+
+    /// Fold one participant's report run into the cohort tallies.
+    pub fn add(&mut self, run: &ReportRunResult) {
+        self.reports += 1;
+        for observation in &run.observations {
+            self.add_observation(observation);
+        }
+        let mut seen = BTreeSet::new();
+        for finding in run
+            .report
+            .get("findings")
+            .and_then(serde_json::Value::as_array)
+            .into_iter()
+            .flatten()
+        {
+            let key = crate::matching::app_finding_dedupe_key(finding, None);
+            if seen.insert(key.clone()) {
+                let tally = self.findings.entry(key).or_insert_with(|| FindingTally {
+                    schema: field(finding, "schema"),
+                    label: finding_label(finding),
+                    reports: 0,
+                });
+                tally.reports += 1;
+            }
+        }
+        for analysis in &run.analyses {
+            self.add_analysis(analysis);
+        }
+    }
+
+    fn add_observation(&mut self, observation: &AppObservation) {
+        let tsv = |key: &str| observation.field(key).to_tsv();
+        let key = tsv("variant_key");
+        if key.is_empty() {
+            return;
+        }
+        let tally = self.variants.entry(key).or_insert_with(|| VariantTally {
+            rsid: tsv("rsid"),
+            gene: tsv("gene"),
+            chrom: tsv("chrom"),
+            pos_start: tsv("pos_start"),
+            ref_allele: tsv("ref"),
+            alt: tsv("alt"),
+            ..VariantTally::default()
+        });
+        tally.observed += 1;
+        *tally.outcomes.entry(tsv("outcome")).or_default() += 1;
+        if observation.call_status != "called" {
+            return;
+        }
+        let display = tsv("genotype_display");
+        let alleles = genotype_alleles(&display);
+        if alleles.is_empty() {
+            return;
+        }
+        tally.called += 1;
+        tally.allele_number += alleles.len();
+        let homozygous = alleles.len() > 1 && alleles.iter().all(|allele| *allele == alleles[0]);
+        for (index, allele) in alleles.iter().enumerate() {
+            let allele_tally = tally.alleles.entry((*allele).to_owned()).or_default();
+            allele_tally.count += 1;
+            if alleles.len() == 1 {
+                allele_tally.hemizygous += 1;
+            } else if !homozygous {
+                allele_tally.heterozygous += 1;
+            } else if index == 0 {
+                allele_tally.homozygous += 1;
+            }
+        }
+        *tally.genotypes.entry(display).or_default() += 1;
+    }
+
+    fn add_analysis(&mut self, analysis: &serde_json::Value) {
+        let id = field(analysis, "analysis_id");
+        if id.is_empty() {
+            return;
+        }
+        let tally = self.analyses.entry(id).or_insert_with(|| AnalysisTally {
+            label: field(analysis, "analysis_label"),
+            ..AnalysisTally::default()
+        });
+        tally.reports += 1;
+        let emitted = analysis
+            .get("emits")
+            .and_then(serde_json::Value::as_array)
+            .into_iter()
+            .flatten()
+            .filter_map(|emit| emit.get("key").and_then(serde_json::Value::as_str))
+            .collect::<Vec<_>>();
+        for row in analysis
+            .get("rows")
+            .and_then(serde_json::Value::as_array)
+            .into_iter()
+            .flatten()
+        {
+            tally.rows += 1;
+            let Some(object) = row.as_object() else {
+                continue;
+            };
+            let keys = if emitted.is_empty() {
+                object.keys().map(String::as_str).collect()
+            } else {
+                emitted.clone()
+            };
+            for key in keys.into_iter().filter(|key| *key != "participant_id") {
+                let value = json_field_as_tsv(object.get(key));
+                if !value.is_empty() {
+                    tally.add_value(key, value);
+                }
+            }
+        }
+    }
+
+    /// `bioscript:cohort-summary:1.0` document for the reports added so far.
+    pub fn summary_json(&self) -> serde_json::Value {
+        serde_json::json!({
+            "schema": "bioscript:cohort-summary:1.0",
+            "version": "1.0",
+            "n_reports": self.reports,
+            "variants": self.variants.iter().map(|(key, tally)| serde_json::json!({
+                "variant_key": key,
+                "rsid": tally.rsid,
+                "gene": tally.gene,
+                "chrom": tally.chrom,
+                "pos_start": tally.pos_start,
+                "ref": tally.ref_allele,
+                "alt": tally.alt,
+                "n_observed": tally.observed,
+                "n_called": tally.called,
+                "allele_number": tally.allele_number,
+                "allele_counts": tally.alleles.iter().map(|(allele, counts)| (allele.clone(), counts.count)).collect::<BTreeMap<_, _>>(),
+                "genotype_counts": tally.genotypes,
+                "outcome_counts": tally.outcomes,
+            })).collect::<Vec<_>>(),
+            "findings": self.findings.values().map(|tally| serde_json::json!({
+                "schema": tally.schema,
+                "label": tally.label,
+                "n_reports": tally.reports,
+                "frequency": frequency(tally.reports, self.reports),
+            })).collect::<Vec<_>>(),
+            "analyses": self.analyses.iter().map(|(id, tally)| serde_json::json!({
+                "analysis_id": id,
+                "analysis_label": tally.label,
+                "n_reports": tally.reports,
+                "n_rows": tally.rows,
+                "value_counts": tally.values,
+                "other_value_counts": tally.other_values,
+            })).collect::<Vec<_>>(),
+        })
+    }
+
+    pub fn write_summary_json<W: io::Write>(&self, mut writer: W) -> Result<(), String> {
+        serde_json::to_writer_pretty(&mut writer, &self.summary_json())
+            .map_err(|err| format!("failed to write cohort summary: {err}"))?;
+        writer
+            .flush()
+            .map_err(|err| format!("failed to write cohort summary: {err}"))
+    }
+
+    /// Per-allele counts and frequencies, one row per variant and allele.
+    pub fn write_alleles_tsv<W: io::Write>(&self, mut writer: W) -> Result<(), String> {
+        let write_err = |err: io::Error| format!("failed to write cohort alleles: {err}");
+        writeln!(writer, "{}", COHORT_ALLELE_TSV_HEADERS.join("\t")).map_err(write_err)?;
+        for (key, tally) in &self.variants {
+            for (allele, counts) in &tally.alleles {
+                writeln!(
+                    writer,
+                    "{key}\t{}\t{}\t{}\t{}\t{allele}\t{}\t{}\t{}\t{}\t{}\t{:.6}",
+                    tally.rsid,
+                    tally.gene,
+                    tally.chrom,
+                    tally.pos_start,
+                    counts.count,
+                    tally.allele_number,
+                    counts.homozygous,
+                    counts.heterozygous,
+                    counts.hemizygous,
+                    frequency(counts.count, tally.allele_number),
+                )
+                .map_err(write_err)?;
+            }
+        }
+        writer.flush().map_err(write_err)
+    }
+}
+
+impl AnalysisTally {
+    fn add_value(&mut self, key: &str, value: String) {
+        let values = self.values.entry(key.to_owned()).or_default();
+        if let Some(count) = values.get_mut(&value) {
+            *count += 1;
+        } else if values.len() < MAX_ANALYSIS_VALUES_PER_KEY {
+            values.insert(value, 1);
+        } else {
+            *self.other_values.entry(key.to_owned()).or_default() += 1;
+        }
+    }
+}
+
+fn field(value: &serde_json::Value, key: &str) -> String {
+    json_field_as_tsv(value.get(key))
+}
+
+fn finding_label(finding: &serde_json::Value) -> String {
+    finding
+        .get("matched_effect")
+        .and_then(|effect| effect.get("label").or_else(|| effect.get("text")))
+        .or_else(|| finding.get("label"))
+        .map(|value| json_field_as_tsv(Some(value)))
+        .unwrap_or_default()
+}
+
+/// Alleles of a called genotype display such as `A/G`, `A|G`, `AG` or `A`.
+fn genotype_alleles(display: &str) -> Vec<&str> {
+    let alleles = if display.contains(['/', '|']) {
+        display.split(['/', '|']).collect::<Vec<_>>()
+    } else if display.len() == 2 && display.is_ascii() {
+        vec![&display[..1], &display[1..]]
+    } else {
+        vec![display]
+    };
+    if alleles
+        .iter()
+        .any(|allele| allele.is_empty() || matches!(*allele, "." | "-" | "--"))
+    {
+        return Vec::new();
+    }
+    alleles
+}
+
+#[allow(clippy::cast_precision_loss)]
+fn frequency(count: usize, total: usize) -> f64 {
+    if total == 0 {
+        0.0
+    } else {
+        count as f64 / total as f64
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use serde_json::json;
+
+    use super::{CohortAggregator, genotype_alleles};
+    use crate::{AppObservation, ReportArtifactTexts, ReportRunResult};
+
+    fn run(participant_id: &str, genotype: &str, metabolizer: &str) -> ReportRunResult {
+        let observation = AppObservation {
+            participant_id: participant_id.to_owned(),
+            variant_key: "rs123".to_owned(),
+            rsid: Some("rs123".to_owned()),
+            gene: "CYP2C19".to_owned(),
+            chrom: "10".to_owned(),
+            pos_start: Some(94_781_859),
+            ref_allele: "G".to_owned(),
+            alt: "A".to_owned(),
+            call_status: if genotype.is_empty() {
+                "no_call"
+            } else {
+                "called"
+            },
+            genotype_display: genotype.to_owned(),
+            outcome: if genotype.contains('A') {
+                "variant"
+            } else {
+                "reference"
+            },
+            ..AppObservation::default()
+        };
+        let finding = json!({
+            "schema": "bioscript:pgx-summary:1.0",
+            "evidence": {"source": "pharmgkb", "id": "1"},
+            "matched_effect": {"label": "A carrier"},
+        });
+        let findings = if genotype.contains('A') {
+            vec![finding.clone(), finding]
+        } else {
+            Vec::new()
+        };
+        let analysis = json!({
+            "analysis_id": "cyp2c19",
+            "analysis_label": "CYP2C19",
+            "emits": [{"key": "participant_id"}, {"key": "metabolizer"}],
+            "rows": [{"participant_id": participant_id, "metabolizer": metabolizer, "notes": "x"}],
+        });
+        ReportRunResult {
+            observation_rows: Vec::new(),
+            variant_observations: Vec::new(),
+            observations: vec![observation],
+            analyses: vec![analysis],
+            report: json!({"participant_id": participant_id, "findings": findings}),
+            artifacts: ReportArtifactTexts {
+                observations_tsv: String::new(),
+                analysis_jsonl: String::new(),
+                reports_jsonl: String::new(),
+                html: String::new(),
+                text_output: String::new(),
+            },
+        }
+    }
+
+    #[test]
+    fn cohort_aggregator_tallies_alleles_findings_and_analyses() {
+        let mut cohort = CohortAggregator::new();
+        cohort.add(&run("P1", "G/A", "intermediate"));
+        cohort.add(&run("P2", "A/A", "poor"));
+        cohort.add(&run("P3", "G/G", "normal"));
+        cohort.add(&run("P4", "", "normal"));
+
+        let summary = cohort.summary_json();
+        assert_eq!(summary["n_reports"], 4);
+        let variant = &summary["variants"][0];
+        assert_eq!(variant["n_observed"], 4);
+        assert_eq!(variant["n_called"], 3);
+        assert_eq!(variant["allele_number"], 6);
+        assert_eq!(variant["allele_counts"], json!({"A": 3, "G": 3}));
+        assert_eq!(variant["genotype_counts"]["A/A"], 1);
+        assert_eq!(variant["outcome_counts"]["reference"], 2);
+        assert_eq!(summary["findings"][0]["n_reports"], 2);
+        assert_eq!(summary["findings"][0]["label"], "A carrier");
+        assert_eq!(summary["findings"][0]["frequency"], 0.5);
+        let analysis = &summary["analyses"][0];
+        assert_eq!(analysis["n_rows"], 4);
+        assert_eq!(analysis["value_counts"]["metabolizer"]["normal"], 2);
+        assert!(analysis["value_counts"].get("notes").is_none());
+
+        let mut tsv = Vec::new();
+        cohort.write_alleles_tsv(&mut tsv).unwrap();
+        let tsv = String::from_utf8(tsv).unwrap();
+        assert_eq!(tsv.lines().count(), 3);
+        assert!(tsv.contains("rs123\trs123\tCYP2C19\t10\t94781859\tA\t3\t6\t1\t1\t0\t0.500000"));
+    }
+
+    #[test]
+    fn haploid_calls_count_as_hemizygous() {
+        let mut cohort = CohortAggregator::new();
+        cohort.add(&run("P1", "A", "poor"));
+        cohort.add(&run("P2", "G", "normal"));
+        cohort.add(&run("P3", "G/A", "intermediate"));
+
+        let variant = &cohort.summary_json()["variants"][0];
+        assert_eq!(variant["n_called"], 3);
+        assert_eq!(variant["allele_number"], 4);
+        assert_eq!(variant["allele_counts"], json!({"A": 2, "G": 2}));
+
+        let mut tsv = Vec::new();
+        cohort.write_alleles_tsv(&mut tsv).unwrap();
+        let tsv = String::from_utf8(tsv).unwrap();
+        assert!(tsv.contains("\tA\t2\t4\t0\t1\t1\t0.500000"));
+        assert!(tsv.contains("\tG\t2\t4\t0\t1\t1\t0.500000"));
+    }
+
+    #[test]
+    fn genotype_alleles_skip_no_calls() {
+        assert_eq!(genotype_alleles("A|G"), vec!["A", "G"]);
+        assert_eq!(genotype_alleles("AG"), vec!["A", "G"]);
+        assert_eq!(genotype_alleles("A"), vec!["A"]);
+        assert_eq!(genotype_alleles("ID/D"), vec!["ID", "D"]);
+        assert!(genotype_alleles("--").is_empty());
+        assert!(genotype_alleles("./.").is_empty());
+        assert!(genotype_alleles("").is_empty());
+    }
+}
@@ -1,4 +1,6 @@
-use std::fmt::Write as _;
+use std::{fmt::Write as _, io};
+
+use crate::AppObservation;
 
 mod analysis;
 mod helpers;
@@ -8,8 +10,8 @@ mod provenance;
 mod sections;
 
 use analysis::render_analysis_tables;
-use helpers::html_escape;
-use observations::render_observation_table;
+use helpers::HtmlEscapeWriter;
+use observations::ObservationTable;
 use pgx::render_pgx_table;
 use provenance::render_provenance_links;
 use sections::{
@@ -18,10 +20,29 @@ use sections::{
     render_report_source_section,
 };
 
+/// Observation rows rendered between writes when streaming the HTML report.
+const OBSERVATION_ROWS_PER_FLUSH: usize = 512;
+
 pub fn render_app_html_document(
-    observations: &[serde_json::Value],
+    observations: &[AppObservation],
     reports: &[serde_json::Value],
 ) -> Result<String, String> {
+    let mut out = Vec::new();
+    write_app_html_document(&mut out, observations, reports)?;
+    String::from_utf8(out).map_err(|err| err.to_string())
+}
+
+/// Stream the app HTML report to `writer`.
+///
+/// Sections are rendered into one reusable buffer that is written out before
+/// the next section starts. The observation table is written every
+/// `OBSERVATION_ROWS_PER_FLUSH` rows and the raw report JSON is escaped as it
+/// is serialized, so the whole document is never held in memory.
+pub fn write_app_html_document<W: io::Write>(
+    mut writer: W,
+    observations: &[AppObservation],
+    reports: &[serde_json::Value],
+) -> Result<(), String> {
     let mut out = String::from(
         r#"<!doctype html><meta charset="utf-8"><title>BioScript report</title><style>body{font-family:system-ui,sans-serif;margin:0;background:#f7f8fa;color:#1f2933}.wrap{max-width:1440px;margin:0 auto;padding:24px}h1{margin:0 0 10px}h2{margin:32px 0 10px;scroll-margin-top:82px}.nav{position:sticky;top:0;z-index:20;display:flex;gap:8px;flex-wrap:wrap;align-items:center;margin:16px -24px 22px;padding:10px 24px;background:rgba(247,248,250,.96);border-block:1px solid #d8dee6;backdrop-filter:saturate(160%) blur(8px)}.nav a{border:1px solid #cbd5df;background:#fff;color:#1f2933;text-decoration:none;padding:7px 10px;border-radius:6px}.nav a:hover{background:#eef2f6}.table-tools,.level-filter{display:flex;justify-content:space-between;gap:12px;align-items:flex-start;margin:6px 0}.table-tools input{width:min(420px,100%);border:1px solid #cbd5df;border-radius:6px;padding:7px 9px;font:inherit;background:#fff}.table-tools label,.level-filter label{display:flex;gap:5px;align-items:center}.level-filter{justify-content:flex-start;flex-wrap:wrap}.filter-scale{display:flex;flex-direction:column;gap:6px}.filter-scale-title{font-weight:700;color:#344054;display:flex;gap:6px;align-items:center}.filter-options{display:flex;flex-wrap:wrap;gap:6px 10px}.filter-actions{display:flex;gap:8px;align-self:flex-end}.level-filter a{display:inline-grid;place-items:center;width:20px;height:20px;border:1px solid #cbd5df;border-radius:50%;text-decoration:none;color:#1f2933;background:#fff;font-weight:700}.filter-action,.pgx-tabs button{border:1px solid #cbd5df;background:#fff;color:#1f2933;border-radius:6px;padding:4px 7px;font:inherit;cursor:pointer}.filter-action:hover,.pgx-tabs button:hover{background:#eef2f6}.pgx-tabs{display:flex;gap:8px;margin:10px 0}.pgx-tabs button.active{background:#1f2933;border-color:#1f2933;color:#fff}.table-wrap{overflow:auto;border:1px solid #d8dee6;background:white;border-radius:8px}table{border-collapse:collapse;width:100%;font-size:13px}td,th{border-bottom:1px solid #e5e9ef;padding:6px 8px;text-align:left;vertical-align:top}th{position:sticky;top:0;background:#eef2f6;z-index:1;white-space:nowrap;cursor:pointer;user-select:none}.sort-mark{font-size:10px;color:#667085;margin-left:3px}.row-variant td{background:#fff7cc}.row-reference td{background:#eaf7ee}.debug-hidden .debug-col{display:none}.participant-filter{display:flex;gap:8px;align-items:center;margin:12px 0}.participant-filter select{border:1px solid #cbd5df;border-radius:6px;padding:6px 8px;background:#fff;font:inherit}.genotype-hit{font-weight:700}.allele-hit{color:#075985;background:#dff4ff;border-radius:3px;padding:0 2px}.level-badge,.pgx-badge{display:inline-block;min-width:2.2em;text-align:center;border-radius:999px;padding:2px 8px;color:#fff;font-weight:700}.level-1,.pgx-informative{background:#0abc72}.level-2,.pgx-actionable{background:#2a74df}.level-3,.pgx-recommended{background:#ffc107;color:#1f2933}.level-4,.pgx-required{background:#c53b3b}.pgx-no-clinical,.pgx-criteria,.pgx-unknown,.level-unknown{background:#667085}.mono{font-family:ui-monospace,SFMono-Regular,Menlo,monospace}.muted{color:#667085}.effect{max-width:760px;min-width:360px}.analysis-kv{display:grid;grid-template-columns:max-content minmax(0,1fr);gap:6px 14px;background:#fff;border:1px solid #d8dee6;border-radius:8px;padding:10px 12px;margin:8px 0 10px}.analysis-kv dt{font-weight:700;color:#344054}.analysis-kv dd{margin:0;min-width:0}.analysis-narrative-list{display:grid;gap:8px;margin:8px 0 10px}.analysis-narrative-row{background:#fff;border:1px solid #d8dee6;border-radius:8px;padding:10px 12px}.analysis-narrative-row h5{margin:0 0 4px;font-size:14px}.analysis-narrative-row p{margin:0;line-height:1.45}.analysis-badge{display:inline-block;border:1px solid #cbd5df;border-radius:999px;background:#eef2f6;padding:1px 8px;font-weight:700}.analysis-badge-normal{background:#eaf7ee;border-color:#9fd6ad;color:#14532d}.analysis-badge-variant{background:#fff7cc;border-color:#f0d66a;color:#713f12}.analysis-badge-unknown{background:#eef2f6;border-color:#cbd5df;color:#475467}.analysis-card{background:#fff;border:1px solid #cbd5df;border-radius:8px;margin:14px 0;overflow:hidden}.analysis-card summary{display:flex;align-items:center;gap:10px;padding:11px 13px;background:#eef2f6;cursor:pointer;font-weight:700}.analysis-card-body{padding:12px 14px}.analysis-card-title{font-size:16px}.logic-note,.analysis-notes{background:#fff;border:1px solid #d8dee6;border-radius:8px;padding:10px 12px;margin:8px 0 10px}.logic-note h4,.analysis-notes h4,h4{margin:0 0 6px}.logic-note p,.analysis-notes p{margin:0 0 6px}.analysis-notes p:last-child{margin-bottom:0}.provenance-list{background:#fff;border:1px solid #d8dee6;border-radius:8px;padding:10px 18px}.provenance-list li{margin:8px 0}pre{white-space:pre-wrap;background:#fff;padding:12px;border:1px solid #d8dee6;border-radius:8px;max-height:520px;overflow:auto}</style><script>const sortState={},filterFrame={},tableRowCache=new Map();function tableRows(id){let rows=tableRowCache.get(id);if(rows)return rows;const table=document.getElementById(id);rows=table&&table.tBodies[0]?Array.from(table.tBodies[0].rows):[];tableRowCache.set(id,rows);return rows}function cachedFilterText(row){return row.dataset.filterText||(row.dataset.filterText=(row.textContent||"").toLowerCase())}function scheduleTableFilter(id){cancelAnimationFrame(filterFrame[id]);filterFrame[id]=requestAnimationFrame(()=>applyTableFilters(id))}function checkedBy(selector,attr){const out={};document.querySelectorAll(selector).forEach(input=>{out[input.getAttribute(attr)||'']=input.checked});return out}function cellText(row,i){const cell=row.cells[i];return(cell?.dataset.sort||cell?.textContent||"").trim()}function cmp(a,b){const an=Number(a),bn=Number(b);if(a!==""&&b!==""&&!Number.isNaN(an)&&!Number.isNaN(bn))return an-bn;return a.localeCompare(b,undefined,{numeric:true,sensitivity:"base"})}function sortTable(id,col){const table=document.getElementById(id);const tbody=table.tBodies[0];const key=id+":"+col;const dir=sortState[key]==="asc"?"desc":"asc";sortState[key]=dir;table.querySelectorAll(".sort-mark").forEach(s=>s.textContent="");table.tHead.rows[0].cells[col].querySelector(".sort-mark").textContent=dir==="asc"?"^":"v";Array.from(tbody.rows).sort((a,b)=>{const v=cmp(cellText(a,col),cellText(b,col));return dir==="asc"?v:-v}).forEach(r=>tbody.appendChild(r))}let selectedParticipant="";function applyTableFilters(id){const q=(document.querySelector('[data-filter-for="'+id+'"]')?.value||"").trim().toLowerCase();const pgxLevels=checkedBy("[data-pgx-any-level-filter]","data-pgx-any-level-filter");const pgxOutcomes=checkedBy("[data-pgx-outcome-filter]","data-pgx-outcome-filter");const observations=checkedBy("[data-observation-filter]","data-observation-filter");for(const row of tableRows(id)){let ok=true;if(q&&cachedFilterText(row).indexOf(q)===-1)ok=false;if(ok&&selectedParticipant&&row.dataset.participant&&row.dataset.participant!==selectedParticipant)ok=false;if(ok&&(row.dataset.pgxLevel||row.dataset.level)){const key=row.dataset.pgxLevel||row.dataset.level||"unknown";ok=!!(pgxLevels[key]??pgxLevels.unknown)}if(ok&&row.dataset.pgxOutcome)ok=pgxOutcomes[row.dataset.pgxOutcome]!==false;if(ok&&row.dataset.observation)ok=observations[row.dataset.observation]!==false;row.style.display=ok?"":"none"}}function applyPgxFilters(){document.querySelectorAll('#pgx table[id]').forEach(table=>applyTableFilters(table.id));document.querySelectorAll('#pgx .pgx-drug-group').forEach(group=>{const visible=Array.from(group.querySelectorAll('tbody tr')).some(row=>row.style.display!=='none');group.style.display=visible?'':'none'})}function setPgxFilterGroup(checked){document.querySelectorAll("[data-pgx-any-level-filter]").forEach(input=>input.checked=checked);applyPgxFilters()}function setObservationFilterGroup(checked){document.querySelectorAll("[data-observation-filter]").forEach(input=>input.checked=checked);applyTableFilters("observations-table")}function setPgxView(view){document.getElementById("pgx-view-variant").hidden=view!=="variant";document.getElementById("pgx-view-drug").hidden=view!=="drug";document.getElementById("pgx-tab-variant")?.classList.toggle("active",view==="variant");document.getElementById("pgx-tab-drug")?.classList.toggle("active",view==="drug")}function setParticipant(value){selectedParticipant=value;document.querySelectorAll("table[id]").forEach(table=>applyTableFilters(table.id))}function toggleDebug(show){document.getElementById("report-wrap").classList.toggle("debug-hidden",!show)}</script><div class="wrap debug-hidden" id="report-wrap">"#,
     );
@@ -51,8 +72,17 @@ pub fn render_app_html_document(
     out.push_str("<section id=\"input-info\"><h2>Input</h2>");
     render_input_debug(&mut out, reports, participants.len() > 1);
     out.push_str("</section>");
+    flush_html(&mut writer, &mut out)?;
     out.push_str("<section id=\"observations\"><h2>Observations</h2>");
-    render_observation_table(&mut out, observations, participants.len() > 1);
+    let observation_table = ObservationTable::new(observations, participants.len() > 1);
+    observation_table.render_start(&mut out);
+    for chunk in observations.chunks(OBSERVATION_ROWS_PER_FLUSH) {
+        for observation in chunk {
+            observation_table.render_row(&mut out, observation);
+        }
+        flush_html(&mut writer, &mut out)?;
+    }
+    observation_table.render_end(&mut out);
     out.push_str("</section>");
     out.push_str("<section id=\"analysis\"><h2>Analysis</h2>");
     render_analysis_tables(
@@ -62,6 +92,7 @@ pub fn render_app_html_document(
         participants.len() > 1,
     );
     out.push_str("</section>");
+    flush_html(&mut writer, &mut out)?;
     if has_pgx_findings {
         out.push_str("<section id=\"pgx\"><h2>PGx</h2>");
         render_pgx_table(&mut out, &label_findings, &summary_findings);
@@ -75,61 +106,89 @@ pub fn render_app_html_document(
     out.push_str("</section>");
     out.push_str("<section id=\"json\"><h2>Raw Reports JSON</h2><details><summary>Show raw report JSON</summary>");
     for report in reports {
-        let text = serde_json::to_string_pretty(report).map_err(|err| err.to_string())?;
-        let _ = write!(out, "<pre>{}</pre>", html_escape(&text));
+        out.push_str("<pre>");
+        flush_html(&mut writer, &mut out)?;
+        serde_json::to_writer_pretty(HtmlEscapeWriter(&mut writer), report)
+            .map_err(|err| format!("failed to write HTML report: {err}"))?;
+        out.push_str("</pre>");
     }
     out.push_str("</details></section></div>");
-    Ok(out)
+    flush_html(&mut writer, &mut out)?;
+    writer
+        .flush()
+        .map_err(|err| format!("failed to write HTML report: {err}"))
+}
+
+fn flush_html(writer: &mut impl io::Write, out: &mut String) -> Result<(), String> {
+    writer
+        .write_all(out.as_bytes())
+        .map_err(|err| format!("failed to write HTML report: {err}"))?;
+    out.clear();
+    Ok(())
 }
 
 #[cfg(test)]
 mod tests {
     use serde_json::json;
 
-    use super::render_app_html_document;
+    use super::{
+        AppObservation, OBSERVATION_ROWS_PER_FLUSH, render_app_html_document,
+        write_app_html_document,
+    };
 
-    fn observation(participant_id: &str, outcome: &str, call_status: &str) -> serde_json::Value {
-        json!({
-            "participant_id": participant_id,
-            "assay_id": "pgx-panel",
-            "assay_version": "1.0",
-            "variant_key": "rs123",
-            "variant_path": "variants/rs123.yaml",
-            "rsid": "rs123",
-            "gene": "CYP2C19",
-            "assembly": "grch38",
-            "chrom": "10",
-            "pos_start": 94_781_859,
-            "pos_end": 94_781_859,
-            "kind": "snv",
-            "ref": "G",
-            "alt": "A",
-            "match_status": if call_status == "called" { "matched" } else { "not_found" },
-            "coverage_status": if call_status == "called" { "covered" } else { "not_covered" },
-            "call_status": call_status,
-            "genotype": "G/A",
-            "genotype_display": "G/A",
-            "zygosity": "heterozygous",
-            "ref_count": 12,
-            "alt_count": 9,
-            "depth": 21,
-            "genotype_quality": 99,
-            "allele_balance": 0.43,
-            "outcome": outcome,
-            "evidence_type": "vcf",
-            "evidence_raw": if outcome == "reference" {
+    fn observation(
+        participant_id: &str,
+        outcome: &'static str,
+        call_status: &'static str,
+    ) -> AppObservation {
+        let called = call_status == "called";
+        AppObservation {
+            participant_id: participant_id.to_owned(),
+            assay_id: "pgx-panel".to_owned(),
+            assay_version: "1.0",
+            variant_key: "rs123".to_owned(),
+            variant_path: "variants/rs123.yaml".to_owned(),
+            rsid: Some("rs123".to_owned()),
+            gene: "CYP2C19".to_owned(),
+            assembly: Some("grch38".to_owned()),
+            chrom: "10".to_owned(),
+            pos_start: Some(94_781_859),
+            pos_end: Some(94_781_859),
+            kind: "snv".to_owned(),
+            ref_allele: "G".to_owned(),
+            alt: "A".to_owned(),
+            match_status: if called { "matched" } else { "not_found" },
+            coverage_status: if called { "covered" } else { "not_covered" },
+            call_status,
+            genotype: "G/A".to_owned(),
+            genotype_display: "G/A".to_owned(),
+            zygosity: "heterozygous".to_owned(),
+            ref_count: Some(12),
+            alt_count: Some(9),
+            depth: Some(21),
+            genotype_quality: Some(99),
+            allele_balance: Some(0.43),
+            outcome,
+            evidence_type: "vcf",
+            evidence_raw: if outcome == "reference" {
                 "imputed reference genotype from absent variant-only VCF record"
             } else {
                 "consumer genotype weak indel match"
-            },
-            "match_quality": if outcome == "variant" { "weak" } else { "strong" },
-            "match_notes": "reported by fixture",
-            "facets": {"clinical": "example"},
-            "source": {
+            }
+            .to_owned(),
+            match_quality: Some(if outcome == "variant" {
+                "weak"
+            } else {
+                "strong"
+            }),
+            match_notes: Some("reported by fixture".to_owned()),
+            facets: Some("clinical=example".to_owned()),
+            source: json!({
                 "label": "dbSNP",
                 "url": "https://www.ncbi.nlm.nih.gov/snp/rs123"
-            }
-        })
+            }),
+            ..AppObservation::default()
+        }
     }
 
     fn analysis(participant_id: &str) -> serde_json::Value {
@@ -279,4 +338,32 @@ mod tests {
         assert!(html.contains("No analysis outputs."));
         assert!(html.contains("No provenance links."));
     }
+
+    #[test]
+    fn write_app_html_document_streams_rows_and_escapes_raw_json() {
+        let observations = (0..=OBSERVATION_ROWS_PER_FLUSH)
+            .map(|_| observation("P001", "variant", "called"))
+            .collect::<Vec<_>>();
+        let mut report = report("P001");
+        report["manifest"]["summary"] = json!("<script>alert(1)</script>");
+        let reports = vec![report];
+
+        let mut streamed = Vec::new();
+        write_app_html_document(&mut streamed, &observations, &reports).unwrap();
+        let html = String::from_utf8(streamed).unwrap();
+
+        assert_eq!(
+            html,
+            render_app_html_document(&observations, &reports).unwrap()
+        );
+        assert_eq!(
+            html.matches("data-observation=").count(),
+            OBSERVATION_ROWS_PER_FLUSH + 1
+        );
+        assert!(
+            html.contains("&quot;summary&quot;: &quot;&lt;script&gt;alert(1)&lt;/script&gt;&quot;")
+        );
+        assert!(!html.contains("<script>alert(1)"));
+        assert!(html.ends_with("</details></section></div>"));
+    }
 }
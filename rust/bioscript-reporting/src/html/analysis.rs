@@ -2,11 +2,12 @@ use super::helpers::{
     html_escape, json_field_as_tsv, render_table_end, render_table_start, table_cell,
     table_header_label, value_str,
 };
+use crate::AppObservation;
 use std::fmt::Write as _;
 pub(super) fn render_analysis_tables(
     out: &mut String,
-    analyses: &[serde_json::Value],
-    observations: &[serde_json::Value],
+    analyses: &[&serde_json::Value],
+    observations: &[AppObservation],
     show_participant_id: bool,
 ) {
     if analyses.is_empty() {
@@ -31,15 +32,14 @@ pub(super) fn render_analysis_tables(
         let rows = analysis
             .get("rows")
             .and_then(serde_json::Value::as_array)
-            .cloned()
-            .unwrap_or_default();
+            .map_or(&[][..], Vec::as_slice);
         if rows.is_empty() {
             out.push_str("<p class=\"muted\">No rows emitted.</p>");
             out.push_str("</div></details>");
             continue;
         }
-        let headers = analysis_row_headers(analysis, &rows, show_participant_id);
-        let notes = analysis_notes(&rows);
+        let headers = analysis_row_headers(analysis, rows, show_participant_id);
+        let notes = analysis_notes(rows);
         if rows.len() == 1 {
             out.push_str("<h4>Results</h4>");
             render_analysis_key_values(out, analysis, &rows[0], &headers);
@@ -50,7 +50,7 @@ pub(super) fn render_analysis_tables(
         }
         out.push_str("<h4>Results</h4>");
         if should_render_analysis_narrative_rows(&headers) {
-            render_analysis_narrative_rows(out, analysis, &rows);
+            render_analysis_narrative_rows(out, analysis, rows);
             render_analysis_notes(out, &notes);
             render_weak_indel_analysis_note(out, weak_indel_dependency);
             out.push_str("</div></details>");
@@ -268,16 +268,12 @@ pub(super) fn render_weak_indel_analysis_note(out: &mut String, weak_indel_depen
 
 pub(super) fn analysis_depends_on_weak_observation(
     analysis: &serde_json::Value,
-    observations: &[serde_json::Value],
+    observations: &[AppObservation],
 ) -> bool {
     let weak_paths = observations
         .iter()
         .filter(|observation| analysis_observation_is_weak_indel_match(observation))
-        .filter_map(|observation| {
-            observation
-                .get("variant_path")
-                .and_then(serde_json::Value::as_str)
-        })
+        .map(|observation| observation.variant_path.as_str())
         .collect::<Vec<_>>();
     if weak_paths.is_empty() {
         return false;
@@ -295,11 +291,8 @@ pub(super) fn analysis_depends_on_weak_observation(
         })
 }
 
-pub(super) fn analysis_observation_is_weak_indel_match(observation: &serde_json::Value) -> bool {
-    observation
-        .get("match_quality")
-        .and_then(serde_json::Value::as_str)
-        == Some("weak")
+pub(super) fn analysis_observation_is_weak_indel_match(observation: &AppObservation) -> bool {
+    observation.match_quality == Some("weak")
 }
 
 pub(super) fn render_analysis_logic(out: &mut String, analysis: &serde_json::Value) {
@@ -360,7 +353,7 @@ mod tests {
         });
         let mut html = String::new();
 
-        render_analysis_tables(&mut html, &[analysis], &[], false);
+        render_analysis_tables(&mut html, &[&analysis], &[], false);
 
         assert!(html.contains("analysis-narrative-list"));
         assert!(html.contains("<h5>rs10305420</h5>"));
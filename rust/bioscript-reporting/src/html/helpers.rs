@@ -1,4 +1,4 @@
-use std::fmt::Write as _;
+use std::{fmt::Write as _, io};
 
 #[path = "helpers/repeats.rs"]
 mod repeats;
@@ -174,3 +174,31 @@ pub(super) fn html_escape(value: &str) -> String {
         .replace('>', "&gt;")
         .replace('"', "&quot;")
 }
+
+/// Writer adapter that HTML-escapes everything written through it, for
+/// streaming serialized text straight into an HTML element.
+pub(super) struct HtmlEscapeWriter<W>(pub(super) W);
+
+impl<W: io::Write> io::Write for HtmlEscapeWriter<W> {
+    fn write(&mut self, buf: &[u8]) -> io::Result<usize> {
+        let mut start = 0;
+        for (index, byte) in buf.iter().enumerate() {
+            let entity: &[u8] = match byte {
+                b'&' => b"&amp;",
+                b'<' => b"&lt;",
+                b'>' => b"&gt;",
+                b'"' => b"&quot;",
+                _ => continue,
+            };
+            self.0.write_all(&buf[start..index])?;
+            self.0.write_all(entity)?;
+            start = index + 1;
+        }
+        self.0.write_all(&buf[start..])?;
+        Ok(buf.len())
+    }
+
+    fn flush(&mut self) -> io::Result<()> {
+        self.0.flush()
+    }
+}
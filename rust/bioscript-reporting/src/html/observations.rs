@@ -1,103 +1,131 @@
 use super::helpers::{
     class_cell, genotype_repeat_notation, genotype_repeat_notation_html, html_escape,
-    json_field_as_tsv, padded_homopolymer_repeat_notation, padded_homopolymer_repeat_notation_html,
+    padded_homopolymer_repeat_notation, padded_homopolymer_repeat_notation_html,
     paired_reference_repeat_notation, paired_reference_repeat_notation_html,
     paired_repeat_notation, paired_repeat_notation_html, render_table_start, repeat_notation,
-    repeat_notation_html, same_homopolymer_base, table_column_class, value_str,
+    repeat_notation_html, same_homopolymer_base, table_column_class,
 };
+use crate::AppObservation;
 use std::fmt::Write as _;
-pub(super) fn render_observation_table(
-    out: &mut String,
-    observations: &[serde_json::Value],
-    show_participant_id: bool,
-) {
-    render_observation_filters(out);
-    let all_headers = [
-        "participant_id",
-        "outcome",
-        "rsid",
-        "gene",
-        "ref_alt",
-        "genotype_display",
-        "genotype",
-        "zygosity",
-        "assembly",
-        "chrom",
-        "pos_start",
-        "pos_end",
-        "kind",
-        "ref_count",
-        "alt_count",
-        "depth",
-        "genotype_quality",
-        "allele_balance",
-        "evidence_type",
-        "evidence_raw",
-        "match_quality",
-        "match_notes",
-        "facets",
-        "assay_id",
-        "assay_version",
-        "variant_key",
-        "match_status",
-        "coverage_status",
-        "call_status",
-        "source",
-    ];
-    let show_counts = observations.iter().any(observation_has_quantitative_depth);
-    let show_genotype_quality = observations
-        .iter()
-        .any(|observation| !json_field_as_tsv(observation.get("genotype_quality")).is_empty());
-    let show_facets = observations
-        .iter()
-        .any(|observation| !json_field_as_tsv(observation.get("facets")).is_empty());
-    let show_match_quality = observations.iter().any(|observation| {
-        !json_field_as_tsv(observation.get("match_quality")).is_empty()
-            || !json_field_as_tsv(observation.get("match_notes")).is_empty()
-    });
-    let show_imputed_reference_note = observations
-        .iter()
-        .any(observation_is_imputed_vcf_reference);
-    let show_weak_indel_note = observations.iter().any(observation_is_weak_indel_match);
-    let headers = all_headers
-        .iter()
-        .copied()
-        .filter(|header| show_participant_id || *header != "participant_id")
-        .filter(|header| {
-            show_counts
-                || !matches!(
-                    *header,
-                    "ref_count" | "alt_count" | "depth" | "allele_balance"
-                )
-        })
-        .filter(|header| show_genotype_quality || *header != "genotype_quality")
-        .filter(|header| show_match_quality || !matches!(*header, "match_quality" | "match_notes"))
-        .filter(|header| show_facets || *header != "facets")
-        .collect::<Vec<_>>();
-    render_table_start(out, "observations-table", &headers);
-    for observation in observations {
+
+/// Layout of the observations table: the columns shown and the footnotes
+/// that apply, decided once from all observations so rows can be rendered
+/// (and flushed) one at a time.
+pub(super) struct ObservationTable {
+    headers: Vec<&'static str>,
+    imputed_reference_note: bool,
+    weak_indel_note: bool,
+}
+
+impl ObservationTable {
+    pub(super) fn new(observations: &[AppObservation], show_participant_id: bool) -> Self {
+        let all_headers = [
+            "participant_id",
+            "outcome",
+            "rsid",
+            "gene",
+            "ref_alt",
+            "genotype_display",
+            "genotype",
+            "zygosity",
+            "assembly",
+            "chrom",
+            "pos_start",
+            "pos_end",
+            "kind",
+            "ref_count",
+            "alt_count",
+            "depth",
+            "genotype_quality",
+            "allele_balance",
+            "evidence_type",
+            "evidence_raw",
+            "match_quality",
+            "match_notes",
+            "facets",
+            "assay_id",
+            "assay_version",
+            "variant_key",
+            "match_status",
+            "coverage_status",
+            "call_status",
+            "source",
+        ];
+        let show_counts = observations.iter().any(observation_has_quantitative_depth);
+        let show_genotype_quality = observations
+            .iter()
+            .any(|observation| observation.genotype_quality.is_some());
+        let show_facets = observations.iter().any(|observation| {
+            observation
+                .facets
+                .as_deref()
+                .is_some_and(|facets| !facets.is_empty())
+        });
+        let show_match_quality = observations.iter().any(|observation| {
+            observation
+                .match_quality
+                .is_some_and(|quality| !quality.is_empty())
+                || observation
+                    .match_notes
+                    .as_deref()
+                    .is_some_and(|notes| !notes.is_empty())
+        });
+        let headers = all_headers
+            .into_iter()
+            .filter(|header| show_participant_id || *header != "participant_id")
+            .filter(|header| {
+                show_counts
+                    || !matches!(
+                        *header,
+                        "ref_count" | "alt_count" | "depth" | "allele_balance"
+                    )
+            })
+            .filter(|header| show_genotype_quality || *header != "genotype_quality")
+            .filter(|header| {
+                show_match_quality || !matches!(*header, "match_quality" | "match_notes")
+            })
+            .filter(|header| show_facets || *header != "facets")
+            .collect::<Vec<_>>();
+        Self {
+            headers,
+            imputed_reference_note: observations
+                .iter()
+                .any(observation_is_imputed_vcf_reference),
+            weak_indel_note: observations.iter().any(observation_is_weak_indel_match),
+        }
+    }
+
+    pub(super) fn render_start(&self, out: &mut String) {
+        render_observation_filters(out);
+        render_table_start(out, "observations-table", &self.headers);
+    }
+
+    pub(super) fn render_row(&self, out: &mut String, observation: &AppObservation) {
         let _ = write!(
             out,
             "<tr class=\"{}\" data-observation=\"{}\" data-participant=\"{}\">",
             observation_row_class(observation),
             observation_filter_group(observation),
-            html_escape(value_str(observation, "participant_id"))
+            html_escape(&observation.participant_id)
         );
-        for header in &headers {
+        for header in &self.headers {
             render_observation_cell(out, observation, header);
         }
         out.push_str("</tr>");
     }
-    out.push_str("</tbody></table></div>");
-    if show_imputed_reference_note {
-        out.push_str("<p class=\"muted observation-note\">* In variant-only VCF inputs, absent queried variant rows are shown as imputed reference genotypes. This is usually appropriate for variant-only VCFs, but it may be wrong if the VCF omits loci for another reason.</p>");
-    }
-    if show_weak_indel_note {
-        out.push_str("<p class=\"muted observation-note\">* Indel calls from consumer genotype files are weak matches: the file reports an insertion/deletion token at the marker, but does not provide sequence-resolved evidence for the exact deletion allele.</p>");
+
+    pub(super) fn render_end(&self, out: &mut String) {
+        out.push_str("</tbody></table></div>");
+        if self.imputed_reference_note {
+            out.push_str("<p class=\"muted observation-note\">* In variant-only VCF inputs, absent queried variant rows are shown as imputed reference genotypes. This is usually appropriate for variant-only VCFs, but it may be wrong if the VCF omits loci for another reason.</p>");
+        }
+        if self.weak_indel_note {
+            out.push_str("<p class=\"muted observation-note\">* Indel calls from consumer genotype files are weak matches: the file reports an insertion/deletion token at the marker, but does not provide sequence-resolved evidence for the exact deletion allele.</p>");
+        }
     }
 }
 
-pub(super) fn observation_filter_group(observation: &serde_json::Value) -> &'static str {
+pub(super) fn observation_filter_group(observation: &AppObservation) -> &'static str {
     match observation_row_class(observation) {
         "row-reference" => "reference",
         "row-missing" => "missing",
@@ -122,30 +150,18 @@ pub(super) fn render_observation_filters(out: &mut String) {
     out.push_str("</div>");
 }
 
-pub(super) fn observation_has_quantitative_depth(observation: &serde_json::Value) -> bool {
+pub(super) fn observation_has_quantitative_depth(observation: &AppObservation) -> bool {
     ["ref_count", "alt_count", "depth", "allele_balance"]
         .iter()
-        .any(|key| !json_field_as_tsv(observation.get(*key)).is_empty())
+        .any(|key| !observation.field(key).to_tsv().is_empty())
 }
 
-pub(super) fn observation_row_class(observation: &serde_json::Value) -> &'static str {
-    let outcome = observation
-        .get("outcome")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
-    if outcome == "variant" {
+pub(super) fn observation_row_class(observation: &AppObservation) -> &'static str {
+    if observation.outcome == "variant" {
         "row-variant"
-    } else if outcome == "reference" {
+    } else if observation.outcome == "reference" {
         "row-reference"
-    } else if observation
-        .get("call_status")
-        .and_then(serde_json::Value::as_str)
-        != Some("called")
-        || observation
-            .get("match_status")
-            .and_then(serde_json::Value::as_str)
-            == Some("not_found")
-    {
+    } else if observation.call_status != "called" || observation.match_status == "not_found" {
         "row-missing"
     } else {
         ""
@@ -154,12 +170,12 @@ pub(super) fn observation_row_class(observation: &serde_json::Value) -> &'static
 
 pub(super) fn render_observation_cell(
     out: &mut String,
-    observation: &serde_json::Value,
+    observation: &AppObservation,
     header: &str,
 ) {
     let cell_class = table_column_class(header);
     if header == "outcome" {
-        let mut value = json_field_as_tsv(observation.get(header));
+        let mut value = observation.outcome.to_owned();
         if (value == "reference" && observation_is_imputed_vcf_reference(observation))
             || (value == "variant" && observation_is_weak_indel_match(observation))
         {
@@ -179,18 +195,15 @@ pub(super) fn render_observation_cell(
     }
     if header == "allele_balance" {
         let value = observation
-            .get(header)
-            .and_then(serde_json::Value::as_f64)
+            .allele_balance
             .map(|value| format!("{value:.2}"))
             .unwrap_or_default();
         class_cell(out, &value, cell_class);
         return;
     }
     if header == "source" {
-        let source = observation
-            .get("source")
-            .unwrap_or(&serde_json::Value::Null);
-        let url = source
+        let url = observation
+            .source
             .get("url")
             .and_then(serde_json::Value::as_str)
             .unwrap_or_default();
@@ -207,29 +220,18 @@ pub(super) fn render_observation_cell(
         return;
     }
     if header == "genotype_display" {
-        let outcome = observation
-            .get("outcome")
-            .and_then(serde_json::Value::as_str)
-            .unwrap_or_default();
-        let raw_value = json_field_as_tsv(observation.get(header));
-        let ref_allele = observation
-            .get("ref")
-            .and_then(serde_json::Value::as_str)
-            .unwrap_or_default();
-        let alt_allele = observation
-            .get("alt")
-            .and_then(serde_json::Value::as_str)
-            .unwrap_or_default();
+        let raw_value = observation.field(header).to_tsv();
+        let ref_allele = observation.ref_allele.as_str();
+        let alt_allele = observation.alt.as_str();
         let value = genotype_repeat_notation(&raw_value, ref_allele, alt_allele);
         let html_value = genotype_repeat_notation_html(&raw_value, ref_allele, alt_allele);
-        if matches!(outcome, "variant" | "observed_alt" | "unknown_alt") {
-            let alt = observation
-                .get("alt")
-                .and_then(serde_json::Value::as_str)
-                .unwrap_or_default();
+        if matches!(
+            observation.outcome,
+            "variant" | "observed_alt" | "unknown_alt"
+        ) {
             let escaped_value = html_escape(&value);
             let cell_html = if html_value == escaped_value {
-                highlight_allele(&value, alt)
+                highlight_allele(&value, alt_allele)
             } else {
                 html_value
             };
@@ -255,11 +257,11 @@ pub(super) fn render_observation_cell(
         out,
         "<td class=\"{}\">{}</td>",
         cell_class,
-        html_escape(&json_field_as_tsv(observation.get(header)))
+        html_escape(&observation.field(header).to_tsv())
     );
 }
 
-fn ref_alt_cell(out: &mut String, observation: &serde_json::Value) {
+fn ref_alt_cell(out: &mut String, observation: &AppObservation) {
     let value = observation_ref_alt(observation);
     let html_value = observation_ref_alt_html(observation);
     let raw_value = observation_ref_alt_raw(observation);
@@ -271,27 +273,18 @@ fn ref_alt_cell(out: &mut String, observation: &serde_json::Value) {
     );
 }
 
-pub(super) fn observation_is_imputed_vcf_reference(observation: &serde_json::Value) -> bool {
+pub(super) fn observation_is_imputed_vcf_reference(observation: &AppObservation) -> bool {
     observation
-        .get("evidence_raw")
-        .and_then(serde_json::Value::as_str)
-        .is_some_and(|evidence| {
-            evidence.contains("imputed reference genotype from absent variant-only VCF record")
-        })
+        .evidence_raw
+        .contains("imputed reference genotype from absent variant-only VCF record")
 }
 
-pub(super) fn observation_is_weak_indel_match(observation: &serde_json::Value) -> bool {
-    observation
-        .get("match_quality")
-        .and_then(serde_json::Value::as_str)
-        == Some("weak")
+pub(super) fn observation_is_weak_indel_match(observation: &AppObservation) -> bool {
+    observation.match_quality == Some("weak")
 }
 
-pub(super) fn observation_ref_alt(observation: &serde_json::Value) -> String {
-    let ref_allele = observation
-        .get("ref")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
+pub(super) fn observation_ref_alt(observation: &AppObservation) -> String {
+    let ref_allele = observation.ref_allele.as_str();
     let alt_alleles = observation_alt_alleles(observation);
     if ref_allele.is_empty() && alt_alleles.is_empty() {
         String::new()
@@ -322,11 +315,8 @@ pub(super) fn observation_ref_alt(observation: &serde_json::Value) -> String {
     }
 }
 
-fn observation_ref_alt_html(observation: &serde_json::Value) -> String {
-    let ref_allele = observation
-        .get("ref")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
+fn observation_ref_alt_html(observation: &AppObservation) -> String {
+    let ref_allele = observation.ref_allele.as_str();
     let alt_alleles = observation_alt_alleles(observation);
     if ref_allele.is_empty() && alt_alleles.is_empty() {
         String::new()
@@ -357,11 +347,8 @@ fn observation_ref_alt_html(observation: &serde_json::Value) -> String {
     }
 }
 
-fn observation_ref_alt_raw(observation: &serde_json::Value) -> String {
-    let ref_allele = observation
-        .get("ref")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
+fn observation_ref_alt_raw(observation: &AppObservation) -> String {
+    let ref_allele = observation.ref_allele.as_str();
     let alt_alleles = observation_alt_alleles(observation);
     if ref_allele.is_empty() && alt_alleles.is_empty() {
         String::new()
@@ -370,23 +357,18 @@ fn observation_ref_alt_raw(observation: &serde_json::Value) -> String {
     }
 }
 
-fn observation_alt_alleles(observation: &serde_json::Value) -> Vec<String> {
+fn observation_alt_alleles(observation: &AppObservation) -> Vec<String> {
     let alts = observation
-        .get("alts")
-        .and_then(serde_json::Value::as_array)
-        .into_iter()
-        .flatten()
-        .filter_map(serde_json::Value::as_str)
+        .alts
+        .iter()
         .filter(|value| !value.is_empty())
-        .map(ToOwned::to_owned)
+        .cloned()
         .collect::<Vec<_>>();
     if !alts.is_empty() {
         return alts;
     }
     observation
-        .get("alt")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default()
+        .alt
         .split(',')
         .filter(|value| !value.is_empty())
         .map(ToOwned::to_owned)
@@ -394,16 +376,14 @@ fn observation_alt_alleles(observation: &serde_json::Value) -> Vec<String> {
 }
 
 fn observation_uses_padded_homopolymer_repeat(
-    observation: &serde_json::Value,
+    observation: &AppObservation,
     ref_allele: &str,
     alt_alleles: &[String],
 ) -> bool {
-    let kind = observation
-        .get("kind")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
-    matches!(kind, "indel" | "deletion" | "insertion")
-        && !ref_allele.is_empty()
+    matches!(
+        observation.kind.as_str(),
+        "indel" | "deletion" | "insertion"
+    ) && !ref_allele.is_empty()
         && !alt_alleles.is_empty()
         && alt_alleles
             .iter()
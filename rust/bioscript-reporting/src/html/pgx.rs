@@ -6,12 +6,12 @@ use super::observations::highlight_allele;
 use std::fmt::Write as _;
 pub(super) fn render_pgx_table(
     out: &mut String,
-    label_findings: &[serde_json::Value],
-    summary_findings: &[serde_json::Value],
+    label_findings: &[&serde_json::Value],
+    summary_findings: &[&serde_json::Value],
 ) {
     let mut findings = Vec::new();
-    findings.extend(label_findings.iter());
-    findings.extend(summary_findings.iter());
+    findings.extend(label_findings.iter().copied());
+    findings.extend(summary_findings.iter().copied());
     if findings.is_empty() {
         out.push_str("<p class=\"muted\">No PGx findings.</p>");
         return;
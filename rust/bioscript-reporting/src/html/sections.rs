@@ -1,24 +1,22 @@
 use super::helpers::{html_escape, table_cell, value_str};
 use std::fmt::Write as _;
-pub(super) fn collect_report_analyses(reports: &[serde_json::Value]) -> Vec<serde_json::Value> {
+pub(super) fn collect_report_analyses(reports: &[serde_json::Value]) -> Vec<&serde_json::Value> {
     reports
         .iter()
         .filter_map(|report| report.get("analyses").and_then(serde_json::Value::as_array))
         .flat_map(|analyses| analyses.iter())
-        .cloned()
         .collect()
 }
 
-pub(super) fn collect_report_findings(
-    reports: &[serde_json::Value],
+pub(super) fn collect_report_findings<'a>(
+    reports: &'a [serde_json::Value],
     schema: &str,
-) -> Vec<serde_json::Value> {
+) -> Vec<&'a serde_json::Value> {
     reports
         .iter()
         .filter_map(|report| report.get("findings").and_then(serde_json::Value::as_array))
         .flat_map(|findings| findings.iter())
         .filter(|finding| finding.get("schema").and_then(serde_json::Value::as_str) == Some(schema))
-        .cloned()
         .collect()
 }
 
@@ -2,10 +2,12 @@
 
 mod analysis;
 mod artifacts;
+mod cohort;
 mod html;
 mod manifest;
 mod matching;
 mod observation;
+mod plan;
 mod report_json;
 mod rows;
 mod runner;
@@ -18,9 +20,11 @@ pub use analysis::{
 };
 pub use artifacts::{
     ReportArtifactTexts, json_field_as_tsv, render_input_report_artifact_texts, render_jsonl,
-    render_observations_tsv, render_report_artifact_texts, standard_text_output,
+    render_observations_tsv, render_report_artifact_texts, standard_text_output, write_jsonl,
+    write_observations_tsv,
 };
-pub use html::render_app_html_document;
+pub use cohort::{COHORT_ALLELE_TSV_HEADERS, CohortAggregator};
+pub use html::{render_app_html_document, write_app_html_document};
 pub use manifest::{
     AnalysisManifestTask, ExecutableAssayMember, ExecutablePanelMember,
     FilesystemManifestWorkspace, ManifestWorkspace, ReportManifestContext, ReportManifestKind,
@@ -33,14 +37,19 @@ pub use manifest::{
     report_manifest_schema, resolve_filesystem_manifest_path,
 };
 pub use matching::match_app_findings;
-pub use observation::{AppObservationInput, app_observation_from_manifest_row};
+pub use observation::{
+    AppObservation, AppObservationInput, ObservationField, app_observation_from_manifest_row,
+    app_observation_record,
+};
+pub use plan::{ReportPlan, ReportPlanCache, VariantObservationFields};
 pub use report_json::{
     AppInputReportInput, AppReportJsonInput, app_input_report_json, app_report_json,
+    write_app_input_report_json, write_app_report_json,
 };
 pub use rows::{
     MANIFEST_ROW_TSV_HEADERS, render_manifest_rows_tsv, render_manifest_trace_tsv, variant_row,
 };
 pub use runner::{
     NoopReportAnalysisRunner, ReportAnalysisRunner, ReportInputContext, ReportRunOptions,
-    ReportRunResult, ReportVariantLookup, ReportWorkspace, run_report,
+    ReportRunResult, ReportVariantLookup, run_report, run_report_with_plan,
 };
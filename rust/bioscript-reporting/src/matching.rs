@@ -1,293 +1,263 @@
-use std::path::Path;
+use std::collections::BTreeSet;
 
+use crate::AppObservation;
+
+#[path = "matching_index.rs"]
+mod index;
+
+use index::{AnalysisIndex, ObservationIndex, ObservedRow};
+
+/// Attach every finding (or finding effect) whose binding matches the
+/// participant's observations or analysis rows.
+///
+/// Observations are indexed once by variant reference and analysis rows by
+/// `(analysis, key)` value, and each binding is parsed into a typed
+/// predicate, so a binding is only checked against the rows its variant or
+/// value can select instead of scanning every row per effect.
 pub fn match_app_findings(
     findings: &[serde_json::Value],
-    observations: &[serde_json::Value],
+    observations: &[AppObservation],
     analyses: &[serde_json::Value],
 ) -> Vec<serde_json::Value> {
+    let mut observation_index = ObservationIndex::new(observations);
+    let mut analysis_index = AnalysisIndex::new(analyses);
     let mut matched = Vec::new();
-    let mut seen = std::collections::BTreeSet::new();
+    let mut seen = BTreeSet::new();
     for finding in findings {
         if let Some(effects) = finding.get("effects").and_then(serde_json::Value::as_array) {
             for effect in effects {
-                if let Some(observation) = app_finding_match_observation(effect, observations) {
-                    let mut item = finding.clone();
-                    if let Some(object) = item.as_object_mut() {
-                        object.remove("effects");
-                        object.insert("matched".to_owned(), serde_json::Value::Bool(true));
-                        object.insert("matched_effect".to_owned(), effect.clone());
-                        object.insert(
-                            "matched_observation".to_owned(),
-                            app_finding_observation_context(observation),
-                        );
-                    }
-                    if seen.insert(app_finding_dedupe_key(&item)) {
-                        matched.push(item);
-                    }
-                } else if let Some(analysis) = app_finding_match_analysis(effect, analyses) {
-                    let mut item = finding.clone();
-                    if let Some(object) = item.as_object_mut() {
-                        object.remove("effects");
-                        object.insert("matched".to_owned(), serde_json::Value::Bool(true));
-                        object.insert("matched_effect".to_owned(), effect.clone());
-                        object.insert("matched_analysis".to_owned(), analysis);
-                    }
-                    if seen.insert(app_finding_dedupe_key(&item)) {
-                        matched.push(item);
-                    }
+                if let Some(found) =
+                    match_binding(effect, &mut observation_index, &mut analysis_index)
+                {
+                    push_matched_finding(&mut matched, &mut seen, finding, Some(effect), &found);
                 }
             }
-        } else if let Some(observation) = app_finding_match_observation(finding, observations) {
-            let mut item = finding.clone();
-            if let Some(object) = item.as_object_mut() {
-                object.insert("matched".to_owned(), serde_json::Value::Bool(true));
-                object.insert(
-                    "matched_observation".to_owned(),
-                    app_finding_observation_context(observation),
-                );
-            }
-            if seen.insert(app_finding_dedupe_key(&item)) {
-                matched.push(item);
-            }
-        } else if let Some(analysis) = app_finding_match_analysis(finding, analyses) {
-            let mut item = finding.clone();
-            if let Some(object) = item.as_object_mut() {
-                object.insert("matched".to_owned(), serde_json::Value::Bool(true));
-                object.insert("matched_analysis".to_owned(), analysis);
-            }
-            if seen.insert(app_finding_dedupe_key(&item)) {
-                matched.push(item);
-            }
+        } else if let Some(found) =
+            match_binding(finding, &mut observation_index, &mut analysis_index)
+        {
+            push_matched_finding(&mut matched, &mut seen, finding, None, &found);
         }
     }
     matched
 }
 
-fn app_finding_match_observation<'a>(
-    finding: &serde_json::Value,
-    observations: &'a [serde_json::Value],
-) -> Option<&'a serde_json::Value> {
+enum BindingMatch<'a> {
+    Observation(&'a AppObservation),
+    Analysis {
+        analysis: &'a serde_json::Value,
+        row: &'a serde_json::Value,
+        key: &'a str,
+    },
+}
+
+fn match_binding<'a>(
+    finding: &'a serde_json::Value,
+    observation_index: &mut ObservationIndex<'a>,
+    analysis_index: &mut AnalysisIndex<'a>,
+) -> Option<BindingMatch<'a>> {
     let binding = finding.get("binding")?;
     match binding.get("source").and_then(serde_json::Value::as_str) {
-        Some("variant") => app_variant_binding_match_observation(binding, observations),
+        Some("variant") => observation_index
+            .find(&VariantBinding::parse(binding)?)
+            .map(BindingMatch::Observation),
+        Some("analysis") => {
+            let binding = AnalysisBinding::parse(binding)?;
+            let (analysis, row) = analysis_index.find(&binding)?;
+            Some(BindingMatch::Analysis {
+                analysis,
+                row,
+                key: binding.key,
+            })
+        }
         _ => None,
     }
 }
 
-fn app_finding_match_analysis(
+/// Push the matched copy of `finding` unless an equivalent one was already
+/// matched. The dedupe key is checked before anything is cloned, and the
+/// effects list is never copied.
+fn push_matched_finding(
+    matched: &mut Vec<serde_json::Value>,
+    seen: &mut BTreeSet<String>,
     finding: &serde_json::Value,
-    analyses: &[serde_json::Value],
-) -> Option<serde_json::Value> {
-    let binding = finding.get("binding")?;
-    if binding.get("source").and_then(serde_json::Value::as_str) != Some("analysis") {
-        return None;
+    effect: Option<&serde_json::Value>,
+    found: &BindingMatch<'_>,
+) {
+    if !seen.insert(app_finding_dedupe_key(finding, effect)) {
+        return;
     }
-    let analysis_id = binding
-        .get("analysis_id")
-        .or_else(|| binding.get("analysis"))
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
-    let key = binding.get("key").and_then(serde_json::Value::as_str)?;
-    for analysis in analyses {
-        if !analysis_id.is_empty()
-            && analysis
-                .get("analysis_id")
-                .and_then(serde_json::Value::as_str)
-                != Some(analysis_id)
-        {
-            continue;
-        }
-        let Some(rows) = analysis.get("rows").and_then(serde_json::Value::as_array) else {
-            continue;
+    let Some(object) = finding.as_object() else {
+        matched.push(finding.clone());
+        return;
+    };
+    let mut item = serde_json::Map::new();
+    for (key, value) in object {
+        // A placeholder keeps the key order `Map::remove` produces below.
+        let value = if effect.is_some() && key == "effects" {
+            serde_json::Value::Null
+        } else {
+            value.clone()
         };
-        for row in rows {
-            if app_binding_matches_value(row.get(key), binding) {
-                return Some(serde_json::json!({
-                    "participant_id": analysis.get("participant_id").cloned().unwrap_or(serde_json::Value::Null),
-                    "assay_id": analysis.get("assay_id").cloned().unwrap_or(serde_json::Value::Null),
-                    "analysis_id": analysis.get("analysis_id").cloned().unwrap_or(serde_json::Value::Null),
-                    "key": key,
-                    "value": row.get(key).cloned().unwrap_or(serde_json::Value::Null),
-                    "row": row,
-                }));
-            }
-        }
+        item.insert(key.clone(), value);
     }
-    None
-}
-
-fn app_variant_binding_match_observation<'a>(
-    binding: &serde_json::Value,
-    observations: &'a [serde_json::Value],
-) -> Option<&'a serde_json::Value> {
-    let operator = binding
-        .get("operator")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or("equals");
-    if matches!(operator, "dosage_equals" | "dosage_in") {
-        let allele = binding
-            .get("allele")
-            .and_then(serde_json::Value::as_str)
-            .unwrap_or_default();
-        return observations
-            .iter()
-            .filter(|observation| !app_variant_ref_mismatch(binding, observation))
-            .filter(|observation| app_binding_chromosome_count_matches(binding, observation))
-            .find(|observation| {
-                let dosage = app_observation_allele_dosage(observation, allele);
-                app_binding_matches_dosage(dosage, binding)
-            });
+    if effect.is_some() {
+        item.remove("effects");
     }
-
-    let key = binding
-        .get("key")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
-    if key.is_empty() {
-        return None;
+    item.insert("matched".to_owned(), serde_json::Value::Bool(true));
+    if let Some(effect) = effect {
+        item.insert("matched_effect".to_owned(), effect.clone());
     }
-    if key == "alt" {
-        let expected_alleles = app_binding_expected_values(binding);
-        return observations
-            .iter()
-            .filter(|observation| !app_variant_ref_mismatch(binding, observation))
-            .filter(|observation| app_binding_chromosome_count_matches(binding, observation))
-            .find(|observation| {
-                app_binding_matches_value(observation.get(key), binding)
-                    && expected_alleles.iter().any(|expected| {
-                        app_observation_allele_dosage(observation, expected)
-                            .is_some_and(|dosage| dosage > 0)
-                    })
-            });
-    }
-    observations
-        .iter()
-        .filter(|observation| !app_variant_ref_mismatch(binding, observation))
-        .filter(|observation| app_binding_chromosome_count_matches(binding, observation))
-        .find(|observation| app_binding_matches_value(observation.get(key), binding))
+    match found {
+        BindingMatch::Observation(observation) => item.insert(
+            "matched_observation".to_owned(),
+            app_finding_observation_context(observation),
+        ),
+        BindingMatch::Analysis { analysis, row, key } => item.insert(
+            "matched_analysis".to_owned(),
+            app_finding_analysis_context(analysis, row, key),
+        ),
+    };
+    matched.push(serde_json::Value::Object(item));
 }
 
-fn app_finding_observation_context(observation: &serde_json::Value) -> serde_json::Value {
-    serde_json::json!({
-        "participant_id": observation.get("participant_id").cloned().unwrap_or(serde_json::Value::Null),
-        "rsid": observation.get("rsid").cloned().unwrap_or(serde_json::Value::Null),
-        "gene": observation.get("gene").cloned().unwrap_or(serde_json::Value::Null),
-        "ref": observation.get("ref").cloned().unwrap_or(serde_json::Value::Null),
-        "alt": observation.get("alt").cloned().unwrap_or(serde_json::Value::Null),
-        "genotype_display": observation.get("genotype_display").cloned().unwrap_or(serde_json::Value::Null),
-        "outcome": observation.get("outcome").cloned().unwrap_or(serde_json::Value::Null),
-    })
+/// Typed form of a `source: variant` binding.
+struct VariantBinding<'a> {
+    /// `variant` or `path`; empty when the binding applies to any variant.
+    variant_ref: &'a str,
+    chromosome_count: Option<i64>,
+    test: VariantTest<'a>,
 }
 
-fn app_variant_ref_mismatch(binding: &serde_json::Value, observation: &serde_json::Value) -> bool {
-    let variant_ref = binding
-        .get("variant")
-        .or_else(|| binding.get("path"))
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
-    if variant_ref.is_empty() {
-        return false;
-    }
-    let basename = Path::new(variant_ref)
-        .file_name()
-        .and_then(|value| value.to_str())
-        .unwrap_or(variant_ref);
-    let candidates = [
-        observation
-            .get("variant_key")
-            .and_then(serde_json::Value::as_str),
-        observation
-            .get("variant_path")
-            .and_then(serde_json::Value::as_str),
-        observation.get("rsid").and_then(serde_json::Value::as_str),
-    ];
-    !candidates.into_iter().flatten().any(|candidate| {
-        candidate == variant_ref
-            || Path::new(candidate)
-                .file_name()
-                .and_then(|value| value.to_str())
-                .is_some_and(|value| value == basename)
-    })
+enum VariantTest<'a> {
+    /// `dosage_equals` / `dosage_in` on the dosage of `allele`.
+    Dosage { allele: &'a str, dosages: Vec<i64> },
+    /// `equals` / `in` on the observation field `key`.
+    Value { key: &'a str, values: Vec<String> },
+    /// `key: alt`, which also requires one of the expected alleles observed.
+    Alt {
+        values: Vec<String>,
+        alleles: Vec<String>,
+    },
 }
 
-fn app_observation_allele_dosage(observation: &serde_json::Value, allele: &str) -> Option<i64> {
-    if allele.is_empty() {
-        return None;
-    }
-    let ref_allele = observation
-        .get("ref")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
-    let alt_allele = observation
-        .get("alt")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
-    let zygosity = observation
-        .get("zygosity")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
-    if allele == ref_allele {
-        return match zygosity {
-            "hom_ref" => Some(2),
-            "hem_ref" | "het" => Some(1),
-            "hom_alt" | "hem_alt" => Some(0),
-            _ => None,
-        };
-    }
-    if allele == alt_allele {
-        return match zygosity {
-            "hom_ref" | "hem_ref" => Some(0),
-            "het" | "hem_alt" => Some(1),
-            "hom_alt" => Some(2),
-            _ => None,
+impl<'a> VariantBinding<'a> {
+    fn parse(binding: &'a serde_json::Value) -> Option<Self> {
+        let operator = binding
+            .get("operator")
+            .and_then(serde_json::Value::as_str)
+            .unwrap_or("equals");
+        let test = if matches!(operator, "dosage_equals" | "dosage_in") {
+            VariantTest::Dosage {
+                allele: binding
+                    .get("allele")
+                    .and_then(serde_json::Value::as_str)
+                    .unwrap_or_default(),
+                dosages: app_binding_accepted_dosages(binding),
+            }
+        } else {
+            let key = binding
+                .get("key")
+                .and_then(serde_json::Value::as_str)
+                .unwrap_or_default();
+            let values = app_binding_accepted_values(binding);
+            match key {
+                "" => return None,
+                "alt" => VariantTest::Alt {
+                    values,
+                    alleles: app_binding_expected_values(binding),
+                },
+                _ => VariantTest::Value { key, values },
+            }
         };
+        Some(Self {
+            variant_ref: binding
+                .get("variant")
+                .or_else(|| binding.get("path"))
+                .and_then(serde_json::Value::as_str)
+                .unwrap_or_default(),
+            chromosome_count: binding
+                .get("chromosome_count")
+                .and_then(serde_json::Value::as_i64),
+            test,
+        })
     }
-    let display = observation
-        .get("genotype_display")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default();
-    if allele.len() == 1 {
-        let allele_ch = allele.chars().next()?.to_ascii_uppercase();
-        return display
-            .chars()
-            .filter(|ch| ch.to_ascii_uppercase() == allele_ch)
-            .count()
-            .try_into()
-            .ok();
+
+    fn matches(&self, row: &ObservedRow<'_>) -> bool {
+        if self
+            .chromosome_count
+            .is_some_and(|expected| row.chromosome_count() != Some(expected))
+        {
+            return false;
+        }
+        match &self.test {
+            VariantTest::Dosage { allele, dosages } => {
+                app_binding_matches_dosage(row.dosage(allele), dosages)
+            }
+            VariantTest::Value { key, values } => {
+                app_binding_matches_value(row.observation.field(key).as_scalar_string(), values)
+            }
+            VariantTest::Alt { values, alleles } => {
+                app_binding_matches_value(Some(row.observation.alt.clone()), values)
+                    && alleles
+                        .iter()
+                        .any(|allele| row.dosage(allele).is_some_and(|dosage| dosage > 0))
+            }
+        }
     }
-    None
 }
 
-fn app_binding_chromosome_count_matches(
-    binding: &serde_json::Value,
-    observation: &serde_json::Value,
-) -> bool {
-    let Some(expected) = binding
-        .get("chromosome_count")
-        .and_then(serde_json::Value::as_i64)
-    else {
-        return true;
-    };
-    app_observation_chromosome_count(observation).is_some_and(|actual| actual == expected)
+/// Typed form of a `source: analysis` binding.
+struct AnalysisBinding<'a> {
+    /// `analysis_id` (or its `analysis` alias); empty matches any analysis.
+    analysis_id: &'a str,
+    key: &'a str,
+    values: Vec<String>,
 }
 
-fn app_observation_chromosome_count(observation: &serde_json::Value) -> Option<i64> {
-    match observation
-        .get("zygosity")
-        .and_then(serde_json::Value::as_str)
-        .unwrap_or_default()
-    {
-        "hem_ref" | "hem_alt" => Some(1),
-        "hom_ref" | "het" | "hom_alt" => Some(2),
-        _ => None,
+impl<'a> AnalysisBinding<'a> {
+    fn parse(binding: &'a serde_json::Value) -> Option<Self> {
+        Some(Self {
+            analysis_id: binding
+                .get("analysis_id")
+                .or_else(|| binding.get("analysis"))
+                .and_then(serde_json::Value::as_str)
+                .unwrap_or_default(),
+            key: binding.get("key").and_then(serde_json::Value::as_str)?,
+            values: app_binding_accepted_values(binding),
+        })
     }
 }
 
-fn app_binding_matches_value(
-    actual: Option<&serde_json::Value>,
-    binding: &serde_json::Value,
-) -> bool {
-    let actual = actual.and_then(value_as_string).unwrap_or_default();
+fn app_finding_observation_context(observation: &AppObservation) -> serde_json::Value {
+    serde_json::json!({
+        "participant_id": observation.participant_id,
+        "rsid": observation.rsid,
+        "gene": observation.gene,
+        "ref": observation.ref_allele,
+        "alt": observation.alt,
+        "genotype_display": observation.genotype_display,
+        "outcome": observation.outcome,
+    })
+}
+
+fn app_finding_analysis_context(
+    analysis: &serde_json::Value,
+    row: &serde_json::Value,
+    key: &str,
+) -> serde_json::Value {
+    serde_json::json!({
+        "participant_id": analysis.get("participant_id").cloned().unwrap_or(serde_json::Value::Null),
+        "assay_id": analysis.get("assay_id").cloned().unwrap_or(serde_json::Value::Null),
+        "analysis_id": analysis.get("analysis_id").cloned().unwrap_or(serde_json::Value::Null),
+        "key": key,
+        "value": row.get(key).cloned().unwrap_or(serde_json::Value::Null),
+        "row": row,
+    })
+}
+
+/// Values an `equals` / `in` binding accepts, rendered like
+/// `value_as_string`. Other operators accept nothing.
+fn app_binding_accepted_values(binding: &serde_json::Value) -> Vec<String> {
     match binding
         .get("operator")
         .and_then(serde_json::Value::as_str)
@@ -296,20 +266,21 @@ fn app_binding_matches_value(
         "equals" => binding
             .get("value")
             .and_then(value_as_string)
-            .is_some_and(|value| value == actual),
+            .into_iter()
+            .collect(),
         "in" => binding
             .get("values")
             .and_then(serde_json::Value::as_array)
-            .is_some_and(|values| {
-                values
-                    .iter()
-                    .filter_map(value_as_string)
-                    .any(|value| value == actual)
-            }),
-        _ => false,
+            .map(|values| values.iter().filter_map(value_as_string).collect())
+            .unwrap_or_default(),
+        _ => Vec::new(),
     }
 }
 
+fn app_binding_matches_value(actual: Option<String>, accepted: &[String]) -> bool {
+    accepted.contains(&actual.unwrap_or_default())
+}
+
 fn app_binding_expected_values(binding: &serde_json::Value) -> Vec<String> {
     let mut values = Vec::new();
     if let Some(value) = binding.get("value").and_then(value_as_string) {
@@ -321,10 +292,7 @@ fn app_binding_expected_values(binding: &serde_json::Value) -> Vec<String> {
     values
 }
 
-fn app_binding_matches_dosage(dosage: Option<i64>, binding: &serde_json::Value) -> bool {
-    let Some(dosage) = dosage else {
-        return false;
-    };
+fn app_binding_accepted_dosages(binding: &serde_json::Value) -> Vec<i64> {
     match binding
         .get("operator")
         .and_then(serde_json::Value::as_str)
@@ -333,20 +301,26 @@ fn app_binding_matches_dosage(dosage: Option<i64>, binding: &serde_json::Value)
         "dosage_equals" => binding
             .get("value")
             .and_then(serde_json::Value::as_i64)
-            .is_some_and(|value| value == dosage),
+            .into_iter()
+            .collect(),
         "dosage_in" => binding
             .get("values")
             .and_then(serde_json::Value::as_array)
-            .is_some_and(|values| {
+            .map(|values| {
                 values
                     .iter()
                     .filter_map(serde_json::Value::as_i64)
-                    .any(|value| value == dosage)
-            }),
-        _ => false,
+                    .collect()
+            })
+            .unwrap_or_default(),
+        _ => Vec::new(),
     }
 }
 
+fn app_binding_matches_dosage(dosage: Option<i64>, accepted: &[i64]) -> bool {
+    dosage.is_some_and(|dosage| accepted.contains(&dosage))
+}
+
 fn value_as_string(value: &serde_json::Value) -> Option<String> {
     match value {
         serde_json::Value::String(value) => Some(value.clone()),
@@ -356,9 +330,12 @@ fn value_as_string(value: &serde_json::Value) -> Option<String> {
     }
 }
 
-fn app_finding_dedupe_key(finding: &serde_json::Value) -> String {
-    let effect_key = finding
-        .get("matched_effect")
+pub(crate) fn app_finding_dedupe_key(
+    finding: &serde_json::Value,
+    matched_effect: Option<&serde_json::Value>,
+) -> String {
+    let effect_key = matched_effect
+        .or_else(|| finding.get("matched_effect"))
         .and_then(|effect| {
             effect
                 .get("id")
@@ -412,6 +389,54 @@ fn app_finding_dedupe_key(finding: &serde_json::Value) -> String {
 mod report_matching_tests {
     use super::*;
 
+    fn observation(
+        variant_path: &str,
+        alleles: (&str, &str),
+        genotype_display: &str,
+        zygosity: &str,
+    ) -> AppObservation {
+        AppObservation {
+            variant_path: variant_path.to_owned(),
+            ref_allele: alleles.0.to_owned(),
+            alt: alleles.1.to_owned(),
+            genotype_display: genotype_display.to_owned(),
+            zygosity: zygosity.to_owned(),
+            ..AppObservation::default()
+        }
+    }
+
+    fn app_variant_binding_match_observation<'a>(
+        binding: &'a serde_json::Value,
+        observations: &'a [AppObservation],
+    ) -> Option<&'a AppObservation> {
+        ObservationIndex::new(observations).find(&VariantBinding::parse(binding)?)
+    }
+
+    fn app_variant_ref_mismatch(binding: &serde_json::Value, observation: &AppObservation) -> bool {
+        let variant_ref = binding
+            .get("variant")
+            .or_else(|| binding.get("path"))
+            .and_then(serde_json::Value::as_str)
+            .unwrap_or_default();
+        ObservationIndex::new(std::slice::from_ref(observation))
+            .variant_candidates(variant_ref)
+            .is_empty()
+    }
+
+    fn binding_matches_value(
+        actual: Option<&serde_json::Value>,
+        binding: &serde_json::Value,
+    ) -> bool {
+        app_binding_matches_value(
+            actual.and_then(value_as_string),
+            &app_binding_accepted_values(binding),
+        )
+    }
+
+    fn binding_matches_dosage(dosage: Option<i64>, binding: &serde_json::Value) -> bool {
+        app_binding_matches_dosage(dosage, &app_binding_accepted_dosages(binding))
+    }
+
     #[test]
     fn alt_binding_requires_observed_allele_dosage() {
         let binding = serde_json::json!({
@@ -420,30 +445,13 @@ mod report_matching_tests {
             "value": "G"
         });
         let observations = vec![
-            serde_json::json!({
-                "variant_path": "rs1.yaml",
-                "ref": "A",
-                "alt": "G",
-                "genotype_display": "AA",
-                "zygosity": "hom_ref"
-            }),
-            serde_json::json!({
-                "variant_path": "rs2.yaml",
-                "ref": "A",
-                "alt": "G",
-                "genotype_display": "AG",
-                "zygosity": "het"
-            }),
+            observation("rs1.yaml", ("A", "G"), "AA", "hom_ref"),
+            observation("rs2.yaml", ("A", "G"), "AG", "het"),
         ];
 
         let matched = app_variant_binding_match_observation(&binding, &observations)
             .expect("het alt observation should match");
-        assert_eq!(
-            matched
-                .get("genotype_display")
-                .and_then(serde_json::Value::as_str),
-            Some("AG")
-        );
+        assert_eq!(matched.genotype_display, "AG");
     }
 
     #[test]
@@ -454,27 +462,17 @@ mod report_matching_tests {
             "operator": "in",
             "values": ["G", "T"]
         });
-        let observations = vec![serde_json::json!({
-            "variant_path": "rs1.yaml",
-            "ref": "A",
-            "alt": "T",
-            "genotype_display": "AT",
-            "zygosity": "het"
-        })];
+        let observations = vec![observation("rs1.yaml", ("A", "T"), "AT", "het")];
 
         assert!(app_variant_binding_match_observation(&binding, &observations).is_some());
     }
 
     #[test]
     fn hemizygous_observations_count_as_single_allele_dosage() {
-        let observations = vec![serde_json::json!({
-            "variant_path": "rs3813929.yaml",
-            "ref": "C",
-            "alt": "T",
-            "genotype": "1",
-            "genotype_display": "T",
-            "zygosity": "hem_alt"
-        })];
+        let observations = vec![AppObservation {
+            genotype: "1".to_owned(),
+            ..observation("rs3813929.yaml", ("C", "T"), "T", "hem_alt")
+        }];
 
         let include_binding = serde_json::json!({
             "source": "variant",
@@ -497,14 +495,10 @@ mod report_matching_tests {
 
     #[test]
     fn chromosome_count_binding_separates_one_x_and_two_x_rows() {
-        let observations = vec![serde_json::json!({
-            "variant_path": "rs3813929.yaml",
-            "ref": "C",
-            "alt": "T",
-            "genotype": "0/1",
-            "genotype_display": "CT",
-            "zygosity": "het"
-        })];
+        let observations = vec![AppObservation {
+            genotype: "0/1".to_owned(),
+            ..observation("rs3813929.yaml", ("C", "T"), "CT", "het")
+        }];
 
         let one_x_binding = serde_json::json!({
             "source": "variant",
@@ -554,18 +548,14 @@ mod report_matching_tests {
                 }
             ]
         })];
-        let observations = vec![serde_json::json!({
-            "participant_id": "p1",
-            "variant_key": "rs1",
-            "variant_path": "variants/rs1.yaml",
-            "rsid": "rs1",
-            "gene": "ABC",
-            "ref": "A",
-            "alt": "G",
-            "genotype_display": "AG",
-            "zygosity": "het",
-            "outcome": "variant"
-        })];
+        let observations = vec![AppObservation {
+            participant_id: "p1".to_owned(),
+            variant_key: "rs1".to_owned(),
+            rsid: Some("rs1".to_owned()),
+            gene: "ABC".to_owned(),
+            outcome: "variant",
+            ..observation("variants/rs1.yaml", ("A", "G"), "AG", "het")
+        }];
 
         let matched = match_app_findings(&findings, &observations, &[]);
         assert_eq!(matched.len(), 1);
@@ -623,17 +613,68 @@ mod report_matching_tests {
         assert_eq!(matched[0]["matched_analysis"]["value"], 2);
     }
 
+    #[test]
+    fn indexed_matching_keeps_first_observation_and_earliest_analysis_row() {
+        let observations = (0..50)
+            .map(|index| AppObservation {
+                participant_id: "p1".to_owned(),
+                rsid: Some(format!("rs{index}")),
+                gene: if index % 2 == 0 { "EVEN" } else { "ODD" }.to_owned(),
+                ..observation(&format!("variants/rs{index}.yaml"), ("A", "G"), "AG", "het")
+            })
+            .collect::<Vec<_>>();
+        let analyses = vec![serde_json::json!({
+            "analysis_id": "star",
+            "rows": [{"call": "*2"}, {"call": "*1"}, {"call": "*2"}]
+        })];
+        let findings = vec![
+            serde_json::json!({
+                "id": "by-gene",
+                "binding": {"source": "variant", "key": "gene", "value": "ODD"}
+            }),
+            serde_json::json!({
+                "id": "by-ref",
+                "binding": {
+                    "source": "variant",
+                    "variant": "other/rs42.yaml",
+                    "allele": "G",
+                    "operator": "dosage_equals",
+                    "value": 1
+                }
+            }),
+            serde_json::json!({
+                "id": "by-row",
+                "binding": {
+                    "source": "analysis",
+                    "analysis_id": "star",
+                    "key": "call",
+                    "operator": "in",
+                    "values": ["*1", "*2"]
+                }
+            }),
+            serde_json::json!({
+                "id": "missing-analysis",
+                "binding": {"source": "analysis", "analysis": "absent", "key": "call", "value": "*1"}
+            }),
+        ];
+
+        let matched = match_app_findings(&findings, &observations, &analyses);
+        assert_eq!(matched.len(), 3);
+        assert_eq!(matched[0]["matched_observation"]["rsid"], "rs1");
+        assert_eq!(matched[1]["matched_observation"]["rsid"], "rs42");
+        assert_eq!(
+            matched[2]["matched_analysis"]["row"],
+            serde_json::json!({"call": "*2"})
+        );
+    }
+
     #[test]
     fn binding_helpers_cover_value_dosage_reference_and_dedupe_edges() {
-        let observation = serde_json::json!({
-            "variant_key": "rs1",
-            "variant_path": "nested/rs1.yaml",
-            "rsid": "rs1",
-            "ref": "A",
-            "alt": "G",
-            "genotype_display": "AG",
-            "zygosity": "het"
-        });
+        let observation = AppObservation {
+            variant_key: "rs1".to_owned(),
+            rsid: Some("rs1".to_owned()),
+            ..observation("nested/rs1.yaml", ("A", "G"), "AG", "het")
+        };
         assert!(!app_variant_ref_mismatch(
             &serde_json::json!({"variant": "rs1.yaml"}),
             &observation
@@ -643,21 +684,21 @@ mod report_matching_tests {
             &observation
         ));
 
-        assert_eq!(app_observation_allele_dosage(&observation, "A"), Some(1));
-        assert_eq!(app_observation_allele_dosage(&observation, "G"), Some(1));
-        assert_eq!(app_observation_allele_dosage(&observation, "T"), Some(0));
-        assert_eq!(app_observation_allele_dosage(&observation, "DEL"), None);
-        assert_eq!(app_observation_chromosome_count(&observation), Some(2));
+        assert_eq!(ObservedRow::new(&observation).dosage("A"), Some(1));
+        assert_eq!(ObservedRow::new(&observation).dosage("G"), Some(1));
+        assert_eq!(ObservedRow::new(&observation).dosage("T"), Some(0));
+        assert_eq!(ObservedRow::new(&observation).dosage("DEL"), None);
+        assert_eq!(ObservedRow::new(&observation).chromosome_count(), Some(2));
 
-        assert!(app_binding_matches_value(
+        assert!(binding_matches_value(
             Some(&serde_json::json!(true)),
             &serde_json::json!({"value": true})
         ));
-        assert!(app_binding_matches_value(
+        assert!(binding_matches_value(
             Some(&serde_json::json!(42)),
             &serde_json::json!({"operator": "in", "values": ["41", 42]})
         ));
-        assert!(!app_binding_matches_value(
+        assert!(!binding_matches_value(
             Some(&serde_json::json!({"object": true})),
             &serde_json::json!({"value": "true"})
         ));
@@ -669,42 +710,39 @@ mod report_matching_tests {
             vec!["A", "B", "3", "false"]
         );
 
-        assert!(app_binding_matches_dosage(
+        assert!(binding_matches_dosage(
             Some(2),
             &serde_json::json!({"operator": "dosage_in", "values": [1, 2]})
         ));
-        assert!(!app_binding_matches_dosage(
+        assert!(!binding_matches_dosage(
             None,
             &serde_json::json!({"operator": "dosage_equals", "value": 0})
         ));
 
         assert_eq!(
-            app_finding_dedupe_key(&serde_json::json!({
-                "evidence": {"url": "https://example.test/evidence"},
-                "matched_effect": {"label": "effect"}
-            })),
+            app_finding_dedupe_key(
+                &serde_json::json!({"evidence": {"url": "https://example.test/evidence"}}),
+                Some(&serde_json::json!({"label": "effect"}))
+            ),
             "evidence_url|https://example.test/evidence|effect"
         );
         assert_eq!(
-            app_finding_dedupe_key(&serde_json::json!({
-                "schema": "s",
-                "label": "l",
-                "notes": "n",
-                "matched_effect": {"text": "t"}
-            })),
+            app_finding_dedupe_key(
+                &serde_json::json!({
+                    "schema": "s",
+                    "label": "l",
+                    "notes": "n",
+                    "matched_effect": {"text": "t"}
+                }),
+                None
+            ),
             "content|s|l|n|t"
         );
     }
 
     #[test]
     fn variant_binding_rejects_missing_keys_and_unsupported_operators() {
-        let observations = vec![serde_json::json!({
-            "variant_path": "rs1.yaml",
-            "ref": "A",
-            "alt": "G",
-            "genotype_display": "AG",
-            "zygosity": "het"
-        })];
+        let observations = vec![observation("rs1.yaml", ("A", "G"), "AG", "het")];
         assert!(
             app_variant_binding_match_observation(
                 &serde_json::json!({"source": "variant"}),
@@ -0,0 +1,229 @@
+use std::{collections::HashMap, path::Path};
+
+use super::{AnalysisBinding, VariantBinding, VariantTest, value_as_string};
+use crate::AppObservation;
+
+/// An app observation as binding predicates see it.
+pub(super) struct ObservedRow<'a> {
+    pub(super) observation: &'a AppObservation,
+}
+
+impl<'a> ObservedRow<'a> {
+    pub(super) fn new(observation: &'a AppObservation) -> Self {
+        Self { observation }
+    }
+
+    pub(super) fn dosage(&self, allele: &str) -> Option<i64> {
+        let observation = self.observation;
+        if allele.is_empty() {
+            return None;
+        }
+        if allele == observation.ref_allele {
+            return match observation.zygosity.as_str() {
+                "hom_ref" => Some(2),
+                "hem_ref" | "het" => Some(1),
+                "hom_alt" | "hem_alt" => Some(0),
+                _ => None,
+            };
+        }
+        if allele == observation.alt {
+            return match observation.zygosity.as_str() {
+                "hom_ref" | "hem_ref" => Some(0),
+                "het" | "hem_alt" => Some(1),
+                "hom_alt" => Some(2),
+                _ => None,
+            };
+        }
+        if allele.len() == 1 {
+            let allele_ch = allele.chars().next()?.to_ascii_uppercase();
+            return observation
+                .genotype_display
+                .chars()
+                .filter(|ch| ch.to_ascii_uppercase() == allele_ch)
+                .count()
+                .try_into()
+                .ok();
+        }
+        None
+    }
+
+    pub(super) fn chromosome_count(&self) -> Option<i64> {
+        match self.observation.zygosity.as_str() {
+            "hem_ref" | "hem_alt" => Some(1),
+            "hom_ref" | "het" | "hom_alt" => Some(2),
+            _ => None,
+        }
+    }
+}
+
+/// Observations indexed by the references a variant binding can name
+/// (`variant_key`, `variant_path`, `rsid` and their file names), plus
+/// per-field value indexes built the first time a binding without a variant
+/// reference filters on that field.
+pub(super) struct ObservationIndex<'a> {
+    rows: Vec<ObservedRow<'a>>,
+    by_ref: HashMap<&'a str, Vec<usize>>,
+    by_file_name: HashMap<&'a str, Vec<usize>>,
+    by_value: HashMap<&'a str, HashMap<String, Vec<usize>>>,
+}
+
+impl<'a> ObservationIndex<'a> {
+    pub(super) fn new(observations: &'a [AppObservation]) -> Self {
+        let mut by_ref = HashMap::<&str, Vec<usize>>::new();
+        let mut by_file_name = HashMap::<&str, Vec<usize>>::new();
+        for (index, observation) in observations.iter().enumerate() {
+            let references = [
+                Some(observation.variant_key.as_str()),
+                Some(observation.variant_path.as_str()),
+                observation.rsid.as_deref(),
+            ];
+            for candidate in references.into_iter().flatten() {
+                push_unique(by_ref.entry(candidate).or_default(), index);
+                if let Some(name) = file_name(candidate) {
+                    push_unique(by_file_name.entry(name).or_default(), index);
+                }
+            }
+        }
+        Self {
+            rows: observations.iter().map(ObservedRow::new).collect(),
+            by_ref,
+            by_file_name,
+            by_value: HashMap::new(),
+        }
+    }
+
+    /// First observation, in input order, that satisfies `binding`.
+    pub(super) fn find(&mut self, binding: &VariantBinding<'a>) -> Option<&'a AppObservation> {
+        let candidates = if binding.variant_ref.is_empty() {
+            match &binding.test {
+                VariantTest::Value { key, values } => self.with_value(key, values),
+                VariantTest::Alt { values, .. } => self.with_value("alt", values),
+                VariantTest::Dosage { .. } => (0..self.rows.len()).collect(),
+            }
+        } else {
+            self.variant_candidates(binding.variant_ref)
+        };
+        candidates
+            .into_iter()
+            .map(|index| &self.rows[index])
+            .find(|row| binding.matches(row))
+            .map(|row| row.observation)
+    }
+
+    /// Observations a variant reference selects: an exact match on any
+    /// reference field, or the same file name.
+    pub(super) fn variant_candidates(&self, variant_ref: &str) -> Vec<usize> {
+        let name = file_name(variant_ref).unwrap_or(variant_ref);
+        sorted_union([self.by_ref.get(variant_ref), self.by_file_name.get(name)])
+    }
+
+    fn with_value(&mut self, key: &'a str, values: &[String]) -> Vec<usize> {
+        let rows = &self.rows;
+        let index = self.by_value.entry(key).or_insert_with(|| {
+            let mut index = HashMap::<String, Vec<usize>>::new();
+            for (position, row) in rows.iter().enumerate() {
+                let value = row
+                    .observation
+                    .field(key)
+                    .as_scalar_string()
+                    .unwrap_or_default();
+                index.entry(value).or_default().push(position);
+            }
+            index
+        });
+        sorted_union(values.iter().map(|value| index.get(value)))
+    }
+}
+
+/// Analyses indexed by `analysis_id`, with the first row index for each
+/// value of a key built once per `(analysis, key)`.
+pub(super) struct AnalysisIndex<'a> {
+    analyses: &'a [serde_json::Value],
+    by_id: HashMap<&'a str, Vec<usize>>,
+    first_rows: HashMap<(usize, &'a str), HashMap<String, usize>>,
+}
+
+impl<'a> AnalysisIndex<'a> {
+    pub(super) fn new(analyses: &'a [serde_json::Value]) -> Self {
+        let mut by_id = HashMap::<&str, Vec<usize>>::new();
+        for (index, analysis) in analyses.iter().enumerate() {
+            if let Some(id) = analysis
+                .get("analysis_id")
+                .and_then(serde_json::Value::as_str)
+            {
+                by_id.entry(id).or_default().push(index);
+            }
+        }
+        Self {
+            analyses,
+            by_id,
+            first_rows: HashMap::new(),
+        }
+    }
+
+    /// First analysis, in input order, with a row whose `key` value the
+    /// binding accepts, together with the earliest such row.
+    pub(super) fn find(
+        &mut self,
+        binding: &AnalysisBinding<'a>,
+    ) -> Option<(&'a serde_json::Value, &'a serde_json::Value)> {
+        let all;
+        let candidates = if binding.analysis_id.is_empty() {
+            all = (0..self.analyses.len()).collect::<Vec<_>>();
+            &all
+        } else {
+            self.by_id.get(binding.analysis_id)?
+        };
+        for &index in candidates {
+            let analysis = &self.analyses[index];
+            let Some(rows) = analysis.get("rows").and_then(serde_json::Value::as_array) else {
+                continue;
+            };
+            let first_rows = self
+                .first_rows
+                .entry((index, binding.key))
+                .or_insert_with(|| {
+                    let mut first_rows = HashMap::new();
+                    for (position, row) in rows.iter().enumerate() {
+                        let value = row
+                            .get(binding.key)
+                            .and_then(value_as_string)
+                            .unwrap_or_default();
+                        first_rows.entry(value).or_insert(position);
+                    }
+                    first_rows
+                });
+            if let Some(position) = binding
+                .values
+                .iter()
+                .filter_map(|value| first_rows.get(value))
+                .min()
+            {
+                return Some((analysis, &rows[*position]));
+            }
+        }
+        None
+    }
+}
+
+fn file_name(path: &str) -> Option<&str> {
+    Path::new(path).file_name().and_then(|value| value.to_str())
+}
+
+fn push_unique(indexes: &mut Vec<usize>, index: usize) {
+    if indexes.last() != Some(&index) {
+        indexes.push(index);
+    }
+}
+
+fn sorted_union<'b>(lists: impl IntoIterator<Item = Option<&'b Vec<usize>>>) -> Vec<usize> {
+    let mut indexes = lists
+        .into_iter()
+        .flatten()
+        .flatten()
+        .copied()
+        .collect::<Vec<_>>();
+    indexes.sort_unstable();
+    indexes.dedup();
+    indexes
+}
@@ -6,6 +6,7 @@ use bioscript_schema::VariantManifest;
 
 mod facets;
 mod genotype_display;
+mod record;
 
 use facets::{
     classify_non_reportable_alleles, is_weak_delimited_indel_match, observation_facets,
@@ -15,6 +16,7 @@ use genotype_display::{
     assembly_row_value, deletion_copy_number_display, genotype_display_from_raw_counts,
     hemizygous_display_genotype, normalize_app_genotype, observation_evidence_raw,
 };
+pub use record::{AppObservation, ObservationField};
 
 pub struct AppObservationInput<'a> {
     pub row: &'a BTreeMap<String, String>,
@@ -29,7 +31,7 @@ pub struct AppObservationInput<'a> {
     pub fallback_assembly: Option<Assembly>,
 }
 
-struct AppObservationJson {
+struct AppObservationParts<'a> {
     allele_balance: Option<f64>,
     alt_count: Option<u32>,
     alt_alleles: Vec<String>,
@@ -50,8 +52,8 @@ struct AppObservationJson {
     ref_allele: String,
     ref_count: Option<u32>,
     reportable_alt: String,
-    row: BTreeMap<String, String>,
-    row_path: String,
+    row: &'a BTreeMap<String, String>,
+    row_path: &'a str,
     source: serde_json::Value,
     weak_indel_match: bool,
     zygosity: String,
@@ -64,6 +66,12 @@ struct ObservationCallValues {
 }
 
 pub fn app_observation_from_manifest_row(input: AppObservationInput<'_>) -> serde_json::Value {
+    app_observation_record(input).to_json()
+}
+
+/// Typed form of [`app_observation_from_manifest_row`], for callers that keep
+/// working with the observation before it is rendered.
+pub fn app_observation_record(input: AppObservationInput<'_>) -> AppObservation {
     let AppObservationInput {
         row,
         row_path,
@@ -137,7 +145,7 @@ pub fn app_observation_from_manifest_row(input: AppObservationInput<'_>) -> serd
     let kind = manifest.spec.kind.map_or("unknown".to_owned(), |kind| {
         format!("{kind:?}").to_lowercase()
     });
-    render_app_observation_json(AppObservationJson {
+    app_observation(AppObservationParts {
         allele_balance,
         alt_count,
         alt_alleles,
@@ -158,8 +166,8 @@ pub fn app_observation_from_manifest_row(input: AppObservationInput<'_>) -> serd
         ref_allele,
         ref_count,
         reportable_alt,
-        row: row.clone(),
-        row_path: row_path.to_owned(),
+        row,
+        row_path,
         source,
         weak_indel_match,
         zygosity,
@@ -305,8 +313,8 @@ fn observation_call_values(
     }
 }
 
-fn render_app_observation_json(input: AppObservationJson) -> serde_json::Value {
-    let AppObservationJson {
+fn app_observation(input: AppObservationParts<'_>) -> AppObservation {
+    let AppObservationParts {
         allele_balance,
         alt_count,
         alt_alleles,
@@ -345,53 +353,65 @@ fn render_app_observation_json(input: AppObservationJson) -> serde_json::Value {
         .filter(|matched| manifest.spec.rsids.iter().any(|rsid| rsid == *matched))
         .map(|matched| format!("matched alias: {matched}"));
     let source = if source.is_null() {
-        manifest_default_source(&row, &manifest)
+        manifest_default_source(row, &manifest)
     } else {
         source
     };
-    serde_json::json!({
-        "participant_id": row.get("participant_id").cloned().unwrap_or_default(),
-        "assay_id": assay_id,
-        "assay_version": "1.0",
-        "variant_key": manifest.name,
-        "variant_path": row_path,
-        "rsid": canonical_rsid.cloned().or_else(|| matched_rsid.cloned()),
-        "gene": gene,
-        "assembly": if assembly.is_empty() { serde_json::Value::Null } else { serde_json::Value::String(assembly.to_uppercase()) },
-        "chrom": chrom,
-        "pos_start": locus.as_ref().map_or(serde_json::Value::Null, |locus| serde_json::Value::from(locus.start)),
-        "pos_end": locus.as_ref().map_or(serde_json::Value::Null, |locus| serde_json::Value::from(locus.end)),
-        "ref": ref_allele,
-        "alt": reportable_alt,
-        "alts": alt_alleles,
-        "kind": kind,
-        "match_status": if row.get("matched_rsid").is_some_and(|value| !value.is_empty()) || !genotype_display.is_empty() { "found" } else { "not_found" },
-        "coverage_status": depth.map_or("covered", |depth| if depth > 0 { "covered" } else { "not_covered" }),
-        "call_status": call.status,
-        "genotype": genotype,
-        "genotype_display": call.reported_genotype_display,
-        "zygosity": zygosity,
-        "ref_count": ref_count,
-        "alt_count": alt_count,
-        "depth": depth,
-        "genotype_quality": serde_json::Value::Null,
-        "allele_balance": allele_balance,
-        "outcome": call.outcome,
-        "evidence_type": if row.get("backend").is_some_and(|value| value == "cram") { "mpileup" } else { "genotype_file" },
-        "evidence_raw": evidence_raw,
-        "source": source,
-        "match_quality": if weak_indel_match { serde_json::Value::String("weak".to_owned()) } else { serde_json::Value::Null },
-        "match_notes": if weak_indel_match {
-            serde_json::Value::String("consumer genotype file reported an insertion/deletion token at the marker, not sequence-resolved evidence for the exact deletion allele".to_owned())
-        } else if let Some(note) = alias_match_note {
-            serde_json::Value::String(note)
+    AppObservation {
+        participant_id: row.get("participant_id").cloned().unwrap_or_default(),
+        assay_id,
+        assay_version: "1.0",
+        rsid: canonical_rsid.cloned().or_else(|| matched_rsid.cloned()),
+        variant_key: manifest.name,
+        variant_path: row_path.to_owned(),
+        gene,
+        assembly: (!assembly.is_empty()).then(|| assembly.to_uppercase()),
+        chrom,
+        pos_start: locus.as_ref().map(|locus| locus.start),
+        pos_end: locus.as_ref().map(|locus| locus.end),
+        ref_allele,
+        alt: reportable_alt,
+        alts: alt_alleles,
+        kind,
+        match_status: if matched_rsid.is_some() || !genotype_display.is_empty() {
+            "found"
         } else {
-            serde_json::Value::Null
+            "not_found"
         },
-        "facets": observation_facets(non_reportable_status, &observed_alt_alleles),
-    })
+        coverage_status: if depth == Some(0) {
+            "not_covered"
+        } else {
+            "covered"
+        },
+        call_status: call.status,
+        genotype,
+        genotype_display: call.reported_genotype_display,
+        zygosity,
+        ref_count,
+        alt_count,
+        depth,
+        genotype_quality: None,
+        allele_balance,
+        outcome: call.outcome,
+        evidence_type: if row.get("backend").is_some_and(|value| value == "cram") {
+            "mpileup"
+        } else {
+            "genotype_file"
+        },
+        evidence_raw,
+        source,
+        match_quality: weak_indel_match.then_some("weak"),
+        match_notes: if weak_indel_match {
+            Some(WEAK_INDEL_MATCH_NOTE.to_owned())
+        } else {
+            alias_match_note
+        },
+        facets: observation_facets(non_reportable_status, &observed_alt_alleles),
+    }
 }
 
+const WEAK_INDEL_MATCH_NOTE: &str = "consumer genotype file reported an insertion/deletion token at the marker, not sequence-resolved evidence for the exact deletion allele";
+
 fn manifest_gene_from_tags(manifest: &VariantManifest) -> Option<String> {
     manifest.tags.iter().find_map(|tag| {
         tag.strip_prefix("gene:")
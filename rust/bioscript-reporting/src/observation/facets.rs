@@ -61,18 +61,15 @@ pub(super) fn is_weak_delimited_indel_match(
 pub(super) fn observation_facets(
     non_reportable_status: Option<&str>,
     observed_alts: &[String],
-) -> serde_json::Value {
-    let mut facets = Vec::new();
-    if let Some(status) = non_reportable_status {
-        facets.push(status.to_owned());
-        if status == "observed_alt" && !observed_alts.is_empty() {
-            facets.push(format!("known_observed_alts={}", observed_alts.join(",")));
-        }
-    }
-    if facets.is_empty() {
-        serde_json::Value::Null
+) -> Option<String> {
+    let status = non_reportable_status?;
+    if status == "observed_alt" && !observed_alts.is_empty() {
+        Some(format!(
+            "{status};known_observed_alts={}",
+            observed_alts.join(",")
+        ))
     } else {
-        serde_json::Value::String(facets.join(";"))
+        Some(status.to_owned())
     }
 }
 
@@ -149,14 +146,14 @@ mod tests {
 
     #[test]
     fn observation_facets_and_optional_integer_parsing_cover_edges() {
-        assert_eq!(observation_facets(None, &[]), serde_json::Value::Null);
+        assert_eq!(observation_facets(None, &[]), None);
         assert_eq!(
-            observation_facets(Some("unknown_alt"), &[]),
-            serde_json::Value::String("unknown_alt".to_owned())
+            observation_facets(Some("unknown_alt"), &[]).as_deref(),
+            Some("unknown_alt")
         );
         assert_eq!(
-            observation_facets(Some("observed_alt"), &["T".to_owned(), "C".to_owned()]),
-            serde_json::Value::String("observed_alt;known_observed_alts=T,C".to_owned())
+            observation_facets(Some("observed_alt"), &["T".to_owned(), "C".to_owned()]).as_deref(),
+            Some("observed_alt;known_observed_alts=T,C")
         );
 
         let good = "42".to_owned();
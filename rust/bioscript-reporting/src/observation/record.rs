@@ -0,0 +1,159 @@
+use serde::Serialize;
+
+/// One participant observation in the app report, as the report pipeline
+/// carries it between observation building, analysis and rendering.
+///
+/// Field order and names are the app observation JSON contract. Renderers and
+/// the findings matcher read fields directly or through
+/// [`AppObservation::field`]; JSON is only produced when observations are
+/// serialized.
+#[derive(Clone, Debug, Default, PartialEq, Serialize)]
+pub struct AppObservation {
+    pub participant_id: String,
+    pub assay_id: String,
+    pub assay_version: &'static str,
+    pub variant_key: String,
+    pub variant_path: String,
+    pub rsid: Option<String>,
+    pub gene: String,
+    pub assembly: Option<String>,
+    pub chrom: String,
+    pub pos_start: Option<i64>,
+    pub pos_end: Option<i64>,
+    #[serde(rename = "ref")]
+    pub ref_allele: String,
+    pub alt: String,
+    pub alts: Vec<String>,
+    pub kind: String,
+    pub match_status: &'static str,
+    pub coverage_status: &'static str,
+    pub call_status: &'static str,
+    pub genotype: String,
+    pub genotype_display: String,
+    pub zygosity: String,
+    pub ref_count: Option<u32>,
+    pub alt_count: Option<u32>,
+    pub depth: Option<u32>,
+    /// Not reported by any backend yet; kept for the JSON contract.
+    pub genotype_quality: Option<u32>,
+    pub allele_balance: Option<f64>,
+    pub outcome: &'static str,
+    pub evidence_type: &'static str,
+    pub evidence_raw: String,
+    pub source: serde_json::Value,
+    pub match_quality: Option<&'static str>,
+    pub match_notes: Option<String>,
+    pub facets: Option<String>,
+}
+
+impl AppObservation {
+    pub fn to_json(&self) -> serde_json::Value {
+        serde_json::to_value(self).unwrap_or_default()
+    }
+
+    /// The field serialized under the JSON name `key`, for renderers and
+    /// bindings that pick a column by name. Unknown names are `Missing`.
+    pub fn field(&self, key: &str) -> ObservationField<'_> {
+        let text = ObservationField::Text;
+        match key {
+            "participant_id" => text(&self.participant_id),
+            "assay_id" => text(&self.assay_id),
+            "assay_version" => text(self.assay_version),
+            "variant_key" => text(&self.variant_key),
+            "variant_path" => text(&self.variant_path),
+            "rsid" => self.rsid.as_deref().map_or(ObservationField::Missing, text),
+            "gene" => text(&self.gene),
+            "assembly" => self
+                .assembly
+                .as_deref()
+                .map_or(ObservationField::Missing, text),
+            "chrom" => text(&self.chrom),
+            "pos_start" => integer(self.pos_start),
+            "pos_end" => integer(self.pos_end),
+            "ref" => text(&self.ref_allele),
+            "alt" => text(&self.alt),
+            "alts" => ObservationField::Alleles(&self.alts),
+            "kind" => text(&self.kind),
+            "match_status" => text(self.match_status),
+            "coverage_status" => text(self.coverage_status),
+            "call_status" => text(self.call_status),
+            "genotype" => text(&self.genotype),
+            "genotype_display" => text(&self.genotype_display),
+            "zygosity" => text(&self.zygosity),
+            "ref_count" => integer(self.ref_count.map(i64::from)),
+            "alt_count" => integer(self.alt_count.map(i64::from)),
+            "depth" => integer(self.depth.map(i64::from)),
+            "genotype_quality" => integer(self.genotype_quality.map(i64::from)),
+            "allele_balance" => self
+                .allele_balance
+                .map_or(ObservationField::Missing, ObservationField::Number),
+            "outcome" => text(self.outcome),
+            "evidence_type" => text(self.evidence_type),
+            "evidence_raw" => text(&self.evidence_raw),
+            "source" => ObservationField::Json(&self.source),
+            "match_quality" => self.match_quality.map_or(ObservationField::Missing, text),
+            "match_notes" => self
+                .match_notes
+                .as_deref()
+                .map_or(ObservationField::Missing, text),
+            "facets" => self
+                .facets
+                .as_deref()
+                .map_or(ObservationField::Missing, text),
+            _ => ObservationField::Missing,
+        }
+    }
+}
+
+fn integer<'a>(value: Option<i64>) -> ObservationField<'a> {
+    value.map_or(ObservationField::Missing, ObservationField::Integer)
+}
+
+/// One [`AppObservation`] field looked up by name. `Missing` stands for both
+/// unknown names and fields that serialize as `null`.
+#[derive(Clone, Copy, Debug, PartialEq)]
+pub enum ObservationField<'a> {
+    Missing,
+    Text(&'a str),
+    Integer(i64),
+    Number(f64),
+    Alleles(&'a [String]),
+    Json(&'a serde_json::Value),
+}
+
+impl ObservationField<'_> {
+    /// Scalar value as a binding compares it: text as-is, numbers and
+    /// booleans as their JSON text; `None` for missing, list and object
+    /// values.
+    pub fn as_scalar_string(&self) -> Option<String> {
+        match self {
+            Self::Text(value) => Some((*value).to_owned()),
+            Self::Integer(value) => Some(value.to_string()),
+            Self::Number(value) => {
+                serde_json::Number::from_f64(*value).map(|number| number.to_string())
+            }
+            Self::Json(serde_json::Value::String(value)) => Some(value.clone()),
+            Self::Json(serde_json::Value::Number(value)) => Some(value.to_string()),
+            Self::Json(serde_json::Value::Bool(value)) => Some(value.to_string()),
+            Self::Missing | Self::Alleles(_) | Self::Json(_) => None,
+        }
+    }
+
+    /// TSV cell text: empty for missing values, text with tabs and newlines
+    /// replaced, anything else as compact JSON.
+    pub fn to_tsv(&self) -> String {
+        let value = match self {
+            Self::Missing | Self::Json(serde_json::Value::Null) => return String::new(),
+            Self::Text(value) => (*value).to_owned(),
+            Self::Json(serde_json::Value::String(value)) => value.clone(),
+            Self::Integer(value) => value.to_string(),
+            Self::Number(value) => match serde_json::Number::from_f64(*value) {
+                Some(number) => number.to_string(),
+                None => return String::new(),
+            },
+            Self::Alleles(values) => serde_json::to_string(values).unwrap_or_default(),
+            Self::Json(value) => value.to_string(),
+        };
+        value.replace(['\t', '\n'], " ")
+    }
+}
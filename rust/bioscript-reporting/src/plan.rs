@@ -0,0 +1,594 @@
+use std::{
+    cell::RefCell,
+    collections::{BTreeMap, HashMap},
+    fmt::Write,
+    sync::{Arc, Mutex, PoisonError},
+};
+
+use bioscript_core::VariantSpec;
+use sha2::{Digest, Sha256};
+
+use crate::{
+    AnalysisManifestTask, ManifestWorkspace, ReportManifestContext, VariantManifestTask,
+    collect_analysis_manifest_tasks, collect_manifest_provenance_entries,
+    collect_variant_manifest_tasks, load_report_manifest_context,
+};
+
+const SNAPSHOT_SCHEMA: &str = "bioscript:report-plan-snapshot:1.0";
+
+/// A manifest resolved once for a whole report run: manifest context
+/// (assay id, metadata, findings, provenance), the flattened variant tasks
+/// with the observation fields read from each variant manifest, and the
+/// analysis tasks for one set of filters.
+///
+/// Compiling walks the manifest tree through a memoizing workspace, so
+/// panels that include the same assays or catalogues several times read and
+/// parse each file once. Every file read and path resolution is recorded;
+/// `content_hash` is the SHA-256 of those together with the entrypoint and
+/// filters, and `snapshot_json` carries them so the CLI or wasm can rebuild
+/// the same plan without the original workspace.
+#[derive(Clone, Debug)]
+pub struct ReportPlan {
+    pub manifest_path: String,
+    pub filters: Vec<String>,
+    pub content_hash: String,
+    pub context: ReportManifestContext,
+    pub variant_tasks: Vec<VariantManifestTask>,
+    /// Observation fields for each entry of `variant_tasks`, in the same order.
+    pub variant_fields: Vec<VariantObservationFields>,
+    pub analysis_tasks: Vec<AnalysisManifestTask>,
+    sources: BTreeMap<String, String>,
+    resolved: BTreeMap<(String, String), String>,
+}
+
+impl ReportPlan {
+    pub fn compile(
+        workspace: &impl ManifestWorkspace,
+        manifest_path: &str,
+        filters: &[String],
+    ) -> Result<Self, String> {
+        let recording = RecordingWorkspace::new(workspace);
+        let context = load_report_manifest_context(&recording, manifest_path)?;
+        let variant_tasks = collect_variant_manifest_tasks(&recording, manifest_path, filters)?;
+        let variant_fields = variant_tasks
+            .iter()
+            .map(|task| VariantObservationFields::from_task(&recording, task))
+            .collect::<Result<Vec<_>, _>>()?;
+        let analysis_tasks = collect_analysis_manifest_tasks(&recording, manifest_path, filters)?;
+        let sources = recording.texts.into_inner();
+        let resolved = recording.resolved.into_inner();
+        Ok(Self {
+            manifest_path: manifest_path.to_owned(),
+            filters: filters.to_vec(),
+            content_hash: content_hash(manifest_path, filters, &sources, &resolved),
+            context,
+            variant_tasks,
+            variant_fields,
+            analysis_tasks,
+            sources,
+            resolved,
+        })
+    }
+
+    /// Variant specs in task order, ready for one batched lookup.
+    pub fn variant_specs(&self) -> Vec<VariantSpec> {
+        self.variant_tasks
+            .iter()
+            .map(|task| task.manifest.spec.clone())
+            .collect()
+    }
+
+    /// Whether `workspace` still resolves every member path the same way and
+    /// serves the exact files this plan was compiled from. Reads each source
+    /// once but parses nothing.
+    pub fn is_current(&self, workspace: &impl ManifestWorkspace) -> bool {
+        self.resolved.iter().all(|((base, relative), resolved)| {
+            workspace
+                .resolve(base, relative)
+                .is_ok_and(|current| current == *resolved)
+        }) && self.sources.iter().all(|(path, text)| {
+            workspace
+                .load_text(path)
+                .is_ok_and(|current| current == *text)
+        })
+    }
+
+    /// Self-contained JSON form of the plan: entrypoint, filters, the source
+    /// text of every manifest file and every member path resolution.
+    pub fn snapshot_json(&self) -> serde_json::Value {
+        serde_json::json!({
+            "schema": SNAPSHOT_SCHEMA,
+            "manifest_path": self.manifest_path,
+            "filters": self.filters,
+            "content_hash": self.content_hash,
+            "files": self.sources,
+            "resolved": self
+                .resolved
+                .iter()
+                .map(|((base, relative), resolved)| serde_json::json!([base, relative, resolved]))
+                .collect::<Vec<_>>(),
+        })
+    }
+
+    /// Rebuild a plan from [`ReportPlan::snapshot_json`], rejecting snapshots
+    /// whose sources no longer match their recorded content hash.
+    pub fn from_snapshot_json(value: &serde_json::Value) -> Result<Self, String> {
+        if value.get("schema").and_then(serde_json::Value::as_str) != Some(SNAPSHOT_SCHEMA) {
+            return Err(format!(
+                "report plan snapshot must use schema {SNAPSHOT_SCHEMA}"
+            ));
+        }
+        let string_field = |key: &str| {
+            value
+                .get(key)
+                .and_then(serde_json::Value::as_str)
+                .ok_or_else(|| format!("report plan snapshot is missing {key}"))
+        };
+        let manifest_path = string_field("manifest_path")?;
+        let expected_hash = string_field("content_hash")?;
+        let filters = json_strings(value.get("filters"))
+            .ok_or("report plan snapshot filters must be strings")?;
+        let files = value
+            .get("files")
+            .and_then(serde_json::Value::as_object)
+            .ok_or("report plan snapshot is missing files")?
+            .iter()
+            .map(|(path, text)| {
+                text.as_str()
+                    .map(|text| (path.clone(), text.to_owned()))
+                    .ok_or_else(|| format!("report plan snapshot file {path} is not text"))
+            })
+            .collect::<Result<BTreeMap<_, _>, _>>()?;
+        let resolved = value
+            .get("resolved")
+            .and_then(serde_json::Value::as_array)
+            .ok_or("report plan snapshot is missing resolved paths")?
+            .iter()
+            .map(|entry| match json_strings(Some(entry)).as_deref() {
+                Some([base, relative, resolved]) => {
+                    Ok(((base.clone(), relative.clone()), resolved.clone()))
+                }
+                _ => Err("report plan snapshot resolved entries must be [base, relative, path]"),
+            })
+            .collect::<Result<BTreeMap<_, _>, _>>()?;
+
+        let plan = Self::compile(
+            &SnapshotWorkspace { files, resolved },
+            manifest_path,
+            &filters,
+        )?;
+        if plan.content_hash != expected_hash {
+            return Err(format!(
+                "report plan snapshot content hash mismatch: expected {expected_hash}, got {}",
+                plan.content_hash
+            ));
+        }
+        Ok(plan)
+    }
+}
+
+/// Report fields of a variant manifest beyond its parsed spec: gene, primary
+/// source and declared alternates. Read once while compiling a plan rather
+/// than for every participant row.
+#[derive(Clone, Debug, Default, PartialEq)]
+pub struct VariantObservationFields {
+    pub gene: String,
+    pub source: serde_json::Value,
+    pub alt_alleles: Vec<String>,
+    pub observed_alt_alleles: Vec<String>,
+}
+
+impl VariantObservationFields {
+    /// Catalogue rows (`path#row`) carry no gene or source; their alternates
+    /// come from the parsed spec. Standalone variant files are read as YAML.
+    fn from_task(
+        workspace: &impl ManifestWorkspace,
+        task: &VariantManifestTask,
+    ) -> Result<Self, String> {
+        if task.manifest_path.contains('#') {
+            return Ok(Self {
+                alt_alleles: task.manifest.spec.alternate.clone().into_iter().collect(),
+                observed_alt_alleles: task.manifest.spec.observed_alternates.clone(),
+                ..Self::default()
+            });
+        }
+        let value = workspace.load_yaml(&task.manifest_path)?;
+        Ok(Self {
+            gene: value
+                .get("gene")
+                .and_then(serde_yaml::Value::as_str)
+                .unwrap_or_default()
+                .to_owned(),
+            source: variant_primary_source(&value)?,
+            alt_alleles: allele_strings(&value, "alts"),
+            observed_alt_alleles: allele_strings(&value, "observed_alts"),
+        })
+    }
+}
+
+/// The dbSNP provenance link when there is one, else a dbSNP link built from
+/// the first rsid, else the first provenance entry.
+fn variant_primary_source(value: &serde_yaml::Value) -> Result<serde_json::Value, String> {
+    let mut links = BTreeMap::<String, serde_json::Value>::new();
+    collect_manifest_provenance_entries(value, &mut links)?;
+    if let Some(source) = links.values().find(|source| {
+        source
+            .get("url")
+            .and_then(serde_json::Value::as_str)
+            .is_some_and(|url| url.contains("ncbi.nlm.nih.gov/snp/rs"))
+    }) {
+        return Ok(source.clone());
+    }
+    if let Some(rsid) = value
+        .get("identifiers")
+        .and_then(|identifiers| identifiers.get("rsids"))
+        .and_then(serde_yaml::Value::as_sequence)
+        .and_then(|items| items.iter().find_map(serde_yaml::Value::as_str))
+    {
+        return Ok(serde_json::json!({
+            "kind": "database",
+            "label": "dbSNP / NCBI SNP",
+            "url": format!("https://www.ncbi.nlm.nih.gov/snp/{rsid}"),
+            "fields": ["identifiers.rsids"],
+        }));
+    }
+    Ok(links
+        .into_values()
+        .next()
+        .unwrap_or(serde_json::Value::Null))
+}
+
+fn allele_strings(value: &serde_yaml::Value, key: &str) -> Vec<String> {
+    value
+        .get("alleles")
+        .and_then(|alleles| alleles.get(key))
+        .and_then(serde_yaml::Value::as_sequence)
+        .into_iter()
+        .flatten()
+        .filter_map(serde_yaml::Value::as_str)
+        .map(ToOwned::to_owned)
+        .collect()
+}
+
+/// Compiled plans for long-lived hosts that render many reports. A cached
+/// plan is reused while `ReportPlan::is_current` holds for the workspace and
+/// recompiled as soon as any included file changes.
+#[derive(Debug, Default)]
+pub struct ReportPlanCache {
+    plans: Mutex<HashMap<(String, Vec<String>), Arc<ReportPlan>>>,
+}
+
+impl ReportPlanCache {
+    pub fn plan(
+        &self,
+        workspace: &impl ManifestWorkspace,
+        manifest_path: &str,
+        filters: &[String],
+    ) -> Result<Arc<ReportPlan>, String> {
+        let key = (manifest_path.to_owned(), filters.to_vec());
+        let cached = self
+            .plans
+            .lock()
+            .unwrap_or_else(PoisonError::into_inner)
+            .get(&key)
+            .cloned();
+        if let Some(plan) = cached.filter(|plan| plan.is_current(workspace)) {
+            return Ok(plan);
+        }
+        let plan = Arc::new(ReportPlan::compile(workspace, manifest_path, filters)?);
+        self.plans
+            .lock()
+            .unwrap_or_else(PoisonError::into_inner)
+            .insert(key, Arc::clone(&plan));
+        Ok(plan)
+    }
+}
+
+/// Workspace wrapper that memoizes texts, parsed YAML and path resolutions
+/// while recording everything it served.
+struct RecordingWorkspace<'a, W> {
+    inner: &'a W,
+    texts: RefCell<BTreeMap<String, String>>,
+    yaml: RefCell<HashMap<String, serde_yaml::Value>>,
+    resolved: RefCell<BTreeMap<(String, String), String>>,
+}
+
+impl<'a, W: ManifestWorkspace> RecordingWorkspace<'a, W> {
+    fn new(inner: &'a W) -> Self {
+        Self {
+            inner,
+            texts: RefCell::default(),
+            yaml: RefCell::default(),
+            resolved: RefCell::default(),
+        }
+    }
+}
+
+impl<W: ManifestWorkspace> ManifestWorkspace for RecordingWorkspace<'_, W> {
+    fn load_text(&self, path: &str) -> Result<String, String> {
+        if let Some(text) = self.texts.borrow().get(path) {
+            return Ok(text.clone());
+        }
+        let text = self.inner.load_text(path)?;
+        self.texts
+            .borrow_mut()
+            .insert(path.to_owned(), text.clone());
+        Ok(text)
+    }
+
+    fn load_yaml(&self, path: &str) -> Result<serde_yaml::Value, String> {
+        if let Some(value) = self.yaml.borrow().get(path) {
+            return Ok(value.clone());
+        }
+        let text = self.load_text(path)?;
+        let value = serde_yaml::from_str::<serde_yaml::Value>(&text)
+            .map_err(|err| format!("failed to parse YAML {path}: {err}"))?;
+        self.yaml
+            .borrow_mut()
+            .insert(path.to_owned(), value.clone());
+        Ok(value)
+    }
+
+    fn resolve(&self, base: &str, relative: &str) -> Result<String, String> {
+        let key = (base.to_owned(), relative.to_owned());
+        if let Some(resolved) = self.resolved.borrow().get(&key) {
+            return Ok(resolved.clone());
+        }
+        let resolved = self.inner.resolve(base, relative)?;
+        self.resolved.borrow_mut().insert(key, resolved.clone());
+        Ok(resolved)
+    }
+}
+
+/// In-memory workspace rebuilt from a plan snapshot.
+struct SnapshotWorkspace {
+    files: BTreeMap<String, String>,
+    resolved: BTreeMap<(String, String), String>,
+}
+
+impl ManifestWorkspace for SnapshotWorkspace {
+    fn load_text(&self, path: &str) -> Result<String, String> {
+        self.files
+            .get(path)
+            .cloned()
+            .ok_or_else(|| format!("report plan snapshot has no file {path}"))
+    }
+
+    fn load_yaml(&self, path: &str) -> Result<serde_yaml::Value, String> {
+        serde_yaml::from_str(&self.load_text(path)?)
+            .map_err(|err| format!("failed to parse YAML {path}: {err}"))
+    }
+
+    fn resolve(&self, base: &str, relative: &str) -> Result<String, String> {
+        self.resolved
+            .get(&(base.to_owned(), relative.to_owned()))
+            .cloned()
+            .ok_or_else(|| format!("report plan snapshot cannot resolve {relative} from {base}"))
+    }
+}
+
+fn content_hash(
+    manifest_path: &str,
+    filters: &[String],
+    sources: &BTreeMap<String, String>,
+    resolved: &BTreeMap<(String, String), String>,
+) -> String {
+    let mut hasher = Sha256::new();
+    let mut field = |bytes: &[u8]| {
+        hasher.update((bytes.len() as u64).to_le_bytes());
+        hasher.update(bytes);
+    };
+    field(manifest_path.as_bytes());
+    for filter in filters {
+        field(filter.as_bytes());
+    }
+    for (path, text) in sources {
+        field(path.as_bytes());
+        field(text.as_bytes());
+    }
+    for ((base, relative), path) in resolved {
+        field(base.as_bytes());
+        field(relative.as_bytes());
+        field(path.as_bytes());
+    }
+    hasher
+        .finalize()
+        .iter()
+        .fold(String::new(), |mut output, byte| {
+            let _ = write!(output, "{byte:02x}");
+            output
+        })
+}
+
+fn json_strings(value: Option<&serde_json::Value>) -> Option<Vec<String>> {
+    value?
+        .as_array()?
+        .iter()
+        .map(|item| item.as_str().map(ToOwned::to_owned))
+        .collect()
+}
+
+#[cfg(test)]
+mod tests {
+    use std::{
+        cell::{Cell, RefCell},
+        collections::BTreeMap,
+    };
+
+    use super::{ReportPlan, ReportPlanCache};
+    use crate::ManifestWorkspace;
+
+    struct CountingWorkspace {
+        files: RefCell<BTreeMap<String, String>>,
+        redirects: RefCell<BTreeMap<String, String>>,
+        reads: Cell<usize>,
+    }
+
+    impl ManifestWorkspace for CountingWorkspace {
+        fn load_text(&self, path: &str) -> Result<String, String> {
+            self.reads.set(self.reads.get() + 1);
+            self.files
+                .borrow()
+                .get(path)
+                .cloned()
+                .ok_or_else(|| format!("missing file: {path}"))
+        }
+
+        fn load_yaml(&self, path: &str) -> Result<serde_yaml::Value, String> {
+            serde_yaml::from_str(&self.load_text(path)?).map_err(|err| err.to_string())
+        }
+
+        fn resolve(&self, base: &str, relative: &str) -> Result<String, String> {
+            if let Some(target) = self.redirects.borrow().get(relative) {
+                return Ok(target.clone());
+            }
+            let base = std::path::Path::new(base)
+                .parent()
+                .unwrap_or_else(|| std::path::Path::new(""));
+            Ok(base.join(relative).display().to_string())
+        }
+    }
+
+    fn variant_yaml(name: &str) -> String {
+        format!(
+            r#"
+schema: bioscript:variant:1.0
+version: "1.0"
+name: {name}
+gene: GENE_{name}
+tags: [keep]
+identifiers:
+  rsids: [{name}]
+coordinates:
+  grch38:
+    chrom: "1"
+    pos: 100
+alleles:
+  kind: snv
+  ref: A
+  alts: [G]
+"#
+        )
+    }
+
+    fn workspace() -> CountingWorkspace {
+        let panel = r#"
+schema: bioscript:panel:1.0
+version: "1.0"
+name: panel
+members:
+  - kind: variant
+    path: rs1.yaml
+  - kind: assay
+    path: assay/assay.yaml
+  - kind: assay
+    path: assay/assay.yaml
+"#;
+        let assay = r#"
+schema: bioscript:assay:1.0
+version: "1.0"
+name: assay
+members:
+  - kind: variant
+    path: rs2.yaml
+"#;
+        CountingWorkspace {
+            files: RefCell::new(BTreeMap::from([
+                ("panel.yaml".to_owned(), panel.to_owned()),
+                ("assay/assay.yaml".to_owned(), assay.to_owned()),
+                ("rs1.yaml".to_owned(), variant_yaml("rs1")),
+                ("assay/rs2.yaml".to_owned(), variant_yaml("rs2")),
+            ])),
+            redirects: RefCell::default(),
+            reads: Cell::new(0),
+        }
+    }
+
+    #[test]
+    fn compile_reads_each_file_once_and_matches_direct_collection() {
+        let workspace = workspace();
+        let plan = ReportPlan::compile(&workspace, "panel.yaml", &[]).unwrap();
+        assert_eq!(workspace.reads.get(), 4);
+
+        let direct = crate::collect_variant_manifest_tasks(&workspace, "panel.yaml", &[]).unwrap();
+        assert_eq!(plan.variant_tasks, direct);
+        assert_eq!(plan.variant_specs().len(), 2);
+        assert_eq!(plan.variant_fields.len(), 2);
+        assert_eq!(plan.variant_fields[1].gene, "GENE_rs2");
+        assert_eq!(plan.variant_fields[1].alt_alleles, ["G"]);
+        assert_eq!(
+            plan.variant_fields[1].source["url"],
+            "https://www.ncbi.nlm.nih.gov/snp/rs2"
+        );
+        assert_eq!(plan.context.assay_id, "panel");
+        assert!(plan.analysis_tasks.is_empty());
+        assert_eq!(plan.content_hash.len(), 64);
+
+        let filtered =
+            ReportPlan::compile(&workspace, "panel.yaml", &["name=rs2".to_owned()]).unwrap();
+        assert_ne!(filtered.content_hash, plan.content_hash);
+        assert_eq!(filtered.variant_tasks.len(), 1);
+    }
+
+    #[test]
+    fn snapshot_round_trips_and_rejects_tampering() {
+        let workspace = workspace();
+        let plan = ReportPlan::compile(&workspace, "panel.yaml", &[]).unwrap();
+        let snapshot = plan.snapshot_json();
+
+        let restored = ReportPlan::from_snapshot_json(&snapshot).unwrap();
+        assert_eq!(restored.content_hash, plan.content_hash);
+        assert_eq!(restored.variant_tasks, plan.variant_tasks);
+        assert_eq!(restored.variant_fields, plan.variant_fields);
+        assert_eq!(restored.context.findings, plan.context.findings);
+
+        let mut tampered = snapshot.clone();
+        tampered["content_hash"] = serde_json::json!("0".repeat(64));
+        assert!(
+            ReportPlan::from_snapshot_json(&tampered)
+                .unwrap_err()
+                .contains("content hash mismatch")
+        );
+        assert!(ReportPlan::from_snapshot_json(&serde_json::json!({})).is_err());
+    }
+
+    #[test]
+    fn cache_reuses_plans_until_a_source_changes() {
+        let workspace = workspace();
+        let cache = ReportPlanCache::default();
+        let first = cache.plan(&workspace, "panel.yaml", &[]).unwrap();
+        let second = cache.plan(&workspace, "panel.yaml", &[]).unwrap();
+        assert!(std::sync::Arc::ptr_eq(&first, &second));
+
+        workspace
+            .files
+            .borrow_mut()
+            .insert("assay/rs2.yaml".to_owned(), variant_yaml("rs2b"));
+        let third = cache.plan(&workspace, "panel.yaml", &[]).unwrap();
+        assert!(!std::sync::Arc::ptr_eq(&first, &third));
+        assert_ne!(third.content_hash, first.content_hash);
+        assert_eq!(third.variant_tasks[1].manifest.name, "rs2b");
+    }
+
+    #[test]
+    fn cache_recompiles_when_a_member_resolves_elsewhere() {
+        let workspace = workspace();
+        workspace
+            .files
+            .borrow_mut()
+            .insert("pinned/rs1.yaml".to_owned(), variant_yaml("rs1b"));
+        let cache = ReportPlanCache::default();
+        let first = cache.plan(&workspace, "panel.yaml", &[]).unwrap();
+        assert!(first.is_current(&workspace));
+
+        workspace
+            .redirects
+            .borrow_mut()
+            .insert("rs1.yaml".to_owned(), "pinned/rs1.yaml".to_owned());
+        assert!(!first.is_current(&workspace));
+        let second = cache.plan(&workspace, "panel.yaml", &[]).unwrap();
+        assert!(!std::sync::Arc::ptr_eq(&first, &second));
+        assert_ne!(second.content_hash, first.content_hash);
+        assert_eq!(second.variant_tasks[0].manifest.name, "rs1b");
+    }
+}
@@ -1,10 +1,16 @@
+use std::io;
+
+use serde::Serialize;
+
+use crate::AppObservation;
+
 #[derive(Clone, Copy)]
 pub struct AppReportJsonInput<'a> {
     pub assay_id: &'a str,
     pub participant_id: &'a str,
     pub input_file_name: &'a str,
     pub input_file_path: &'a str,
-    pub observations: &'a [serde_json::Value],
+    pub observations: &'a [AppObservation],
     pub analyses: &'a [serde_json::Value],
     pub findings: &'a [serde_json::Value],
     pub provenance: &'a [serde_json::Value],
@@ -18,7 +24,7 @@ pub struct AppInputReportInput<'a> {
     pub participant_id: &'a str,
     pub input_file_name: &'a str,
     pub input_file_path: &'a str,
-    pub observations: &'a [serde_json::Value],
+    pub observations: &'a [AppObservation],
     pub analyses: &'a [serde_json::Value],
     pub findings: &'a [serde_json::Value],
     pub provenance: &'a [serde_json::Value],
@@ -44,12 +50,81 @@ pub fn app_input_report_json(input: AppInputReportInput<'_>) -> serde_json::Valu
 }
 
 pub fn app_report_json(input: AppReportJsonInput<'_>) -> serde_json::Value {
+    serde_json::to_value(app_report(input)).unwrap_or_default()
+}
+
+/// Serialize the app report for `input` straight to `writer`, borrowing the
+/// analyses, findings and provenance instead of copying them into a JSON tree.
+pub fn write_app_input_report_json<W: io::Write>(
+    writer: W,
+    input: AppInputReportInput<'_>,
+) -> Result<(), String> {
+    let matched_findings =
+        crate::match_app_findings(input.findings, input.observations, input.analyses);
+    write_app_report_json(
+        writer,
+        AppReportJsonInput {
+            assay_id: input.assay_id,
+            participant_id: input.participant_id,
+            input_file_name: input.input_file_name,
+            input_file_path: input.input_file_path,
+            observations: input.observations,
+            analyses: input.analyses,
+            findings: &matched_findings,
+            provenance: input.provenance,
+            input_inspection: input.input_inspection,
+            manifest_metadata: input.manifest_metadata,
+        },
+    )
+}
+
+pub fn write_app_report_json<W: io::Write>(
+    writer: W,
+    input: AppReportJsonInput<'_>,
+) -> Result<(), String> {
+    serde_json::to_writer(writer, &app_report(input))
+        .map_err(|err| format!("failed to write report JSON: {err}"))
+}
+
+/// `bioscript:report:1.0` document; field order is the report JSON order.
+#[derive(Serialize)]
+struct AppReport<'a> {
+    schema: &'static str,
+    version: &'static str,
+    participant_id: &'a str,
+    assay_id: &'a str,
+    assay_version: &'static str,
+    manifest: &'a serde_json::Value,
+    input: AppReportInputFile<'a>,
+    report_status: &'static str,
+    derived_from: Vec<&'a str>,
+    analyses: &'a [serde_json::Value],
+    findings: &'a [serde_json::Value],
+    provenance: &'a [serde_json::Value],
+    metrics: AppReportMetrics,
+}
+
+#[derive(Serialize)]
+struct AppReportInputFile<'a> {
+    file_name: &'a str,
+    file_path: &'a str,
+    debug: Option<serde_json::Value>,
+}
+
+#[derive(Serialize)]
+struct AppReportMetrics {
+    n_sites_tested: usize,
+    n_sites_called: usize,
+    n_sites_missing: usize,
+    n_analyses: usize,
+    n_findings_matched: usize,
+}
+
+fn app_report(input: AppReportJsonInput<'_>) -> AppReport<'_> {
     let called = input
         .observations
         .iter()
-        .filter(|item| {
-            item.get("call_status").and_then(serde_json::Value::as_str) == Some("called")
-        })
+        .filter(|item| item.call_status == "called")
         .count();
     let input_debug = input.input_inspection.map(|inspection| {
         let mut value = input_inspection_json(inspection);
@@ -63,41 +138,46 @@ pub fn app_report_json(input: AppReportJsonInput<'_>) -> serde_json::Value {
         }
         value
     });
-    serde_json::json!({
-        "schema": "bioscript:report:1.0",
-        "version": "1.0",
-        "participant_id": input.participant_id,
-        "assay_id": input.assay_id,
-        "assay_version": "1.0",
-        "manifest": input.manifest_metadata,
-        "input": {
-            "file_name": input.input_file_name,
-            "file_path": input.input_file_path,
-            "debug": input_debug,
+    AppReport {
+        schema: "bioscript:report:1.0",
+        version: "1.0",
+        participant_id: input.participant_id,
+        assay_id: input.assay_id,
+        assay_version: "1.0",
+        manifest: input.manifest_metadata,
+        input: AppReportInputFile {
+            file_name: input.input_file_name,
+            file_path: input.input_file_path,
+            debug: input_debug,
         },
-        "report_status": if called == input.observations.len() { "complete" } else { "partial" },
-        "derived_from": input.observations.iter().filter_map(|item| item.get("variant_key").cloned()).collect::<Vec<_>>(),
-        "analyses": input.analyses,
-        "findings": input.findings,
-        "provenance": input.provenance,
-        "metrics": {
-            "n_sites_tested": input.observations.len(),
-            "n_sites_called": called,
-            "n_sites_missing": input.observations.len().saturating_sub(called),
-            "n_analyses": input.analyses.len(),
-            "n_findings_matched": input.findings.len(),
-        }
-    })
+        report_status: if called == input.observations.len() {
+            "complete"
+        } else {
+            "partial"
+        },
+        derived_from: input
+            .observations
+            .iter()
+            .map(|item| item.variant_key.as_str())
+            .collect(),
+        analyses: input.analyses,
+        findings: input.findings,
+        provenance: input.provenance,
+        metrics: AppReportMetrics {
+            n_sites_tested: input.observations.len(),
+            n_sites_called: called,
+            n_sites_missing: input.observations.len().saturating_sub(called),
+            n_analyses: input.analyses.len(),
+            n_findings_matched: input.findings.len(),
+        },
+    }
 }
 
-fn observations_have_imputed_vcf_references(observations: &[serde_json::Value]) -> bool {
+fn observations_have_imputed_vcf_references(observations: &[AppObservation]) -> bool {
     observations.iter().any(|observation| {
         observation
-            .get("evidence_raw")
-            .and_then(serde_json::Value::as_str)
-            .is_some_and(|evidence| {
-                evidence.contains("imputed reference genotype from absent variant-only VCF record")
-            })
+            .evidence_raw
+            .contains("imputed reference genotype from absent variant-only VCF record")
     })
 }
 
@@ -192,7 +272,10 @@ mod tests {
     };
     use serde_json::json;
 
-    use super::{AppInputReportInput, AppReportJsonInput, app_input_report_json, app_report_json};
+    use super::{
+        AppInputReportInput, AppObservation, AppReportJsonInput, app_input_report_json,
+        app_report_json, write_app_input_report_json,
+    };
 
     fn inspection() -> FileInspection {
         FileInspection {
@@ -224,19 +307,24 @@ mod tests {
         }
     }
 
-    fn observation(call_status: &str, evidence_raw: &str) -> serde_json::Value {
-        json!({
-            "variant_key": "rs123",
-            "call_status": call_status,
-            "outcome": if call_status == "called" { "variant" } else { "unknown" },
-            "evidence_raw": evidence_raw,
-            "rsid": "rs123",
-            "gene": "CYP2C19",
-            "ref": "G",
-            "alt": "A",
-            "genotype_display": "G/A",
-            "zygosity": "het"
-        })
+    fn observation(call_status: &'static str, evidence_raw: &str) -> AppObservation {
+        AppObservation {
+            variant_key: "rs123".to_owned(),
+            call_status,
+            outcome: if call_status == "called" {
+                "variant"
+            } else {
+                "unknown"
+            },
+            evidence_raw: evidence_raw.to_owned(),
+            rsid: Some("rs123".to_owned()),
+            gene: "CYP2C19".to_owned(),
+            ref_allele: "G".to_owned(),
+            alt: "A".to_owned(),
+            genotype_display: "G/A".to_owned(),
+            zygosity: "het".to_owned(),
+            ..AppObservation::default()
+        }
     }
 
     #[test]
@@ -297,7 +385,7 @@ mod tests {
         let provenance = Vec::new();
         let manifest = json!({"name": "panel"});
 
-        let report = app_input_report_json(AppInputReportInput {
+        let input = AppInputReportInput {
             assay_id: "assay",
             participant_id: "P001",
             input_file_name: "sample.txt",
@@ -308,8 +396,12 @@ mod tests {
             provenance: &provenance,
             input_inspection: None,
             manifest_metadata: &manifest,
-        });
+        };
+        let report = app_input_report_json(input);
+        let mut streamed = Vec::new();
+        write_app_input_report_json(&mut streamed, input).unwrap();
 
+        assert_eq!(streamed, serde_json::to_vec(&report).unwrap());
         assert_eq!(report["report_status"], "complete");
         assert_eq!(report["metrics"]["n_findings_matched"], 1);
         assert_eq!(
@@ -1,37 +1,23 @@
-use std::collections::BTreeMap;
+use std::collections::{BTreeMap, HashMap};
 
-use bioscript_core::{Assembly, VariantObservation, VariantSpec};
-use bioscript_formats::SexInference;
-use bioscript_schema::load_variant_manifest_text;
+use bioscript_core::{VariantObservation, VariantSpec};
 
 use crate::{
-    AppInputReportInput, FilesystemManifestWorkspace, ManifestWorkspace, app_input_report_json,
-    app_observation_from_manifest_row, collect_analysis_manifest_tasks,
-    collect_manifest_provenance_entries, collect_variant_manifest_tasks,
-    load_report_manifest_context, render_input_report_artifact_texts, variant_row,
+    AppInputReportInput, AppObservation, AppObservationInput, ManifestWorkspace, ReportPlan,
+    app_input_report_json, app_observation_record, render_report_artifact_texts, variant_row,
 };
 
 pub trait ReportVariantLookup {
     fn lookup_variants(&self, specs: &[VariantSpec]) -> Result<Vec<VariantObservation>, String>;
 }
 
-pub trait ReportWorkspace: ManifestWorkspace {
-    fn app_observation_from_manifest_row(
-        &self,
-        row: &BTreeMap<String, String>,
-        assay_id: &str,
-        inferred_sex: Option<&SexInference>,
-        fallback_assembly: Option<Assembly>,
-    ) -> Result<serde_json::Value, String>;
-}
-
 pub trait ReportAnalysisRunner {
     fn run_analysis_task(
         &self,
         task: &crate::AnalysisManifestTask,
         observation_rows: &[BTreeMap<String, String>],
         variant_observations: &[VariantObservation],
-        observations: &[serde_json::Value],
+        observations: &[AppObservation],
     ) -> Result<Vec<serde_json::Value>, String>;
 }
 
@@ -43,7 +29,7 @@ impl ReportAnalysisRunner for NoopReportAnalysisRunner {
         _task: &crate::AnalysisManifestTask,
         _observation_rows: &[BTreeMap<String, String>],
         _variant_observations: &[VariantObservation],
-        _observations: &[serde_json::Value],
+        _observations: &[AppObservation],
     ) -> Result<Vec<serde_json::Value>, String> {
         Ok(Vec::new())
     }
@@ -66,30 +52,39 @@ pub struct ReportRunOptions<'a> {
 pub struct ReportRunResult {
     pub observation_rows: Vec<BTreeMap<String, String>>,
     pub variant_observations: Vec<VariantObservation>,
-    pub observations: Vec<serde_json::Value>,
+    pub observations: Vec<AppObservation>,
     pub analyses: Vec<serde_json::Value>,
     pub report: serde_json::Value,
     pub artifacts: crate::ReportArtifactTexts,
 }
 
 pub fn run_report(
-    workspace: &impl ReportWorkspace,
+    workspace: &impl ManifestWorkspace,
     manifest_path: &str,
     lookup: &impl ReportVariantLookup,
     analysis_runner: &impl ReportAnalysisRunner,
     input: ReportInputContext<'_>,
     options: ReportRunOptions<'_>,
 ) -> Result<ReportRunResult, String> {
-    let manifest_context = load_report_manifest_context(workspace, manifest_path)?;
-    let variant_tasks = collect_variant_manifest_tasks(workspace, manifest_path, options.filters)?;
-    let variant_observations = lookup.lookup_variants(
-        &variant_tasks
-            .iter()
-            .map(|task| task.manifest.spec.clone())
-            .collect::<Vec<_>>(),
-    )?;
-    let observation_rows = variant_tasks
-        .into_iter()
+    let plan = ReportPlan::compile(workspace, manifest_path, options.filters)?;
+    run_report_with_plan(&plan, lookup, analysis_runner, input)
+}
+
+/// Run one participant against an already compiled [`ReportPlan`]. Callers
+/// rendering many inputs against the same manifest compile the plan once and
+/// only pay for lookups, observation building and rendering per input; no
+/// manifest file is read again.
+pub fn run_report_with_plan(
+    plan: &ReportPlan,
+    lookup: &impl ReportVariantLookup,
+    analysis_runner: &impl ReportAnalysisRunner,
+    input: ReportInputContext<'_>,
+) -> Result<ReportRunResult, String> {
+    let manifest_context = &plan.context;
+    let variant_observations = lookup.lookup_variants(&plan.variant_specs())?;
+    let observation_rows = plan
+        .variant_tasks
+        .iter()
         .zip(variant_observations.iter())
         .map(|(task, observation)| {
             variant_row(
@@ -101,27 +96,36 @@ pub fn run_report(
             )
         })
         .collect::<Vec<_>>();
+    let inferred_sex = input
+        .input_inspection
+        .and_then(|inspection| inspection.inferred_sex.as_ref());
+    let fallback_assembly = input
+        .input_inspection
+        .and_then(|inspection| inspection.assembly);
     let observations = observation_rows
         .iter()
-        .map(|row| {
-            workspace.app_observation_from_manifest_row(
+        .zip(plan.variant_tasks.iter().zip(&plan.variant_fields))
+        .map(|(row, (task, fields))| {
+            app_observation_record(AppObservationInput {
                 row,
-                &manifest_context.assay_id,
-                input
-                    .input_inspection
-                    .and_then(|inspection| inspection.inferred_sex.as_ref()),
-                input
-                    .input_inspection
-                    .and_then(|inspection| inspection.assembly),
-            )
+                row_path: &task.manifest_path,
+                assay_id: &manifest_context.assay_id,
+                manifest: task.manifest.clone(),
+                gene: fields.gene.clone(),
+                source: fields.source.clone(),
+                alt_alleles: fields.alt_alleles.clone(),
+                observed_alt_alleles: fields.observed_alt_alleles.clone(),
+                inferred_sex,
+                fallback_assembly,
+            })
         })
-        .collect::<Result<Vec<_>, _>>()?;
+        .collect::<Vec<_>>();
     let analysis_variant_observations =
         analysis_variant_observations(&variant_observations, &observations);
     let mut analyses = Vec::new();
-    for task in collect_analysis_manifest_tasks(workspace, manifest_path, options.filters)? {
+    for task in &plan.analysis_tasks {
         analyses.extend(analysis_runner.run_analysis_task(
-            &task,
+            task,
             &observation_rows,
             &analysis_variant_observations,
             &observations,
@@ -140,7 +144,8 @@ pub fn run_report(
         manifest_metadata: &manifest_context.manifest_metadata,
     };
     let report = app_input_report_json(report_input);
-    let artifacts = render_input_report_artifact_texts(report_input)?;
+    let artifacts =
+        render_report_artifact_texts(&observations, &analyses, std::slice::from_ref(&report))?;
     Ok(ReportRunResult {
         observation_rows,
         variant_observations,
@@ -158,178 +163,46 @@ impl ReportVariantLookup for bioscript_formats::GenotypeStore {
     }
 }
 
-impl ReportWorkspace for FilesystemManifestWorkspace {
-    fn app_observation_from_manifest_row(
-        &self,
-        row: &BTreeMap<String, String>,
-        assay_id: &str,
-        inferred_sex: Option<&SexInference>,
-        fallback_assembly: Option<Assembly>,
-    ) -> Result<serde_json::Value, String> {
-        let row_path = row.get("path").cloned().unwrap_or_default();
-        let (manifest, gene, source, alt_alleles, observed_alt_alleles) = if row_path.contains('#')
-        {
-            let task = crate::load_variant_manifest_task_by_path(self, &row_path)?;
-            let alt_alleles = task
-                .manifest
-                .spec
-                .alternate
-                .clone()
-                .into_iter()
-                .collect::<Vec<_>>();
-            let observed_alt_alleles = task.manifest.spec.observed_alternates.clone();
-            (
-                task.manifest,
-                String::new(),
-                serde_json::Value::Null,
-                alt_alleles,
-                observed_alt_alleles,
-            )
-        } else {
-            let text = self.load_text(&row_path)?;
-            let manifest = load_variant_manifest_text(&row_path, &text)?;
-            let value = self.load_yaml(&row_path)?;
-            (
-                manifest,
-                yaml_string(&value, "gene").unwrap_or_default(),
-                variant_primary_source_from_yaml(&value)?,
-                variant_alt_alleles_from_yaml(&value),
-                variant_observed_alt_alleles_from_yaml(&value),
-            )
-        };
-        Ok(app_observation_from_manifest_row(
-            crate::AppObservationInput {
-                row,
-                row_path: &row_path,
-                assay_id,
-                manifest,
-                gene,
-                source,
-                alt_alleles,
-                observed_alt_alleles,
-                inferred_sex,
-                fallback_assembly,
-            },
-        ))
-    }
-}
-
-fn variant_primary_source_from_yaml(
-    value: &serde_yaml::Value,
-) -> Result<serde_json::Value, String> {
-    let mut links = BTreeMap::<String, serde_json::Value>::new();
-    collect_manifest_provenance_entries(value, &mut links)?;
-    if let Some(source) = links
-        .values()
-        .find(|source| source_url_contains(source, "ncbi.nlm.nih.gov/snp/rs"))
-    {
-        return Ok(source.clone());
-    }
-    if let Some(rsid) = value
-        .get("identifiers")
-        .and_then(|identifiers| identifiers.get("rsids"))
-        .and_then(serde_yaml::Value::as_sequence)
-        .and_then(|items| items.iter().find_map(serde_yaml::Value::as_str))
-    {
-        return Ok(serde_json::json!({
-            "kind": "database",
-            "label": "dbSNP / NCBI SNP",
-            "url": format!("https://www.ncbi.nlm.nih.gov/snp/{rsid}"),
-            "fields": ["identifiers.rsids"],
-        }));
-    }
-    Ok(links
-        .into_values()
-        .next()
-        .unwrap_or(serde_json::Value::Null))
-}
-
-fn source_url_contains(source: &serde_json::Value, needle: &str) -> bool {
-    source
-        .get("url")
-        .and_then(serde_json::Value::as_str)
-        .is_some_and(|url| url.contains(needle))
-}
-
-fn variant_observed_alt_alleles_from_yaml(value: &serde_yaml::Value) -> Vec<String> {
-    value
-        .get("alleles")
-        .and_then(serde_yaml::Value::as_mapping)
-        .and_then(|mapping| mapping.get(serde_yaml::Value::String("observed_alts".to_owned())))
-        .and_then(serde_yaml::Value::as_sequence)
-        .into_iter()
-        .flatten()
-        .filter_map(serde_yaml::Value::as_str)
-        .map(ToOwned::to_owned)
-        .collect()
-}
-
-fn variant_alt_alleles_from_yaml(value: &serde_yaml::Value) -> Vec<String> {
-    value
-        .get("alleles")
-        .and_then(serde_yaml::Value::as_mapping)
-        .and_then(|mapping| mapping.get(serde_yaml::Value::String("alts".to_owned())))
-        .and_then(serde_yaml::Value::as_sequence)
-        .into_iter()
-        .flatten()
-        .filter_map(serde_yaml::Value::as_str)
-        .map(ToOwned::to_owned)
-        .collect()
-}
-
-fn yaml_string(value: &serde_yaml::Value, key: &str) -> Option<String> {
-    value
-        .get(key)
-        .and_then(serde_yaml::Value::as_str)
-        .map(ToOwned::to_owned)
-}
-
+/// Variant observations handed to analyses, with the genotype replaced by
+/// the app observation's normalized display for the same rsid.
 fn analysis_variant_observations(
     variant_observations: &[VariantObservation],
-    observations: &[serde_json::Value],
+    observations: &[AppObservation],
 ) -> Vec<VariantObservation> {
+    let mut by_rsid = HashMap::new();
+    for observation in observations {
+        if let Some(rsid) = observation.rsid.as_deref() {
+            by_rsid.entry(rsid).or_insert(observation);
+        }
+    }
     variant_observations
         .iter()
         .map(|observation| {
             let mut observation = observation.clone();
-            if let Some(app_observation) = matching_app_observation(&observation, observations)
-                && let Some(genotype_display) = app_observation
-                    .get("genotype_display")
-                    .and_then(serde_json::Value::as_str)
-                    .filter(|value| !value.is_empty() && *value != "??")
+            if let Some(app_observation) = observation
+                .matched_rsid
+                .as_deref()
+                .and_then(|rsid| by_rsid.get(rsid))
+                && !app_observation.genotype_display.is_empty()
+                && app_observation.genotype_display != "??"
             {
-                observation.genotype = Some(genotype_display.to_owned());
+                observation.genotype = Some(app_observation.genotype_display.clone());
             }
             observation
         })
         .collect()
 }
 
-fn matching_app_observation<'a>(
-    observation: &VariantObservation,
-    observations: &'a [serde_json::Value],
-) -> Option<&'a serde_json::Value> {
-    let matched_rsid = observation.matched_rsid.as_deref()?;
-    observations.iter().find(|app_observation| {
-        app_observation
-            .get("rsid")
-            .and_then(serde_json::Value::as_str)
-            == Some(matched_rsid)
-    })
-}
-
 #[cfg(test)]
 mod tests {
     use std::{cell::Cell, collections::BTreeMap};
 
     use bioscript_core::{VariantObservation, VariantSpec};
-    use bioscript_formats::SexInference;
 
     use super::{
-        ReportAnalysisRunner, ReportInputContext, ReportRunOptions, ReportVariantLookup,
-        ReportWorkspace, run_report,
+        ReportAnalysisRunner, ReportInputContext, ReportRunOptions, ReportVariantLookup, run_report,
     };
-    use crate::ManifestWorkspace;
+    use crate::{AppObservation, ManifestWorkspace};
 
     struct MapWorkspace {
         files: BTreeMap<String, String>,
@@ -355,24 +228,6 @@ mod tests {
         }
     }
 
-    impl ReportWorkspace for MapWorkspace {
-        fn app_observation_from_manifest_row(
-            &self,
-            row: &BTreeMap<String, String>,
-            assay_id: &str,
-            _inferred_sex: Option<&SexInference>,
-            _fallback_assembly: Option<bioscript_core::Assembly>,
-        ) -> Result<serde_json::Value, String> {
-            Ok(serde_json::json!({
-                "assay_id": assay_id,
-                "participant_id": row.get("participant_id").cloned().unwrap_or_default(),
-                "path": row.get("path").cloned().unwrap_or_default(),
-                "rsid": row.get("matched_rsid").cloned().unwrap_or_default(),
-                "genotype_display": row.get("genotype").cloned().unwrap_or_default(),
-            }))
-        }
-    }
-
     struct StaticLookup;
 
     impl ReportVariantLookup for StaticLookup {
@@ -402,7 +257,7 @@ mod tests {
             task: &crate::AnalysisManifestTask,
             observation_rows: &[BTreeMap<String, String>],
             variant_observations: &[VariantObservation],
-            observations: &[serde_json::Value],
+            observations: &[AppObservation],
         ) -> Result<Vec<serde_json::Value>, String> {
             self.calls.set(self.calls.get() + 1);
             assert_eq!(task.manifest_name, "panel");
@@ -449,6 +304,7 @@ interpretations:
 schema: bioscript:variant:1.0
 version: "1.0"
 name: rs1
+gene: GENE1
 identifiers:
   rsids: [rs1]
 coordinates:
@@ -485,7 +341,12 @@ alleles:
 
         assert_eq!(analysis.calls.get(), 1);
         assert_eq!(result.observation_rows.len(), 1);
-        assert_eq!(result.observations[0]["assay_id"], "panel");
+        assert_eq!(result.observations[0].assay_id, "panel");
+        assert_eq!(result.observations[0].gene, "GENE1");
+        assert_eq!(
+            result.observations[0].source["url"],
+            "https://www.ncbi.nlm.nih.gov/snp/rs1"
+        );
         assert_eq!(result.analyses[0]["assay_id"], "panel");
         assert_eq!(result.report["participant_id"], "sample");
         assert!(result.artifacts.observations_tsv.contains("sample"));
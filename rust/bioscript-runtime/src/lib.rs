@@ -12,4 +12,4 @@
 
 mod runtime;
 
-pub use runtime::{BioscriptRuntime, RuntimeConfig, StageTiming};
+pub use runtime::{BioscriptRuntime, RuntimeConfig, StageTiming, write_timing_report};
@@ -3,19 +3,21 @@ use std::{
     fs,
     path::{Path, PathBuf},
     sync::Arc,
-    time::Duration,
+    thread,
 };
 
 use bioscript_core::RuntimeError;
 use monty::{LimitedTracker, MontyObject, MontyRun, NameLookupResult, PrintWriter, RunProgress};
 
 mod args;
+mod async_calls;
 mod dispatch;
 mod genotype_load;
 mod host_io;
 mod imports;
 mod kestrel_native_methods;
 mod lib_methods;
+mod lookup_prefetch;
 mod methods;
 mod objects;
 mod paths;
@@ -23,16 +25,19 @@ mod samtools_command_methods;
 mod samtools_native_methods;
 mod state;
 mod timing;
+mod timing_report;
 mod tool_methods;
 mod trace;
 mod variants;
 mod vcf_methods;
 
+use async_calls::{AsyncHostCalls, async_method_target};
 #[cfg(test)]
 use bioscript_core::VariantSpec;
 use host_io::{deepest_existing_ancestor, host_read_text, host_write_text};
 use imports::rewrite_bioscript_imports;
 use lib_methods::host_bioscript_import;
+use lookup_prefetch::LookupPrefetch;
 use objects::bioscript_object;
 #[cfg(test)]
 use objects::{
@@ -42,6 +47,7 @@ pub(crate) use paths::resolve_optional_loader_path;
 pub use state::{RuntimeConfig, StageTiming};
 use state::{RuntimeState, monty_error};
 use timing::RuntimeInstant;
+pub use timing_report::write_timing_report;
 #[cfg(test)]
 use trace::{
     ends_with_unescaped_backslash, extract_coordinate, extract_rsid, update_nesting_depth,
@@ -146,6 +152,16 @@ impl BioscriptRuntime {
             .lock()
             .expect("timings mutex poisoned")
             .clear();
+        self.state
+            .awaiting_parent
+            .lock()
+            .expect("timing parents mutex poisoned")
+            .clear();
+        *self
+            .state
+            .lookup_prefetch
+            .lock()
+            .expect("lookup prefetch mutex poisoned") = LookupPrefetch::default();
 
         extra_inputs.push(("__name__", MontyObject::String("__main__".to_owned())));
         extra_inputs.push((
@@ -174,7 +190,7 @@ impl BioscriptRuntime {
         }
         self.record_timing(
             "run_file_total",
-            run_started.elapsed(),
+            &run_started,
             format!("script={}", script_path.display()),
         );
 
@@ -201,10 +217,21 @@ impl BioscriptRuntime {
         let runner =
             MontyRun::new(code.to_owned(), script_name, input_names).map_err(monty_error)?;
         let tracker = LimitedTracker::new(self.config.limits.clone());
-        let mut progress = runner
+        let progress = runner
             .start(input_values, tracker, PrintWriter::Stdout)
             .map_err(monty_error)?;
 
+        thread::scope(|scope| {
+            let mut async_calls = AsyncHostCalls::new(scope, self, self.config.async_host_workers);
+            self.drive_script(progress, &mut async_calls)
+        })
+    }
+
+    fn drive_script(
+        &self,
+        mut progress: RunProgress<LimitedTracker>,
+        async_calls: &mut AsyncHostCalls<'_, '_>,
+    ) -> Result<MontyObject, RuntimeError> {
         loop {
             progress = match progress {
                 RunProgress::Complete(value) => return Ok(value),
@@ -222,7 +249,19 @@ impl BioscriptRuntime {
                         .map_err(monty_error)?
                 }
                 RunProgress::FunctionCall(call) => {
-                    if call.method_call {
+                    if call.method_call
+                        && let Some(method_name) =
+                            async_method_target(&call.args, &call.function_name)
+                    {
+                        async_calls.submit(
+                            call.call_id,
+                            method_name,
+                            call.args.clone(),
+                            call.kwargs.clone(),
+                        );
+                        call.resume_pending(PrintWriter::Stdout)
+                            .map_err(monty_error)?
+                    } else if call.method_call {
                         let result = self.dispatch_method_call(
                             &call.function_name,
                             &call.args,
@@ -243,10 +282,14 @@ impl BioscriptRuntime {
                     }
                 }
                 RunProgress::ResolveFutures(state) => {
-                    return Err(RuntimeError::Unsupported(format!(
-                        "async futures are not supported in bioscript runtime: {:?}",
-                        state.pending_call_ids()
-                    )));
+                    let call_ids = state.pending_call_ids().to_vec();
+                    let mut results = Vec::with_capacity(call_ids.len());
+                    for call_id in call_ids {
+                        results.push((call_id, async_calls.resolve(call_id)?.into()));
+                    }
+                    state
+                        .resume(results, PrintWriter::Stdout)
+                        .map_err(monty_error)?
                 }
                 RunProgress::OsCall(call) => {
                     return Err(RuntimeError::Unsupported(format!(
@@ -258,16 +301,31 @@ impl BioscriptRuntime {
         }
     }
 
-    fn record_timing(&self, stage: &str, duration: Duration, detail: String) {
-        self.state
-            .timings
+    /// Records a finished stage. Stages nested inside it finished earlier and
+    /// are waiting in `awaiting_parent`; they get this stage's name now.
+    fn record_timing(&self, stage: &str, started: &RuntimeInstant, detail: String) {
+        let mut timing = StageTiming::new(stage, started.elapsed(), detail);
+        timing.counters = started.counters();
+        timing.backend_counters = started.backend_counters();
+        let mut timings = self.state.timings.lock().expect("timings mutex poisoned");
+        let mut awaiting = self
+            .state
+            .awaiting_parent
             .lock()
-            .expect("timings mutex poisoned")
-            .push(StageTiming {
-                stage: stage.to_owned(),
-                duration_ms: duration.as_millis(),
-                detail,
-            });
+            .expect("timing parents mutex poisoned");
+        awaiting.retain(|(index, parent)| {
+            if !Arc::ptr_eq(parent, started.scope()) {
+                return true;
+            }
+            if let Some(child) = timings.get_mut(*index) {
+                child.parent = Some(stage.to_owned());
+            }
+            false
+        });
+        if let Some(parent) = started.parent_scope() {
+            awaiting.push((timings.len(), Arc::clone(parent)));
+        }
+        timings.push(timing);
     }
 
     #[must_use]
@@ -734,7 +792,19 @@ mod tests {
             .method_genotype_lookup_variants_details(&[genotype, plan], &[])
             .unwrap();
         assert!(matches!(detail_values, MontyObject::List(items) if items.len() == 1));
-        assert!(runtime.timing_snapshot().len() >= 4);
+        let timings = runtime.timing_snapshot();
+        assert!(timings.len() >= 4);
+        let batch = timings
+            .iter()
+            .find(|timing| timing.stage == "lookup_variants")
+            .unwrap();
+        assert_eq!(
+            batch
+                .counters
+                .get(&bioscript_core::ProfileCounter::VariantsQueried),
+            Some(&1)
+        );
+        assert!(batch.duration_us >= batch.duration_ms);
     }
 
     #[test]
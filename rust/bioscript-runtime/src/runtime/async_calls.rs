@@ -0,0 +1,183 @@
+use std::{
+    collections::{BTreeMap, VecDeque},
+    thread::{self, Scope, ScopedJoinHandle},
+};
+
+use bioscript_core::{ProfileScope, RuntimeError, profile};
+use monty::MontyObject;
+
+use super::BioscriptRuntime;
+
+const ASYNC_SUFFIX: &str = "_async";
+
+/// Host methods a script may call with an `_async` suffix. They only touch
+/// shared runtime state through `RuntimeState`'s mutexes and never re-enter
+/// the interpreter, so they can run on a worker thread while the script keeps
+/// going until it awaits the result.
+const ASYNC_METHODS: &[(&str, &str)] = &[
+    ("Bioscript", "load_genotypes"),
+    ("GenotypeFile", "lookup_variant"),
+    ("GenotypeFile", "lookup_variant_details"),
+    ("GenotypeFile", "lookup_variants"),
+    ("GenotypeFile", "lookup_variants_details"),
+    ("SamtoolsModule", "view"),
+    ("SamtoolsModule", "view_region"),
+    ("SamtoolsModule", "view_region_native"),
+    ("SamtoolsModule", "fastq"),
+    ("SamtoolsModule", "fastq_native"),
+    ("SamtoolsModule", "sort"),
+    ("SamtoolsModule", "depth"),
+    ("SamtoolsModule", "depth_native"),
+    ("SamtoolsModule", "index"),
+    ("KestrelModule", "run_native"),
+    ("BcftoolsModule", "sort"),
+    ("BcftoolsModule", "sort_native"),
+    ("BcftoolsModule", "index"),
+    ("BcftoolsModule", "index_native"),
+    ("BcftoolsModule", "view"),
+    ("BcftoolsModule", "view_native"),
+    ("VcfModule", "read_kestrel"),
+    ("VcfModule", "read_vntyper_kestrel"),
+];
+
+/// Returns the synchronous method behind an `_async` method call, if the
+/// receiver's class allows running it off the interpreter thread.
+pub(crate) fn async_method_target<'a>(
+    args: &[MontyObject],
+    method_name: &'a str,
+) -> Option<&'a str> {
+    let base = method_name.strip_suffix(ASYNC_SUFFIX)?;
+    let Some(MontyObject::Dataclass { name, .. }) = args.first() else {
+        return None;
+    };
+    ASYNC_METHODS
+        .iter()
+        .any(|(class_name, method)| *class_name == name.as_str() && *method == base)
+        .then_some(base)
+}
+
+/// Default worker count for `_async` host calls. wasm has no threads, so calls
+/// there are evaluated inline and handed back as already-resolved futures.
+pub(crate) fn default_async_workers() -> usize {
+    if cfg!(target_arch = "wasm32") {
+        0
+    } else {
+        thread::available_parallelism().map_or(2, usize::from)
+    }
+}
+
+type HostCallResult = Result<MontyObject, RuntimeError>;
+
+enum PendingCall<'scope> {
+    Running(ScopedJoinHandle<'scope, HostCallResult>),
+    Ready(HostCallResult),
+}
+
+/// In-flight `_async` host calls for one `run_script`, keyed by Monty call id.
+/// Workers are scoped to the run, so nothing outlives the script.
+pub(crate) struct AsyncHostCalls<'scope, 'env> {
+    scope: &'scope Scope<'scope, 'env>,
+    runtime: &'env BioscriptRuntime,
+    max_workers: usize,
+    pending: BTreeMap<u32, PendingCall<'scope>>,
+    running: VecDeque<u32>,
+}
+
+impl<'scope, 'env> AsyncHostCalls<'scope, 'env> {
+    pub(crate) fn new(
+        scope: &'scope Scope<'scope, 'env>,
+        runtime: &'env BioscriptRuntime,
+        max_workers: usize,
+    ) -> Self {
+        Self {
+            scope,
+            runtime,
+            max_workers,
+            pending: BTreeMap::new(),
+            running: VecDeque::new(),
+        }
+    }
+
+    pub(crate) fn submit(
+        &mut self,
+        call_id: u32,
+        method_name: &str,
+        args: Vec<MontyObject>,
+        kwargs: Vec<(MontyObject, MontyObject)>,
+    ) {
+        if self.max_workers == 0 {
+            let result = self
+                .runtime
+                .dispatch_method_call(method_name, &args, &kwargs);
+            self.pending.insert(call_id, PendingCall::Ready(result));
+            return;
+        }
+        while self.running.len() >= self.max_workers {
+            let Some(oldest) = self.running.pop_front() else {
+                break;
+            };
+            if let Some(PendingCall::Running(handle)) = self.pending.remove(&oldest) {
+                self.pending
+                    .insert(oldest, PendingCall::Ready(join_host_call(handle)));
+            }
+        }
+
+        let runtime = self.runtime;
+        let method_name = method_name.to_owned();
+        let counters = profile::current_counters();
+        let handle = self.scope.spawn(move || {
+            let _profile_scope = counters.map(ProfileScope::enter);
+            runtime.dispatch_method_call(&method_name, &args, &kwargs)
+        });
+        self.pending.insert(call_id, PendingCall::Running(handle));
+        self.running.push_back(call_id);
+    }
+
+    pub(crate) fn resolve(&mut self, call_id: u32) -> HostCallResult {
+        self.running.retain(|id| *id != call_id);
+        match self.pending.remove(&call_id) {
+            Some(PendingCall::Running(handle)) => join_host_call(handle),
+            Some(PendingCall::Ready(result)) => result,
+            None => Err(RuntimeError::Unsupported(format!(
+                "unknown async host call id: {call_id}"
+            ))),
+        }
+    }
+}
+
+fn join_host_call(handle: ScopedJoinHandle<'_, HostCallResult>) -> HostCallResult {
+    handle
+        .join()
+        .map_err(|_| RuntimeError::Io("async host call worker panicked".to_owned()))?
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn receiver(name: &str) -> MontyObject {
+        MontyObject::Dataclass {
+            name: name.to_owned(),
+            type_id: 0,
+            field_names: Vec::new(),
+            attrs: Vec::<(MontyObject, MontyObject)>::new().into(),
+            frozen: true,
+        }
+    }
+
+    #[test]
+    fn async_method_target_requires_allowlisted_class_and_suffix() {
+        let samtools = [receiver("SamtoolsModule")];
+        assert_eq!(
+            async_method_target(&samtools, "depth_native_async"),
+            Some("depth_native")
+        );
+        assert_eq!(async_method_target(&samtools, "depth_native"), None);
+        assert_eq!(async_method_target(&samtools, "plan_depth_async"), None);
+        assert_eq!(
+            async_method_target(&[receiver("Bioscript")], "write_tsv_async"),
+            None
+        );
+        assert_eq!(async_method_target(&[], "depth_async"), None);
+    }
+}
@@ -1,3 +1,5 @@
+use std::sync::Arc;
+
 use bioscript_core::RuntimeError;
 use bioscript_formats::{GenotypeLoadOptions, GenotypeSourceFormat, GenotypeStore};
 use monty::MontyObject;
@@ -99,10 +101,10 @@ impl BioscriptRuntime {
             .genotype_files
             .lock()
             .expect("genotype mutex poisoned")
-            .insert(handle, store);
+            .insert(handle, Arc::new(store));
         self.record_timing(
             "load_genotypes",
-            started.elapsed(),
+            &started,
             format!("path={}", path.display()),
         );
         Ok(genotype_file_object(handle))
@@ -173,7 +173,7 @@ impl BioscriptRuntime {
         })?;
         self.record_timing(
             "native_tool_call",
-            started.elapsed(),
+            &started,
             "method=kestrel.run_native".to_owned(),
         );
         Ok(MontyObject::String(
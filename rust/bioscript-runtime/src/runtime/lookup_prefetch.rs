@@ -0,0 +1,170 @@
+use std::collections::HashMap;
+
+use bioscript_core::{ProfileCounter, RuntimeError, VariantObservation, VariantSpec, profile};
+use bioscript_formats::GenotypeStore;
+
+use super::{BioscriptRuntime, timing::RuntimeInstant};
+
+/// Variants the script has declared with `bioscript.variant(...)`, plus the
+/// batch lookups already run for them on each genotype handle.
+///
+/// Assays usually declare every variant at module level and then call
+/// `genotypes.lookup_variant(...)` one at a time. Each single lookup reopens
+/// or rescans the input, so the first lookup of a declared variant resolves
+/// every outstanding declaration in one `lookup_variants` batch and later
+/// lookups are answered from it.
+#[derive(Debug, Default)]
+pub(crate) struct LookupPrefetch {
+    /// Declarations in script order; the index is a declaration's id.
+    declared: Vec<VariantSpec>,
+    ids: HashMap<VariantSpec, usize>,
+    batches: HashMap<u64, HandleBatches>,
+}
+
+/// Batch state for one genotype handle.
+#[derive(Debug, Default)]
+struct HandleBatches {
+    /// Declarations with ids below this have been batched on the handle,
+    /// whether or not the batch succeeded, so a failing batch is never rerun.
+    attempted: usize,
+    observations: HashMap<usize, VariantObservation>,
+}
+
+impl LookupPrefetch {
+    pub(crate) fn declare(&mut self, spec: &VariantSpec) {
+        if !self.ids.contains_key(spec) {
+            self.ids.insert(spec.clone(), self.declared.len());
+            self.declared.push(spec.clone());
+        }
+    }
+
+    fn declared_id(&self, spec: &VariantSpec) -> Option<usize> {
+        self.ids.get(spec).copied()
+    }
+
+    fn cached(&self, handle: u64, id: usize) -> Option<VariantObservation> {
+        self.batches
+            .get(&handle)
+            .and_then(|batches| batches.observations.get(&id))
+            .cloned()
+    }
+
+    /// Declarations not yet batched on `handle`, as the id of the first one
+    /// plus the specs. They count as attempted from here on.
+    fn take_pending(&mut self, handle: u64) -> (usize, Vec<VariantSpec>) {
+        let batches = self.batches.entry(handle).or_default();
+        let first = batches.attempted;
+        batches.attempted = self.declared.len();
+        (first, self.declared[first..].to_vec())
+    }
+
+    fn insert(&mut self, handle: u64, first: usize, observations: Vec<VariantObservation>) {
+        self.batches
+            .entry(handle)
+            .or_default()
+            .observations
+            .extend((first..).zip(observations));
+    }
+}
+
+impl BioscriptRuntime {
+    /// Single-variant lookup that goes through the declared-variant batch.
+    /// Undeclared specs, specs whose batch already ran without them, and
+    /// batches the backend rejects fall back to a plain `lookup_variant`, so
+    /// the result never differs from the unbatched path.
+    pub(super) fn lookup_declared_variant(
+        &self,
+        handle: u64,
+        store: &GenotypeStore,
+        spec: &VariantSpec,
+    ) -> Result<VariantObservation, RuntimeError> {
+        let (id, first, pending) = {
+            let mut prefetch = self
+                .state
+                .lookup_prefetch
+                .lock()
+                .expect("lookup prefetch mutex poisoned");
+            let Some(id) = prefetch.declared_id(spec) else {
+                return store.lookup_variant(spec);
+            };
+            if let Some(observation) = prefetch.cached(handle, id) {
+                profile::record(ProfileCounter::CacheHits, 1);
+                return Ok(observation);
+            }
+            let (first, pending) = prefetch.take_pending(handle);
+            (id, first, pending)
+        };
+        if id < first {
+            return store.lookup_variant(spec);
+        }
+
+        let batch_started = RuntimeInstant::now();
+        let batch = store.lookup_variants(&pending);
+        self.record_timing(
+            "prefetch_declared_variants",
+            &batch_started,
+            format!("count={}", pending.len()),
+        );
+        let Ok(observations) = batch else {
+            return store.lookup_variant(spec);
+        };
+        let mut prefetch = self
+            .state
+            .lookup_prefetch
+            .lock()
+            .expect("lookup prefetch mutex poisoned");
+        prefetch.insert(handle, first, observations);
+        match prefetch.cached(handle, id) {
+            Some(observation) => Ok(observation),
+            None => store.lookup_variant(spec),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn spec(rsid: &str) -> VariantSpec {
+        VariantSpec {
+            rsids: vec![rsid.to_owned()],
+            ..VariantSpec::default()
+        }
+    }
+
+    #[test]
+    fn pending_tracks_declarations_per_handle() {
+        let mut prefetch = LookupPrefetch::default();
+        prefetch.declare(&spec("rs1"));
+        prefetch.declare(&spec("rs2"));
+        prefetch.declare(&spec("rs1"));
+        assert_eq!(prefetch.declared_id(&spec("rs2")), Some(1));
+        assert_eq!(prefetch.declared_id(&spec("rs3")), None);
+
+        let observation = VariantObservation {
+            genotype: Some("AG".to_owned()),
+            ..VariantObservation::default()
+        };
+        assert_eq!(
+            prefetch.take_pending(7),
+            (0, vec![spec("rs1"), spec("rs2")])
+        );
+        prefetch.insert(7, 0, vec![observation.clone()]);
+        assert_eq!(prefetch.cached(7, 0), Some(observation));
+        assert_eq!(prefetch.cached(7, 1), None);
+        assert_eq!(prefetch.cached(8, 0), None);
+        assert_eq!(prefetch.take_pending(8).1.len(), 2);
+    }
+
+    #[test]
+    fn attempted_batches_are_not_rerun() {
+        let mut prefetch = LookupPrefetch::default();
+        prefetch.declare(&spec("rs1"));
+        // The batch failed, so nothing was inserted; it still counts.
+        assert_eq!(prefetch.take_pending(7).1.len(), 1);
+        assert!(prefetch.take_pending(7).1.is_empty());
+
+        prefetch.declare(&spec("rs2"));
+        assert_eq!(prefetch.take_pending(7), (1, vec![spec("rs2")]));
+    }
+}
@@ -29,16 +29,7 @@ impl BioscriptRuntime {
         }
         let handle = dataclass_handle_id(&args[0], "GenotypeFile")?;
         let rsid = expect_string_arg(args, 1, "GenotypeFile.get")?;
-        let guard = self
-            .state
-            .genotype_files
-            .lock()
-            .expect("genotype mutex poisoned");
-        let Some(store) = guard.get(&handle) else {
-            return Err(RuntimeError::InvalidArguments(format!(
-                "unknown genotype handle: {handle}"
-            )));
-        };
+        let store = self.state.genotype_store(handle)?;
         Ok(match store.get(&rsid)? {
             Some(value) => MontyObject::String(value),
             None => MontyObject::None,
@@ -56,6 +47,11 @@ impl BioscriptRuntime {
             ));
         }
         let spec = variant_spec_from_kwargs(kwargs)?;
+        self.state
+            .lookup_prefetch
+            .lock()
+            .expect("lookup prefetch mutex poisoned")
+            .declare(&spec);
         Ok(variant_object(&spec))
     }
 
@@ -88,20 +84,11 @@ impl BioscriptRuntime {
         }
         let handle = dataclass_handle_id(&args[0], "GenotypeFile")?;
         let spec = dataclass_to_variant_spec(&args[1])?;
-        let guard = self
-            .state
-            .genotype_files
-            .lock()
-            .expect("genotype mutex poisoned");
-        let Some(store) = guard.get(&handle) else {
-            return Err(RuntimeError::InvalidArguments(format!(
-                "unknown genotype handle: {handle}"
-            )));
-        };
-        let observation = store.lookup_variant(&spec)?;
+        let store = self.state.genotype_store(handle)?;
+        let observation = self.lookup_declared_variant(handle, &store, &spec)?;
         self.record_timing(
             "lookup_variant",
-            started.elapsed(),
+            &started,
             format!("rsids={}", spec.rsids.join("|")),
         );
         Ok(match observation.genotype {
@@ -124,20 +111,11 @@ impl BioscriptRuntime {
         }
         let handle = dataclass_handle_id(&args[0], "GenotypeFile")?;
         let spec = dataclass_to_variant_spec(&args[1])?;
-        let guard = self
-            .state
-            .genotype_files
-            .lock()
-            .expect("genotype mutex poisoned");
-        let Some(store) = guard.get(&handle) else {
-            return Err(RuntimeError::InvalidArguments(format!(
-                "unknown genotype handle: {handle}"
-            )));
-        };
-        let observation = store.lookup_variant(&spec)?;
+        let store = self.state.genotype_store(handle)?;
+        let observation = self.lookup_declared_variant(handle, &store, &spec)?;
         self.record_timing(
             "lookup_variant_details",
-            started.elapsed(),
+            &started,
             format!("rsids={}", spec.rsids.join("|")),
         );
         Ok(variant_observation_object(&observation))
@@ -157,20 +135,11 @@ impl BioscriptRuntime {
         }
         let handle = dataclass_handle_id(&args[0], "GenotypeFile")?;
         let specs = variant_specs_from_plan(&args[1])?;
-        let guard = self
-            .state
-            .genotype_files
-            .lock()
-            .expect("genotype mutex poisoned");
-        let Some(store) = guard.get(&handle) else {
-            return Err(RuntimeError::InvalidArguments(format!(
-                "unknown genotype handle: {handle}"
-            )));
-        };
+        let store = self.state.genotype_store(handle)?;
         let observations = store.lookup_variants(&specs)?;
         self.record_timing(
             "lookup_variants",
-            started.elapsed(),
+            &started,
             format!("count={}", specs.len()),
         );
         Ok(MontyObject::List(
@@ -198,20 +167,11 @@ impl BioscriptRuntime {
         }
         let handle = dataclass_handle_id(&args[0], "GenotypeFile")?;
         let specs = variant_specs_from_plan(&args[1])?;
-        let guard = self
-            .state
-            .genotype_files
-            .lock()
-            .expect("genotype mutex poisoned");
-        let Some(store) = guard.get(&handle) else {
-            return Err(RuntimeError::InvalidArguments(format!(
-                "unknown genotype handle: {handle}"
-            )));
-        };
+        let store = self.state.genotype_store(handle)?;
         let observations = store.lookup_variants(&specs)?;
         self.record_timing(
             "lookup_variants_details",
-            started.elapsed(),
+            &started,
             format!("count={}", specs.len()),
         );
         Ok(MontyObject::List(
@@ -254,7 +214,7 @@ impl BioscriptRuntime {
         if self.write_virtual_text_file(&path, output.clone()) {
             self.record_timing(
                 "write_tsv",
-                started.elapsed(),
+                &started,
                 format!("path={} rows={}", path.display(), rows.len()),
             );
             return Ok(MontyObject::None);
@@ -272,7 +232,7 @@ impl BioscriptRuntime {
         })?;
         self.record_timing(
             "write_tsv",
-            started.elapsed(),
+            &started,
             format!("path={} rows={}", path.display(), rows.len()),
         );
         Ok(MontyObject::None)
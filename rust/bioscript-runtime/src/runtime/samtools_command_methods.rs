@@ -99,7 +99,7 @@ fn command_argv_object(
 ) -> Result<MontyObject, RuntimeError> {
     runtime.record_timing(
         "tool_command_plan",
-        started.elapsed(),
+        &started,
         format!("method={method} argv={}", argv.join(" ")),
     );
     Ok(MontyObject::List(
@@ -281,11 +281,7 @@ fn optional_existing_path(
 }
 
 fn record_native_tool_call(runtime: &BioscriptRuntime, method: &str, started: RuntimeInstant) {
-    runtime.record_timing(
-        "native_tool_call",
-        started.elapsed(),
-        format!("method={method}"),
-    );
+    runtime.record_timing("native_tool_call", &started, format!("method={method}"));
 }
 
 fn expect_bool_arg(
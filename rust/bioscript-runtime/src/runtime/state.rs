@@ -1,18 +1,20 @@
 use std::{
     collections::{BTreeMap, HashMap},
     sync::{
-        Mutex,
+        Arc, Mutex,
         atomic::{AtomicU64, Ordering},
     },
     time::Duration,
 };
 
-use bioscript_core::VariantObservation;
+use bioscript_core::{ProfileCounter, ProfileCounters, VariantObservation};
 use bioscript_formats::{GenotypeLoadOptions, GenotypeStore};
 use monty::{MontyException, ResourceLimits};
 
 use bioscript_core::RuntimeError;
 
+use super::{async_calls::default_async_workers, lookup_prefetch::LookupPrefetch};
+
 #[derive(Debug, Clone)]
 pub struct RuntimeConfig {
     pub limits: ResourceLimits,
@@ -26,6 +28,9 @@ pub struct RuntimeConfig {
     /// `genotypes.lookup_variants(plan)` calls hit the cache first and only
     /// fall through to the store for novel rsids the panel didn't cover.
     pub preloaded_observations: Vec<VariantObservation>,
+    /// Worker threads for `*_async` host method calls. `0` evaluates them
+    /// inline and hands the script an already-resolved future.
+    pub async_host_workers: usize,
 }
 
 impl Default for RuntimeConfig {
@@ -43,6 +48,7 @@ impl Default for RuntimeConfig {
             virtual_binary_files: BTreeMap::new(),
             virtual_text_files: BTreeMap::new(),
             preloaded_observations: Vec::new(),
+            async_host_workers: default_async_workers(),
         }
     }
 }
@@ -51,7 +57,30 @@ impl Default for RuntimeConfig {
 pub struct StageTiming {
     pub stage: String,
     pub duration_ms: u128,
+    pub duration_us: u128,
     pub detail: String,
+    /// Stage that was open when this one was recorded, e.g. `run_file_total`.
+    pub parent: Option<String>,
+    /// Work counters reported by backends and native tools during the stage.
+    pub counters: BTreeMap<ProfileCounter, u64>,
+    /// The same counters split by the genotype backend (`text`, `vcf`,
+    /// `cram`, ...) that reported them.
+    pub backend_counters: BTreeMap<String, BTreeMap<ProfileCounter, u64>>,
+}
+
+impl StageTiming {
+    #[must_use]
+    pub fn new(stage: impl Into<String>, duration: Duration, detail: impl Into<String>) -> Self {
+        Self {
+            stage: stage.into(),
+            duration_ms: duration.as_millis(),
+            duration_us: duration.as_micros(),
+            detail: detail.into(),
+            parent: None,
+            counters: BTreeMap::new(),
+            backend_counters: BTreeMap::new(),
+        }
+    }
 }
 
 pub(crate) fn monty_error(value: MontyException) -> RuntimeError {
@@ -60,9 +89,16 @@ pub(crate) fn monty_error(value: MontyException) -> RuntimeError {
 
 pub(crate) struct RuntimeState {
     pub(crate) next_handle: AtomicU64,
-    pub(crate) genotype_files: Mutex<HashMap<u64, GenotypeStore>>,
+    /// Loaded stores by handle. Lookups clone the `Arc` out and release the
+    /// lock before querying, so concurrent async lookups don't serialize.
+    pub(crate) genotype_files: Mutex<HashMap<u64, Arc<GenotypeStore>>>,
     pub(crate) trace_lines: Mutex<Vec<usize>>,
     pub(crate) timings: Mutex<Vec<StageTiming>>,
+    /// Recorded stages whose enclosing stage is still running, as (index
+    /// into `timings`, enclosing stage's counter scope). The parent name is
+    /// filled in when the enclosing stage is recorded.
+    pub(crate) awaiting_parent: Mutex<Vec<(usize, Arc<ProfileCounters>)>>,
+    pub(crate) lookup_prefetch: Mutex<LookupPrefetch>,
     pub(crate) virtual_written_text_files: Mutex<BTreeMap<String, String>>,
     /// Real on-disk temp directory that mirrors the virtual filesystem so
     /// native tool facades (samtools/kestrel/bcftools) can operate on real
@@ -78,6 +114,8 @@ impl RuntimeState {
             genotype_files: Mutex::new(HashMap::new()),
             trace_lines: Mutex::new(Vec::new()),
             timings: Mutex::new(Vec::new()),
+            awaiting_parent: Mutex::new(Vec::new()),
+            lookup_prefetch: Mutex::new(LookupPrefetch::default()),
             virtual_written_text_files: Mutex::new(BTreeMap::new()),
             materialized_root: Mutex::new(None),
         }
@@ -86,4 +124,15 @@ impl RuntimeState {
     pub(crate) fn next_handle(&self) -> u64 {
         self.next_handle.fetch_add(1, Ordering::Relaxed)
     }
+
+    pub(crate) fn genotype_store(&self, handle: u64) -> Result<Arc<GenotypeStore>, RuntimeError> {
+        self.genotype_files
+            .lock()
+            .expect("genotype mutex poisoned")
+            .get(&handle)
+            .cloned()
+            .ok_or_else(|| {
+                RuntimeError::InvalidArguments(format!("unknown genotype handle: {handle}"))
+            })
+    }
 }
@@ -1,29 +1,76 @@
-use std::time::Duration;
+use std::{collections::BTreeMap, sync::Arc, time::Duration};
 
-#[cfg(not(target_arch = "wasm32"))]
-pub(crate) struct RuntimeInstant(std::time::Instant);
+use bioscript_core::{ProfileCounter, ProfileCounters, ProfileScope};
+
+/// Start of a profiled stage: wall clock plus the counter scope that genotype
+/// backends and native tools report into while the stage runs.
+pub(crate) struct RuntimeInstant {
+    clock: Clock,
+    counters: Arc<ProfileCounters>,
+    _scope: ProfileScope,
+}
 
-#[cfg(not(target_arch = "wasm32"))]
 impl RuntimeInstant {
     pub(crate) fn now() -> Self {
-        Self(std::time::Instant::now())
+        let counters = Arc::new(ProfileCounters::nested());
+        Self {
+            clock: Clock::now(),
+            _scope: ProfileScope::enter(Arc::clone(&counters)),
+            counters,
+        }
     }
 
     pub(crate) fn elapsed(&self) -> Duration {
+        self.clock.elapsed()
+    }
+
+    pub(crate) fn counters(&self) -> BTreeMap<ProfileCounter, u64> {
+        self.counters.snapshot()
+    }
+
+    pub(crate) fn backend_counters(&self) -> BTreeMap<String, BTreeMap<ProfileCounter, u64>> {
+        self.counters
+            .labelled_snapshot()
+            .into_iter()
+            .map(|(backend, counters)| (backend.to_owned(), counters))
+            .collect()
+    }
+
+    /// Counter scope of this stage; nested stages hold it as their parent.
+    pub(crate) fn scope(&self) -> &Arc<ProfileCounters> {
+        &self.counters
+    }
+
+    /// Counter scope of the stage that was open when this one started.
+    pub(crate) fn parent_scope(&self) -> Option<&Arc<ProfileCounters>> {
+        self.counters.parent()
+    }
+}
+
+#[cfg(not(target_arch = "wasm32"))]
+struct Clock(std::time::Instant);
+
+#[cfg(not(target_arch = "wasm32"))]
+impl Clock {
+    fn now() -> Self {
+        Self(std::time::Instant::now())
+    }
+
+    fn elapsed(&self) -> Duration {
         self.0.elapsed()
     }
 }
 
 #[cfg(target_arch = "wasm32")]
-pub(crate) struct RuntimeInstant;
+struct Clock;
 
 #[cfg(target_arch = "wasm32")]
-impl RuntimeInstant {
-    pub(crate) fn now() -> Self {
+impl Clock {
+    fn now() -> Self {
         Self
     }
 
-    pub(crate) fn elapsed(&self) -> Duration {
+    fn elapsed(&self) -> Duration {
         Duration::ZERO
     }
 }
@@ -0,0 +1,157 @@
+use std::{collections::BTreeMap, fmt::Write as _, fs, path::Path};
+
+use bioscript_core::{ProfileCounter, RuntimeError};
+
+use super::StageTiming;
+
+/// Writes a `--timing-report`. A `.json` path gets the structured stage tree
+/// (microsecond durations, parent stage, typed counters in total and per
+/// backend); any other path keeps the flat `stage\tduration_ms\tdetail` TSV.
+pub fn write_timing_report(path: &Path, timings: &[StageTiming]) -> Result<(), RuntimeError> {
+    if let Some(parent) = path.parent() {
+        fs::create_dir_all(parent).map_err(|err| {
+            RuntimeError::Io(format!(
+                "failed to create timing report dir {}: {err}",
+                parent.display()
+            ))
+        })?;
+    }
+    let is_json = path
+        .extension()
+        .is_some_and(|ext| ext.eq_ignore_ascii_case("json"));
+    let output = if is_json {
+        timing_report_json(timings)
+    } else {
+        timing_report_tsv(timings)
+    };
+    fs::write(path, output).map_err(|err| {
+        RuntimeError::Io(format!(
+            "failed to write timing report {}: {err}",
+            path.display()
+        ))
+    })
+}
+
+fn timing_report_tsv(timings: &[StageTiming]) -> String {
+    let mut output = String::from("stage\tduration_ms\tdetail\n");
+    for timing in timings {
+        let _ = writeln!(
+            output,
+            "{}\t{}\t{}",
+            timing.stage,
+            timing.duration_ms,
+            timing.detail.replace('\t', " ")
+        );
+    }
+    output
+}
+
+fn timing_report_json(timings: &[StageTiming]) -> String {
+    let stages = timings
+        .iter()
+        .map(|timing| {
+            let backends = timing
+                .backend_counters
+                .iter()
+                .map(|(backend, counters)| (backend.clone(), counters_json(counters)))
+                .collect::<serde_json::Map<_, _>>();
+            serde_json::json!({
+                "stage": timing.stage,
+                "parent": timing.parent,
+                "duration_us": u64::try_from(timing.duration_us).unwrap_or(u64::MAX),
+                "duration_ms": u64::try_from(timing.duration_ms).unwrap_or(u64::MAX),
+                "detail": timing.detail,
+                "counters": counters_json(&timing.counters),
+                "backends": backends,
+            })
+        })
+        .collect::<Vec<_>>();
+    let mut output = serde_json::to_string_pretty(&serde_json::json!({ "stages": stages }))
+        .unwrap_or_else(|_| "{}".to_owned());
+    output.push('\n');
+    output
+}
+
+fn counters_json(counters: &BTreeMap<ProfileCounter, u64>) -> serde_json::Value {
+    counters
+        .iter()
+        .map(|(counter, value)| (counter.as_str().to_owned(), serde_json::json!(value)))
+        .collect::<serde_json::Map<_, _>>()
+        .into()
+}
+
+#[cfg(test)]
+mod tests {
+    use std::{
+        path::PathBuf,
+        time::{Duration, SystemTime, UNIX_EPOCH},
+    };
+
+    use super::*;
+
+    fn temp_dir(name: &str) -> PathBuf {
+        let unique = SystemTime::now()
+            .duration_since(UNIX_EPOCH)
+            .unwrap()
+            .as_nanos();
+        let dir = std::env::temp_dir().join(format!(
+            "bioscript-runtime-timing-{name}-{}-{unique}",
+            std::process::id()
+        ));
+        fs::create_dir_all(&dir).unwrap();
+        dir
+    }
+
+    #[test]
+    fn tsv_report_creates_parent_and_sanitizes_tabs() {
+        let dir = temp_dir("tsv");
+        let path = dir.join("nested/timing.tsv");
+        write_timing_report(
+            &path,
+            &[
+                StageTiming::new("stage1", Duration::from_millis(12), "a\tb"),
+                StageTiming::new("stage2", Duration::ZERO, "ok"),
+            ],
+        )
+        .unwrap();
+        let text = fs::read_to_string(&path).unwrap();
+        assert_eq!(
+            text,
+            "stage\tduration_ms\tdetail\nstage1\t12\ta b\nstage2\t0\tok\n"
+        );
+
+        fs::remove_dir_all(dir).unwrap();
+    }
+
+    #[test]
+    fn json_report_emits_stage_tree_and_backend_counters() {
+        let dir = temp_dir("json");
+        let path = dir.join("timing.json");
+        let mut lookup =
+            StageTiming::new("lookup_variants", Duration::from_micros(1_250), "count=2");
+        lookup.parent = Some("run_file_total".to_owned());
+        lookup.counters = BTreeMap::from([
+            (ProfileCounter::LinesScanned, 40),
+            (ProfileCounter::VariantsQueried, 2),
+        ]);
+        lookup.backend_counters = BTreeMap::from([(
+            "text".to_owned(),
+            BTreeMap::from([(ProfileCounter::LinesScanned, 40)]),
+        )]);
+        write_timing_report(&path, &[lookup]).unwrap();
+
+        let text = fs::read_to_string(&path).unwrap();
+        assert!(text.ends_with("}\n"));
+        let value: serde_json::Value = serde_json::from_str(&text).unwrap();
+        let stage = &value["stages"][0];
+        assert_eq!(stage["stage"], "lookup_variants");
+        assert_eq!(stage["parent"], "run_file_total");
+        assert_eq!(stage["duration_us"], 1_250);
+        assert_eq!(stage["duration_ms"], 1);
+        assert_eq!(stage["counters"]["lines_scanned"], 40);
+        assert_eq!(stage["counters"]["variants_queried"], 2);
+        assert_eq!(stage["backends"]["text"]["lines_scanned"], 40);
+
+        fs::remove_dir_all(dir).unwrap();
+    }
+}
@@ -451,7 +451,7 @@ fn command_argv_object(
 ) -> Result<MontyObject, RuntimeError> {
     runtime.record_timing(
         "tool_command_plan",
-        started.elapsed(),
+        &started,
         format!("method={method} argv={}", argv.join(" ")),
     );
     Ok(MontyObject::List(
@@ -468,11 +468,7 @@ fn native_tool_none(
     method: &str,
     started: RuntimeInstant,
 ) -> Result<MontyObject, RuntimeError> {
-    runtime.record_timing(
-        "native_tool_call",
-        started.elapsed(),
-        format!("method={method}"),
-    );
+    runtime.record_timing("native_tool_call", &started, format!("method={method}"));
     Ok(MontyObject::None)
 }
 
@@ -0,0 +1,106 @@
+use std::{
+    fs,
+    path::PathBuf,
+    time::{SystemTime, UNIX_EPOCH},
+};
+
+use bioscript_runtime::{BioscriptRuntime, RuntimeConfig};
+use monty::MontyObject;
+
+fn temp_dir(label: &str) -> PathBuf {
+    let nanos = SystemTime::now()
+        .duration_since(UNIX_EPOCH)
+        .expect("clock drift")
+        .as_nanos();
+    let dir = std::env::temp_dir().join(format!(
+        "bioscript-runtime-async-{label}-{}-{nanos}",
+        std::process::id()
+    ));
+    fs::create_dir_all(&dir).unwrap();
+    dir
+}
+
+const GATHER_SCRIPT: &str = r#"
+import asyncio
+
+RS1 = bioscript.variant(rsid="rs1")
+RS2 = bioscript.variant(rsid="rs2")
+MISSING = bioscript.variant(rsid="rsMissing")
+
+async def main():
+    genotypes = await bioscript.load_genotypes_async(input_file)
+    values = await asyncio.gather(
+        genotypes.lookup_variant_async(RS2),
+        genotypes.lookup_variant_async(MISSING),
+        genotypes.lookup_variant_async(RS1),
+    )
+    batch = await genotypes.lookup_variants_async(bioscript.query_plan([RS1, RS2]))
+    bioscript.write_text("outputs/async.txt", str(list(values)) + "\n" + str(batch))
+
+await main()
+"#;
+
+/// Runs `GATHER_SCRIPT` with `workers` async host workers and returns the
+/// written output plus the runtime for timing checks.
+fn run_gather(label: &str, workers: usize) -> (String, BioscriptRuntime) {
+    let dir = temp_dir(label);
+    fs::write(
+        dir.join("genotypes.txt"),
+        "rsid\tchromosome\tposition\tgenotype\nrs1\t1\t10\tAG\nrs2\t1\t20\tCT\n",
+    )
+    .unwrap();
+    let script = dir.join("script.py");
+    fs::write(&script, GATHER_SCRIPT).unwrap();
+
+    let runtime = BioscriptRuntime::with_config(
+        &dir,
+        RuntimeConfig {
+            async_host_workers: workers,
+            ..RuntimeConfig::default()
+        },
+    )
+    .unwrap();
+    runtime
+        .run_file(
+            &script,
+            None,
+            vec![(
+                "input_file",
+                MontyObject::String("genotypes.txt".to_owned()),
+            )],
+        )
+        .unwrap();
+    let output = fs::read_to_string(dir.join("outputs/async.txt")).unwrap();
+    fs::remove_dir_all(dir).unwrap();
+    (output, runtime)
+}
+
+#[test]
+fn gathered_async_lookups_resolve_in_call_order() {
+    let (threaded, runtime) = run_gather("threaded", 4);
+    assert_eq!(threaded, "['CT', None, 'AG']\n['AG', 'CT']");
+
+    // Every async call still records its own stage, on whichever thread ran it.
+    let stages = runtime
+        .timing_snapshot()
+        .into_iter()
+        .map(|timing| timing.stage)
+        .collect::<Vec<_>>();
+    assert_eq!(
+        stages
+            .iter()
+            .filter(|stage| *stage == "lookup_variant")
+            .count(),
+        3
+    );
+    assert!(stages.iter().any(|stage| stage == "load_genotypes"));
+    assert!(stages.iter().any(|stage| stage == "lookup_variants"));
+}
+
+#[test]
+fn inline_async_calls_match_worker_threads() {
+    let (inline, _) = run_gather("inline", 0);
+    let (threaded, _) = run_gather("single-worker", 1);
+    assert_eq!(inline, threaded);
+    assert_eq!(inline, "['CT', None, 'AG']\n['AG', 'CT']");
+}
@@ -7,7 +7,7 @@ use std::{
     time::{Duration, SystemTime, UNIX_EPOCH},
 };
 
-use bioscript_core::GenomicLocus;
+use bioscript_core::{GenomicLocus, ProfileCounter};
 use bioscript_formats::{GenotypeLoadOptions, alignment};
 use bioscript_runtime::{BioscriptRuntime, RuntimeConfig};
 use monty::{MontyObject, ResourceLimits};
@@ -1067,6 +1067,98 @@ if __name__ == "__main__":
             .iter()
             .any(|timing| timing.stage == "lookup_variant")
     );
+    // Both module-level declarations are resolved by the first single lookup;
+    // the second is served from that batch.
+    let lookups = runtime
+        .timing_snapshot()
+        .into_iter()
+        .filter(|timing| timing.stage == "lookup_variant")
+        .collect::<Vec<_>>();
+    assert_eq!(lookups.len(), 2);
+    assert_eq!(
+        lookups[0].counters.get(&ProfileCounter::VariantsQueried),
+        Some(&2)
+    );
+    assert_eq!(
+        lookups[1].counters.get(&ProfileCounter::CacheHits),
+        Some(&1)
+    );
+    assert_eq!(
+        lookups[1].counters.get(&ProfileCounter::VariantsQueried),
+        None
+    );
+    // The batch is its own stage nested under the lookup that triggered it,
+    // and the store's counters are attributed to the text backend.
+    let timings = runtime.timing_snapshot();
+    let batch = timings
+        .iter()
+        .find(|timing| timing.stage == "prefetch_declared_variants")
+        .unwrap();
+    assert_eq!(batch.parent.as_deref(), Some("lookup_variant"));
+    assert_eq!(lookups[0].parent.as_deref(), Some("run_file_total"));
+    assert_eq!(
+        lookups[0]
+            .backend_counters
+            .get("text")
+            .and_then(|counters| counters.get(&ProfileCounter::VariantsQueried)),
+        Some(&2)
+    );
+}
+
+#[test]
+fn declared_variants_do_not_carry_over_between_runs() {
+    let dir = temp_dir("prefetch-between-runs");
+    fs::write(
+        dir.join("genotypes.txt"),
+        "rsid\tchromosome\tposition\tgenotype\nrs1\t1\t10\tAG\nrs2\t1\t20\tCT\n",
+    )
+    .unwrap();
+    let inputs = || {
+        vec![(
+            "input_file",
+            MontyObject::String("genotypes.txt".to_owned()),
+        )]
+    };
+
+    let runtime = run_script_with_inputs(
+        &dir,
+        r#"
+RS1 = bioscript.variant(rsid="rs1")
+MISSING = bioscript.variant(rsid="rsMissing")
+bioscript.load_genotypes(input_file).lookup_variant(RS1)
+"#,
+        inputs(),
+    )
+    .unwrap();
+
+    // The second run on the same runtime declares one variant, so its first
+    // lookup batches only that one, not the first run's declarations too.
+    let script = dir.join("second.py");
+    fs::write(
+        &script,
+        r#"
+RS2 = bioscript.variant(rsid="rs2")
+bioscript.write_text(
+    "outputs/second.txt",
+    str(bioscript.load_genotypes(input_file).lookup_variant(RS2)),
+)
+"#,
+    )
+    .unwrap();
+    runtime.run_file(&script, None, inputs()).unwrap();
+    assert_eq!(
+        fs::read_to_string(dir.join("outputs/second.txt")).unwrap(),
+        "CT"
+    );
+    let lookup = runtime
+        .timing_snapshot()
+        .into_iter()
+        .find(|timing| timing.stage == "lookup_variant")
+        .unwrap();
+    assert_eq!(
+        lookup.counters.get(&ProfileCounter::VariantsQueried),
+        Some(&1)
+    );
 }
 
 #[test]
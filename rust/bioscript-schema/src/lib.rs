@@ -7,8 +7,9 @@ pub use remote_resource::{
 pub use validator::{
     AssayManifest, Download, FileReport, Issue, PanelInterpretation, PanelInterpretationAsset,
     PanelInterpretationLogic, PanelInterpretationLogicSource, PanelManifest, PanelMember,
-    Permissions, Severity, ValidationReport, VariantManifest, load_assay_manifest,
+    Permissions, Severity, ValidateOptions, ValidationReport, VariantManifest, load_assay_manifest,
     load_assay_manifest_text, load_panel_manifest, load_panel_manifest_text, load_variant_manifest,
     load_variant_manifest_text, load_variant_manifest_text_for_lookup, validate_assays_path,
-    validate_panels_path, validate_variants_path,
+    validate_assays_path_with_options, validate_panels_path, validate_panels_path_with_options,
+    validate_variants_path, validate_variants_path_with_options,
 };
@@ -3,6 +3,7 @@
 // creating arbitrary numbered chunks.
 include!("validator_types.rs");
 include!("validator_load.rs");
+include!("validator_parallel.rs");
 include!("validator_roots.rs");
 include!("validator_alleles_findings.rs");
 include!("validator_catalogue.rs");
@@ -5,7 +5,7 @@
 /// Returns an error when the input path cannot be read, traversed, or parsed
 /// as YAML.
 pub fn validate_variants_path(path: &Path) -> Result<ValidationReport, String> {
-    validate_manifest_path(path, ManifestSelector::Variant)
+    validate_manifest_path(path, ManifestSelector::Variant, &ValidateOptions::default())
 }
 
 /// Validate a panel file or directory of panel files.
@@ -21,7 +21,7 @@ pub fn validate_variants_path(path: &Path) -> Result<ValidationReport, String> {
 /// Returns an error when the input path cannot be read, traversed, or parsed
 /// as YAML.
 pub fn validate_panels_path(path: &Path) -> Result<ValidationReport, String> {
-    validate_manifest_path(path, ManifestSelector::Panel)
+    validate_manifest_path(path, ManifestSelector::Panel, &ValidateOptions::default())
 }
 
 /// Validate an assay file or directory of assay files.
@@ -37,7 +37,7 @@ pub fn validate_panels_path(path: &Path) -> Result<ValidationReport, String> {
 /// Returns an error when the input path cannot be read, traversed, or parsed
 /// as YAML.
 pub fn validate_assays_path(path: &Path) -> Result<ValidationReport, String> {
-    validate_manifest_path(path, ManifestSelector::Assay)
+    validate_manifest_path(path, ManifestSelector::Assay, &ValidateOptions::default())
 }
 
 /// Load a single variant manifest from YAML.
@@ -236,28 +236,6 @@ enum ManifestSelector {
     Panel,
 }
 
-fn validate_manifest_path(
-    path: &Path,
-    selector: ManifestSelector,
-) -> Result<ValidationReport, String> {
-    let files = collect_yaml_files(path)?;
-    let mut reports = Vec::new();
-    for file in &files {
-        let report = match selector {
-            ManifestSelector::Assay => validate_assay_file(file)?,
-            ManifestSelector::Variant => validate_variant_file(file)?,
-            ManifestSelector::Panel => validate_panel_file(file)?,
-        };
-        if !report.issues.is_empty() {
-            reports.push(report);
-        }
-    }
-    Ok(ValidationReport {
-        files_scanned: files.len(),
-        reports,
-    })
-}
-
 fn collect_yaml_files(path: &Path) -> Result<Vec<PathBuf>, String> {
     if path.is_file() {
         return Ok(vec![path.to_path_buf()]);
@@ -290,101 +268,111 @@ fn collect_yaml_files_recursive(path: &Path, files: &mut Vec<PathBuf>) -> Result
     Ok(())
 }
 
-fn validate_assay_file(path: &Path) -> Result<FileReport, String> {
+fn validate_manifest_file(path: &Path, selector: ManifestSelector) -> Result<FileReport, String> {
     let value = load_yaml(path)?;
-    let Some(schema) = scalar_at(&value, &["schema"]) else {
-        return Ok(FileReport {
+    Ok(validate_manifest_value(path, &value, selector))
+}
+
+fn validate_manifest_value(path: &Path, value: &Value, selector: ManifestSelector) -> FileReport {
+    match selector {
+        ManifestSelector::Assay => validate_assay_value(path, value),
+        ManifestSelector::Variant => validate_variant_value(path, value),
+        ManifestSelector::Panel => validate_panel_value(path, value),
+    }
+}
+
+fn validate_assay_value(path: &Path, value: &Value) -> FileReport {
+    let Some(schema) = scalar_at(value, &["schema"]) else {
+        return FileReport {
             file: path.to_path_buf(),
             issues: vec![Issue {
                 severity: Severity::Error,
                 path: "schema".to_owned(),
                 message: "missing schema".to_owned(),
             }],
-        });
+        };
     };
     if !schema.contains("assay") {
-        return Ok(FileReport {
+        return FileReport {
             file: path.to_path_buf(),
             issues: Vec::new(),
-        });
+        };
     }
 
     let mut issues = Vec::new();
-    validate_assay_root(&value, &mut issues);
-    Ok(FileReport {
+    validate_assay_root(value, &mut issues);
+    FileReport {
         file: path.to_path_buf(),
         issues,
-    })
+    }
 }
 
-fn validate_variant_file(path: &Path) -> Result<FileReport, String> {
-    let value = load_yaml(path)?;
-    let Some(schema) = scalar_at(&value, &["schema"]) else {
-        return Ok(FileReport {
+fn validate_variant_value(path: &Path, value: &Value) -> FileReport {
+    let Some(schema) = scalar_at(value, &["schema"]) else {
+        return FileReport {
             file: path.to_path_buf(),
             issues: vec![Issue {
                 severity: Severity::Error,
                 path: "schema".to_owned(),
                 message: "missing schema".to_owned(),
             }],
-        });
+        };
     };
     if schema == "bioscript:variant-catalogue:1.0" {
         let mut issues = Vec::new();
-        validate_variant_catalogue_root(&value, &mut issues);
-        return Ok(FileReport {
+        validate_variant_catalogue_root(value, &mut issues);
+        return FileReport {
             file: path.to_path_buf(),
             issues,
-        });
+        };
     }
     if !schema.contains("variant") {
         if schema == "bioscript:pgx-findings:1.0" {
             let mut issues = Vec::new();
-            validate_pgx_findings_root(&value, &mut issues);
-            return Ok(FileReport {
+            validate_pgx_findings_root(value, &mut issues);
+            return FileReport {
                 file: path.to_path_buf(),
                 issues,
-            });
+            };
         }
-        return Ok(FileReport {
+        return FileReport {
             file: path.to_path_buf(),
             issues: Vec::new(),
-        });
+        };
     }
 
     let mut issues = Vec::new();
-    validate_variant_root(&value, &mut issues);
-    Ok(FileReport {
+    validate_variant_root(value, &mut issues);
+    FileReport {
         file: path.to_path_buf(),
         issues,
-    })
+    }
 }
 
-fn validate_panel_file(path: &Path) -> Result<FileReport, String> {
-    let value = load_yaml(path)?;
-    let Some(schema) = scalar_at(&value, &["schema"]) else {
-        return Ok(FileReport {
+fn validate_panel_value(path: &Path, value: &Value) -> FileReport {
+    let Some(schema) = scalar_at(value, &["schema"]) else {
+        return FileReport {
             file: path.to_path_buf(),
             issues: vec![Issue {
                 severity: Severity::Error,
                 path: "schema".to_owned(),
                 message: "missing schema".to_owned(),
             }],
-        });
+        };
     };
     if !schema.contains("panel") {
-        return Ok(FileReport {
+        return FileReport {
             file: path.to_path_buf(),
             issues: Vec::new(),
-        });
+        };
     }
 
     let mut issues = Vec::new();
-    validate_panel_root(&value, &mut issues);
-    Ok(FileReport {
+    validate_panel_root(value, &mut issues);
+    FileReport {
         file: path.to_path_buf(),
         issues,
-    })
+    }
 }
 
 #[cfg(test)]
@@ -532,13 +520,17 @@ members:
         let dir = temp_dir("files");
         let missing = dir.join("missing.yaml");
         fs::write(&missing, "name: missing\n").unwrap();
-        assert_eq!(validate_variant_file(&missing).unwrap().issues[0].path, "schema");
-        assert_eq!(validate_panel_file(&missing).unwrap().issues[0].path, "schema");
-        assert_eq!(validate_assay_file(&missing).unwrap().issues[0].path, "schema");
+        let issues = |path: &Path, selector| validate_manifest_file(path, selector).unwrap().issues;
+        assert_eq!(
+            issues(&missing, ManifestSelector::Variant)[0].path,
+            "schema"
+        );
+        assert_eq!(issues(&missing, ManifestSelector::Panel)[0].path, "schema");
+        assert_eq!(issues(&missing, ManifestSelector::Assay)[0].path, "schema");
 
         let panel = dir.join("panel.yaml");
         fs::write(&panel, "schema: bioscript:panel:1.0\n").unwrap();
-        assert!(validate_variant_file(&panel).unwrap().issues.is_empty());
+        assert!(issues(&panel, ManifestSelector::Variant).is_empty());
 
         let pgx = dir.join("pgx.yaml");
         fs::write(
@@ -550,7 +542,7 @@ findings: []
 "#,
         )
         .unwrap();
-        assert!(!validate_variant_file(&pgx).unwrap().issues.is_empty());
+        assert!(!issues(&pgx, ManifestSelector::Variant).is_empty());
 
         fs::remove_dir_all(dir).unwrap();
     }
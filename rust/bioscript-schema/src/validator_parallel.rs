@@ -0,0 +1,427 @@
+/// Options for validating a directory of manifests.
+#[derive(Debug, Clone, Default)]
+pub struct ValidateOptions {
+    /// Worker threads; `None` sizes the pool to the available cores.
+    pub threads: Option<usize>,
+    /// Directory holding the validation cache. Files whose path and content
+    /// hash were recorded as clean by this validator version are not parsed
+    /// again. Each run drops the entries under its path that it did not find
+    /// clean, so deleted, renamed and edited files do not accumulate.
+    pub cache_dir: Option<PathBuf>,
+}
+
+/// Validate a variant file or directory of variant files with `options`.
+///
+/// # Errors
+///
+/// Returns an error when the input path cannot be read, traversed, or parsed
+/// as YAML, or when the cache cannot be read or written.
+pub fn validate_variants_path_with_options(
+    path: &Path,
+    options: &ValidateOptions,
+) -> Result<ValidationReport, String> {
+    validate_manifest_path(path, ManifestSelector::Variant, options)
+}
+
+/// Validate a panel file or directory of panel files with `options`.
+///
+/// # Errors
+///
+/// Returns an error when the input path cannot be read, traversed, or parsed
+/// as YAML, or when the cache cannot be read or written.
+pub fn validate_panels_path_with_options(
+    path: &Path,
+    options: &ValidateOptions,
+) -> Result<ValidationReport, String> {
+    validate_manifest_path(path, ManifestSelector::Panel, options)
+}
+
+/// Validate an assay file or directory of assay files with `options`.
+///
+/// # Errors
+///
+/// Returns an error when the input path cannot be read, traversed, or parsed
+/// as YAML, or when the cache cannot be read or written.
+pub fn validate_assays_path_with_options(
+    path: &Path,
+    options: &ValidateOptions,
+) -> Result<ValidationReport, String> {
+    validate_manifest_path(path, ManifestSelector::Assay, options)
+}
+
+/// Cache file inside `ValidateOptions::cache_dir`: one
+/// `key<TAB>selector<TAB>path` line for every file that validated without
+/// issues, where `key` is the hex content hash and `path` is canonical.
+const VALIDATION_CACHE_FILE: &str = "bioscript-validation-cache.txt";
+
+/// Part of every cache key, so results from another validator version (or
+/// another key layout) never match.
+const VALIDATION_CACHE_VERSION: &str =
+    concat!("bioscript-schema-validation:2:", env!("CARGO_PKG_VERSION"));
+
+/// Clean files by selector name and canonical path, with their content key.
+type ValidationCache = BTreeMap<(String, PathBuf), String>;
+
+/// A clean file's cache entry: canonical path and content key.
+type CacheEntry = (PathBuf, String);
+
+/// Outcome of validating one file on a worker.
+enum FileOutcome {
+    /// Path and content key already recorded as clean in the cache.
+    Cached(CacheEntry),
+    Checked {
+        report: FileReport,
+        cache_entry: Option<CacheEntry>,
+    },
+}
+
+/// Files are handed out one at a time from a shared cursor so a slow file
+/// does not hold up a whole batch. Results are put back in file order, so the
+/// report (and the first error returned) is the same as a sequential run.
+fn validate_manifest_path(
+    path: &Path,
+    selector: ManifestSelector,
+    options: &ValidateOptions,
+) -> Result<ValidationReport, String> {
+    let files = collect_yaml_files(path)?;
+    let cache = options
+        .cache_dir
+        .as_deref()
+        .map(load_validation_cache)
+        .transpose()?;
+    let workers = options
+        .threads
+        .filter(|value| *value > 0)
+        .unwrap_or_else(|| std::thread::available_parallelism().map_or(1, usize::from))
+        .min(files.len())
+        .max(1);
+
+    let next = std::sync::atomic::AtomicUsize::new(0);
+    let validate_next = || {
+        let mut done = Vec::new();
+        loop {
+            let index = next.fetch_add(1, std::sync::atomic::Ordering::Relaxed);
+            let Some(file) = files.get(index) else {
+                break;
+            };
+            done.push((index, validate_file_cached(file, selector, cache.as_ref())));
+        }
+        done
+    };
+    let mut outcomes = std::thread::scope(|scope| {
+        let handles = (1..workers)
+            .map(|_| scope.spawn(validate_next))
+            .collect::<Vec<_>>();
+        let mut outcomes = validate_next();
+        for handle in handles {
+            outcomes.extend(handle.join().expect("validation worker panicked"));
+        }
+        outcomes
+    });
+    outcomes.sort_unstable_by_key(|(index, _)| *index);
+
+    let mut reports = Vec::new();
+    let mut clean = Vec::new();
+    for (_, outcome) in outcomes {
+        match outcome? {
+            FileOutcome::Cached(entry) => clean.push(entry),
+            FileOutcome::Checked {
+                report,
+                cache_entry,
+            } => {
+                if report.issues.is_empty() {
+                    clean.extend(cache_entry);
+                } else {
+                    reports.push(report);
+                }
+            }
+        }
+    }
+    if let (Some(cache_dir), Some(cache)) = (options.cache_dir.as_deref(), cache) {
+        let root = fs::canonicalize(path)
+            .map_err(|err| format!("failed to resolve {}: {err}", path.display()))?;
+        let pruned = prune_validation_cache(&cache, selector, &root, clean);
+        if pruned != cache {
+            store_validation_cache(cache_dir, &pruned)?;
+        }
+    }
+    Ok(ValidationReport {
+        files_scanned: files.len(),
+        reports,
+    })
+}
+
+fn validate_file_cached(
+    path: &Path,
+    selector: ManifestSelector,
+    cache: Option<&ValidationCache>,
+) -> Result<FileOutcome, String> {
+    let Some(cache) = cache else {
+        return Ok(FileOutcome::Checked {
+            report: validate_manifest_file(path, selector)?,
+            cache_entry: None,
+        });
+    };
+    let bytes =
+        fs::read(path).map_err(|err| format!("failed to read {}: {err}", path.display()))?;
+    let cache_key = validation_cache_key(selector, &bytes);
+    let canonical = fs::canonicalize(path)
+        .map_err(|err| format!("failed to resolve {}: {err}", path.display()))?;
+    let cache_slot = (selector_name(selector).to_owned(), canonical);
+    if cache.get(&cache_slot) == Some(&cache_key) {
+        return Ok(FileOutcome::Cached((cache_slot.1, cache_key)));
+    }
+    let text = String::from_utf8(bytes)
+        .map_err(|err| format!("failed to read {}: {err}", path.display()))?;
+    let value: Value = serde_yaml::from_str(&text)
+        .map_err(|err| format!("failed to parse YAML {}: {err}", path.display()))?;
+    Ok(FileOutcome::Checked {
+        report: validate_manifest_value(path, &value, selector),
+        cache_entry: Some((cache_slot.1, cache_key)),
+    })
+}
+
+fn selector_name(selector: ManifestSelector) -> &'static str {
+    match selector {
+        ManifestSelector::Assay => "assay",
+        ManifestSelector::Variant => "variant",
+        ManifestSelector::Panel => "panel",
+    }
+}
+
+/// The cache after a run over `root`: entries for other selectors or outside
+/// `root` are kept, and those inside are replaced by the files this run found
+/// clean, dropping deleted, renamed and no longer clean files.
+fn prune_validation_cache(
+    cache: &ValidationCache,
+    selector: ManifestSelector,
+    root: &Path,
+    clean: Vec<CacheEntry>,
+) -> ValidationCache {
+    let selector = selector_name(selector);
+    let mut pruned = cache
+        .iter()
+        .filter(|((name, path), _)| name != selector || !path.starts_with(root))
+        .map(|(slot, key)| (slot.clone(), key.clone()))
+        .collect::<ValidationCache>();
+    pruned.extend(
+        clean
+            .into_iter()
+            .map(|(path, key)| ((selector.to_owned(), path), key)),
+    );
+    pruned
+}
+
+fn validation_cache_key(selector: ManifestSelector, bytes: &[u8]) -> String {
+    use sha2::{Digest, Sha256};
+
+    let mut hasher = Sha256::new();
+    hasher.update(VALIDATION_CACHE_VERSION.as_bytes());
+    hasher.update([0]);
+    hasher.update(selector_name(selector).as_bytes());
+    hasher.update([0]);
+    hasher.update(bytes);
+    hasher
+        .finalize()
+        .iter()
+        .fold(String::with_capacity(64), |mut out, byte| {
+            let _ = write!(out, "{byte:02x}");
+            out
+        })
+}
+
+fn load_validation_cache(cache_dir: &Path) -> Result<ValidationCache, String> {
+    let path = cache_dir.join(VALIDATION_CACHE_FILE);
+    match fs::read_to_string(&path) {
+        Ok(text) => Ok(text
+            .lines()
+            .filter_map(|line| {
+                let mut fields = line.splitn(3, '\t');
+                let (key, selector, path) = (fields.next()?, fields.next()?, fields.next()?);
+                (key.len() == 64)
+                    .then(|| ((selector.to_owned(), PathBuf::from(path)), key.to_owned()))
+            })
+            .collect()),
+        Err(err) if err.kind() == std::io::ErrorKind::NotFound => Ok(ValidationCache::new()),
+        Err(err) => Err(format!("failed to read {}: {err}", path.display())),
+    }
+}
+
+/// Rewrite the cache through a temporary file so a concurrent or interrupted
+/// run never sees a truncated cache.
+fn store_validation_cache(cache_dir: &Path, cache: &ValidationCache) -> Result<(), String> {
+    fs::create_dir_all(cache_dir)
+        .map_err(|err| format!("failed to create {}: {err}", cache_dir.display()))?;
+    let path = cache_dir.join(VALIDATION_CACHE_FILE);
+    let temp = cache_dir.join(format!(
+        "{VALIDATION_CACHE_FILE}.{}.tmp",
+        std::process::id()
+    ));
+    let mut text = String::new();
+    for ((selector, path), key) in cache {
+        // Paths that cannot be written on one line are simply not cached.
+        if let Some(path) = path.to_str().filter(|path| !path.contains('\n')) {
+            let _ = writeln!(text, "{key}\t{selector}\t{path}");
+        }
+    }
+    fs::write(&temp, text).map_err(|err| format!("failed to write {}: {err}", temp.display()))?;
+    fs::rename(&temp, &path).map_err(|err| format!("failed to write {}: {err}", path.display()))
+}
+
+#[cfg(test)]
+mod parallel_validator_tests {
+    use super::*;
+    use std::time::{SystemTime, UNIX_EPOCH};
+
+    fn temp_dir(name: &str) -> PathBuf {
+        let unique = SystemTime::now()
+            .duration_since(UNIX_EPOCH)
+            .unwrap()
+            .as_nanos();
+        let dir = std::env::temp_dir().join(format!(
+            "bioscript-schema-parallel-{name}-{}-{unique}",
+            std::process::id()
+        ));
+        fs::create_dir_all(&dir).unwrap();
+        dir
+    }
+
+    fn variant_yaml(name: &str) -> String {
+        format!(
+            r#"
+schema: bioscript:variant:1.0
+version: "1.0"
+name: {name}
+identifiers:
+  rsids: [rs1]
+coordinates:
+  grch38:
+    chrom: "1"
+    pos: 100
+alleles:
+  kind: snv
+  ref: A
+  alts: [G]
+"#
+        )
+    }
+
+    #[test]
+    fn parallel_validation_matches_sequential_order() {
+        let dir = temp_dir("order");
+        for index in 0..40 {
+            let text = if index % 7 == 0 {
+                format!("name: missing-{index}\n")
+            } else {
+                variant_yaml(&format!("rs{index}"))
+            };
+            fs::write(dir.join(format!("v{index:02}.yaml")), text).unwrap();
+        }
+
+        let sequential = validate_variants_path_with_options(
+            &dir,
+            &ValidateOptions {
+                threads: Some(1),
+                ..ValidateOptions::default()
+            },
+        )
+        .unwrap();
+        let parallel = validate_variants_path_with_options(
+            &dir,
+            &ValidateOptions {
+                threads: Some(8),
+                ..ValidateOptions::default()
+            },
+        )
+        .unwrap();
+
+        assert_eq!(parallel, sequential);
+        assert_eq!(parallel.files_scanned, 40);
+        assert_eq!(parallel.reports.len(), 6);
+        assert!(
+            parallel
+                .reports
+                .windows(2)
+                .all(|pair| pair[0].file < pair[1].file)
+        );
+
+        fs::write(dir.join("v03.yaml"), "{").unwrap();
+        let err =
+            validate_variants_path_with_options(&dir, &ValidateOptions::default()).unwrap_err();
+        assert!(err.contains("v03.yaml"));
+
+        fs::remove_dir_all(dir).unwrap();
+    }
+
+    #[test]
+    fn validation_cache_skips_unchanged_clean_files() {
+        let dir = temp_dir("cache");
+        let manifests = dir.join("manifests");
+        fs::create_dir_all(&manifests).unwrap();
+        fs::write(manifests.join("a.yaml"), variant_yaml("a")).unwrap();
+        fs::write(manifests.join("b.yaml"), "name: missing\n").unwrap();
+        let options = ValidateOptions {
+            threads: None,
+            cache_dir: Some(dir.join("cache")),
+        };
+
+        let first = validate_variants_path_with_options(&manifests, &options).unwrap();
+        assert_eq!(first.total_errors(), 1);
+        let cache = load_validation_cache(&dir.join("cache")).unwrap();
+        let a_slot = (
+            "variant".to_owned(),
+            fs::canonicalize(manifests.join("a.yaml")).unwrap(),
+        );
+        let a_key = validation_cache_key(ManifestSelector::Variant, variant_yaml("a").as_bytes());
+        assert_eq!(cache, ValidationCache::from([(a_slot, a_key.clone())]));
+
+        // A cached key is only trusted for the same content and selector.
+        assert_ne!(
+            a_key,
+            validation_cache_key(ManifestSelector::Panel, variant_yaml("a").as_bytes())
+        );
+        let second = validate_variants_path_with_options(&manifests, &options).unwrap();
+        assert_eq!(second, first);
+
+        fs::write(manifests.join("a.yaml"), "name: now-missing\n").unwrap();
+        let third = validate_variants_path_with_options(&manifests, &options).unwrap();
+        assert_eq!(third.total_errors(), 2);
+
+        fs::remove_dir_all(dir).unwrap();
+    }
+
+    #[test]
+    fn validation_cache_drops_entries_the_run_no_longer_finds_clean() {
+        let dir = temp_dir("cache-prune");
+        let manifests = dir.join("manifests");
+        let other = dir.join("other");
+        fs::create_dir_all(&manifests).unwrap();
+        fs::create_dir_all(&other).unwrap();
+        for name in ["a", "b", "c"] {
+            fs::write(manifests.join(format!("{name}.yaml")), variant_yaml(name)).unwrap();
+        }
+        fs::write(other.join("d.yaml"), variant_yaml("d")).unwrap();
+        let options = ValidateOptions {
+            threads: Some(2),
+            cache_dir: Some(dir.join("cache")),
+        };
+        validate_variants_path_with_options(&other, &options).unwrap();
+        validate_variants_path_with_options(&manifests, &options).unwrap();
+        assert_eq!(load_validation_cache(&dir.join("cache")).unwrap().len(), 4);
+
+        // Deleted, renamed and edited files leave the cache; the run over
+        // `other` is outside this run's path and stays.
+        fs::remove_file(manifests.join("a.yaml")).unwrap();
+        fs::rename(manifests.join("b.yaml"), manifests.join("b2.yaml")).unwrap();
+        fs::write(manifests.join("c.yaml"), "name: missing\n").unwrap();
+        validate_variants_path_with_options(&manifests, &options).unwrap();
+        let names = load_validation_cache(&dir.join("cache"))
+            .unwrap()
+            .into_keys()
+            .map(|(_, path)| path.file_name().unwrap().to_string_lossy().into_owned())
+            .collect::<Vec<_>>();
+        assert_eq!(names, vec!["b2.yaml", "d.yaml"]);
+
+        fs::remove_dir_all(dir).unwrap();
+    }
+}
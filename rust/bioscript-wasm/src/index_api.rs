@@ -1,6 +1,17 @@
-use wasm_bindgen::{JsError, prelude::wasm_bindgen};
+//! Index generation for files the browser cannot index elsewhere.
+//!
+//! The `*Bytes` forms take the whole file; the `*FromReader` forms stream it
+//! through a JS `readAt(offset, length)` callback, so memory stays bounded by
+//! the reader's block cache plus the index being built. Reader forms accept
+//! an optional `onProgress(bytesRead, totalBytes)` callback; throwing from it
+//! cancels the job.
 
-use crate::js_reader::JsReader;
+use std::io;
+
+use js_sys::Function;
+use wasm_bindgen::{JsError, JsValue, prelude::wasm_bindgen};
+
+use crate::{js_reader::JsReader, progress::ProgressReader};
 
 #[wasm_bindgen(js_name = generateVcfTbi)]
 pub fn generate_vcf_tbi(input_name: &str, vcf_bytes: &[u8]) -> Result<Vec<u8>, JsError> {
@@ -8,6 +19,18 @@ pub fn generate_vcf_tbi(input_name: &str, vcf_bytes: &[u8]) -> Result<Vec<u8>, J
         .map_err(|err| JsError::new(&format!("generate tabix index for {input_name}: {err:?}")))
 }
 
+#[wasm_bindgen(js_name = generateVcfTbiFromReader)]
+pub fn generate_vcf_tbi_from_reader(
+    input_name: &str,
+    vcf_read_at: Function,
+    vcf_len: f64,
+    on_progress: Option<Function>,
+) -> Result<Vec<u8>, JsError> {
+    let reader = streaming_reader(vcf_read_at, vcf_len, "vcf-index", on_progress);
+    bioscript_formats::alignment::generate_vcf_tbi_reader(reader)
+        .map_err(|err| JsError::new(&format!("generate tabix index for {input_name}: {err:?}")))
+}
+
 #[wasm_bindgen(js_name = generateCramCrai)]
 pub fn generate_cram_crai(input_name: &str, cram_bytes: &[u8]) -> Result<Vec<u8>, JsError> {
     bioscript_formats::alignment::generate_cram_crai_bytes(cram_bytes)
@@ -17,10 +40,11 @@ pub fn generate_cram_crai(input_name: &str, cram_bytes: &[u8]) -> Result<Vec<u8>
 #[wasm_bindgen(js_name = generateCramCraiFromReader)]
 pub fn generate_cram_crai_from_reader(
     input_name: &str,
-    cram_read_at: js_sys::Function,
+    cram_read_at: Function,
     cram_len: f64,
+    on_progress: Option<Function>,
 ) -> Result<Vec<u8>, JsError> {
-    let reader = JsReader::new(cram_read_at, cram_len as u64, "cram-index");
+    let reader = streaming_reader(cram_read_at, cram_len, "cram-index", on_progress);
     bioscript_formats::alignment::generate_cram_crai_reader(reader)
         .map_err(|err| JsError::new(&format!("generate CRAI index for {input_name}: {err:?}")))
 }
@@ -34,10 +58,11 @@ pub fn generate_bam_bai(input_name: &str, bam_bytes: &[u8]) -> Result<Vec<u8>, J
 #[wasm_bindgen(js_name = generateBamBaiFromReader)]
 pub fn generate_bam_bai_from_reader(
     input_name: &str,
-    bam_read_at: js_sys::Function,
+    bam_read_at: Function,
     bam_len: f64,
+    on_progress: Option<Function>,
 ) -> Result<Vec<u8>, JsError> {
-    let reader = JsReader::new(bam_read_at, bam_len as u64, "bam-index");
+    let reader = streaming_reader(bam_read_at, bam_len, "bam-index", on_progress);
     bioscript_formats::alignment::generate_bam_bai_reader(reader)
         .map_err(|err| JsError::new(&format!("generate BAI index for {input_name}: {err:?}")))
 }
@@ -51,10 +76,38 @@ pub fn generate_fasta_fai(input_name: &str, fasta_bytes: &[u8]) -> Result<Vec<u8
 #[wasm_bindgen(js_name = generateFastaFaiFromReader)]
 pub fn generate_fasta_fai_from_reader(
     input_name: &str,
-    fasta_read_at: js_sys::Function,
+    fasta_read_at: Function,
     fasta_len: f64,
+    on_progress: Option<Function>,
 ) -> Result<Vec<u8>, JsError> {
-    let reader = JsReader::new(fasta_read_at, fasta_len as u64, "fasta-index");
+    let reader = streaming_reader(fasta_read_at, fasta_len, "fasta-index", on_progress);
     bioscript_formats::alignment::generate_fasta_fai_reader(reader)
         .map_err(|err| JsError::new(&format!("generate FAI index for {input_name}: {err:?}")))
 }
+
+/// A block-cached `JsReader` that reports progress to `on_progress`, if any.
+fn streaming_reader(
+    read_at: Function,
+    len: f64,
+    label: &'static str,
+    on_progress: Option<Function>,
+) -> ProgressReader<JsReader, impl FnMut(u64, u64) -> io::Result<()>> {
+    let total = len as u64;
+    ProgressReader::new(
+        JsReader::new(read_at, total, label),
+        total,
+        move |done, total| {
+            let Some(callback) = on_progress.as_ref() else {
+                return Ok(());
+            };
+            callback
+                .call2(
+                    &JsValue::NULL,
+                    &JsValue::from_f64(done as f64),
+                    &JsValue::from_f64(total as f64),
+                )
+                .map(|_| ())
+                .map_err(|err| io::Error::other(format!("{label} onProgress threw: {err:?}")))
+        },
+    )
+}
@@ -35,6 +35,7 @@ pub fn inspect_bytes(
         reference_file: options_js.reference_file.map(PathBuf::from),
         reference_index: options_js.reference_index.map(PathBuf::from),
         detect_sex: options_js.detect_sex,
+        ..InspectOptions::default()
     };
 
     let inspection = inspect_bytes_rs(name, bytes, &options)
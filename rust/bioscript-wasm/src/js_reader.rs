@@ -2,34 +2,54 @@
 //! callback. The host JS (Node or browser) owns the file handle; we ask for
 //! byte ranges on demand so a 20 GB CRAM never needs to load into memory.
 //!
-//! On wasm32-unknown-unknown there are no real threads, so the `Send + Sync`
-//! unsafe impls below are sound — `fasta::Repository` requires them for its
+//! On wasm32-unknown-unknown there are no real threads (a Web Worker pool
+//! runs a separate module instance per worker, see `lookup_shards`), so the
+//! `Send + Sync` unsafe impls below are sound — `fasta::Repository` requires them for its
 //! `Arc<RwLock<dyn Adapter + Send + Sync>>` cache.
 
 use std::io::{self, Read, Seek, SeekFrom};
 
+use bioscript_formats::alignment::BlockCacheReader;
 use js_sys::{Function, Uint8Array};
 use wasm_bindgen::JsValue;
 
+/// Block size for `readAt` fetches. Every call crosses the wasm boundary and
+/// copies a `Uint8Array`, so blocks are larger than for local files.
+const BLOCK_SIZE: usize = 256 * 1024;
+/// Cached bytes per reader (32 blocks).
+const CACHE_BYTES: usize = 8 * 1024 * 1024;
+
+/// `Read + Seek` over a JS `readAt` callback. Reads go through the shared
+/// alignment `BlockCacheReader`, so noodles' small reads cost one JS call per
+/// 256 KiB block (with read-ahead on sequential scans) instead of one per
+/// `Read::read`.
 pub struct JsReader {
-    read_at: Function,
-    length: u64,
-    position: u64,
-    label: String,
+    blocks: BlockCacheReader<JsReadAt>,
 }
 
 impl JsReader {
     pub fn new(read_at: Function, length: u64, label: impl Into<String>) -> Self {
-        Self {
+        let source = JsReadAt {
             read_at,
             length,
             position: 0,
             label: label.into(),
+        };
+        Self {
+            blocks: BlockCacheReader::with_block_size(source, length, CACHE_BYTES, BLOCK_SIZE),
         }
     }
 }
 
-impl Read for JsReader {
+/// Uncached reads: one `readAt` call per `Read::read`.
+struct JsReadAt {
+    read_at: Function,
+    length: u64,
+    position: u64,
+    label: String,
+}
+
+impl Read for JsReadAt {
     fn read(&mut self, buf: &mut [u8]) -> io::Result<usize> {
         if buf.is_empty() || self.position >= self.length {
             return Ok(0);
@@ -71,24 +91,35 @@ impl Read for JsReader {
     }
 }
 
-impl Seek for JsReader {
+impl Seek for JsReadAt {
     fn seek(&mut self, pos: SeekFrom) -> io::Result<u64> {
         let new_pos = match pos {
-            SeekFrom::Start(n) => n as i128,
-            SeekFrom::End(n) => self.length as i128 + n as i128,
-            SeekFrom::Current(n) => self.position as i128 + n as i128,
+            SeekFrom::Start(n) => i128::from(n),
+            SeekFrom::End(n) => i128::from(self.length) + i128::from(n),
+            SeekFrom::Current(n) => i128::from(self.position) + i128::from(n),
         };
-        if new_pos < 0 {
-            return Err(io::Error::new(
+        self.position = u64::try_from(new_pos).map_err(|_| {
+            io::Error::new(
                 io::ErrorKind::InvalidInput,
                 format!("{} seek before start of stream", self.label),
-            ));
-        }
-        self.position = new_pos as u64;
+            )
+        })?;
         Ok(self.position)
     }
 }
 
+impl Read for JsReader {
+    fn read(&mut self, buf: &mut [u8]) -> io::Result<usize> {
+        self.blocks.read(buf)
+    }
+}
+
+impl Seek for JsReader {
+    fn seek(&mut self, pos: SeekFrom) -> io::Result<u64> {
+        self.blocks.seek(pos)
+    }
+}
+
 // SAFETY: wasm32-unknown-unknown is single-threaded. `JsValue`/`Function` are
 // `!Send + !Sync` in the general case because shared access from multiple OS
 // threads would race, but under single-threaded wasm that scenario can't
@@ -7,6 +7,12 @@
 //! - `lookupCramVariants(cramReadAt, cramLen, craiBytes, fastaReadAt, fastaLen,
 //!   faiBytes, variantsJson)` — SNP lookups against an indexed CRAM + FASTA
 //!   through JS-supplied random-read callbacks.
+//! - `partitionVariants(variantsJson, shardCount)` /
+//!   `mergeVariantObservations(shardsJson, variantCount)` — split a panel into
+//!   region shards for a Web Worker pool and merge the per-worker lookups in
+//!   order.
+//! - `generate{VcfTbi,CramCrai,BamBai,FastaFai}FromReader(name, readAt, len,
+//!   onProgress?)` — build an index by streaming the file through `readAt`.
 //!
 //! Pending (see migration checklist in the architecture doc):
 //! - `loadGenotypesBytes(name, bytes)` / `lookupVariants(storeId, planJson)`
@@ -18,20 +24,23 @@ mod index_api;
 mod inspect_api;
 mod js_reader;
 mod lookup_api;
+mod lookup_shards;
 mod package_api;
+mod progress;
 mod report_api;
 mod variant_yaml;
 
 pub use index_api::{
     generate_bam_bai, generate_bam_bai_from_reader, generate_cram_crai,
     generate_cram_crai_from_reader, generate_fasta_fai, generate_fasta_fai_from_reader,
-    generate_vcf_tbi,
+    generate_vcf_tbi, generate_vcf_tbi_from_reader,
 };
 pub use inspect_api::{inspect_bytes, resolve_remote_resource_text};
 pub use lookup_api::{
     lookup_cram_variants, lookup_genotype_bytes_rsids, lookup_genotype_bytes_variants,
     lookup_vcf_variants,
 };
+pub use lookup_shards::{merge_variant_observations, partition_variants};
 pub use package_api::{
     resolve_package_release_text, resolve_package_zip_bytes, verify_package_artifact_sha256,
 };
@@ -2,7 +2,7 @@ use std::io::BufReader;
 
 use bioscript_core::{GenomicLocus, VariantKind, VariantObservation, VariantSpec};
 use bioscript_formats::{
-    GenotypeStore, alignment, observe_bam_variant, observe_cram_deletion_with_reader,
+    GenotypeStore, alignment, observe_bam_variants, observe_cram_deletion_with_reader,
     observe_cram_indel_with_reader, observe_cram_snp_with_reader, observe_vcf_snp_with_reader,
 };
 use noodles::csi as noodles_csi;
@@ -183,14 +183,20 @@ pub fn lookup_bam_variants(
     let mut indexed = alignment::build_bam_indexed_reader_from_reader(bam_reader, bai_index)
         .map_err(|err| JsError::new(&format!("build bam reader: {err:?}")))?;
 
+    // One sweep for the whole panel: nearby variants share their region
+    // query and every overlapping read is decoded once.
     let variants = parse_variants_json(variants_json)?;
-    let mut results = Vec::with_capacity(variants.len());
-    for variant in variants {
-        let spec = variant_input_to_spec(&variant)?;
-        let observation = observe_bam_variant(&mut indexed, "bam", &spec)
-            .map_err(|err| JsError::new(&format!("bam lookup {}: {err:?}", variant.name)))?;
-        results.push(observation_to_js(variant, observation));
-    }
+    let specs = variants
+        .iter()
+        .map(variant_input_to_spec)
+        .collect::<Result<Vec<_>, _>>()?;
+    let observations = observe_bam_variants(&mut indexed, "bam", &specs)
+        .map_err(|err| JsError::new(&format!("bam lookup: {err:?}")))?;
+    let results = variants
+        .into_iter()
+        .zip(observations)
+        .map(|(variant, observation)| observation_to_js(variant, observation))
+        .collect::<Vec<_>>();
 
     serde_json::to_string(&results).map_err(|err| JsError::new(&format!("encode results: {err}")))
 }
@@ -0,0 +1,290 @@
+//! Region shards for running one panel lookup on several Web Workers.
+//!
+//! A wasm instance is single-threaded, so parallel lookups run one module
+//! instance per worker. `partitionVariants` splits a `variantsJson` panel into
+//! shards of nearby variants; the host posts each shard's `variants` to a
+//! worker that calls the usual `lookupCramVariants` / `lookupBamVariants` /
+//! `lookupVcfVariants`, then hands the shards with their `observations` to
+//! `mergeVariantObservations` with the panel length to get one result array in
+//! panel order.
+//!
+//! Only the lookup entry points are sharded. `runPackageReportFromCram` and
+//! the other report entry points still run a whole report in one instance.
+
+use serde::{Deserialize, Serialize};
+use serde_json::Value;
+use wasm_bindgen::prelude::*;
+
+/// Variants on one contig at most this many bases apart stay in one shard,
+/// so the worker reads their shared container or BGZF blocks once.
+const SHARD_MERGE_GAP: i64 = 1_000;
+
+#[derive(Deserialize)]
+struct VariantLocusInput {
+    chrom: String,
+    #[serde(default)]
+    pos: Option<i64>,
+    #[serde(default)]
+    start: Option<i64>,
+    #[serde(default)]
+    end: Option<i64>,
+}
+
+#[derive(Debug, Serialize)]
+struct ShardJs {
+    shard: usize,
+    /// Positions of `variants` in the input panel.
+    indices: Vec<usize>,
+    variants: Vec<Value>,
+}
+
+#[derive(Deserialize)]
+struct ShardResultJs {
+    indices: Vec<usize>,
+    observations: Vec<Value>,
+}
+
+/// Split `variantsJson` into at most `shardCount` region shards of similar
+/// size. Returns `[{shard, indices, variants}]`; shards with no variants are
+/// omitted.
+#[wasm_bindgen(js_name = partitionVariants)]
+pub fn partition_variants(variants_json: &str, shard_count: usize) -> Result<String, JsError> {
+    let shards =
+        partition_variants_value(variants_json, shard_count).map_err(|err| JsError::new(&err))?;
+    serde_json::to_string(&shards).map_err(|err| JsError::new(&format!("encode shards: {err}")))
+}
+
+/// Combine per-shard results (`[{indices, observations}]`, any order) into
+/// one observation array in the original panel order. `variantCount` is the
+/// length of the partitioned panel; every variant must come back from exactly
+/// one shard, so a lost or unanswered shard is an error rather than a shorter
+/// result.
+#[wasm_bindgen(js_name = mergeVariantObservations)]
+pub fn merge_variant_observations(
+    shards_json: &str,
+    variant_count: usize,
+) -> Result<String, JsError> {
+    let merged = merge_variant_observations_value(shards_json, variant_count)
+        .map_err(|err| JsError::new(&err))?;
+    serde_json::to_string(&merged).map_err(|err| JsError::new(&format!("encode results: {err}")))
+}
+
+fn partition_variants_value(
+    variants_json: &str,
+    shard_count: usize,
+) -> Result<Vec<ShardJs>, String> {
+    let variants: Vec<Value> =
+        serde_json::from_str(variants_json).map_err(|err| format!("parse variantsJson: {err}"))?;
+    let mut loci = Vec::with_capacity(variants.len());
+    for (index, variant) in variants.iter().enumerate() {
+        let locus = VariantLocusInput::deserialize(variant)
+            .map_err(|err| format!("parse variantsJson[{index}]: {err}"))?;
+        let start = locus
+            .start
+            .or(locus.pos)
+            .ok_or_else(|| format!("variantsJson[{index}]: start/pos missing"))?;
+        let chrom = locus.chrom.trim_start_matches("chr").to_ascii_lowercase();
+        loci.push((chrom, start, locus.end.unwrap_or(start).max(start)));
+    }
+
+    let mut variants = variants.into_iter().map(Some).collect::<Vec<_>>();
+    Ok(shard_indices(&loci, shard_count)
+        .into_iter()
+        .enumerate()
+        .map(|(shard, indices)| ShardJs {
+            shard,
+            variants: indices
+                .iter()
+                .map(|index| variants[*index].take().unwrap_or(Value::Null))
+                .collect(),
+            indices,
+        })
+        .collect())
+}
+
+/// Group `(chrom, start, end)` loci into at most `shard_count` shards.
+///
+/// Loci are sorted by contig and position and chained into clusters within
+/// `SHARD_MERGE_GAP`; contiguous runs of clusters are then cut into shards of
+/// roughly equal variant counts, never splitting a cluster.
+fn shard_indices(loci: &[(String, i64, i64)], shard_count: usize) -> Vec<Vec<usize>> {
+    let mut order = (0..loci.len()).collect::<Vec<_>>();
+    order.sort_by(|left, right| loci[*left].cmp(&loci[*right]));
+
+    let mut clusters: Vec<Vec<usize>> = Vec::new();
+    let mut cluster_end = i64::MIN;
+    for index in order {
+        let (chrom, start, end) = &loci[index];
+        let joins = clusters
+            .last()
+            .and_then(|cluster| cluster.last())
+            .is_some_and(|last| {
+                loci[*last].0 == *chrom && *start <= cluster_end.saturating_add(SHARD_MERGE_GAP)
+            });
+        if joins && let Some(cluster) = clusters.last_mut() {
+            cluster_end = cluster_end.max(*end);
+            cluster.push(index);
+        } else {
+            cluster_end = *end;
+            clusters.push(vec![index]);
+        }
+    }
+
+    let shard_count = shard_count.max(1);
+    let target = loci.len().div_ceil(shard_count).max(1);
+    let mut shards: Vec<Vec<usize>> = Vec::with_capacity(shard_count.min(clusters.len()));
+    let mut current = Vec::new();
+    for cluster in clusters {
+        current.extend(cluster);
+        if current.len() >= target && shards.len() + 1 < shard_count {
+            shards.push(std::mem::take(&mut current));
+        }
+    }
+    if !current.is_empty() {
+        shards.push(current);
+    }
+    shards
+}
+
+fn merge_variant_observations_value(
+    shards_json: &str,
+    variant_count: usize,
+) -> Result<Vec<Value>, String> {
+    let shards: Vec<ShardResultJs> =
+        serde_json::from_str(shards_json).map_err(|err| format!("parse shardsJson: {err}"))?;
+    let mut merged: Vec<Option<Value>> = vec![None; variant_count];
+    for shard in shards {
+        if shard.indices.len() != shard.observations.len() {
+            return Err(format!(
+                "shard has {} indices but {} observations",
+                shard.indices.len(),
+                shard.observations.len()
+            ));
+        }
+        for (index, observation) in shard.indices.into_iter().zip(shard.observations) {
+            let slot = merged.get_mut(index).ok_or_else(|| {
+                format!("shard index {index} is outside the {variant_count} variants")
+            })?;
+            if slot.replace(observation).is_some() {
+                return Err(format!(
+                    "variant index {index} appears in more than one shard"
+                ));
+            }
+        }
+    }
+    if let Some(index) = merged.iter().position(Option::is_none) {
+        let missing = merged.iter().filter(|slot| slot.is_none()).count();
+        return Err(format!(
+            "{missing} of {variant_count} variants have no shard result (first missing index {index})"
+        ));
+    }
+    Ok(merged.into_iter().flatten().collect())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn variant(name: &str, chrom: &str, pos: i64) -> Value {
+        serde_json::json!({"name": name, "chrom": chrom, "pos": pos, "ref": "A", "alt": "G"})
+    }
+
+    #[test]
+    fn shards_keep_nearby_variants_together_and_balance_counts() {
+        let loci = [
+            ("1".to_owned(), 5_000, 5_000),
+            ("1".to_owned(), 100, 100),
+            ("2".to_owned(), 100, 100),
+            ("1".to_owned(), 600, 600),
+            ("1".to_owned(), 90_000, 90_000),
+            ("2".to_owned(), 50_000, 50_000),
+        ];
+        assert_eq!(
+            shard_indices(&loci, 3),
+            vec![vec![1, 3], vec![0, 4], vec![2, 5]]
+        );
+        assert_eq!(shard_indices(&loci, 1), vec![vec![1, 3, 0, 4, 2, 5]]);
+        assert_eq!(shard_indices(&loci, 20).len(), 5);
+        assert!(shard_indices(&[], 4).is_empty());
+    }
+
+    #[test]
+    fn partition_and_merge_round_trip_in_panel_order() {
+        let panel = Value::Array(vec![
+            variant("a", "chr2", 500),
+            variant("b", "chr1", 10),
+            variant("c", "1", 20),
+            variant("d", "chr2", 900_000),
+        ]);
+        let shards = partition_variants_value(&panel.to_string(), 2).unwrap();
+        assert_eq!(shards.len(), 2);
+        assert_eq!(shards[0].indices, vec![1, 2]);
+        assert_eq!(shards[0].variants[0]["name"], "b");
+
+        // Workers answer in any order; each observation echoes its variant name.
+        let results = shards
+            .iter()
+            .rev()
+            .map(|shard| {
+                serde_json::json!({
+                    "indices": shard.indices,
+                    "observations": shard
+                        .variants
+                        .iter()
+                        .map(|variant| serde_json::json!({"name": variant["name"]}))
+                        .collect::<Vec<_>>(),
+                })
+            })
+            .collect::<Vec<_>>();
+        let merged =
+            merge_variant_observations_value(&Value::Array(results.clone()).to_string(), 4)
+                .unwrap();
+        let names = merged
+            .iter()
+            .map(|observation| observation["name"].as_str().unwrap())
+            .collect::<Vec<_>>();
+        assert_eq!(names, vec!["a", "b", "c", "d"]);
+
+        // A worker that never answers must not yield a silently shorter panel.
+        let partial = Value::Array(results[1..].to_vec()).to_string();
+        assert_eq!(
+            merge_variant_observations_value(&partial, 4).unwrap_err(),
+            "2 of 4 variants have no shard result (first missing index 0)"
+        );
+    }
+
+    #[test]
+    fn merge_rejects_inconsistent_shards() {
+        let duplicate =
+            r#"[{"indices":[0],"observations":[{}]},{"indices":[0],"observations":[{}]}]"#;
+        assert!(
+            merge_variant_observations_value(duplicate, 1)
+                .unwrap_err()
+                .contains("more than one shard")
+        );
+        let short = r#"[{"indices":[0,1],"observations":[{}]}]"#;
+        assert!(
+            merge_variant_observations_value(short, 2)
+                .unwrap_err()
+                .contains("2 indices but 1 observations")
+        );
+        let trailing = r#"[{"indices":[1,0],"observations":[{},{}]}]"#;
+        assert!(
+            merge_variant_observations_value(trailing, 3)
+                .unwrap_err()
+                .contains("first missing index 2")
+        );
+        let outside = r#"[{"indices":[3],"observations":[{}]}]"#;
+        assert!(
+            merge_variant_observations_value(outside, 1)
+                .unwrap_err()
+                .contains("outside")
+        );
+        let missing = r#"[{"chrom":"1"}]"#;
+        assert!(
+            partition_variants_value(missing, 2)
+                .unwrap_err()
+                .contains("start/pos missing")
+        );
+    }
+}
@@ -0,0 +1,133 @@
+//! Byte-count progress for long sequential jobs such as index generation.
+//!
+//! `ProgressReader` wraps the input stream and reports how far into it the
+//! job has read. Progress is the furthest offset reached, so the short
+//! backward seeks noodles makes while decoding never move it backwards.
+
+use std::io::{self, Read, Seek, SeekFrom};
+
+/// Report at most once per this many bytes read.
+const PROGRESS_STEP: u64 = 8 * 1024 * 1024;
+
+pub(crate) struct ProgressReader<R, F> {
+    inner: R,
+    total: u64,
+    position: u64,
+    furthest: u64,
+    next_report: u64,
+    step: u64,
+    finished: bool,
+    on_progress: F,
+}
+
+impl<R, F> ProgressReader<R, F>
+where
+    F: FnMut(u64, u64) -> io::Result<()>,
+{
+    /// Wrap `inner` (`total` bytes long). `on_progress(bytesRead, total)` is
+    /// called every `PROGRESS_STEP` bytes and once at end of data; an error
+    /// from it fails the read, which lets the host cancel the job.
+    pub(crate) fn new(inner: R, total: u64, on_progress: F) -> Self {
+        Self::with_step(inner, total, PROGRESS_STEP, on_progress)
+    }
+
+    fn with_step(inner: R, total: u64, step: u64, on_progress: F) -> Self {
+        let step = step.max(1);
+        Self {
+            inner,
+            total,
+            position: 0,
+            furthest: 0,
+            next_report: step,
+            step,
+            finished: false,
+            on_progress,
+        }
+    }
+
+    fn advance(&mut self, read: usize, at_end: bool) -> io::Result<()> {
+        self.position += read as u64;
+        self.furthest = self.furthest.max(self.position);
+        if at_end && !self.finished {
+            self.finished = true;
+            return (self.on_progress)(self.furthest, self.total);
+        }
+        if self.furthest >= self.next_report {
+            self.next_report = self.furthest + self.step;
+            return (self.on_progress)(self.furthest, self.total);
+        }
+        Ok(())
+    }
+}
+
+impl<R, F> Read for ProgressReader<R, F>
+where
+    R: Read,
+    F: FnMut(u64, u64) -> io::Result<()>,
+{
+    fn read(&mut self, buf: &mut [u8]) -> io::Result<usize> {
+        let read = self.inner.read(buf)?;
+        self.advance(read, read == 0 && !buf.is_empty())?;
+        Ok(read)
+    }
+}
+
+impl<R, F> Seek for ProgressReader<R, F>
+where
+    R: Seek,
+{
+    fn seek(&mut self, pos: SeekFrom) -> io::Result<u64> {
+        self.position = self.inner.seek(pos)?;
+        Ok(self.position)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::io::Cursor;
+
+    use super::*;
+
+    #[test]
+    fn reports_each_step_and_once_at_end() {
+        let mut reports = Vec::new();
+        let mut reader =
+            ProgressReader::with_step(Cursor::new(vec![0u8; 25]), 25, 10, |done, total| {
+                reports.push((done, total));
+                Ok(())
+            });
+        let mut buf = [0u8; 4];
+        while reader.read(&mut buf).unwrap() != 0 {}
+        assert_eq!(reader.read(&mut buf).unwrap(), 0);
+        drop(reader);
+        assert_eq!(reports, vec![(12, 25), (24, 25), (25, 25)]);
+    }
+
+    #[test]
+    fn backward_seeks_do_not_rewind_progress() {
+        let mut reports = Vec::new();
+        let mut reader =
+            ProgressReader::with_step(Cursor::new(vec![0u8; 30]), 30, 10, |done, _| {
+                reports.push(done);
+                Ok(())
+            });
+        let mut buf = [0u8; 12];
+        reader.read_exact(&mut buf).unwrap();
+        reader.seek(SeekFrom::Start(2)).unwrap();
+        reader.read_exact(&mut buf).unwrap();
+        reader.seek(SeekFrom::Current(6)).unwrap();
+        reader.read_exact(&mut buf[..2]).unwrap();
+        drop(reader);
+        assert_eq!(reports, vec![12, 22]);
+    }
+
+    #[test]
+    fn callback_errors_cancel_the_read() {
+        let mut reader = ProgressReader::with_step(Cursor::new(vec![0u8; 8]), 8, 4, |_, _| {
+            Err(io::Error::other("cancelled"))
+        });
+        let mut buf = [0u8; 8];
+        let err = reader.read(&mut buf).unwrap_err();
+        assert_eq!(err.to_string(), "cancelled");
+    }
+}
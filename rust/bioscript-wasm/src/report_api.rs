@@ -1,6 +1,7 @@
 use std::{
     collections::BTreeMap,
     path::{Path, PathBuf},
+    sync::Arc,
     time::Duration,
 };
 
@@ -8,11 +9,11 @@ use bioscript_core::{
     Assembly, GenomicLocus, RuntimeError, VariantKind, VariantObservation, VariantSpec,
 };
 use bioscript_formats::{
-    GenotypeLoadOptions, GenotypeStore, InspectOptions, SexInference,
-    inspect_bytes as inspect_bytes_rs,
+    GenotypeLoadOptions, GenotypeStore, InspectOptions, inspect_bytes as inspect_bytes_rs,
 };
+use bioscript_reporting::{ReportPlan, ReportPlanCache};
 use bioscript_runtime::{BioscriptRuntime, RuntimeConfig};
-use bioscript_schema::{PanelInterpretation, VariantManifest, load_variant_manifest_text};
+use bioscript_schema::PanelInterpretation;
 use monty::{MontyObject, ResourceLimits};
 use serde::{Deserialize, Serialize};
 use wasm_bindgen::prelude::*;
@@ -34,6 +35,22 @@ use report_input_inspection::{
 use report_lookup::{BamReportLookup, CramReportLookup, VcfReportLookup};
 use report_workspace::PackageWorkspace;
 
+thread_local! {
+    static REPORT_PLANS: ReportPlanCache = ReportPlanCache::default();
+}
+
+/// Compiled report plan for `manifest_path`, reused across calls on this
+/// instance while the package files it was built from are unchanged.
+fn report_plan(
+    workspace: &PackageWorkspace,
+    manifest_path: &str,
+    filters: &[String],
+) -> Result<Arc<ReportPlan>, JsError> {
+    REPORT_PLANS
+        .with(|plans| plans.plan(workspace, manifest_path, filters))
+        .map_err(|err| JsError::new(&err))
+}
+
 #[derive(Deserialize)]
 #[serde(rename_all = "camelCase")]
 pub(super) struct PackageFileInput {
@@ -76,6 +93,7 @@ impl ReportOptionsInput {
             reference_file: self.reference_file_path.as_ref().map(PathBuf::from),
             reference_index: self.reference_index_path.as_ref().map(PathBuf::from),
             detect_sex,
+            ..InspectOptions::default()
         }
     }
 }
@@ -137,9 +155,9 @@ pub fn run_package_report_bytes(
         loader: &loader,
         options: &options,
     };
-    let run = bioscript_reporting::run_report(
-        &workspace,
-        manifest_path,
+    let plan = report_plan(&workspace, manifest_path, &options.filters)?;
+    let run = bioscript_reporting::run_report_with_plan(
+        &plan,
         &store,
         &analysis_runner,
         bioscript_reporting::ReportInputContext {
@@ -148,9 +166,6 @@ pub fn run_package_report_bytes(
             input_file_path,
             input_inspection: Some(&input_inspection),
         },
-        bioscript_reporting::ReportRunOptions {
-            filters: &options.filters,
-        },
     )
     .map_err(|err| JsError::new(&err))?;
     encode_report_run_output(started_ms, run.artifacts)
@@ -165,6 +180,11 @@ pub fn run_package_report_bytes(
 /// per-script Python interpreter still receives `input_bytes` as a virtual
 /// file; for CRAM that's an empty buffer because typical PGx analysis scripts
 /// (apoe, mthfr, apol1, …) read observation rows rather than raw genome bytes.
+///
+/// The report runs in a single module instance and is not region-sharded:
+/// sex detection, the panel lookup and the analyses all share one indexed
+/// reader. Hosts that want a Web Worker pool for the lookup itself use
+/// `partitionVariants` / `lookupCramVariants` / `mergeVariantObservations`.
 #[wasm_bindgen(js_name = runPackageReportFromCram)]
 #[allow(clippy::too_many_arguments)]
 pub fn run_package_report_from_cram(
@@ -255,9 +275,9 @@ pub fn run_package_report_from_cram(
         loader: &loader,
         options: &options,
     };
-    let run = bioscript_reporting::run_report(
-        &workspace,
-        manifest_path,
+    let plan = report_plan(&workspace, manifest_path, &options.filters)?;
+    let run = bioscript_reporting::run_report_with_plan(
+        &plan,
         &lookup,
         &analysis_runner,
         bioscript_reporting::ReportInputContext {
@@ -266,9 +286,6 @@ pub fn run_package_report_from_cram(
             input_file_path,
             input_inspection: Some(&head_inspection),
         },
-        bioscript_reporting::ReportRunOptions {
-            filters: &options.filters,
-        },
     )
     .map_err(|err| JsError::new(&err))?;
     encode_report_run_output(started_ms, run.artifacts)
@@ -335,9 +352,9 @@ pub fn run_package_report_from_bam(
         loader: &loader,
         options: &options,
     };
-    let run = bioscript_reporting::run_report(
-        &workspace,
-        manifest_path,
+    let plan = report_plan(&workspace, manifest_path, &options.filters)?;
+    let run = bioscript_reporting::run_report_with_plan(
+        &plan,
         &lookup,
         &analysis_runner,
         bioscript_reporting::ReportInputContext {
@@ -346,9 +363,6 @@ pub fn run_package_report_from_bam(
             input_file_path,
             input_inspection: Some(&head_inspection),
         },
-        bioscript_reporting::ReportRunOptions {
-            filters: &options.filters,
-        },
     )
     .map_err(|err| JsError::new(&err))?;
     encode_report_run_output(started_ms, run.artifacts)
@@ -424,9 +438,9 @@ pub fn run_package_report_from_vcf(
         loader: &loader,
         options: &options,
     };
-    let run = bioscript_reporting::run_report(
-        &workspace,
-        manifest_path,
+    let plan = report_plan(&workspace, manifest_path, &options.filters)?;
+    let run = bioscript_reporting::run_report_with_plan(
+        &plan,
         &lookup,
         &analysis_runner,
         bioscript_reporting::ReportInputContext {
@@ -435,9 +449,6 @@ pub fn run_package_report_from_vcf(
             input_file_path,
             input_inspection: Some(&head_inspection),
         },
-        bioscript_reporting::ReportRunOptions {
-            filters: &options.filters,
-        },
     )
     .map_err(|err| JsError::new(&err))?;
     encode_report_run_output(started_ms, run.artifacts)
@@ -65,82 +65,6 @@ pub(super) fn parse_analysis_output_text(
     bioscript_reporting::parse_analysis_output_text(text, format).map_err(|err| JsError::new(&err))
 }
 
-pub(super) fn yaml_string(value: &serde_yaml::Value, key: &str) -> Option<String> {
-    value
-        .get(key)
-        .and_then(serde_yaml::Value::as_str)
-        .map(ToOwned::to_owned)
-}
-
-pub(super) fn variant_primary_source_from_yaml(value: &serde_yaml::Value) -> serde_json::Value {
-    let mut links = BTreeMap::<String, serde_json::Value>::new();
-    let _ = bioscript_reporting::collect_manifest_provenance_entries(value, &mut links);
-    if let Some(source) = links
-        .values()
-        .find(|source| source_url_contains(source, "ncbi.nlm.nih.gov/snp/rs"))
-    {
-        return source.clone();
-    }
-    if let Some(rsid) = value
-        .get("identifiers")
-        .and_then(|identifiers| identifiers.get("rsids"))
-        .and_then(serde_yaml::Value::as_sequence)
-        .and_then(|items| items.iter().find_map(serde_yaml::Value::as_str))
-    {
-        return serde_json::json!({
-            "kind": "database",
-            "label": "dbSNP / NCBI SNP",
-            "url": format!("https://www.ncbi.nlm.nih.gov/snp/{rsid}"),
-            "fields": ["identifiers.rsids"],
-        });
-    }
-    links
-        .into_values()
-        .next()
-        .unwrap_or(serde_json::Value::Null)
-}
-
-fn source_url_contains(source: &serde_json::Value, needle: &str) -> bool {
-    source
-        .get("url")
-        .and_then(serde_json::Value::as_str)
-        .is_some_and(|url| url.contains(needle))
-}
-
-pub(super) fn variant_observed_alt_alleles_from_yaml(value: &serde_yaml::Value) -> Vec<String> {
-    value
-        .as_mapping()
-        .and_then(|mapping| mapping.get(serde_yaml::Value::String("alleles".to_owned())))
-        .and_then(serde_yaml::Value::as_mapping)
-        .and_then(|mapping| mapping.get(serde_yaml::Value::String("observed_alts".to_owned())))
-        .and_then(serde_yaml::Value::as_sequence)
-        .map(|items| {
-            items
-                .iter()
-                .filter_map(serde_yaml::Value::as_str)
-                .map(ToOwned::to_owned)
-                .collect()
-        })
-        .unwrap_or_default()
-}
-
-pub(super) fn variant_alt_alleles_from_yaml(value: &serde_yaml::Value) -> Vec<String> {
-    value
-        .as_mapping()
-        .and_then(|mapping| mapping.get(serde_yaml::Value::String("alleles".to_owned())))
-        .and_then(serde_yaml::Value::as_mapping)
-        .and_then(|mapping| mapping.get(serde_yaml::Value::String("alts".to_owned())))
-        .and_then(serde_yaml::Value::as_sequence)
-        .map(|items| {
-            items
-                .iter()
-                .filter_map(serde_yaml::Value::as_str)
-                .map(ToOwned::to_owned)
-                .collect()
-        })
-        .unwrap_or_default()
-}
-
 #[cfg(test)]
 mod tests {
     use super::participant_id_from_name;
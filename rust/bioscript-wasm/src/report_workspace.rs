@@ -35,11 +35,6 @@ impl PackageWorkspace {
         let base = Path::new(base).parent().unwrap_or_else(|| Path::new(""));
         normalize_package_path(&base.join(relative).display().to_string())
     }
-
-    pub(super) fn load_variant(&self, path: &str) -> Result<VariantManifest, JsError> {
-        load_variant_manifest_text(path, self.text(path)?)
-            .map_err(|err| JsError::new(&format!("load variant {path}: {err}")))
-    }
 }
 
 impl bioscript_reporting::ManifestWorkspace for PackageWorkspace {
@@ -58,60 +53,3 @@ impl bioscript_reporting::ManifestWorkspace for PackageWorkspace {
             .map_err(|err| format!("{err:?}"))
     }
 }
-
-impl bioscript_reporting::ReportWorkspace for PackageWorkspace {
-    fn app_observation_from_manifest_row(
-        &self,
-        row: &BTreeMap<String, String>,
-        assay_id: &str,
-        inferred_sex: Option<&SexInference>,
-        fallback_assembly: Option<Assembly>,
-    ) -> Result<serde_json::Value, String> {
-        let row_path = row.get("path").cloned().unwrap_or_default();
-        let (manifest, gene, source, alt_alleles, observed_alt_alleles) = if row_path.contains('#')
-        {
-            let task = bioscript_reporting::load_variant_manifest_task_by_path(self, &row_path)?;
-            let alt_alleles = task
-                .manifest
-                .spec
-                .alternate
-                .clone()
-                .into_iter()
-                .collect::<Vec<_>>();
-            let observed_alt_alleles = task.manifest.spec.observed_alternates.clone();
-            (
-                task.manifest,
-                String::new(),
-                serde_json::Value::Null,
-                alt_alleles,
-                observed_alt_alleles,
-            )
-        } else {
-            let manifest = self
-                .load_variant(&row_path)
-                .map_err(|err| format!("{err:?}"))?;
-            let value = self.yaml(&row_path).map_err(|err| format!("{err:?}"))?;
-            (
-                manifest,
-                yaml_string(&value, "gene").unwrap_or_default(),
-                variant_primary_source_from_yaml(&value),
-                variant_alt_alleles_from_yaml(&value),
-                variant_observed_alt_alleles_from_yaml(&value),
-            )
-        };
-        Ok(bioscript_reporting::app_observation_from_manifest_row(
-            bioscript_reporting::AppObservationInput {
-                row,
-                row_path: &row_path,
-                assay_id,
-                manifest,
-                gene,
-                source,
-                alt_alleles,
-                observed_alt_alleles,
-                inferred_sex,
-                fallback_assembly,
-            },
-        ))
-    }
-}
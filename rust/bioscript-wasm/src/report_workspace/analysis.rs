@@ -15,7 +15,7 @@ impl bioscript_reporting::ReportAnalysisRunner for WasmReportAnalysisRunner<'_>
         task: &bioscript_reporting::AnalysisManifestTask,
         _observation_rows: &[BTreeMap<String, String>],
         variant_observations: &[VariantObservation],
-        _observations: &[serde_json::Value],
+        _observations: &[bioscript_reporting::AppObservation],
     ) -> Result<Vec<serde_json::Value>, String> {
         self.workspace
             .run_interpretations(
@@ -139,6 +139,7 @@ impl PackageWorkspace {
                     virtual_binary_files,
                     virtual_text_files: std::mem::take(&mut virtual_text_files),
                     preloaded_observations: runtime_observations,
+                    async_host_workers: 0,
                 },
             )
             .map_err(|err| JsError::new(&format!("create analysis runtime failed: {err:?}")))?;
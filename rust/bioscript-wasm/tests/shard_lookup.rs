@@ -0,0 +1,91 @@
+//! Sharded CRAM lookups driven the way a Web Worker pool drives them: split
+//! the panel, run `lookupCramVariants` on each shard through JS `readAt`
+//! callbacks, and merge the answers back into panel order.
+//!
+//! Run with `wasm-pack test --node rust/bioscript-wasm`.
+
+#![cfg(target_arch = "wasm32")]
+
+use bioscript_wasm::{lookup_cram_variants, merge_variant_observations, partition_variants};
+use js_sys::{Function, Uint8Array};
+use serde_json::{Value, json};
+use wasm_bindgen::{JsCast, JsValue};
+use wasm_bindgen_test::wasm_bindgen_test;
+
+const MINI_CRAM: &[u8] = include_bytes!("../../bioscript-formats/tests/fixtures/mini.cram");
+const MINI_CRAI: &[u8] = include_bytes!("../../bioscript-formats/tests/fixtures/mini.cram.crai");
+const MINI_FA: &[u8] = include_bytes!("../../bioscript-formats/tests/fixtures/mini.fa");
+const MINI_FAI: &[u8] = include_bytes!("../../bioscript-formats/tests/fixtures/mini.fa.fai");
+
+/// A host `readAt(offset, length)` over an in-memory `Uint8Array`, standing
+/// in for the worker's `FileReaderSync` or Node file handle.
+fn read_at(bytes: &[u8]) -> Function {
+    let make = Function::new_with_args(
+        "bytes",
+        "return (offset, length) => bytes.subarray(offset, offset + length);",
+    );
+    make.call1(&JsValue::NULL, &Uint8Array::from(bytes))
+        .expect("build readAt")
+        .unchecked_into()
+}
+
+fn lookup_shard(variants: &Value) -> Value {
+    let observations = lookup_cram_variants(
+        read_at(MINI_CRAM),
+        MINI_CRAM.len() as f64,
+        MINI_CRAI,
+        read_at(MINI_FA),
+        MINI_FA.len() as f64,
+        MINI_FAI,
+        &variants.to_string(),
+    )
+    .map_err(JsValue::from)
+    .expect("shard lookup");
+    serde_json::from_str(&observations).unwrap()
+}
+
+#[wasm_bindgen_test]
+fn sharded_cram_lookups_merge_back_into_panel_order() {
+    // mini.cram holds 2000 reference-matching 50 bp reads starting at
+    // chr_test:500..2499, so every locus below has depth 50.
+    let panel = json!([
+        {"name": "v2000", "chrom": "chr_test", "pos": 2000, "ref": "G", "alt": "A"},
+        {"name": "v600", "chrom": "chr_test", "pos": 600, "ref": "C", "alt": "T"},
+        {"name": "v2400", "chrom": "chr_test", "pos": 2400, "ref": "C", "alt": "G"},
+        {"name": "v700", "chrom": "chr_test", "pos": 700, "ref": "C", "alt": "A"},
+    ]);
+    let shards: Vec<Value> =
+        serde_json::from_str(&partition_variants(&panel.to_string(), 2).unwrap()).unwrap();
+    assert_eq!(shards.len(), 2);
+    assert_eq!(shards[0]["indices"], json!([1, 3]));
+    assert_eq!(shards[1]["indices"], json!([0, 2]));
+
+    // Each shard runs against its own readers, as it would in its own worker,
+    // and the answers arrive in the opposite order.
+    let answers = shards
+        .iter()
+        .rev()
+        .map(|shard| {
+            json!({
+                "indices": shard["indices"],
+                "observations": lookup_shard(&shard["variants"]),
+            })
+        })
+        .collect::<Vec<_>>();
+    let merged: Vec<Value> = serde_json::from_str(
+        &merge_variant_observations(&Value::Array(answers).to_string(), 4).unwrap(),
+    )
+    .unwrap();
+
+    let names = merged
+        .iter()
+        .map(|observation| observation["name"].as_str().unwrap())
+        .collect::<Vec<_>>();
+    assert_eq!(names, ["v2000", "v600", "v2400", "v700"]);
+    for observation in &merged {
+        assert_eq!(observation["backend"], "cram", "{observation}");
+        assert_eq!(observation["depth"], 50, "{observation}");
+        assert_eq!(observation["refCount"], 50, "{observation}");
+        assert_eq!(observation["altCount"], 0, "{observation}");
+    }
+}
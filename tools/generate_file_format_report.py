@@ -3,8 +3,10 @@ from __future__ import annotations
 
 import argparse
 import html
+import json
 import subprocess
 import sys
+import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -41,27 +43,37 @@ def iter_targets(test_data_root: Path) -> list[Path]:
     return targets
 
 
-def inspect_file(bioscript: Path, root: Path, path: Path) -> dict[str, str]:
-    proc = subprocess.run(
-        [str(bioscript), "inspect", str(path)],
-        cwd=root,
-        text=True,
-        capture_output=True,
-        check=False,
-    )
-    result = {
-        "path": str(path.relative_to(root)),
-        "status": "ok" if proc.returncode == 0 else "error",
-        "stderr": proc.stderr.strip(),
-    }
-    if proc.returncode != 0:
-        return result
-    for line in proc.stdout.splitlines():
-        if "\t" not in line:
-            continue
-        key, value = line.split("\t", 1)
-        result[key] = value
-    return result
+def inspect_files(bioscript: Path, root: Path, paths: list[Path]) -> list[dict[str, str]]:
+    if not paths:
+        return []
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as manifest:
+        manifest.write("".join(f"{path.resolve()}\n" for path in paths))
+    try:
+        proc = subprocess.run(
+            [str(bioscript), "inspect", "--jsonl", "--manifest", manifest.name],
+            cwd=root,
+            text=True,
+            capture_output=True,
+            check=False,
+        )
+    finally:
+        Path(manifest.name).unlink()
+
+    records = [json.loads(line) for line in proc.stdout.splitlines() if line.strip()]
+    if proc.returncode != 0 or len(records) != len(paths):
+        stderr = proc.stderr.strip() or "bioscript inspect did not report every file"
+        return [
+            {"path": str(path.relative_to(root)), "status": "error", "stderr": stderr}
+            for path in paths
+        ]
+
+    rows = []
+    for path, record in zip(paths, records):
+        row = {key: str(value) for key, value in record.items()}
+        row["path"] = str(path.relative_to(root))
+        row["stderr"] = row.pop("error", "")
+        rows.append(row)
+    return rows
 
 
 def cell(value: str) -> str:
@@ -142,7 +154,7 @@ def main() -> int:
         print(f"test-data directory not found: {test_data_root}", file=sys.stderr)
         return 1
 
-    rows = [inspect_file(args.bioscript, args.root, path) for path in iter_targets(test_data_root)]
+    rows = inspect_files(args.bioscript, args.root, iter_targets(test_data_root))
     args.output.parent.mkdir(parents=True, exist_ok=True)
     args.output.write_text(render_html(rows), encoding="utf-8")
     print(args.output)